@@ -4,6 +4,7 @@ A/B Testing System für Email Subject Lines
 Automatische Optimierung basierend auf Performance
 """
 import random
+import time
 from automated_email_sender import SBSEmailAutomation
 import pandas as pd
 from datetime import datetime
@@ -25,7 +26,9 @@ class ABTestingEmailAutomation(SBSEmailAutomation):
         """Sendet Kampagne mit A/B Testing"""
         templates = self.load_templates()
         
+        self.campaign_id = f"ab_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         results = {
+            'campaign': self.campaign_id,
             'timestamp': datetime.now().isoformat(),
             'sent': 0,
             'failed': 0,
@@ -91,6 +94,7 @@ class ABTestingEmailAutomation(SBSEmailAutomation):
                 print(f"   ⏳ Warte {delay_seconds}s...\n")
                 time.sleep(delay_seconds)
         
+        self.update_rollups(results)
         return results
     
     def export_ab_results(self, results, filename='ab_test_results.csv'):
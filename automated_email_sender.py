@@ -7,30 +7,92 @@ Website: https://sbsdeutschland.com/sbshomepage/ | https://www.sbsnexus.de
 """
 
 import os
+import sys
 import resend
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 import yaml
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import time
 from datetime import datetime
 import pandas as pd
 import openai
 
+from src.ai.prompt_context import (
+    PROMPT_CONTEXT_VERSION, build_system_block, context_fingerprint, openai_messages
+)
+from src.ai.usage_tracker import TokenUsageTracker, openai_usage
+from src.content_automation.campaign_planner import CampaignPlanner
+from src.content_automation.near_duplicates import NearDuplicateIndex, REGENERATE_HINT
+from src.analytics.rollups import CampaignRollups
+from src.analytics.metrics import GENERATIONS, SENDS, SEND_LATENCY
+from src.analytics.health import HealthEvaluator
+from src.analytics.tracing import TRACER, current_span, span, traced
+from src.delivery.mime import MessageAssembler, ascii_address, message_id_of
+from src.delivery.replies import ReplyTracker
+from src.delivery.mx_scheduler import MXScheduler
+from src.delivery.policy import CAMPAIGN_POLICY, PERMANENT, THROTTLED, TRANSIENT
+from src.delivery.resend_batch import ResendBatchTransport
+from src.delivery.suppression import SuppressionList, list_unsubscribe_headers
+from monitoring import notify
+
 load_dotenv()
 
+# Statische, gecachte System-Blöcke (identischer Prefix für jeden Kontakt)
+EMAIL_SYSTEM_BLOCK = build_system_block("""ROLLE:
+Du bist Experte für deutsche B2B Enterprise Sales Emails im Steuerberater-Markt. Du schreibst auf dem Niveau von Apple, SAP und NVIDIA Corporate Communications. Produkt: SBS Nexus KI-Rechnungsverarbeitung.
+
+STIL:
+- Professionell, konkret, Enterprise-Standard (Apple/SAP Niveau)
+- Deutsche Business-Etikette (Sehr geehrte/r)
+- Max. 250-300 Wörter
+- Personalisierungs-Hook nutzen!
+- Kein generisches Marketing
+- Konkrete Zahlen
+
+STRUKTUR:
+1. Persönliche Ansprache mit Bezug auf Kanzlei
+2. Konkretes Pain Point (Rechnungsverarbeitung, E-Rechnung)
+3. SBS Nexus als Lösung mit messbaren Vorteilen
+4. Partnerprogramm erwähnen (Revenue Share)
+5. Subtiler CTA (20-Min Demo)
+6. Professionelle Signatur
+
+Schreibe NUR die Email, keine Metakommentare.""")
+
+# Betreff-Prompt bewusst ohne großen Kontext-Block – klein, aber ebenfalls statisch → variabel
+SUBJECT_SYSTEM_BLOCK = """Erstelle einen professionellen Email-Betreff für den folgenden Empfänger:
+- Thema: SBS Nexus KI-Rechnungsverarbeitung für Steuerberater
+- Max 60 Zeichen, Deutsch, konkret mit Zahlen
+- Beispiele: "70% weniger Zeitaufwand bei der Rechnungsverarbeitung" oder "8 Sekunden statt 8 Minuten: KI für Ihre Kanzlei"
+Schreibe NUR den Betreff."""
+
 
 class SBSEmailAutomation:
     """Enterprise Email Automation für SBS Nexus Steuerberater-Outreach"""
 
-    def __init__(self, use_resend: bool = True):
+    def __init__(self, use_resend: bool = True, outbox=None):
         self.use_resend = use_resend
+        self.outbox = outbox            # optional: deferred/dead → Outbox (Retry bzw. Dead Letter)
+        self.policy = CAMPAIGN_POLICY
+        self.last_outcome = None
+        self.last_message = None        # zuletzt gerenderte MIME-Bytes (SMTP) → Outbox bei Retry
+        self.last_message_id = None
         self.sender_email = os.getenv('SENDER_EMAIL')
         self.sender_name = os.getenv('SENDER_NAME', 'Luis Orozco')
         self.sender_title = os.getenv('SENDER_TITLE', 'Gründer & CEO')
         self.company = os.getenv('COMPANY_NAME', 'SBS Deutschland GmbH')
+        self.campaign_id = None
+        self.usage_tracker = TokenUsageTracker()
+        self.duplicate_index = NearDuplicateIndex()
+        self.duplicate_flags = {}
+        self.rollups = CampaignRollups()
+        self.health = HealthEvaluator.from_config(sink=notify)
+        self.batch_transport = None
+        self.assembler = MessageAssembler(self.sender_name, self.sender_email)
+        self.replies = ReplyTracker()         # Message-IDs → Antworten stoppen Follow-ups
+        self.suppression = SuppressionList()  # Bounces/Complaints/Abmeldungen – vor Generierung und Versand
+        self.mx = MXScheduler.from_config()   # Rate-Caps pro Mail-Provider (Strato, IONOS, DATEV …)
 
         if use_resend:
             resend.api_key = os.getenv('RESEND_API_KEY')
@@ -43,6 +105,7 @@ class SBSEmailAutomation:
             self.smtp_use_ssl = os.getenv('SMTP_USE_SSL', 'True') == 'True'
             print("✓ Strato SMTP initialisiert")
 
+    @traced("load_templates")
     def load_templates(self) -> Dict:
         with open('config/message_templates.yaml', 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
@@ -59,19 +122,29 @@ class SBSEmailAutomation:
         else:
             return templates['templates']['steuerberater_template']
 
+    @traced("render")
     def personalize_message(self, template: Dict, contact: Dict) -> Tuple[str, str]:
         subject = template['subject_variants'][0]
-        msg_parts = template['message']
-        sections = []
+        body = self.template_body(template)
+        replacements = {**self.placeholder_values(contact), **self.sender_values()}
 
-        for key in ['opening', 'value_proposition', 'pain_point', 'differentiator',
-                    'social_proof', 'partnership', 'cta', 'signature']:
-            if key in msg_parts:
-                sections.append(msg_parts[key])
+        for key, value in replacements.items():
+            subject = subject.replace(f"{{{{{key}}}}}", str(value))
+            body = body.replace(f"{{{{{key}}}}}", str(value))
 
-        body = "\n\n".join(sections)
+        return subject, body
 
-        replacements = {
+    def template_body(self, template: Dict) -> str:
+        """Abschnitte eines Templates in fester Reihenfolge zusammensetzen"""
+        msg_parts = template['message']
+        sections = [msg_parts[key] for key in ['opening', 'value_proposition', 'pain_point', 'differentiator',
+                                               'social_proof', 'partnership', 'cta', 'signature']
+                    if key in msg_parts]
+        return "\n\n".join(sections)
+
+    def placeholder_values(self, contact: Dict) -> Dict[str, str]:
+        """Kontaktabhängige Platzhalter"""
+        return {
             'first_name': contact.get('first_name', ''),
             'last_name': contact.get('last_name', ''),
             'job_title': contact.get('job_title', ''),
@@ -81,23 +154,20 @@ class SBSEmailAutomation:
             'mandanten_count': str(contact.get('mandanten_count', '80-120')),
             'team_size': str(contact.get('company_size', '15')),
             'personalization_hook': contact.get('personalization_hook', f"als {contact.get('job_title', 'Steuerberater')} bei {contact.get('company_name', '')} setzen Sie digitale Maßstäbe."),
+        }
+
+    def sender_values(self) -> Dict[str, str]:
+        """Absender-Platzhalter – für alle Kontakte gleich"""
+        return {
             'sender_name': self.sender_name,
             'sender_title': self.sender_title,
             'sender_phone': os.getenv('SENDER_PHONE', ''),
             'calendly_link': os.getenv('CALENDLY_LINK', 'https://calendly.com/sbs-nexus/demo'),
         }
 
-        for key, value in replacements.items():
-            subject = subject.replace(f"{{{{{key}}}}}", str(value))
-            body = body.replace(f"{{{{{key}}}}}", str(value))
-
-        return subject, body
-
-    def generate_ai_email(self, contact: Dict) -> Tuple[str, str]:
-        """Generiert personalisierte SBS Nexus Email mit OpenAI GPT-4"""
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-
-        prompt = f"""Erstelle eine professionelle B2B Cold Email für SBS Nexus:
+    def build_email_prompt(self, contact: Dict) -> str:
+        """Variabler Teil des Body-Prompts – statischer Kontext liegt im gecachten System-Block"""
+        return f"""Erstelle eine professionelle B2B Cold Email für SBS Nexus:
 
 EMPFÄNGER:
 - Name: {contact.get('first_name', '')} {contact.get('last_name', '')}
@@ -111,75 +181,53 @@ PERSONALISIERUNG: {contact.get('personalization_hook', 'Digital-affine Kanzlei')
 SENDER:
 - Name: {self.sender_name}
 - Position: {self.sender_title}
-- Unternehmen: SBS Deutschland GmbH
-
-PRODUKT - SBS NEXUS:
-- KI-gestützte Rechnungsverarbeitung
-- 8 Sekunden Verarbeitungszeit pro Rechnung
-- 99,2% Erkennungsgenauigkeit
-- Automatischer DATEV-konformer Export
-- Unterstützt: XRechnung, ZUGFeRD, PDF
-- Multimodale KI (nicht regelbasierte OCR)
-- DSGVO-konform, Server in Frankfurt
-- E-Rechnungspflicht 2025 Compliance
-
-PARTNERPROGRAMM:
-- 15-25% Revenue Share (3 Tiers)
-- Dauerhaft pro vermitteltem Mandant
-- Keine Vorabkosten
-- 14-Tage-Onboarding
-- Details: www.sbsnexus.de/partner
-
-MARKT:
-- 89.000 Steuerberater in Deutschland
-- €21,3 Mrd. Marktvolumen
-- DATEV 90%+ Marktanteil
-- E-Rechnungspflicht seit Januar 2025
+- Unternehmen: SBS Deutschland GmbH"""
 
-STIL:
-- Professionell, konkret, Enterprise-Standard (Apple/SAP Niveau)
-- Deutsche Business-Etikette (Sehr geehrte/r)
-- Max. 250-300 Wörter
-- Personalisierungs-Hook nutzen!
-- Kein generisches Marketing
-- Konkrete Zahlen
+    def build_subject_prompt(self, contact: Dict) -> str:
+        """Variabler Teil des Betreff-Prompts"""
+        return f"""- Empfänger: {contact.get('first_name', '')} {contact.get('last_name', '')} bei {contact.get('company_name', '')}"""
 
-STRUKTUR:
-1. Persönliche Ansprache mit Bezug auf Kanzlei
-2. Konkretes Pain Point (Rechnungsverarbeitung, E-Rechnung)
-3. SBS Nexus als Lösung mit messbaren Vorteilen
-4. Partnerprogramm erwähnen (Revenue Share)
-5. Subtiler CTA (20-Min Demo)
-6. Professionelle Signatur
+    @traced("generate", {"provider": "openai", "model": "gpt-4"})
+    def generate_ai_email(self, contact: Dict, templates: Dict = None) -> Tuple[str, str]:
+        """Generiert personalisierte SBS Nexus Email mit OpenAI GPT-4 (Fallback: übergebene Templates)"""
+        openai.api_key = os.getenv('OPENAI_API_KEY')
 
-Schreibe NUR die Email, keine Metakommentare."""
+        prompt = self.build_email_prompt(contact)
+        subject_prompt = self.build_subject_prompt(contact)
 
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Du bist Experte für deutsche B2B Enterprise Sales Emails im Steuerberater-Markt. Du schreibst auf dem Niveau von Apple, SAP und NVIDIA Corporate Communications. Produkt: SBS Nexus KI-Rechnungsverarbeitung."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-
-            body = response.choices[0].message.content.strip()
-
-            subject_prompt = f"""Erstelle einen professionellen Email-Betreff für:
-- Empfänger: {contact.get('first_name', '')} {contact.get('last_name', '')} bei {contact.get('company_name', '')}
-- Thema: SBS Nexus KI-Rechnungsverarbeitung für Steuerberater
-- Max 60 Zeichen, Deutsch, konkret mit Zahlen
-- Beispiele: "70% weniger Zeitaufwand bei der Rechnungsverarbeitung" oder "8 Sekunden statt 8 Minuten: KI für Ihre Kanzlei"
-Schreibe NUR den Betreff."""
-
-            subject_response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": subject_prompt}],
-                temperature=0.6,
-                max_tokens=50
-            )
+            # Max. 2 Versuche: bei Near-Duplicate einmal neu generieren, danach markieren
+            for attempt in range(2):
+                started = time.perf_counter()
+                with span("llm", {"generator": "email_body", "attempt": attempt + 1}):
+                    response = openai.chat.completions.create(
+                        model="gpt-4",
+                        messages=openai_messages(EMAIL_SYSTEM_BLOCK, prompt),
+                        temperature=0.7,
+                        max_tokens=800
+                    )
+                self._record_usage("email_body", response, started, EMAIL_SYSTEM_BLOCK)
+
+                body = response.choices[0].message.content.strip()
+                duplicate = self._check_duplicate(body)
+                if not duplicate:
+                    break
+                print(f"   ⚠️  Near-Duplicate ({duplicate['similarity']:.0%}) zu {duplicate['source']}:{duplicate['key']}")
+                prompt += REGENERATE_HINT
+
+            if duplicate:
+                self.duplicate_flags[contact['email']] = duplicate
+            self._index_email(contact, body)
+
+            started = time.perf_counter()
+            with span("llm", {"generator": "email_subject"}):
+                subject_response = openai.chat.completions.create(
+                    model="gpt-4",
+                    messages=openai_messages(SUBJECT_SYSTEM_BLOCK, subject_prompt),
+                    temperature=0.6,
+                    max_tokens=50
+                )
+            self._record_usage("email_subject", subject_response, started, SUBJECT_SYSTEM_BLOCK)
 
             subject = subject_response.choices[0].message.content.strip().strip('"')
 
@@ -188,103 +236,314 @@ Schreibe NUR den Betreff."""
 
         except Exception as e:
             print(f"   ✗ AI-Fehler: {str(e)}")
-            templates = self.load_templates()
-            template = self.select_template(contact.get('role', 'Steuerberater'), templates)
+            current_span().set_error(f"AI-Fehler, Template-Fallback: {e}")
+            GENERATIONS.labels(provider="openai", model="gpt-4", generator="email", outcome="error").inc()
+            template = self.select_template(contact.get('role', 'Steuerberater'), templates or self.load_templates())
             return self.personalize_message(template, contact)
 
-    def send_via_resend(self, to_email: str, subject: str, body: str) -> bool:
+    def _check_duplicate(self, body: str) -> Optional[Dict]:
+        """Near-Duplicate-Check – Index-Fehler lösen keinen Template-Fallback aus"""
         try:
-            params: resend.Emails.SendParams = {
-                "from": f"{self.sender_name} <{self.sender_email}>",
-                "to": [to_email],
-                "subject": subject,
-                "html": body.replace('\n', '<br>'),
-                "reply_to": self.sender_email,
-            }
-            email = resend.Emails.send(params)
-            print(f"✓ Email via Resend gesendet an {to_email} (ID: {email['id']})")
-            return True
+            with span("duplicate_check"):
+                return self.duplicate_index.check(body, kind="email")
         except Exception as e:
-            print(f"✗ Resend Fehler bei {to_email}: {str(e)}")
-            return False
+            print(f"   ⚠️  Duplicate-Check Fehler: {str(e)}")
+            return None
 
-    def send_via_smtp(self, to_email: str, subject: str, body: str) -> bool:
+    def _index_email(self, contact: Dict, body: str):
+        """Generierte Email in den Near-Duplicate-Index aufnehmen (Fehler stoppen keinen Versand)"""
         try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg['Reply-To'] = self.sender_email
+            with span("db.duplicate_index"):
+                self.duplicate_index.add("ai_email", f"{self.campaign_id}:{contact['email']}", body, kind="email")
+        except Exception as e:
+            print(f"   ⚠️  Duplicate-Index Fehler: {str(e)}")
 
-            text_part = MIMEText(body, 'plain', 'utf-8')
-            html_part = MIMEText(body.replace('\n', '<br>'), 'html', 'utf-8')
-            msg.attach(text_part)
-            msg.attach(html_part)
+    def _record_usage(self, generator: str, response, started: float, system_block: str):
+        """Token-Verbrauch eines OpenAI-Calls protokollieren (Fehler hier stoppen keinen Versand)"""
+        try:
+            with span("db.usage"):
+                self.usage_tracker.record(
+                    generator, "openai", "gpt-4", openai_usage(response),
+                    (time.perf_counter() - started) * 1000, campaign=self.campaign_id,
+                    prompt_version=PROMPT_CONTEXT_VERSION,
+                    prompt_fingerprint=context_fingerprint(system_block)
+                )
+        except Exception as e:
+            print(f"   ⚠️  Usage-Log Fehler: {str(e)}")
+
+    def resend_params(self, to_email: str, subject: str, body: str, message_id: str = None) -> Dict:
+        return {
+            "from": f"{self.sender_name} <{self.sender_email}>",
+            "to": [to_email],
+            "subject": subject,
+            "html": body.replace('\n', '<br>'),
+            "reply_to": self.sender_email,
+            "headers": {"Message-ID": message_id or self.assembler.message_id(to_email),
+                        **list_unsubscribe_headers(to_email)},
+        }
 
+    @traced("send", {"provider": "resend"})
+    def send_via_resend(self, to_email: str, subject: str, body: str, **retry) -> bool:
+        self.last_message_id = self.assembler.message_id(to_email)
+        outcome = self.policy.execute(self._resend_once, to_email, subject, body, self.last_message_id, **retry)
+        return self._report("resend", to_email, outcome)
+
+    def _resend_once(self, to_email: str, subject: str, body: str, message_id: str = None) -> str:
+        params: resend.Emails.SendParams = self.resend_params(to_email, subject, body, message_id)
+        with SEND_LATENCY.labels(provider="resend").time():
+            return resend.Emails.send(params)['id']
+
+    @traced("send", {"provider": "smtp"})
+    def send_via_smtp(self, to_email: str, subject: str, body: str, message: bytes = None, **retry) -> bool:
+        # Einmal rendern – alle Retries (inline und aus der Outbox) senden dieselben Bytes
+        self.last_message_id = message_id_of(message) if message else self.assembler.message_id(to_email)
+        self.last_message = message
+        outcome = self.policy.execute(self._smtp_once, to_email, subject, body, **retry)
+        return self._report("smtp", to_email, outcome)
+
+    def _smtp_once(self, to_email: str, subject: str, body: str):
+        if self.last_message is None:  # Rendern innerhalb der Policy → nicht kodierbare Adresse = Dead Letter
+            self.last_message = self.assembler.render(to_email, subject, body, self.last_message_id,
+                                                      list_unsubscribe_headers(to_email))
+        message, to_email = self.last_message, ascii_address(to_email)
+        with SEND_LATENCY.labels(provider="smtp").time():
             if self.smtp_use_ssl:
                 with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
                     server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
+                    server.sendmail(self.sender_email, [to_email], message)
             else:
                 with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
                     server.starttls()
                     server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
-
-            print(f"✓ Email via SMTP gesendet an {to_email}")
+                    server.sendmail(self.sender_email, [to_email], message)
+
+    def _report(self, provider: str, to_email: str, outcome: Dict) -> bool:
+        """Ergebnis der Zustell-Policy loggen; deferred/dead landen über _record_result in der Outbox"""
+        self.last_outcome = outcome
+        label = "Resend" if provider == "resend" else "SMTP"
+        if outcome['status'] == 'sent':
+            SENDS.labels(provider=provider, outcome="sent").inc()
+            suffix = f" (ID: {outcome['result']})" if outcome['result'] else ""
+            print(f"✓ Email via {label} gesendet an {to_email}{suffix}")
             return True
-        except Exception as e:
-            print(f"✗ SMTP Fehler bei {to_email}: {str(e)}")
-            return False
-
-    def send_email(self, to_email: str, subject: str, body: str) -> bool:
+        current_span().set_error(outcome['error'])
+        if outcome['status'] == 'deferred':
+            SENDS.labels(provider=provider, outcome="deferred").inc()
+            retry_at = datetime.fromtimestamp(outcome['retry_at']).strftime('%H:%M:%S')
+            print(f"⏸️  {label} zurückgestellt ({outcome['kind']}) bei {to_email}: {outcome['error']} "
+                  f"– neuer Versuch ab {retry_at}")
+        else:
+            SENDS.labels(provider=provider, outcome="failed").inc()
+            print(f"✗ {label} Fehler bei {to_email} ({outcome['kind']}, {outcome['attempts']} Versuche): "
+                  f"{outcome['error']}")
+        return False
+
+    def send_email(self, to_email: str, subject: str, body: str, message: bytes = None, **retry) -> bool:
+        """Versand über die Zustell-Policy; retry: attempt/first_attempt_at, message: MIME-Bytes aus der Outbox"""
+        started = time.perf_counter()
+        self.last_outcome = None
+        self.last_message = None
         if self.use_resend:
-            return self.send_via_resend(to_email, subject, body)
+            success = self.send_via_resend(to_email, subject, body, **retry)
         else:
-            return self.send_via_smtp(to_email, subject, body)
+            success = self.send_via_smtp(to_email, subject, body, message, **retry)
+        if success:
+            self.replies.record_sent(self.last_message_id, to_email, self.campaign_id)
+
+        # Health-Fenster aktualisieren (O(1)) und SLOs prüfen – Alerts dedupliziert mit Cooldown
+        self.health.record_send(success, time.perf_counter() - started)
+        for alert in self.health.check():
+            print(f"   🚨 SLO verletzt: {alert['rule']} ({alert['window']}: {alert['metric']} = {alert['value']:.3g})")
+        return success
+
+    def retry_deferred(self, limit: int = 100) -> Dict:
+        """Fällige zurückgestellte Emails aus der Outbox erneut zustellen (Erfolge → Rollups)"""
+        stats = {'sent': 0, 'deferred': 0, 'dead': 0, 'suppressed': 0, 'sent_emails': [], 'dead_emails': []}
+        if self.outbox is None:
+            return stats
+        self.suppression.refresh()  # Abmeldungen/Bounces aus dem Webhook-Prozess seit dem letzten Lauf
+        batches: Dict[str, Dict] = {}
+        for item in self.outbox.due_retries(limit):
+            reason = self.suppression.reason(item['email'])
+            if reason:  # inzwischen gebounced/abgemeldet → nicht erneut versuchen
+                self.outbox.mark(item['campaign'], item['email'], 'suppressed', reason)
+                stats['suppressed'] += 1
+                continue
+            self.send_email(item['email'], item['subject'], item['body'], item['mime'],
+                            attempt=item['attempts'] or 0, first_attempt_at=item['first_attempt_at'])
+            outcome = self.last_outcome
+            self.outbox.record_attempt(item['campaign'], item['contact'], item['subject'], item['body'], outcome,
+                                       self.last_message)
+            stats[outcome['status']] += 1
+            if outcome['status'] == 'dead':
+                stats['dead_emails'].append(item['email'])
+            if outcome['status'] != 'sent':
+                continue  # bleibt in den Rollups als 'failed' gezählt
+            stats['sent_emails'].append(item['email'])
+            now = datetime.now().isoformat()
+            batch = batches.setdefault(item['campaign'], {
+                'campaign': item['campaign'], 'timestamp': now,
+                'sent': 0, 'failed': 0, 'total': 0, 'details': []})
+            batch['details'].append({
+                'email': item['email'], 'company': item['contact'].get('company_name', ''),
+                'status': 'sent', 'timestamp': now,
+                # ursprünglich als 'failed' gezählter Versuch wird in den Rollups umgebucht – im Bucket,
+                # den der Fehlschlag dort bekommen hat (recipient_index.failed_at); das hier ist nur der Fallback
+                'retried_from': datetime.fromtimestamp(item['first_attempt_at']).isoformat()
+                                if item['first_attempt_at'] else now,
+            })
+            batch['sent'] += 1
+            batch['total'] += 1
+        for batch in batches.values():
+            self.update_rollups(batch)
+        return stats
+
+    @traced("send", {"provider": "resend_batch"})
+    def send_batch(self, messages: List[Tuple[str, str, str]]) -> Dict[str, Dict]:
+        """(to, subject, body)-Tupel über die Resend Batch-API (bis zu 100 pro Request) → {email: Policy-Outcome}"""
+        if self.batch_transport is None:
+            self.batch_transport = ResendBatchTransport(resend.api_key)
+        started = time.perf_counter()
+        params = [self.resend_params(*message) for message in messages]
+        results = self.batch_transport.send(params)
+        latency = (time.perf_counter() - started) / max(len(results), 1)
+        outcomes = {}
+        for result, message in zip(results, params):
+            self.health.record_send(bool(result['id']), latency)
+            if result['id']:
+                self.replies.record_sent(message['headers']['Message-ID'], result['email'], self.campaign_id)
+                print(f"✓ Email via Resend Batch gesendet an {result['email']} (ID: {result['id']})")
+                outcomes[result['email']] = {'status': 'sent', 'result': result['id'], 'attempts': result['attempts']}
+            elif result['retryable']:
+                # Transport hat selbst schon wiederholt → Rest über die Outbox später
+                retry_at = time.time() + self.policy.backoff(result['attempts'])
+                print(f"⏸️  Resend Batch zurückgestellt bei {result['email']}: {result['error']}")
+                outcomes[result['email']] = {'status': 'deferred', 'error': result['error'], 'kind': TRANSIENT,
+                                             'attempts': result['attempts'], 'retry_at': retry_at}
+            else:
+                print(f"✗ Resend Batch Fehler bei {result['email']}: {result['error']}")
+                outcomes[result['email']] = {'status': 'dead', 'error': result['error'], 'kind': PERMANENT,
+                                             'attempts': result['attempts']}
+        for alert in self.health.check():
+            print(f"   🚨 SLO verletzt: {alert['rule']} ({alert['window']}: {alert['metric']} = {alert['value']:.3g})")
+        return outcomes
+
+    def send_campaign(self, contacts: List[Dict], delay_seconds: int = 120,
+                      campaign_id: str = None, drafts: Dict[str, Tuple[str, str]] = None,
+                      batch: bool = False) -> Dict:
+        """Versendet Kampagne; vorab erstellte Entwürfe (z.B. aus dem Batch-Job) werden direkt genutzt
+
+        batch=True (nur Resend): erst alle Emails rendern, dann gesammelt über /emails/batch senden
+        (ohne Wartezeit zwischen den Emails).
+        """
+        self.campaign_id = campaign_id or f"campaign_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Ein Trace pro Kampagne (TRACE_EXPORTER=jsonl) → python -m src.analytics.tracing breakdown --campaign <id>
+        with span("campaign", {"campaign.id": self.campaign_id, "contacts": len(contacts),
+                               "provider": "resend" if self.use_resend else "smtp"}):
+            results = self._send_campaign(contacts, delay_seconds, drafts or {}, batch and self.use_resend)
+        TRACER.flush()
+        return results
 
-    def send_campaign(self, contacts: List[Dict], delay_seconds: int = 120) -> Dict:
+    def _send_campaign(self, contacts: List[Dict], delay_seconds: int,
+                       drafts: Dict[str, Tuple[str, str]], batch: bool) -> Dict:
         templates = self.load_templates()
+        contacts, suppressed = self.suppress(contacts)
         results = {
+            'campaign': self.campaign_id,
             'timestamp': datetime.now().isoformat(),
-            'sent': 0, 'failed': 0, 'total': len(contacts),
+            'sent': 0, 'failed': 0, 'deferred': 0, 'total': len(contacts), 'suppressed': len(suppressed),
             'details': []
         }
 
         print(f"\n🚀 SBS Nexus Email-Kampagne für {len(contacts)} Steuerberater...")
         print(f"📧 Sender: {self.sender_name} <{self.sender_email}>")
-        print(f"⚙️  Methode: {'Resend API' if self.use_resend else 'SMTP'}\n")
+        print(f"⚙️  Methode: {'Resend Batch API' if batch else 'Resend API' if self.use_resend else 'SMTP'}\n")
 
-        for idx, contact in enumerate(contacts, 1):
-            print(f"\n[{idx}/{len(contacts)}] {contact.get('company_name', '')} – {contact['email']}")
+        plan = CampaignPlanner.from_config(self, templates).plan(contacts, drafts)
+        print(f"🧭 Generierung: {plan.describe()}")
 
-            USE_AI = os.getenv('USE_AI_GENERATION', 'True') == 'True'
+        queued = []
+        if not batch:
+            contacts = self.mx.plan(contacts)   # reihum über die Mail-Provider statt Hoster-Blöcke
 
-            if USE_AI and os.getenv('OPENAI_API_KEY'):
-                subject, body = self.generate_ai_email(contact)
-            else:
-                template = self.select_template(contact.get('role', 'Steuerberater'), templates)
-                subject, body = self.personalize_message(template, contact)
-
-            success = self.send_email(contact['email'], subject, body)
-
-            results['details'].append({
-                'email': contact['email'],
-                'company': contact.get('company_name', ''),
-                'status': 'sent' if success else 'failed',
-                'timestamp': datetime.now().isoformat()
-            })
-
-            if success:
-                results['sent'] += 1
-            else:
-                results['failed'] += 1
+        for idx, contact in enumerate(contacts, 1):
+            with span("contact", {"contact.email": contact['email'], "contact.company": contact.get('company_name', '')}):
+                print(f"\n[{idx}/{len(contacts)}] {contact.get('company_name', '')} – {contact['email']}")
+
+                subject, body, template_id = plan.compose(contact)
+
+                if batch:
+                    queued.append((contact, subject, body, template_id))
+                    continue
+
+                current_span().set_attribute("mx.provider", self.mx.acquire(contact['email']))
+                self.send_email(contact['email'], subject, body)
+                if self.last_outcome.get('kind') == THROTTLED:
+                    self.mx.throttle(contact['email'])
+                self._record_result(results, contact, subject, body, self.last_outcome, template_id)
+
+                if idx < len(contacts):
+                    print(f"   ⏳ Warte {delay_seconds}s...")
+                    with span("sleep", {"seconds": delay_seconds}):
+                        time.sleep(delay_seconds)
+
+        if queued:
+            outcomes = self.send_batch([(contact['email'], subject, body) for contact, subject, body, _ in queued])
+            for contact, subject, body, template_id in queued:
+                outcome = outcomes.get(contact['email'], {'status': 'dead', 'error': 'Kein Ergebnis', 'kind': PERMANENT})
+                self._record_result(results, contact, subject, body, outcome, template_id)
+
+        usage = self.usage_tracker.summarize(self.campaign_id)
+        if usage['calls']:
+            print(f"\n🧮 Tokens: {usage['input_tokens']} Input ({usage['cache_hit_rate']:.0f}% gecacht), "
+                  f"{usage['output_tokens']} Output, Ø {usage['avg_latency_ms']:.0f} ms/Call")
+        results['token_usage'] = usage
+
+        self.update_rollups(results)
+        return results
 
-            if idx < len(contacts):
-                print(f"   ⏳ Warte {delay_seconds}s...")
-                time.sleep(delay_seconds)
+    def suppress(self, contacts: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Gesperrte Empfänger aussortieren, bevor KI-Generierung oder Versand Kosten verursachen"""
+        contacts, suppressed = self.suppression.filter(contacts)
+        for contact in suppressed:
+            print(f"⛔ Übersprungen ({contact['suppression_reason']}): {contact['email']}")
+            if self.outbox is not None and self.campaign_id:
+                self.outbox.mark(self.campaign_id, contact['email'], 'suppressed', contact['suppression_reason'])
+        return contacts, suppressed
+
+    def _record_result(self, results: Dict, contact: Dict, subject: str, body: str, outcome: Dict,
+                       template_id: str):
+        success = outcome['status'] == 'sent'
+        detail = {
+            'email': contact['email'],
+            'company': contact.get('company_name', ''),
+            'status': 'sent' if success else 'failed',
+            'timestamp': datetime.now().isoformat(),
+            'template': template_id
+        }
+        if contact['email'] in self.duplicate_flags:
+            detail['duplicate_score'] = round(self.duplicate_flags[contact['email']]['similarity'], 2)
+        if not success:
+            detail['delivery'] = outcome['status']          # deferred (Retry folgt) | dead
+            detail['error_kind'] = outcome.get('kind')
+            if self.outbox is not None:
+                self.outbox.record_attempt(self.campaign_id, contact, subject, body, outcome, self.last_message)
+        results['details'].append(detail)
+
+        if success:
+            results['sent'] += 1
+        else:
+            results['failed'] += 1
+            if outcome['status'] == 'deferred':
+                results['deferred'] += 1
 
-        return results
+    def update_rollups(self, results: Dict):
+        """Dashboard-Rollups nach jedem Versand-Batch aktualisieren"""
+        try:
+            with span("db.rollups"):
+                self.rollups.apply_send_batch(results)
+        except Exception as e:
+            print(f"   ⚠️  Rollup Fehler: {str(e)}")
 
     def export_results(self, results: Dict, filename: str = 'campaign_results.csv'):
         df = pd.DataFrame(results['details'])
@@ -345,7 +604,18 @@ TARGET_CONTACTS = [
 ]
 
 
+def profile_campaign():
+    """Kampagne mit gestubbten Providern, ohne Wartezeit (für --profile)"""
+    SBSEmailAutomation(use_resend=True).send_campaign(contacts=TARGET_CONTACTS, delay_seconds=0,
+                                                      campaign_id="profile")
+
+
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        from src.utils.profiling import profile_run
+        profile_run("email_sender", profile_campaign)
+        sys.exit(0)
+
     print("=" * 60)
     print("SBS NEXUS GTM EMAIL AUTOMATION")
     print(f"Sender: Luis Orozco – Gründer & CEO")
@@ -5,11 +5,22 @@ Läuft im Hintergrund und führt alle Tasks aus
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Dict
 import pandas as pd
 from automated_email_sender import SBSEmailAutomation
+from batch_email_drafts import BatchDraftJobs, BACKENDS
+from src.delivery.outbox import Outbox
+from src.delivery.sharding import ShardedCampaign
+from src.analytics.send_time import SendTimeEngine
+from src.delivery.replies import ReplyPoller
+from src.lead_generation.pipeline import LeadPipeline, crawler_from_config, sources_from_config
+from backend.lead_service import LeadService
+from src.analytics.metrics import start_metrics_server
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,38 +41,184 @@ class AutomationPipeline:
     """Vollautomatische Email-Pipeline"""
     
     def __init__(self):
-        self.automation = SBSEmailAutomation()
+        self.outbox = Outbox()
+        self.automation = SBSEmailAutomation(outbox=self.outbox)  # deferred/dead → Outbox
         self.scheduler = BackgroundScheduler()
+        self.lead_service = LeadService()
+        self.send_shards = int(os.getenv('SEND_SHARDS', 1))  # Versandprozesse (1 = sequentiell)
+        self.reply_poller = ReplyPoller() if os.getenv('IMAP_HOST') else None  # Antworten stoppen Follow-ups
+        self.send_time = SendTimeEngine.from_config()
+        self.optimize_send_time = (self.send_time.config['enabled']
+                                   and os.getenv('SEND_TIME_OPTIMIZATION', 'True') == 'True')
+        self.batch_provider = os.getenv('BATCH_DRAFT_PROVIDER', '')  # openai | anthropic | leer = aus
+    
+    @staticmethod
+    def campaign_id_for(day: datetime) -> str:
+        """Eine Kampagne pro Versandtag"""
+        return f"campaign_{day.strftime('%Y%m%d')}"
+    
+    def prepare_batch_drafts(self):
+        """Task 2a: Entwürfe für die morgige Kampagne per Batch API vorbereiten"""
+        if not self.batch_provider:
+            return
+        
+        campaign_id = self.campaign_id_for(datetime.now() + timedelta(days=1))
+        logger.info(f"🌙 Preparing batch drafts for {campaign_id}...")
+        
+        try:
+            contacts = self.load_pending_contacts()
+            if not contacts:
+                logger.info("No pending contacts")
+                return
+            
+            self.outbox.enqueue(campaign_id, contacts)
+            jobs = BatchDraftJobs(self.automation, self.outbox, BACKENDS[self.batch_provider]())
+            batch_id = jobs.submit(campaign_id)
+            logger.info(f"✓ Batch job submitted: {batch_id}")
+            
+        except Exception as e:
+            logger.error(f"Error preparing batch drafts: {str(e)}")
+    
+    def collect_batch_drafts(self):
+        """Task 2b: Fertige Batch-Jobs in die Outbox übernehmen (ein Poll, kein Warten)"""
+        if not self.batch_provider:
+            return
+        
+        try:
+            jobs = BatchDraftJobs(self.automation, self.outbox, BACKENDS[self.batch_provider]())
+            loaded = jobs.poll()
+            if loaded:
+                logger.info(f"✓ {loaded} batch results loaded into outbox")
+        except Exception as e:
+            logger.error(f"Error collecting batch drafts: {str(e)}")
     
     def find_leads(self):
         """Task 1: Lead-Generierung"""
         logger.info("🔍 Starting lead generation...")
         
-        # TODO: Integration mit Apollo.io, Hunter.io, LinkedIn
-        # Für jetzt: Placeholder
-        
-        logger.info("✓ Lead generation completed")
+        try:
+            sources = sources_from_config()
+            if not sources:
+                logger.info("No lead sources configured")
+                return
+            
+            stats = LeadPipeline(sources, lead_service=self.lead_service, crawler=crawler_from_config()).run()
+            logger.info(f"✓ Lead generation completed: {stats['added']} new, {stats['merged']} merged, "
+                        f"{stats['duplicates']} duplicates, {stats['excluded']} excluded, "
+                        f"{stats['enriched']} with website signals ({stats['seconds']}s)")
+            
+        except Exception as e:
+            logger.error(f"Error in lead generation: {str(e)}")
     
     def generate_and_send_emails(self):
         """Task 2: Email-Generierung & Versand"""
         logger.info("📧 Starting email campaign...")
         
         try:
-            # Lade Kontakte
-            contacts = self.load_pending_contacts()
+            campaign_id = self.campaign_id_for(datetime.now())
+            self.collect_batch_drafts()
+            
+            # Lade Kontakte – vorbereitete Batch-Entwürfe zuerst
+            drafts = self.outbox.drafts(campaign_id)
+            contacts = self.outbox.drafted_contacts(campaign_id)
+            contacts += [c for c in self.load_pending_contacts() if c['email'] not in drafts]
+            undeliverable = self.outbox.undeliverable_emails(c['email'] for c in contacts)  # Dead Letter / Retry offen
+            contacts = [c for c in contacts if c['email'] not in undeliverable]
+            if self.optimize_send_time:
+                queued = self.outbox.scheduled_emails(c['email'] for c in contacts)
+                contacts = [c for c in contacts if c['email'] not in queued or c['email'] in drafts]
             
             if not contacts:
                 logger.info("No pending contacts")
                 return
             
-            # Sende Emails
-            results = self.automation.send_campaign(contacts, delay_seconds=120)
+            # Send-Time-Optimierung: nur einplanen, release_scheduled gibt zum besten Slot frei
+            if self.optimize_send_time:
+                contacts, _ = self.automation.suppression.filter(contacts)  # keine Slots für Gesperrte
+                self.outbox.enqueue(campaign_id, contacts)
+                self.send_time.sync_event_log()
+                plan = self.send_time.plan(contacts, booked=self.outbox.booked_hours())  # Slots früherer Kampagnen
+                self.outbox.schedule(campaign_id, {email: moment.timestamp() for email, moment in plan.items()})
+                logger.info(f"⏰ {len(plan)} emails scheduled between {min(plan.values()):%a %H:%M} "
+                            f"and {max(plan.values()):%a %H:%M}")
+                return
+            
+            # Sende Emails – bei SEND_SHARDS > 1 parallel über die Outbox (Shard = Empfänger-Domain)
+            if self.send_shards > 1:
+                self.outbox.enqueue(campaign_id, contacts)
+                results = ShardedCampaign(campaign_id, self.send_shards, self.outbox,
+                                          use_resend=self.automation.use_resend,
+                                          max_per_hour=self.send_time.config['max_per_hour']).run()
+            else:
+                results = self.automation.send_campaign(
+                    contacts, delay_seconds=120, campaign_id=campaign_id, drafts=drafts
+                )
             
-            logger.info(f"✓ Campaign completed: {results['sent']}/{results['total']} sent")
+            self._complete(campaign_id, results)
+            logger.info(f"✓ Campaign completed: {results['sent']}/{results['total']} sent, "
+                        f"{results['deferred']} deferred")
             
         except Exception as e:
             logger.error(f"Error in email campaign: {str(e)}")
     
+    def release_scheduled(self):
+        """Task 2d: Eingeplante Emails (Send-Time-Slot bzw. Import-Freigabe) versenden"""
+        try:
+            # Sequentiell: 120s Abstand → pro Lauf nur so viele, wie bis zum nächsten Lauf passen
+            delay = 3600 // self.send_time.config['max_per_hour']
+            budget = max(1, 15 * 60 // delay)
+            for campaign_id in self.outbox.due_campaigns():
+                if self.send_shards > 1:
+                    # gleicher Stunden-Cap und gleiches Budget pro Lauf wie sequentiell, nur auf Shards verteilt
+                    results = ShardedCampaign(campaign_id, self.send_shards, self.outbox,
+                                              use_resend=self.automation.use_resend,
+                                              max_per_hour=self.send_time.config['max_per_hour'],
+                                              budget=budget).run()
+                else:
+                    claimed = self.outbox.claim(campaign_id, 0, 1, 'scheduler', limit=budget)
+                    if not claimed:
+                        continue
+                    results = self.automation.send_campaign(
+                        [item['contact'] for item in claimed], delay_seconds=delay, campaign_id=campaign_id,
+                        drafts={item['email']: item['draft'] for item in claimed if item['draft']}
+                    )
+                self._complete(campaign_id, results)
+                logger.info(f"⏰ Released {campaign_id}: {results['sent']}/{results['total']} sent, "
+                            f"{results['deferred']} deferred")
+        except Exception as e:
+            logger.error(f"Error releasing scheduled emails: {str(e)}")
+    
+    def _complete(self, campaign_id: str, results: Dict):
+        """Gesendete in Outbox und Lead-DB markieren (Fehlschläge hat die Zustell-Policy bereits vermerkt)"""
+        sent = [d['email'] for d in results['details'] if d['status'] == 'sent']
+        for email in sent:
+            self.outbox.mark(campaign_id, email, 'sent')
+        self.lead_service.mark_contacted(sent)
+        self.lead_service.mark_undeliverable([d['email'] for d in results['details'] if d.get('delivery') == 'dead'])
+    
+    def retry_deferred(self):
+        """Task 2c: Zurückgestellte Emails (429, Timeouts, SMTP 4xx) erneut zustellen"""
+        try:
+            stats = self.automation.retry_deferred()
+            if any(stats.values()):
+                logger.info(f"🔁 Retries: {stats['sent']} sent, {stats['deferred']} deferred, "
+                            f"{stats['dead']} dead-lettered, {stats['suppressed']} suppressed")
+            if stats['sent_emails']:
+                self.lead_service.mark_contacted(stats['sent_emails'])
+            self.lead_service.mark_undeliverable(stats['dead_emails'])
+        except Exception as e:
+            logger.error(f"Error in retry pass: {str(e)}")
+    
+    def poll_replies(self):
+        """Task 2e: Reply-To-Postfach inkrementell prüfen (nur neue UIDs)"""
+        try:
+            stats = self.reply_poller.poll()
+            if stats['replies']:
+                logger.info(f"💬 {stats['replies']} replies detected – follow-ups stopped")
+        except Exception as e:
+            logger.error(f"Error polling replies: {str(e)}")
+            self.reply_poller.close()
+    
     def check_follow_ups(self):
         """Task 3: Follow-up Check"""
         logger.info("🔄 Checking follow-ups...")
@@ -85,10 +242,22 @@ class AutomationPipeline:
         
         logger.info("✓ Report generated")
     
-    def load_pending_contacts(self):
-        """Lädt Kontakte die noch angeschrieben werden müssen"""
-        # TODO: Aus Datenbank laden
-        return []
+    def load_pending_contacts(self, limit: int = 50):
+        """Lädt Kontakte die noch angeschrieben werden müssen (heiße/warme Leads ohne Erstkontakt)"""
+        contacts = []
+        for lead in self.lead_service.get_pending_contacts(limit):
+            first_name, _, last_name = lead['kontakt'].partition(' ') if '@' not in lead['kontakt'] else ('', '', '')
+            contacts.append({
+                'email': lead['email'],
+                'first_name': first_name,
+                'last_name': last_name,
+                'job_title': lead['position'] or 'Steuerberater',
+                'role': lead['position'] or 'Steuerberater',
+                'company_name': lead['unternehmen'],
+                'lead_id': lead['id'],
+                'lead_score': lead['score'],
+            })
+        return contacts
     
     def start(self):
         """Startet die Automation-Pipeline"""
@@ -108,6 +277,44 @@ class AutomationPipeline:
             id='email_campaign'
         )
         
+        # Task 2a/2b: Batch-Entwürfe (Vorabend 20:00, stündlich einsammeln)
+        if self.batch_provider:
+            self.scheduler.add_job(
+                self.prepare_batch_drafts,
+                CronTrigger(day_of_week='sun,wed', hour=20, minute=0),
+                id='batch_drafts_submit'
+            )
+            self.scheduler.add_job(
+                self.collect_batch_drafts,
+                CronTrigger(minute=15),
+                id='batch_drafts_collect'
+            )
+        
+        # Task 2c: Retry-Pass für zurückgestellte Emails (alle 10 Minuten)
+        self.scheduler.add_job(
+            self.retry_deferred,
+            IntervalTrigger(minutes=10),
+            id='delivery_retries',
+            max_instances=1
+        )
+        
+        # Task 2d: Send-Time-Slots und importierte Kampagnen (CSV/XLSX-Upload) freigeben (alle 15 Minuten)
+        self.scheduler.add_job(
+            self.release_scheduled,
+            IntervalTrigger(minutes=15),
+            id='send_time_release',
+            max_instances=1
+        )
+        
+        # Task 2e: Antwort-Erkennung (alle 5 Minuten, IMAP_HOST gesetzt)
+        if self.reply_poller:
+            self.scheduler.add_job(
+                self.poll_replies,
+                IntervalTrigger(minutes=5),
+                id='reply_poll',
+                max_instances=1
+            )
+        
         # Task 3: Follow-up Check (Täglich 9:00)
         self.scheduler.add_job(
             self.check_follow_ups,
@@ -123,7 +330,11 @@ class AutomationPipeline:
         )
         
         self.scheduler.start()
+        metrics_port = int(os.getenv('METRICS_PORT', 9108))
+        metrics_addr = os.getenv('METRICS_ADDR', '127.0.0.1')
+        self.metrics_server = start_metrics_server(metrics_port, metrics_addr)
         logger.info("✓ Automation Pipeline started")
+        logger.info(f"📈 Metrics: http://{metrics_addr}:{metrics_port}/metrics")
         logger.info("Scheduled jobs:")
         for job in self.scheduler.get_jobs():
             logger.info(f"  - {job.id}: {job.next_run_time}")
@@ -131,9 +342,21 @@ class AutomationPipeline:
     def stop(self):
         """Stoppt die Pipeline"""
         self.scheduler.shutdown()
+        if getattr(self, 'metrics_server', None):
+            self.metrics_server.shutdown()
         logger.info("Pipeline stopped")
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        # Ein Versand-Lauf statt Scheduler, Provider gestubbt
+        from src.utils.profiling import profile_run
+        def pipeline_send():
+            pipeline = AutomationPipeline()
+            pipeline.optimize_send_time = False  # direkt senden statt einplanen
+            pipeline.generate_and_send_emails()
+        profile_run("pipeline_send", pipeline_send)
+        sys.exit(0)
+
     pipeline = AutomationPipeline()
     pipeline.start()
     
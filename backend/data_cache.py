@@ -0,0 +1,250 @@
+"""
+Gecachter Datenzugriff für alle Streamlit-Seiten
+
+Jeder Loader ist ein st.cache_data-Wrapper, dessen Cache-Key eine billige
+Store-Version enthält:
+- SQLite: PRAGMA data_version (über eine dauerhaft offene Verbindung) + mtime/size
+- Dateien (CSV/YAML): mtime/size
+
+Reruns werden aus dem Speicher bedient; neu gelesen wird nur, wenn sich die
+Daten tatsächlich geändert haben oder die TTL der Abfrage abgelaufen ist
+(z.B. für zeitabhängige Zähler wie "heute").
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+import yaml
+
+EMAIL_DB = "data/emails.db"
+LEADS_DB = "data/leads.db"
+LINKEDIN_DB = "data/linkedin.db"
+ANALYTICS_DB = "data/analytics.db"
+CAMPAIGN_RESULTS = "campaign_results.csv"
+
+# TTLs pro Abfrage (Sekunden)
+TTL_STATS = 60          # enthält DATE('now') → muss auch ohne Schreibzugriff altern
+TTL_LISTS = 15 * 60
+TTL_ROLLUPS = 15 * 60
+TTL_FILES = 60 * 60
+
+# Alte Versionen fallen über max_entries raus, nicht erst nach Ablauf der TTL
+MAX_ENTRIES = 32
+
+_version_conns: Dict[str, sqlite3.Connection] = {}
+_version_lock = threading.Lock()
+
+
+# ---------- Store-Versionen ----------
+
+def file_version(path: str) -> Tuple[int, int]:
+    """(mtime_ns, size) – (0, 0) wenn die Datei fehlt"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def db_version(path: str) -> Tuple[int, ...]:
+    """PRAGMA data_version + mtime/size (inkl. WAL) einer SQLite-DB"""
+    if not os.path.exists(path):
+        return (0, 0, 0)
+    with _version_lock:
+        conn = _version_conns.get(path)
+        if conn is None:
+            # data_version ändert sich nur für *andere* Verbindungen → eigene, dauerhaft offene Verbindung
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            _version_conns[path] = conn
+        try:
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        except sqlite3.Error:
+            _version_conns.pop(path, None).close()
+            data_version = 0
+    return (data_version, *file_version(path), *file_version(path + "-wal"))
+
+
+# ---------- Services (eine Instanz pro Prozess) ----------
+
+@st.cache_resource
+def email_service():
+    from backend.email_service import EmailService
+    return EmailService()
+
+
+@st.cache_resource
+def lead_service():
+    from backend.lead_service import LeadService
+    return LeadService()
+
+
+@st.cache_resource
+def linkedin_service():
+    from backend.linkedin_service import LinkedInService
+    return LinkedInService()
+
+
+@st.cache_resource
+def hunter_client(api_key: str):
+    """Ein Client pro API-Key → Session-Pool und Rate-Limit gelten prozessweit"""
+    from src.lead_generation.hunter_client import HunterClient
+    return HunterClient(api_key=api_key)
+
+
+@st.cache_resource
+def campaign_rollups():
+    from src.analytics.rollups import CampaignRollups
+    rollups = CampaignRollups(ANALYTICS_DB)
+    if rollups.is_empty():
+        rollups.backfill_results_csv(CAMPAIGN_RESULTS)
+    return rollups
+
+
+# ---------- Email ----------
+
+@st.cache_data(ttl=TTL_STATS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _email_stats(version) -> Dict:
+    return email_service().get_stats()
+
+
+def email_stats() -> Dict:
+    """Email-KPIs (heute/woche/gesamt)"""
+    return _email_stats(db_version(EMAIL_DB))
+
+
+@st.cache_data(ttl=TTL_LISTS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _email_history_page(limit: int, filters: tuple, after: Optional[str], version) -> Dict:
+    return email_service().get_history_page(limit=limit, after=after, **dict(filters))
+
+
+def email_history_page(limit: int = 50, after: Optional[str] = None, **filters) -> Dict:
+    """Seite der Email-Historie (Filter: status, template, date_from, date_to)"""
+    return _email_history_page(limit, tuple(sorted(filters.items())), after, db_version(EMAIL_DB))
+
+
+def email_history(limit: int = 50, **filters) -> List[Dict]:
+    """Email-Historie"""
+    return email_history_page(limit, **filters)["items"]
+
+
+# ---------- Leads ----------
+
+@st.cache_data(ttl=TTL_STATS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _lead_stats(version) -> Dict:
+    return lead_service().get_stats()
+
+
+def lead_stats() -> Dict:
+    """Lead-KPIs"""
+    return _lead_stats(db_version(LEADS_DB))
+
+
+@st.cache_data(ttl=TTL_LISTS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _leads_page(status_filter: Optional[tuple], limit: int, filters: tuple,
+                after: Optional[str], version) -> Dict:
+    return lead_service().get_leads_page(status_filter=list(status_filter) if status_filter else None,
+                                         limit=limit, after=after, **dict(filters))
+
+
+def leads_page(status_filter: List[str] = None, limit: int = 100,
+               after: Optional[str] = None, **filters) -> Dict:
+    """Seite der Leads (Filter: branche, date_from, date_to)"""
+    return _leads_page(tuple(status_filter) if status_filter else None, limit,
+                       tuple(sorted(filters.items())), after, db_version(LEADS_DB))
+
+
+def leads(status_filter: List[str] = None, limit: int = 100, **filters) -> List[Dict]:
+    """Leads (optional gefiltert)"""
+    return leads_page(status_filter, limit, **filters)["items"]
+
+
+# ---------- LinkedIn ----------
+
+@st.cache_data(ttl=TTL_LISTS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _linkedin_posts_page(limit: int, filters: tuple, after: Optional[str], version) -> Dict:
+    return linkedin_service().get_posts_page(limit=limit, after=after, **dict(filters))
+
+
+def linkedin_posts_page(limit: int = 20, after: Optional[str] = None, **filters) -> Dict:
+    """Seite gespeicherter Posts (Filter: status, date_from, date_to)"""
+    return _linkedin_posts_page(limit, tuple(sorted(filters.items())), after, db_version(LINKEDIN_DB))
+
+
+def linkedin_posts(limit: int = 20, **filters) -> List[Dict]:
+    """Gespeicherte LinkedIn Posts"""
+    return linkedin_posts_page(limit, **filters)["items"]
+
+
+# ---------- Analytics Rollups ----------
+
+@st.cache_data(ttl=TTL_ROLLUPS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _rollup(query: str, version):
+    return getattr(campaign_rollups(), query)()
+
+
+def rollup(query: str):
+    """Ergebnis einer CampaignRollups-Abfrage (totals, by_template, daily, hourly, recent …)"""
+    return _rollup(query, db_version(ANALYTICS_DB))
+
+
+def has_rollups() -> bool:
+    return not rollup('is_empty')
+
+
+# ---------- Volltextsuche ----------
+
+@st.cache_resource
+def search_service():
+    from backend.search_service import SearchService
+    return SearchService()
+
+
+@st.cache_data(ttl=TTL_LISTS, max_entries=MAX_ENTRIES, show_spinner=False)
+def _search(source: str, query: str, limit: int, version) -> List[Dict]:
+    if source == "all":
+        return search_service().search_all(query, limit)
+    return search_service().search(source, query, limit)
+
+
+def search(query: str, source: str = "all", limit: int = 20) -> List[Dict]:
+    """FTS5-Suche (leads, emails, posts oder all) mit BM25-Ranking + Snippets"""
+    version = tuple(db_version(path) for path in (LEADS_DB, EMAIL_DB, LINKEDIN_DB))
+    return _search(source, query, limit, version)
+
+
+# ---------- Dateien ----------
+
+@st.cache_data(ttl=TTL_FILES, max_entries=MAX_ENTRIES, show_spinner=False)
+def _csv(path: str, version) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def load_csv(path: str = CAMPAIGN_RESULTS) -> pd.DataFrame:
+    """CSV als DataFrame (FileNotFoundError wie pd.read_csv)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return _csv(path, file_version(path))
+
+
+@st.cache_data(ttl=TTL_FILES, max_entries=MAX_ENTRIES, show_spinner=False)
+def _yaml(path: str, version):
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def load_yaml(path: str):
+    """YAML-Konfiguration"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return _yaml(str(path), file_version(path))
+
+
+def clear():
+    """Nur den Daten-Layer leeren (statt st.cache_data.clear())"""
+    for loader in (_email_stats, _email_history_page, _lead_stats, _leads_page, _linkedin_posts_page,
+                   _rollup, _search, _csv, _yaml):
+        loader.clear()
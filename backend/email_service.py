@@ -1,11 +1,18 @@
 import streamlit as st
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 import sqlite3
 import os
+from backend.pagination import (build_query, date_conditions, ensure_sort_keys, keyset_condition,
+                                page, page_result, DateLike)
+from backend.search_service import ensure_fts_index
+from src.analytics.metrics import MeteredConnection, SENDS, SEND_LATENCY
+from src.delivery.mime import MessageAssembler, ascii_address
+from src.delivery.policy import INTERACTIVE_POLICY, PERMANENT
+
+# Sortierung der Historie (Keyset)
+HISTORY_ORDER = ("timestamp_key", "id")  # NULL-sicherer Schlüssel (ensure_sort_keys)
 
 class EmailService:
     def __init__(self):
@@ -17,6 +24,8 @@ class EmailService:
         self.smtp_username = st.secrets.get("SMTP_USERNAME", "")
         self.smtp_password = st.secrets.get("SMTP_PASSWORD", "")
         self.smtp_use_ssl = st.secrets.get("SMTP_USE_SSL", "True") == "True"
+        self.assembler = MessageAssembler(self.sender_name, self.sender_email)
+        self.last_message = None  # gerenderte MIME-Bytes des laufenden Versands
         
         self.db_path = "data/emails.db"
         self._init_db()
@@ -24,7 +33,7 @@ class EmailService:
     def _init_db(self):
         """Erstelle Email-Historie Datenbank"""
         os.makedirs("data", exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS emails (
@@ -37,6 +46,15 @@ class EmailService:
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # Indizes für Keyset-Pagination (timestamp, id) + Filter
+        ensure_sort_keys(c, "emails", {"timestamp": "''"})
+        for index in ("idx_emails_order", "idx_emails_status", "idx_emails_template"):
+            c.execute(f'DROP INDEX IF EXISTS {index}')  # Vorgänger auf der Rohspalte
+        for name, prefix in (("keyset", ""), ("status_keyset", "status, "), ("template_keyset", "template, ")):
+            c.execute(f'CREATE INDEX IF NOT EXISTS idx_emails_{name} ON emails ({prefix}timestamp_key DESC, id DESC)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_emails_empfaenger ON emails (empfaenger COLLATE NOCASE)')
+        # Volltext-Index (FTS5) + Sync-Trigger
+        ensure_fts_index(conn, "emails")
         conn.commit()
         conn.close()
     
@@ -47,36 +65,19 @@ class EmailService:
         # Prüfe Credentials
         if not self.smtp_username or not self.smtp_password:
             self._save_to_db(empfaenger, betreff, nachricht, template, "simuliert")
+            SENDS.labels(provider="smtp", outcome="simulated").inc()
             return {
                 "success": True,
                 "simulated": True,
                 "message": "Email simuliert (SMTP nicht konfiguriert)"
             }
         
-        try:
-            # Erstelle Email
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = empfaenger
-            msg['Subject'] = betreff
-            msg['Reply-To'] = self.sender_email
-            
-            # Body
-            text_part = MIMEText(nachricht, 'plain', 'utf-8')
-            html_part = MIMEText(nachricht.replace('\n', '<br>'), 'html', 'utf-8')
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            # Sende via SMTP
-            if self.smtp_use_ssl:
-                with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                    server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
-            else:
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
+        # Zustell-Policy: kurze Retries inline (Dashboard wartet), danach Fehler mit Klasse
+        self.last_message = None  # rendert _send_smtp beim ersten Versuch, Retries senden dieselben Bytes
+        outcome = INTERACTIVE_POLICY.execute(self._send_smtp, empfaenger, betreff, nachricht)
+        
+        if outcome["status"] == "sent":
+            SENDS.labels(provider="smtp", outcome="sent").inc()
             
             # Speichere in DB
             self._save_to_db(empfaenger, betreff, nachricht, template, "gesendet")
@@ -87,19 +88,38 @@ class EmailService:
                 "timestamp": datetime.now().isoformat()
             }
         
-        except Exception as e:
-            # Fehler in DB speichern
-            self._save_to_db(empfaenger, betreff, nachricht, template, "fehler")
-            
-            return {
-                "success": False,
-                "error": str(e)
-            }
+        # Fehler in DB speichern
+        SENDS.labels(provider="smtp", outcome="failed").inc()
+        self._save_to_db(empfaenger, betreff, nachricht, template, "fehler")
+        
+        return {
+            "success": False,
+            "error": outcome["error"],
+            "error_kind": outcome["kind"],
+            "retryable": outcome["kind"] != PERMANENT,
+            "attempts": outcome["attempts"]
+        }
+    
+    def _send_smtp(self, empfaenger: str, betreff: str, nachricht: str):
+        """Ein SMTP-Versuch (Render- und Versandfehler werden von der Zustell-Policy klassifiziert)"""
+        if self.last_message is None:
+            self.last_message = self.assembler.render(empfaenger, betreff, nachricht)
+        message, empfaenger = self.last_message, ascii_address(empfaenger)
+        with SEND_LATENCY.labels(provider="smtp").time():
+            if self.smtp_use_ssl:
+                with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
+                    server.login(self.smtp_username, self.smtp_password)
+                    server.sendmail(self.sender_email, [empfaenger], message)
+            else:
+                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                    server.starttls()
+                    server.login(self.smtp_username, self.smtp_password)
+                    server.sendmail(self.sender_email, [empfaenger], message)
     
     def _save_to_db(self, empfaenger: str, betreff: str, nachricht: str, 
                     template: str, status: str):
         """Speichere in DB"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         c.execute('''
             INSERT INTO emails (empfaenger, betreff, nachricht, template, status)
@@ -108,25 +128,43 @@ class EmailService:
         conn.commit()
         conn.close()
     
-    def get_history(self, limit: int = 50) -> List[Dict]:
+    def get_history(self, limit: int = 50, status: Optional[str] = None,
+                    template: Optional[str] = None, date_from: DateLike = None,
+                    date_to: DateLike = None, after: Optional[str] = None) -> List[Dict]:
         """Hole Email-Historie"""
+        return self.get_history_page(limit, status, template, date_from, date_to, after)["items"]
+    
+    def get_history_page(self, limit: int = 50, status: Optional[str] = None,
+                         template: Optional[str] = None, date_from: DateLike = None,
+                         date_to: DateLike = None, after: Optional[str] = None) -> Dict:
+        """Hole eine Seite Email-Historie: {"items": [...], "next_cursor": ...}"""
         if not os.path.exists(self.db_path):
-            return []
+            return page_result([], None)
+        
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if template:
+            conditions.append("template = ?")
+            params.append(template)
+        date_sql, date_params = date_conditions("timestamp", date_from, date_to)
+        keyset_sql, keyset_params = keyset_condition(HISTORY_ORDER, after)
+        conditions += date_sql + ([keyset_sql] if keyset_sql else [])
+        params += date_params + keyset_params
             
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
-        c.execute('''
-            SELECT empfaenger, betreff, template, status, timestamp
-            FROM emails
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        rows = c.fetchall()
+        c.execute(build_query(
+            "SELECT empfaenger, betreff, template, status, timestamp, id, timestamp_key FROM emails",
+            conditions, HISTORY_ORDER
+        ), (*params, limit + 1))
+        rows, next_cursor = page(c.fetchall(), limit, key_indexes=(6, 5))
         conn.close()
         
-        return [
+        return page_result([
             {
+                "id": row[5],
                 "empfaenger": row[0],
                 "betreff": row[1],
                 "template": row[2] or "Keins",
@@ -134,14 +172,14 @@ class EmailService:
                 "timestamp": row[4]
             }
             for row in rows
-        ]
+        ], next_cursor)
     
     def get_stats(self) -> Dict:
         """Hole Statistiken"""
         if not os.path.exists(self.db_path):
             return {"heute": 0, "woche": 0, "gesamt": 0}
             
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         
         c.execute("SELECT COUNT(*) FROM emails WHERE DATE(timestamp) = DATE('now')")
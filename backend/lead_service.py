@@ -1,17 +1,35 @@
 import sqlite3
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
+from backend.pagination import (build_query, date_conditions, ensure_sort_keys, keyset_condition,
+                                page, page_result, DateLike)
+from backend.search_service import ensure_fts_index
+from src.lead_generation.dedupe import LeadDeduplicator
+from src.analytics.metrics import MeteredConnection
+
+# Sortierung der Lead-Liste (Keyset, NULL-sichere Schlüsselspalten)
+LEAD_ORDER = ("score_key", "timestamp_key", "id")
+
+STATUS_MAP = {"🟢 Heiß": "heiss", "🟡 Warm": "warm", "🔵 Kalt": "kalt"}
+STATUS_EMOJI = {"heiss": "🟢 Heiß", "warm": "🟡 Warm", "kalt": "🔵 Kalt"}
+
+# Bereits angeschriebene Empfänger (für die einmalige contacted_at-Migration)
+CONTACT_SOURCES = (
+    ("data/emails.db", "SELECT MIN(timestamp) FROM src.emails WHERE empfaenger = leads.email COLLATE NOCASE"),
+    ("data/analytics.db", "SELECT CURRENT_TIMESTAMP FROM src.recipient_index WHERE email = LOWER(leads.email)"),
+)
 
 class LeadService:
     def __init__(self):
         self.db_path = "data/leads.db"
+        self.deduplicator = LeadDeduplicator(self.db_path)
         self._init_db()
     
     def _init_db(self):
         """Erstelle Leads DB"""
         os.makedirs("data", exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS leads (
@@ -28,13 +46,67 @@ class LeadService:
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # Indizes für Keyset-Pagination (score, timestamp, id) + Filter – über die NULL-sicheren Schlüssel
+        ensure_sort_keys(c, "leads", {"score": "-1", "timestamp": "''"})
+        for index in ("idx_leads_order", "idx_leads_status", "idx_leads_branche"):
+            c.execute(f'DROP INDEX IF EXISTS {index}')  # Vorgänger auf den Rohspalten
+        for name, prefix in (("keyset", ""), ("status_keyset", "status, "), ("branche_keyset", "branche, ")):
+            c.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_leads_{name}
+                ON leads ({prefix}score_key DESC, timestamp_key DESC, id DESC)
+            ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_leads_timestamp ON leads (timestamp)')
+        # Volltext-Index (FTS5) + Sync-Trigger
+        ensure_fts_index(conn, "leads")
+        # Normalisierte Spalten für die Deduplizierung
+        self.deduplicator.ensure_schema(conn)
+        # Erstkontakt → offene Kontakte (heiß/warm, noch nicht angeschrieben) per Teilindex
+        columns = {row[1] for row in c.execute("PRAGMA table_info(leads)")}
+        if "contacted_at" not in columns:
+            c.execute("ALTER TABLE leads ADD COLUMN contacted_at DATETIME")
+            self._backfill_contacted(conn)
+        if "undeliverable_at" not in columns:
+            c.execute("ALTER TABLE leads ADD COLUMN undeliverable_at DATETIME")
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS idx_leads_pending ON leads (score DESC, id)
+            WHERE contacted_at IS NULL AND status IN ('heiss', 'warm')
+        ''')
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def _backfill_contacted(conn: sqlite3.Connection):
+        """contacted_at aus Email-Historie und Kampagnen-Rollups übernehmen"""
+        for db_path, first_contact in CONTACT_SOURCES:
+            if not os.path.exists(db_path):
+                continue
+            conn.execute("ATTACH DATABASE ? AS src", (db_path,))
+            try:
+                conn.execute(f"UPDATE leads SET contacted_at = ({first_contact}) "
+                             f"WHERE contacted_at IS NULL AND email <> ''")
+            except sqlite3.OperationalError:
+                pass  # Quelltabelle (noch) nicht vorhanden
+            conn.commit()
+            conn.execute("DETACH DATABASE src")
+    
     def add_lead(self, unternehmen: str, kontakt: str, position: str = "", 
-                 email: str = "", branche: str = "", score: int = 0) -> Dict:
+                 email: str = "", branche: str = "", score: int = 0, notizen: str = "") -> Dict:
         """Füge Lead hinzu"""
-        conn = sqlite3.connect(self.db_path)
+        return self.add_leads([{"unternehmen": unternehmen, "kontakt": kontakt, "position": position,
+                                "email": email, "branche": branche, "score": score, "notizen": notizen}])[0]
+    
+    def add_leads(self, leads: List[Dict]) -> List[Dict]:
+        """Füge mehrere Leads in einer Transaktion hinzu (Felder wie add_lead)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        try:
+            results = [self._add_lead(conn, **lead) for lead in leads]
+            conn.commit()
+        finally:
+            conn.close()  # ohne commit → Rollback, die Sperre ist sofort wieder frei
+        return results
+    
+    def _add_lead(self, conn: sqlite3.Connection, unternehmen: str, kontakt: str, position: str = "",
+                  email: str = "", branche: str = "", score: int = 0, notizen: str = "") -> Dict:
         c = conn.cursor()
         
         # Status basierend auf Score
@@ -45,75 +117,138 @@ class LeadService:
         else:
             status = "kalt"
         
-        c.execute('''
-            INSERT INTO leads (unternehmen, kontakt, position, email, branche, score, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (unternehmen, kontakt, position, email, branche, score, status))
+        # Bereits vorhandene Kanzlei? → zusammenführen statt Duplikat anlegen
+        duplicate, review = self.deduplicator.classify(conn, unternehmen, email, kontakt)
+        if duplicate:
+            lead_id, match_score, reason = duplicate
+            incoming = {"unternehmen": unternehmen, "kontakt": kontakt, "position": position,
+                        "email": email, "branche": branche, "score": score, "status": status,
+                        "notizen": notizen}
+            self.deduplicator.merge_into(conn, lead_id, incoming, match_score, reason)
+            return {"success": True, "duplicate_of": lead_id,
+                    "message": f"Lead {unternehmen} mit bestehendem Lead zusammengeführt"}
         
-        conn.commit()
-        conn.close()
+        norm = self.deduplicator.normalized(unternehmen, email)
+        c.execute('''
+            INSERT INTO leads (unternehmen, kontakt, position, email, branche, score, status, notizen,
+                               email_norm, company_norm, domain, block_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (unternehmen, kontakt, position, email, branche, score, status, notizen or None,
+              norm["email_norm"], norm["company_norm"], norm["domain"], norm["block_key"]))
+        if review:
+            # Nur ähnlicher Name → kein automatischer Merge, sondern Review-Liste
+            self.deduplicator.queue_review(conn, c.lastrowid, review)
+            return {"success": True, "review": [candidate_id for candidate_id, _, _ in review],
+                    "message": f"Lead {unternehmen} hinzugefügt (mögliches Duplikat zur Prüfung vorgemerkt)"}
         
         return {"success": True, "message": f"Lead {unternehmen} hinzugefügt"}
     
-    def get_leads(self, status_filter: List[str] = None, limit: int = 100) -> List[Dict]:
+    def get_leads(self, status_filter: List[str] = None, limit: int = 100,
+                  branche: Optional[str] = None, date_from: DateLike = None,
+                  date_to: DateLike = None, after: Optional[str] = None) -> List[Dict]:
         """Hole Leads"""
+        return self.get_leads_page(status_filter, limit, branche, date_from, date_to, after)["items"]
+    
+    def get_leads_page(self, status_filter: List[str] = None, limit: int = 100,
+                       branche: Optional[str] = None, date_from: DateLike = None,
+                       date_to: DateLike = None, after: Optional[str] = None) -> Dict:
+        """Hole eine Seite Leads: {"items": [...], "next_cursor": ...}"""
         if not os.path.exists(self.db_path):
-            return []
-            
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+            return page_result([], None)
         
+        conditions, params = [], []
         if status_filter:
             # Konvertiere Emoji-Status zurück
-            status_map = {"🟢 Heiß": "heiss", "🟡 Warm": "warm", "🔵 Kalt": "kalt"}
-            status_db = [status_map.get(s, s.lower()) for s in status_filter]
-            
-            placeholders = ','.join('?' * len(status_db))
-            query = f'''
-                SELECT unternehmen, kontakt, position, email, score, status, timestamp
-                FROM leads
-                WHERE status IN ({placeholders})
-                ORDER BY score DESC, timestamp DESC
-                LIMIT ?
-            '''
-            c.execute(query, (*status_db, limit))
-        else:
-            c.execute('''
-                SELECT unternehmen, kontakt, position, email, score, status, timestamp
-                FROM leads
-                ORDER BY score DESC, timestamp DESC
-                LIMIT ?
-            ''', (limit,))
+            status_db = [STATUS_MAP.get(s, s.lower()) for s in status_filter]
+            conditions.append(f"status IN ({','.join('?' * len(status_db))})")
+            params += status_db
+        if branche:
+            conditions.append("branche = ?")
+            params.append(branche)
+        date_sql, date_params = date_conditions("timestamp", date_from, date_to)
+        keyset_sql, keyset_params = keyset_condition(LEAD_ORDER, after)
+        conditions += date_sql + ([keyset_sql] if keyset_sql else [])
+        params += date_params + keyset_params
         
-        rows = c.fetchall()
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.execute(build_query(
+            "SELECT unternehmen, kontakt, position, email, score, status, timestamp, id, branche, "
+            "score_key, timestamp_key FROM leads",
+            conditions, LEAD_ORDER
+        ), (*params, limit + 1))
+        rows, next_cursor = page(c.fetchall(), limit, key_indexes=(9, 10, 7))
         conn.close()
         
-        # Emoji-Mapping
-        status_emoji = {
-            "heiss": "🟢 Heiß",
-            "warm": "🟡 Warm",
-            "kalt": "🔵 Kalt"
-        }
-        
-        return [
+        return page_result([
             {
+                "id": row[7],
                 "unternehmen": row[0],
                 "kontakt": row[1],
                 "position": row[2],
                 "email": row[3],
+                "branche": row[8],
                 "score": row[4],
-                "status": status_emoji.get(row[5], row[5]),
+                "status": STATUS_EMOJI.get(row[5], row[5]),
                 "timestamp": row[6]
             }
             for row in rows
-        ]
+        ], next_cursor)
+    
+    def get_pending_contacts(self, limit: int = 50) -> List[Dict]:
+        """Heiße/warme Leads mit Email, die noch nicht angeschrieben wurden (bester Score zuerst)"""
+        if not os.path.exists(self.db_path):
+            return []
+        
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute('''
+            SELECT id, unternehmen, kontakt, position, email, branche, score, status, notizen
+            FROM leads INDEXED BY idx_leads_pending
+            WHERE contacted_at IS NULL AND status IN ('heiss', 'warm') AND email <> ''
+              AND undeliverable_at IS NULL
+            ORDER BY score DESC, id
+            LIMIT ?
+        ''', (limit,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def mark_contacted(self, emails: List[str]) -> int:
+        """Leads nach dem Versand als angeschrieben markieren"""
+        if not emails:
+            return 0
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.executemany('''
+            UPDATE leads SET contacted_at = CURRENT_TIMESTAMP
+            WHERE email_norm = ? AND contacted_at IS NULL
+        ''', [(self.deduplicator.normalized("", email)["email_norm"],) for email in emails])
+        marked = conn.total_changes
+        conn.commit()
+        conn.close()
+        return marked
+    
+    def mark_undeliverable(self, emails: List[str]) -> int:
+        """Dauerhaft unzustellbare Leads (Dead Letter) aus den offenen Kontakten nehmen"""
+        if not emails:
+            return 0
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.executemany('''
+            UPDATE leads SET undeliverable_at = CURRENT_TIMESTAMP
+            WHERE email_norm = ? AND undeliverable_at IS NULL
+        ''', [(self.deduplicator.normalized("", email)["email_norm"],) for email in emails])
+        marked = conn.total_changes
+        conn.commit()
+        conn.close()
+        return marked
     
     def get_stats(self) -> Dict:
         """Hole Lead-Statistiken"""
         if not os.path.exists(self.db_path):
             return {"heiss": 0, "warm": 0, "kalt": 0, "gesamt": 0}
             
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         
         c.execute("SELECT COUNT(*) FROM leads WHERE status = 'heiss'")
@@ -2,7 +2,15 @@ import streamlit as st
 from datetime import datetime
 import sqlite3
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
+from src.content_automation.near_duplicates import NearDuplicateIndex
+from backend.pagination import (build_query, date_conditions, ensure_sort_keys, keyset_condition,
+                                page, page_result, DateLike)
+from backend.search_service import ensure_fts_index
+from src.analytics.metrics import MeteredConnection
+
+# Sortierung der Post-Liste (Keyset)
+POST_ORDER = ("timestamp_key", "id")  # NULL-sicherer Schlüssel (ensure_sort_keys)
 
 class LinkedInService:
     def __init__(self):
@@ -17,7 +25,7 @@ class LinkedInService:
     def _init_db(self):
         """Erstelle Posts DB"""
         os.makedirs("data", exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS posts (
@@ -33,6 +41,14 @@ class LinkedInService:
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # Indizes für Keyset-Pagination (timestamp, id) + Status-Filter
+        ensure_sort_keys(c, "posts", {"timestamp": "''"})
+        for index in ("idx_posts_order", "idx_posts_status"):
+            c.execute(f'DROP INDEX IF EXISTS {index}')  # Vorgänger auf der Rohspalte
+        c.execute('CREATE INDEX IF NOT EXISTS idx_posts_keyset ON posts (timestamp_key DESC, id DESC)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_posts_status_keyset ON posts (status, timestamp_key DESC, id DESC)')
+        # Volltext-Index (FTS5) + Sync-Trigger
+        ensure_fts_index(conn, "posts")
         conn.commit()
         conn.close()
     
@@ -75,39 +91,59 @@ Gründer & CEO, {self.company}""",
     def save_post(self, thema: str, inhalt: str, hashtags: str = "", 
                   cta: str = "", status: str = "entwurf") -> Dict:
         """Speichere Post in DB"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         c.execute('''
             INSERT INTO posts (thema, inhalt, hashtags, cta, status)
             VALUES (?, ?, ?, ?, ?)
         ''', (thema, inhalt, hashtags, cta, status))
+        post_id = c.lastrowid
         conn.commit()
         conn.close()
         
+        # Near-Duplicate Index sofort aktualisieren (sonst erst beim nächsten Sync)
+        NearDuplicateIndex().add("linkedin_db", str(post_id), inhalt, kind="post")
+        
         return {
             "success": True,
             "message": f"Post '{thema}' gespeichert"
         }
     
-    def get_posts(self, limit: int = 20) -> List[Dict]:
+    def get_posts(self, limit: int = 20, status: Optional[str] = None,
+                  date_from: DateLike = None, date_to: DateLike = None,
+                  after: Optional[str] = None) -> List[Dict]:
         """Hole Posts"""
+        return self.get_posts_page(limit, status, date_from, date_to, after)["items"]
+    
+    def get_posts_page(self, limit: int = 20, status: Optional[str] = None,
+                       date_from: DateLike = None, date_to: DateLike = None,
+                       after: Optional[str] = None) -> Dict:
+        """Hole eine Seite Posts: {"items": [...], "next_cursor": ...}"""
         if not os.path.exists(self.db_path):
-            return []
+            return page_result([], None)
+        
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        date_sql, date_params = date_conditions("timestamp", date_from, date_to)
+        keyset_sql, keyset_params = keyset_condition(POST_ORDER, after)
+        conditions += date_sql + ([keyset_sql] if keyset_sql else [])
+        params += date_params + keyset_params
             
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
-        c.execute('''
-            SELECT thema, inhalt, hashtags, status, likes, kommentare, shares, timestamp
-            FROM posts
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        rows = c.fetchall()
+        c.execute(build_query(
+            "SELECT thema, inhalt, hashtags, status, likes, kommentare, shares, timestamp, id, timestamp_key "
+            "FROM posts",
+            conditions, POST_ORDER
+        ), (*params, limit + 1))
+        rows, next_cursor = page(c.fetchall(), limit, key_indexes=(9, 8))
         conn.close()
         
-        return [
+        return page_result([
             {
+                "id": row[8],
                 "thema": row[0],
                 "inhalt": row[1][:100] + "..." if len(row[1]) > 100 else row[1],
                 "hashtags": row[2],
@@ -118,14 +154,14 @@ Gründer & CEO, {self.company}""",
                 "timestamp": row[7]
             }
             for row in rows
-        ]
+        ], next_cursor)
     
     def get_stats(self) -> Dict:
         """Hole Statistiken"""
         if not os.path.exists(self.db_path):
             return {"posts_monat": 0, "total_engagement": 0}
             
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
         c = conn.cursor()
         
         c.execute("SELECT COUNT(*) FROM posts WHERE DATE(timestamp) >= DATE('now', '-30 days')")
@@ -0,0 +1,89 @@
+"""
+Keyset-Pagination für die SQLite-Services
+
+Statt OFFSET merkt sich der Cursor die Sortierwerte der letzten Zeile
+(z.B. score, timestamp, id). Die nächste Seite startet per Row-Value-Vergleich
+direkt im Index → Seite 500 kostet so viel wie Seite 1.
+
+Sortiert wird über NULL-sichere Schlüsselspalten (<spalte>_key, siehe ensure_sort_keys):
+ein Row-Value-Vergleich mit NULL ist nie wahr, solche Zeilen fielen sonst aus allen Folgeseiten.
+"""
+
+import base64
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+DateLike = Union[str, date, datetime, None]
+
+
+def ensure_sort_keys(conn, table: str, fallbacks: Dict[str, str]):
+    """Virtuelle Spalten <spalte>_key = COALESCE(spalte, fallback) anlegen (idempotent)
+
+    Der Fallback liegt unter allen echten Werten → bei absteigender Sortierung NULLS LAST.
+    """
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+    for column, fallback in fallbacks.items():
+        if f"{column}_key" not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_key "
+                         f"GENERATED ALWAYS AS (COALESCE({column}, {fallback})) VIRTUAL")
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Sortierwerte der letzten Zeile → URL-sicherer String"""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> List:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Ungültiger Cursor: {cursor}") from e
+
+
+def keyset_condition(columns: Sequence[str], cursor: Optional[str]) -> Tuple[str, List]:
+    """WHERE-Teil für 'nach dem Cursor' bei absteigender Sortierung über alle Spalten"""
+    if not cursor:
+        return "", []
+    values = decode_cursor(cursor)
+    if len(values) != len(columns):
+        raise ValueError("Cursor passt nicht zur Sortierung")
+    return f"({', '.join(columns)}) < ({', '.join('?' * len(columns))})", values
+
+
+def date_conditions(column: str, date_from: DateLike = None, date_to: DateLike = None) -> Tuple[List[str], List]:
+    """Datumsbereich (inklusive date_to) als indexfähige Bereichsbedingung"""
+    conditions, params = [], []
+    if date_from:
+        conditions.append(f"{column} >= ?")
+        params.append(_day(date_from))
+    if date_to:
+        conditions.append(f"{column} < ?")
+        params.append(_day(date_to, offset_days=1))
+    return conditions, params
+
+
+def _day(value: DateLike, offset_days: int = 0) -> str:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value + timedelta(days=offset_days)).isoformat()
+
+
+def page(rows: List[tuple], limit: int, key_indexes: Sequence[int]) -> Tuple[List[tuple], Optional[str]]:
+    """Mit limit + 1 abgefragte Zeilen → (Seite, next_cursor)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][i] for i in key_indexes])
+
+
+def build_query(select: str, conditions: List[str], order_columns: Sequence[str]) -> str:
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = ', '.join(f"{column} DESC" for column in order_columns)
+    return f"{select} {where} ORDER BY {order} LIMIT ?"
+
+
+def page_result(items: List[Dict], next_cursor: Optional[str]) -> Dict:
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,192 @@
+"""
+Volltextsuche über Leads, gesendete Emails und LinkedIn Posts (SQLite FTS5)
+
+- External-Content FTS5-Tabellen direkt in leads.db / emails.db / linkedin.db
+- Trigger halten den Index bei INSERT/UPDATE/DELETE synchron
+- Ranking per BM25 (Spalten gewichtet), Treffer-Ausschnitte per snippet()
+"""
+
+import os
+import re
+import sqlite3
+from typing import Dict, List, Optional
+
+from src.analytics.metrics import MeteredConnection
+
+# Quelle → DB, Tabelle, indizierte Spalten + BM25-Gewichte
+FTS_SPECS = {
+    "leads": {
+        "db_path": "data/leads.db",
+        "table": "leads",
+        "columns": {"unternehmen": 4.0, "kontakt": 2.0, "position": 1.0, "notizen": 1.0},
+        "fields": ("id", "unternehmen", "kontakt", "position", "email", "branche", "score", "status", "timestamp"),
+    },
+    "emails": {
+        "db_path": "data/emails.db",
+        "table": "emails",
+        "columns": {"empfaenger": 2.0, "betreff": 3.0, "nachricht": 1.0},
+        "fields": ("id", "empfaenger", "betreff", "template", "status", "timestamp"),
+    },
+    "posts": {
+        "db_path": "data/linkedin.db",
+        "table": "posts",
+        "columns": {"thema": 3.0, "inhalt": 1.0, "hashtags": 2.0},
+        "fields": ("id", "thema", "hashtags", "status", "timestamp"),
+    },
+}
+
+HIGHLIGHT = ("**", "**")
+QUERY_TOKENS = re.compile(r'"([^"]*)"|(\w+)')
+
+
+def ensure_fts_index(conn: sqlite3.Connection, source: str):
+    """FTS5-Tabelle + Sync-Trigger anlegen (idempotent, Erstbefüllung per 'rebuild')"""
+    spec = FTS_SPECS[source]
+    table, columns = spec["table"], list(spec["columns"])
+    fts = f"{table}_fts"
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+    if exists:
+        return
+
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{col}" for col in columns)
+    old_cols = ", ".join(f"old.{col}" for col in columns)
+    conn.executescript(f'''
+        CREATE VIRTUAL TABLE {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2", prefix='2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_cols});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_cols});
+        END;
+        INSERT INTO {fts} ({fts}) VALUES ('rebuild');
+    ''')
+    # Spaltengewichte als Standard-Ranking → ORDER BY rank wird direkt in FTS5 ausgewertet
+    weights = ", ".join(str(w) for w in spec["columns"].values())
+    conn.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('rank', 'bm25({weights})')")
+    conn.commit()
+
+
+def to_match_query(text: str) -> str:
+    """Freitext → FTS5-Query: alle Begriffe gequotet als Präfix, "…" als Phrase
+
+    Sonderzeichen wie ( ) : * ^ oder AND/OR landen nie roh in MATCH → kein fts5 syntax error.
+    """
+    parts = []
+    for phrase, word in QUERY_TOKENS.findall(text or ""):
+        if word:
+            parts.append(f'"{word}"*')
+        elif re.search(r"\w", phrase):
+            parts.append('"' + " ".join(re.findall(r"\w+", phrase)) + '"')
+    return " ".join(parts)
+
+
+class SearchService:
+    """Suche mit BM25-Ranking und Snippets"""
+
+    def __init__(self, db_paths: Optional[Dict[str, str]] = None):
+        self.db_paths = {source: spec["db_path"] for source, spec in FTS_SPECS.items()}
+        self.db_paths.update(db_paths or {})
+        for source, db_path in self.db_paths.items():
+            if os.path.exists(db_path):
+                conn = sqlite3.connect(db_path, factory=MeteredConnection)
+                try:
+                    ensure_fts_index(conn, source)
+                except sqlite3.OperationalError:
+                    pass  # Basistabelle (noch) nicht vorhanden
+                conn.close()
+
+    @staticmethod
+    def _ranked(fts: str) -> str:
+        """Top-Treffer direkt aus FTS5 (Sortierung + Snippets nur für ausgegebene Zeilen)"""
+        return f'''
+            SELECT rowid, rank, snippet({fts}, -1, '{HIGHLIGHT[0]}', '{HIGHLIGHT[1]}', '…', 12) AS snippet
+            FROM {fts} WHERE {fts} MATCH ? ORDER BY rank LIMIT ?
+        '''
+
+    def search(self, source: str, query: str, limit: int = 20) -> List[Dict]:
+        """Treffer einer Quelle (leads, emails, posts) – bestes Ranking zuerst"""
+        spec = FTS_SPECS[source]
+        match = to_match_query(query)
+        if not match or not os.path.exists(self.db_paths[source]):
+            return []
+        table = spec["table"]
+        fields = ", ".join(f"t.{field}" for field in spec["fields"])
+
+        conn = sqlite3.connect(self.db_paths[source], factory=MeteredConnection)
+        c = conn.cursor()
+        c.execute(f'''
+            SELECT {fields}, hits.rank, hits.snippet
+            FROM ({self._ranked(f"{table}_fts")}) hits
+            JOIN {table} t ON t.id = hits.rowid
+            ORDER BY hits.rank
+        ''', (match, limit))
+        rows = c.fetchall()
+        conn.close()
+
+        keys = (*spec["fields"], "rank", "snippet")
+        return [dict(zip(keys, row), source=source) for row in rows]
+
+    def search_all(self, query: str, limit: int = 20) -> List[Dict]:
+        """Über alle Quellen; reihum verschränkt (BM25-Ranks verschiedener DBs sind nicht vergleichbar)"""
+        per_source = [self.search(source, query, limit) for source in FTS_SPECS]
+        hits = []
+        for position in range(limit):
+            hits += [results[position] for results in per_source if position < len(results)]
+        return hits[:limit]
+
+    def search_contacted_leads(self, lead_query: str, email_query: str, limit: int = 50) -> List[Dict]:
+        """Leads (z.B. 'Kanzlei Heidelberg'), die eine passende Email (z.B. 'XRechnung') erhalten haben"""
+        lead_match, email_match = to_match_query(lead_query), to_match_query(email_query)
+        if not lead_match or not email_match:
+            return []
+        if not all(os.path.exists(self.db_paths[s]) for s in ("leads", "emails")):
+            return []
+
+        conn = sqlite3.connect(self.db_paths["leads"], factory=MeteredConnection)
+        conn.execute("ATTACH DATABASE ? AS em", (self.db_paths["emails"],))
+        c = conn.cursor()
+        # Email-Treffer einmal materialisieren, dann Leads in Rank-Reihenfolge per Index prüfen
+        fields = ", ".join(f"t.{field}" for field in FTS_SPECS["leads"]["fields"])
+        c.execute(f'''
+            SELECT {fields}, leads_fts.rank,
+                   snippet(leads_fts, -1, '{HIGHLIGHT[0]}', '{HIGHLIGHT[1]}', '…', 12)
+            FROM leads_fts JOIN leads t ON t.id = leads_fts.rowid
+            WHERE leads_fts MATCH ?
+              AND EXISTS (
+                  SELECT 1 FROM em.emails e
+                  WHERE e.empfaenger = t.email COLLATE NOCASE
+                    AND e.id IN (SELECT rowid FROM em.emails_fts WHERE emails_fts MATCH ?)
+              )
+            ORDER BY leads_fts.rank
+            LIMIT ?
+        ''', (lead_match, email_match, limit))
+        leads = c.fetchall()
+
+        # Passende Email (neueste) + Snippet nur für die ausgegebenen Leads
+        rows = []
+        for lead in leads:
+            candidates = c.execute('''
+                SELECT id, betreff, timestamp FROM em.emails
+                WHERE empfaenger = ? COLLATE NOCASE ORDER BY timestamp DESC, id DESC
+            ''', (lead[4],)).fetchall()
+            for email_id, betreff, timestamp in candidates:
+                hit = c.execute(f'''
+                    SELECT snippet(emails_fts, -1, '{HIGHLIGHT[0]}', '{HIGHLIGHT[1]}', '…', 12)
+                    FROM em.emails_fts WHERE emails_fts MATCH ? AND rowid = ?
+                ''', (email_match, email_id)).fetchone()
+                if hit:
+                    rows.append((*lead, email_id, betreff, timestamp, hit[0]))
+                    break
+        conn.close()
+
+        keys = (*FTS_SPECS["leads"]["fields"], "rank", "snippet",
+                "email_id", "email_betreff", "email_timestamp", "email_snippet")
+        return [dict(zip(keys, row)) for row in rows]
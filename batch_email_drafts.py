@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Batch-API Modus für nächtliche Email-Entwürfe
+Verpackt Body- und Betreff-Prompts aller offenen Kontakte in einen
+OpenAI/Anthropic Batch-Job, pollt den Status und lädt die Ergebnisse
+kontaktgenau zurück in die Outbox – ohne dass ein Prozess offen bleiben muss.
+
+Usage:
+    python batch_email_drafts.py submit --campaign campaign_20261019 --provider openai
+    python batch_email_drafts.py poll --campaign campaign_20261019 [--wait]
+    python batch_email_drafts.py submit --campaign demo --provider local --demo-contacts
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from automated_email_sender import (
+    SBSEmailAutomation, EMAIL_SYSTEM_BLOCK, SUBJECT_SYSTEM_BLOCK, TARGET_CONTACTS
+)
+from src.ai.prompt_context import PROMPT_CONTEXT_VERSION, anthropic_system, openai_messages
+from src.ai.usage_tracker import TokenUsageTracker, anthropic_usage
+from src.delivery.outbox import Outbox
+
+load_dotenv()
+
+BATCH_DIR = "data/batches"
+
+# OpenAI: gleiches Modell und gleiche Parameter wie generate_ai_email – nur zum halben Preis
+OPENAI_BATCH_MODEL = "gpt-4"
+# Anthropic: generate_ai_email hat keinen Anthropic-Pfad (nur gpt-4) → kein Live-Modell zum Angleichen,
+# bewusst das günstigste Modell für nächtliche Massenentwürfe
+ANTHROPIC_BATCH_MODEL = "claude-3-5-haiku-20241022"
+PROMPT_SPECS = {
+    'body': {'system': EMAIL_SYSTEM_BLOCK, 'temperature': 0.7, 'max_tokens': 800},
+    'subject': {'system': SUBJECT_SYSTEM_BLOCK, 'temperature': 0.6, 'max_tokens': 50},
+}
+
+# (custom_id, text, usage, error)
+BatchResult = Tuple[str, Optional[str], Dict, Optional[str]]
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API (/v1/chat/completions, 24h Fenster)"""
+
+    name = "openai"
+
+    def __init__(self):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+    def request_line(self, custom_id: str, kind: str, user_prompt: str) -> Dict:
+        spec = PROMPT_SPECS[kind]
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": OPENAI_BATCH_MODEL,
+                "messages": openai_messages(spec['system'], user_prompt),
+                "temperature": spec['temperature'],
+                "max_tokens": spec['max_tokens']
+            }
+        }
+
+    def submit(self, job_file: str) -> str:
+        with open(job_file, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return "completed"
+        if batch.status in ("failed", "expired", "cancelled"):
+            return "failed"
+        return "in_progress"
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return
+        content = self.client.files.content(batch.output_file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get('response') or {}
+            if item.get('error') or response.get('status_code') != 200:
+                yield item['custom_id'], None, {}, str(item.get('error') or response.get('status_code'))
+                continue
+            body = response['body']
+            usage = body.get('usage', {})
+            yield item['custom_id'], body['choices'][0]['message']['content'], {
+                'input_tokens': usage.get('prompt_tokens', 0),
+                'cached_tokens': (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0),
+                'output_tokens': usage.get('completion_tokens', 0)
+            }, None
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches API (mit Prompt Caching im System-Block)"""
+
+    name = "anthropic"
+
+    def __init__(self):
+        from anthropic import Anthropic
+        self.client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+
+    def request_line(self, custom_id: str, kind: str, user_prompt: str) -> Dict:
+        spec = PROMPT_SPECS[kind]
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": ANTHROPIC_BATCH_MODEL,
+                "max_tokens": spec['max_tokens'],
+                "temperature": spec['temperature'],
+                "system": anthropic_system(spec['system']),
+                "messages": [{"role": "user", "content": user_prompt}]
+            }
+        }
+
+    def submit(self, job_file: str) -> str:
+        with open(job_file, 'r', encoding='utf-8') as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return "completed" if batch.processing_status == "ended" else "in_progress"
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        for item in self.client.messages.batches.results(batch_id):
+            if item.result.type != "succeeded":
+                yield item.custom_id, None, {}, item.result.type
+                continue
+            message = item.result.message
+            yield item.custom_id, message.content[0].text, anthropic_usage(message), None
+
+
+class LocalBatchBackend:
+    """Lokaler Stand-in: beantwortet den Job sofort, ohne Netzwerk (Tests & Dry-Runs)"""
+
+    name = "local"
+
+    def __init__(self, responder: Optional[Callable[[str, str, str], str]] = None):
+        self.responder = responder or (lambda custom_id, kind, prompt: f"[Lokaler Entwurf: {kind}]\n{prompt}")
+        self._jobs: Dict[str, str] = {}
+
+    def request_line(self, custom_id: str, kind: str, user_prompt: str) -> Dict:
+        return {"custom_id": custom_id, "kind": kind, "prompt": user_prompt}
+
+    def submit(self, job_file: str) -> str:
+        batch_id = f"local_{os.path.basename(job_file)}"
+        self._jobs[batch_id] = job_file
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed"
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        job_file = self._jobs.get(batch_id) or os.path.join(BATCH_DIR, batch_id[len("local_"):])
+        with open(job_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    yield item['custom_id'], self.responder(item['custom_id'], item['kind'], item['prompt']), {}, None
+
+
+BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "anthropic": AnthropicBatchBackend,
+    "local": LocalBatchBackend,
+}
+
+
+class BatchDraftJobs:
+    """Erstellt, verfolgt und übernimmt Batch-Jobs für eine Kampagnen-Outbox"""
+
+    def __init__(self, automation: SBSEmailAutomation, outbox: Outbox = None, backend=None):
+        self.automation = automation
+        self.outbox = outbox or Outbox()
+        self.backend = backend or OpenAIBatchBackend()
+        self.usage_tracker = TokenUsageTracker()
+        self._init_db()
+
+    def _init_db(self):
+        """Job-Registry neben der Outbox"""
+        conn = sqlite3.connect(self.outbox.db_path)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS batch_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                campaign TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                batch_id TEXT NOT NULL,
+                job_file TEXT NOT NULL,
+                manifest TEXT NOT NULL,
+                status TEXT DEFAULT 'in_progress',
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                completed_at DATETIME
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def submit(self, campaign: str) -> Optional[str]:
+        """Schreibt Job-Datei für alle pending Kontakte und reicht sie beim Provider ein
+
+        Job-Eintrag und Reservierung der Outbox-Zeilen (batch_job) laufen in einer Transaktion –
+        ein zweites submit vor dem poll findet die Kontakte nicht mehr als offen.
+        """
+        job_id, contacts = self._reserve(campaign)
+        if not contacts:
+            print("ℹ️  Keine offenen Kontakte für Batch-Job")
+            return None
+
+        os.makedirs(BATCH_DIR, exist_ok=True)
+        job_file = os.path.join(
+            BATCH_DIR, f"{campaign}_{self.backend.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id}.jsonl"
+        )
+
+        # custom_ids müssen provider-kompatibel sein (Anthropic: [a-zA-Z0-9_-]) → Manifest mappt auf Email
+        manifest = {}
+        with open(job_file, 'w', encoding='utf-8') as f:
+            for idx, contact in enumerate(contacts):
+                prompts = {
+                    'body': self.automation.build_email_prompt(contact),
+                    'subject': self.automation.build_subject_prompt(contact),
+                }
+                for kind, user_prompt in prompts.items():
+                    custom_id = f"c{idx:06d}-{kind}"
+                    manifest[custom_id] = contact['email']
+                    line = self.backend.request_line(custom_id, kind, user_prompt)
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+        try:
+            batch_id = self.backend.submit(job_file)
+        except Exception:
+            self._finish_job(job_id, "failed")
+            raise
+
+        conn = sqlite3.connect(self.outbox.db_path, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            UPDATE batch_jobs SET batch_id = ?, job_file = ?, manifest = ?, status = 'in_progress' WHERE id = ?
+        ''', (batch_id, job_file, json.dumps(manifest), job_id))
+        conn.commit()
+        conn.close()
+
+        print(f"✓ Batch-Job {batch_id} eingereicht: {len(contacts)} Kontakte, {len(manifest)} Prompts")
+        return batch_id
+
+    def _reserve(self, campaign: str) -> Tuple[Optional[int], List[Dict]]:
+        """Job anlegen und offene Kontakte atomar für ihn reservieren"""
+        conn = sqlite3.connect(self.outbox.db_path, timeout=30, isolation_level=None)
+        c = conn.cursor()
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('''
+            INSERT INTO batch_jobs (campaign, provider, batch_id, job_file, manifest, status)
+            VALUES (?, ?, '', '', '{}', 'submitting')
+        ''', (campaign, self.backend.name))
+        job_id = c.lastrowid
+        c.execute('''
+            UPDATE outbox SET batch_job = ?
+            WHERE campaign = ? AND status = 'pending' AND batch_job IS NULL
+        ''', (job_id, campaign))
+        if not c.rowcount:
+            c.execute('ROLLBACK')
+            conn.close()
+            return None, []
+        c.execute('SELECT contact FROM outbox WHERE batch_job = ? ORDER BY id', (job_id,))
+        contacts = [json.loads(row[0]) for row in c.fetchall()]
+        c.execute('COMMIT')
+        conn.close()
+        return job_id, contacts
+
+    def open_jobs(self, campaign: Optional[str] = None) -> List[Dict]:
+        """Noch nicht übernommene Jobs des aktuellen Providers"""
+        conn = sqlite3.connect(self.outbox.db_path)
+        c = conn.cursor()
+        query = '''
+            SELECT id, campaign, batch_id, manifest FROM batch_jobs
+            WHERE status = 'in_progress' AND provider = ?
+        '''
+        params = [self.backend.name]
+        if campaign:
+            query += ' AND campaign = ?'
+            params.append(campaign)
+        c.execute(query, params)
+        rows = c.fetchall()
+        conn.close()
+        return [
+            {"id": row[0], "campaign": row[1], "batch_id": row[2], "manifest": json.loads(row[3])}
+            for row in rows
+        ]
+
+    def poll(self, campaign: Optional[str] = None) -> int:
+        """Ein Poll-Durchlauf: fertige Jobs in die Outbox übernehmen. Gibt Anzahl übernommener Ergebnisse zurück."""
+        drafted = 0
+        for job in self.open_jobs(campaign):
+            status = self.backend.status(job['batch_id'])
+            if status == "in_progress":
+                print(f"⏳ Batch {job['batch_id']} läuft noch")
+                continue
+            if status == "completed":
+                drafted += self._load_results(job)
+            self._finish_job(job['id'], status)
+        return drafted
+
+    def wait(self, campaign: Optional[str] = None, interval_seconds: int = 300,
+             timeout_seconds: int = 24 * 3600) -> int:
+        """Pollt bis alle Jobs fertig sind (für manuelle Läufe – der Scheduler nutzt poll())"""
+        deadline = time.monotonic() + timeout_seconds
+        drafted = self.poll(campaign)
+        while self.open_jobs(campaign) and time.monotonic() < deadline:
+            time.sleep(interval_seconds)
+            drafted += self.poll(campaign)
+        return drafted
+
+    def _load_results(self, job: Dict) -> int:
+        """Ergebnisse kontaktgenau in die Outbox schreiben"""
+        manifest = job['manifest']
+        loaded = 0
+        failed = 0
+        for custom_id, text, usage, error in self.backend.results(job['batch_id']):
+            email = manifest.get(custom_id)
+            if email is None:
+                continue
+            if error or text is None:
+                failed += 1
+                print(f"   ✗ Batch-Fehler {email} ({custom_id}): {error}")
+                continue
+
+            kind = custom_id.rsplit('-', 1)[1]
+            if kind == 'subject':
+                self.outbox.store_draft(job['campaign'], email, subject=text.strip().strip('"'))
+            else:
+                self.outbox.store_draft(job['campaign'], email, body=text.strip())
+            loaded += 1
+
+            if usage:
+                self.usage_tracker.record(
+                    f"email_{kind}_batch", self.backend.name,
+                    OPENAI_BATCH_MODEL if self.backend.name == "openai" else ANTHROPIC_BATCH_MODEL,
+                    usage, 0, campaign=job['campaign'], prompt_version=PROMPT_CONTEXT_VERSION
+                )
+
+        drafted = self.outbox.stats(job['campaign']).get('drafted', 0)
+        print(f"✓ Batch {job['batch_id']} übernommen: {loaded} Ergebnisse, {drafted} fertige Entwürfe, {failed} Fehler")
+        return loaded
+
+    def _finish_job(self, job_id: int, status: str):
+        """Job abschließen; nicht übernommene Kontakte verlieren ihre Reservierung"""
+        conn = sqlite3.connect(self.outbox.db_path)
+        c = conn.cursor()
+        c.execute('''
+            UPDATE batch_jobs SET status = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (status, job_id))
+        # Kontakte ohne Ergebnis (Fehler / abgebrochener Job) wieder für den nächsten Job freigeben
+        c.execute('''
+            UPDATE outbox SET batch_job = NULL WHERE batch_job = ? AND status = 'pending'
+        ''', (job_id,))
+        conn.commit()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SBS Nexus Batch-Entwürfe (OpenAI/Anthropic Batch API)")
+    parser.add_argument("command", choices=["submit", "poll"])
+    parser.add_argument("--campaign", required=True)
+    parser.add_argument("--provider", choices=list(BACKENDS), default="openai")
+    parser.add_argument("--demo-contacts", action="store_true", help="TARGET_CONTACTS in die Outbox legen")
+    parser.add_argument("--wait", action="store_true", help="Bis zum Abschluss pollen")
+    args = parser.parse_args()
+
+    automation = SBSEmailAutomation(use_resend=True)
+    jobs = BatchDraftJobs(automation, backend=BACKENDS[args.provider]())
+
+    if args.command == "submit":
+        if args.demo_contacts:
+            jobs.outbox.enqueue(args.campaign, TARGET_CONTACTS)
+        jobs.submit(args.campaign)
+        if args.provider == "local":
+            jobs.poll(args.campaign)
+    else:
+        loaded = jobs.wait(args.campaign) if args.wait else jobs.poll(args.campaign)
+        print(f"📊 Outbox {args.campaign}: {jobs.outbox.stats(args.campaign)} ({loaded} neue Ergebnisse)")
+
+
+if __name__ == "__main__":
+    main()
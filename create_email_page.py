@@ -1,4 +1,5 @@
 import sys
+import time
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -6,6 +7,10 @@ import streamlit as st
 
 sys.path.append(".")
 from backend.email_service import EmailService  # nutzt deine echte SMTP + SQLite Logik
+from backend.data_cache import email_history_page, email_stats
+from src.content_automation.campaign_planner import fill
+from src.delivery.contact_stream import ContactStream, normalize_contact
+from src.delivery.outbox import Outbox
 
 
 # ---------- PAGE CONFIG & STYLING ----------
@@ -60,7 +65,7 @@ def get_email_service() -> EmailService:
 
 
 email_service = get_email_service()
-stats = email_service.get_stats()  # echte DB‑Daten
+stats = email_stats()  # echte DB‑Daten (gecacht bis emails.db sich ändert)
 
 
 # ---------- SIDEBAR ----------
@@ -277,26 +282,29 @@ elif sidebar_mode == "Bulk Campaigns":
         "Quelle", ["CSV Upload", "Manuelle Liste", "Leads aus Lead‑Modul"], horizontal=True
     )
 
+    # Empfänger bleiben ein Stream (Kontakt-Dicts) – beim Planen chunkweise direkt in die Outbox
+    recipients, recipient_count = [], 0
     if source == "CSV Upload":
-        csv_file = st.file_uploader("CSV mit Spalte `email` hochladen", type=["csv"])
-        recipients = []
+        csv_file = st.file_uploader("CSV/XLSX mit Spalte `email` hochladen", type=["csv", "xlsx"])
         if csv_file is not None:
-            df_csv = pd.read_csv(csv_file)
-            if "email" in df_csv.columns:
-                recipients = df_csv["email"].dropna().tolist()
-                st.success(f"{len(recipients)} Empfänger aus CSV geladen.")
+            # Nur gezählt und validiert – keine Adressliste im Speicher, pro Upload nur einmal
+            recipients = ContactStream(csv_file)
+            recipient_count = recipients.validate(cache=st.session_state)["valid"]
+            if recipient_count:
+                st.success(f"{recipient_count} Empfänger geladen ({recipients.stats['invalid']} ungültige Zeilen übersprungen).")
             else:
-                st.error("Spalte `email` nicht gefunden.")
+                st.error("Keine gültigen Adressen gefunden (Spalte `email` vorhanden?).")
     elif source == "Manuelle Liste":
         manual_list = st.text_area(
             "Emails (eine pro Zeile)",
             placeholder="a@firma.de\nb@firma.de\nc@firma.de",
             height=200,
         )
-        recipients = [l.strip() for l in manual_list.splitlines() if l.strip()]
+        contacts = (normalize_contact({"email": line})[0] for line in manual_list.splitlines())
+        recipients = [contact for contact in contacts if contact]
+        recipient_count = len(recipients)
     else:
         st.info("Integration mit Lead‑Modul kannst du später über LeadService ergänzen.")
-        recipients = []
 
     st.markdown("#### Kampagnen‑Template")
 
@@ -322,20 +330,30 @@ elif sidebar_mode == "Bulk Campaigns":
 
     if simulate_clicked:
         st.info(
-            f"Simulation: {len(recipients)} Empfänger würden mit diesem Template angeschrieben."
+            f"Simulation: {recipient_count} Empfänger würden mit diesem Template angeschrieben."
         )
 
     if launch_clicked:
         if not campaign_name:
             st.error("Bitte einen Kampagnennamen vergeben.")
-        elif not recipients:
+        elif not recipient_count:
             st.error("Keine Empfänger gefunden.")
         elif not bulk_subject or not bulk_body:
             st.error("Betreff und Template‑Text sind Pflicht.")
         else:
+            def render(contact):
+                values = {key: str(value) for key, value in contact.items()}
+                return fill(bulk_subject, values), fill(bulk_body, values)
+
+            # Fertige Entwürfe, sofort freigegeben → release_scheduled versendet über die Zustell-Policy
+            outbox, release_at = Outbox(), time.time()
+            if isinstance(recipients, ContactStream):
+                added = recipients.enqueue(outbox, campaign_name, not_before=release_at, render=render)
+            else:
+                added = outbox.enqueue(campaign_name, recipients, not_before=release_at, render=render)
             st.success(
-                f"Kampagne **{campaign_name}** mit {len(recipients)} Empfängern geplant "
-                "(Sende‑Logik kann über SBSEmailAutomation angebunden werden)."
+                f"Kampagne **{campaign_name}** mit {added} Empfängern geplant "
+                "– Versand übernimmt der Scheduler."
             )
 
 
@@ -344,24 +362,43 @@ elif sidebar_mode == "Bulk Campaigns":
 elif sidebar_mode == "History & Analytics":
     st.subheader("📊 Email Historie & Auswertung")
 
-    col_f1, col_f2 = st.columns(2)
+    col_f1, col_f2, col_f3 = st.columns(3)
     with col_f1:
         date_from = st.date_input(
             "Von", value=datetime.now().date() - timedelta(days=14)
         )
     with col_f2:
         date_to = st.date_input("Bis", value=datetime.now().date())
-
-    historie = email_service.get_history(limit=200)
+    with col_f3:
+        status_filter = st.selectbox("Status", ["Alle", "gesendet", "fehler"])
+
+    # Filter laufen in SQLite; Blättern per Cursor (Keyset) statt OFFSET
+    filters = {"date_from": date_from, "date_to": date_to}
+    if status_filter != "Alle":
+        filters["status"] = status_filter
+    if st.session_state.get("history_filters") != filters:
+        st.session_state["history_filters"] = filters
+        st.session_state["history_cursors"] = [None]
+    cursors = st.session_state["history_cursors"]
+
+    history_page = email_history_page(limit=200, after=cursors[-1], **filters)
+    historie = history_page["items"]
+
+    col_p1, col_p2, col_p3 = st.columns([1, 1, 4])
+    with col_p1:
+        if st.button("◀ Zurück", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_p2:
+        if st.button("Weiter ▶", disabled=not history_page["next_cursor"]):
+            cursors.append(history_page["next_cursor"])
+            st.rerun()
+    with col_p3:
+        st.caption(f"Seite {len(cursors)}")
 
     if historie:
-        df = pd.DataFrame(historie)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-        mask = (df["timestamp"].dt.date >= date_from) & (
-            df["timestamp"].dt.date <= date_to
-        )
-        df_f = df.loc[mask].copy()
+        df_f = pd.DataFrame(historie)
+        df_f["timestamp"] = pd.to_datetime(df_f["timestamp"])
 
         st.markdown("#### Verlauf (Anzahl pro Tag)")
         per_day = df_f.groupby(df_f["timestamp"].dt.date).size().reset_index(name="Anzahl")
@@ -387,7 +424,7 @@ elif sidebar_mode == "History & Analytics":
             mime="text/csv",
         )
     else:
-        st.info("Noch keine Email‑Historie vorhanden.")
+        st.info("Keine Email‑Historie im gewählten Zeitraum.")
 
 
 # ---------- MODE: SETTINGS ----------
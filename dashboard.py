@@ -9,6 +9,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import os
+from backend.data_cache import rollup, has_rollups
 
 st.set_page_config(
     page_title="SBS GTM Analytics", 
@@ -21,20 +22,19 @@ st.title("📊 SBS GTM Email Campaign Analytics")
 st.markdown(f"**Dashboard aktualisiert:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
 st.markdown("---")
 
-# Daten laden
-try:
-    df = pd.read_csv('campaign_results.csv')
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-except FileNotFoundError:
-    st.error("❌ Keine campaign_results.csv gefunden. Bitte zuerst eine Kampagne ausführen.")
+# Daten laden (vorberechnete Rollups, gecacht bis sich analytics.db ändert)
+if not has_rollups():
+    st.error("❌ Noch keine Kampagnendaten. Bitte zuerst eine Kampagne ausführen.")
     st.stop()
 
+totals = rollup('totals')
+
 # KPI Cards
 col1, col2, col3, col4 = st.columns(4)
 
-total = len(df)
-sent = len(df[df['status'] == 'sent'])
-failed = len(df[df['status'] == 'failed'])
+sent = totals.get('sent', 0)
+failed = totals.get('failed', 0)
+total = sent + failed
 success_rate = (sent/total*100) if total > 0 else 0
 
 with col1:
@@ -71,9 +71,12 @@ st.markdown("---")
 col_left, col_right = st.columns(2)
 
 with col_left:
-    # Kampagnen-Details Tabelle
+    # Kampagnen-Details Tabelle (nur die letzten Sends)
     st.subheader("📋 Kampagnen-Details")
     
+    df = pd.DataFrame(rollup('recent'),
+                      columns=['email', 'company', 'campaign', 'template', 'variant', 'status', 'timestamp'])
+    
     # Filteroptionen
     status_filter = st.multiselect(
         "Status filtern:",
@@ -85,24 +88,28 @@ with col_left:
     
     # Formatierte Tabelle
     display_df = filtered_df[['email', 'company', 'status', 'template', 'timestamp']].copy()
-    display_df['timestamp'] = display_df['timestamp'].dt.strftime('%d.%m.%Y %H:%M')
+    display_df['timestamp'] = pd.to_datetime(display_df['timestamp']).dt.strftime('%d.%m.%Y %H:%M')
     
     st.dataframe(
         display_df,
         use_container_width=True,
         hide_index=True
     )
+    
+    # Webhook-Events (delivered, opened, clicked, bounced …)
+    event_counts = {k: v for k, v in totals.items() if k not in ('sent', 'failed')}
+    if event_counts:
+        st.subheader("📨 Webhook-Events")
+        st.bar_chart(pd.Series(event_counts, name='Anzahl'))
 
 with col_right:
     # Status-Verteilung (Pie Chart)
     st.subheader("📊 Status-Verteilung")
     
-    status_counts = df['status'].value_counts()
-    
     fig_pie = px.pie(
-        values=status_counts.values,
-        names=status_counts.index,
-        color=status_counts.index,
+        values=[sent, failed],
+        names=['sent', 'failed'],
+        color=['sent', 'failed'],
         color_discrete_map={'sent': '#00C853', 'failed': '#FF1744'}
     )
     
@@ -112,7 +119,8 @@ with col_right:
     # Template-Verteilung
     st.subheader("📝 Template-Nutzung")
     
-    template_counts = df['template'].value_counts()
+    template_df = pd.DataFrame(rollup('by_template'), columns=['template', 'status', 'count'])
+    template_counts = template_df[template_df['status'].isin(['sent', 'failed'])].groupby('template')['count'].sum()
     
     fig_bar = px.bar(
         x=template_counts.index,
@@ -126,22 +134,23 @@ with col_right:
 
 st.markdown("---")
 
-# Timeline Visualisierung
+# Timeline Visualisierung (stündliche Rollups)
 st.subheader("⏱️ Versand-Timeline")
 
-fig_timeline = px.scatter(
-    df,
-    x='timestamp',
-    y='company',
+hourly_df = pd.DataFrame(rollup('hourly'), columns=['hour', 'status', 'count'])
+hourly_df['hour'] = pd.to_datetime(hourly_df['hour'])
+
+fig_timeline = px.bar(
+    hourly_df,
+    x='hour',
+    y='count',
     color='status',
-    size=[1]*len(df),
-    hover_data=['email', 'template'],
     color_discrete_map={'sent': '#00C853', 'failed': '#FF1744'}
 )
 
 fig_timeline.update_layout(
     xaxis_title="Zeitpunkt",
-    yaxis_title="Firma",
+    yaxis_title="Emails",
     showlegend=True
 )
 
@@ -153,9 +162,11 @@ st.subheader("💾 Export & Downloads")
 
 col_export1, col_export2, col_export3 = st.columns(3)
 
+daily_df = pd.DataFrame(rollup('daily'), columns=['day', 'status', 'count'])
+
 with col_export1:
-    # CSV Export
-    csv = df.to_csv(index=False).encode('utf-8')
+    # CSV Export (Tages-Rollup)
+    csv = daily_df.to_csv(index=False).encode('utf-8')
     st.download_button(
         label="📥 CSV herunterladen",
         data=csv,
@@ -167,7 +178,7 @@ with col_export2:
     # Excel Export
     if st.button("📊 Excel generieren"):
         excel_file = f'campaign_report_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
-        df.to_excel(excel_file, index=False)
+        daily_df.to_excel(excel_file, index=False)
         st.success(f"✓ Excel erstellt: {excel_file}")
 
 with col_export3:
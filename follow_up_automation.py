@@ -4,11 +4,20 @@ Automatisches Follow-up System - 3/7/14 Tage nach Erstkontakt
 Author: Luis Schenk
 """
 import pandas as pd
+from html import escape
 from datetime import datetime, timedelta
 from automated_email_sender import SBSEmailAutomation
 import os
+import sys
+import time
 from dotenv import load_dotenv
 import resend
+from src.delivery.outbox import Outbox
+from src.delivery.policy import CAMPAIGN_POLICY, PERMANENT, TRANSIENT
+from src.delivery.mime import new_message_id
+from src.delivery.replies import ReplyTracker
+from src.delivery.resend_batch import ResendBatchTransport
+from src.delivery.suppression import SuppressionList, list_unsubscribe_headers, unsubscribe_url
 
 load_dotenv()
 
@@ -62,8 +71,8 @@ SBS Deutschland GmbH"""
     }
 }
 
-def send_follow_up(contact_email, company, days_ago):
-    """Sendet Follow-up basierend auf Tagen seit Erstkontakt"""
+def render_follow_up(contact_email, company, days_ago):
+    """Resend-Params für ein Follow-up basierend auf Tagen seit Erstkontakt"""
     
     # Template auswählen
     if days_ago >= 14:
@@ -77,25 +86,71 @@ def send_follow_up(contact_email, company, days_ago):
     first_name = contact_email.split('@')[0].split('.')[0].title()
     subject = template['subject'].format(first_name=first_name, company_name=company)
     body = template['body'].format(first_name=first_name, company_name=company)
+    html = body.replace('\n', '<br>')
+    
+    # Signierter Abmeldelink im Text + List-Unsubscribe (One-Click) wie bei der Erstmail
+    link = unsubscribe_url(contact_email)
+    if link:
+        html += f'<br><br><small><a href="{escape(link)}">Keine weiteren Emails erhalten</a></small>'
     
-    # Senden via Resend
+    return {
+        "from": "Luis Schenk <ki@sbsdeutschland.de>",
+        "to": [contact_email],
+        "subject": subject,
+        "html": html,
+        "reply_to": "ki@sbsdeutschland.de",
+        "headers": {"Message-ID": new_message_id(contact_email, "sbsdeutschland.de"),
+                    **list_unsubscribe_headers(contact_email)},
+    }
+
+def send_follow_up(contact_email, company, days_ago):
+    """Sendet ein einzelnes Follow-up (Zustell-Policy: Retry bzw. Outbox statt Verlust)"""
+    reason = SuppressionList().reason(contact_email)
+    if reason or ReplyTracker().stopped([contact_email]):
+        print(f"⛔ Follow-up übersprungen ({reason or 'Antwort erhalten'}): {contact_email}")
+        return False
     resend.api_key = os.getenv('RESEND_API_KEY')
+    params = render_follow_up(contact_email, company, days_ago)
     
-    try:
-        params = {
-            "from": "Luis Schenk <ki@sbsdeutschland.de>",
-            "to": [contact_email],
-            "subject": subject,
-            "html": body.replace('\n', '<br>'),
-            "reply_to": "ki@sbsdeutschland.de",
-        }
-        
-        email = resend.Emails.send(params)
-        print(f"✓ Follow-up gesendet an {contact_email} (Tag {days_ago}) - ID: {email['id']}")
+    outcome = CAMPAIGN_POLICY.execute(resend.Emails.send, params)
+    if outcome['status'] == 'sent':
+        ReplyTracker().record_sent(params['headers']['Message-ID'], contact_email, 'followup')
+        print(f"✓ Follow-up gesendet an {contact_email} (Tag {days_ago}) - ID: {outcome['result']['id']}")
         return True
-    except Exception as e:
-        print(f"✗ Fehler bei {contact_email}: {str(e)}")
-        return False
+    defer_follow_up(params, company, outcome)
+    print(f"✗ Fehler bei {contact_email} ({outcome['status']}, {outcome['kind']}): {outcome['error']}")
+    return False
+
+def defer_follow_up(params, company, outcome):
+    """Fehlgeschlagenes Follow-up in der Outbox vermerken (deferred → Retry-Pass der Pipeline, dead → Dead Letter)"""
+    campaign = f"followup_{datetime.now().strftime('%Y%m%d')}"
+    contact = {'email': params['to'][0], 'company_name': company}
+    Outbox().record_attempt(campaign, contact, params['subject'], params['html'], outcome)
+
+def send_follow_up_wave(due):
+    """Sendet alle fälligen Follow-ups gesammelt über die Resend Batch-API (100 pro Request)"""
+    if not due:
+        return 0
+    transport = ResendBatchTransport(os.getenv('RESEND_API_KEY'))
+    messages = [render_follow_up(email, company, days) for email, company, days in due]
+    results = transport.send(messages)
+    replies = ReplyTracker()
+    
+    for (email, company, days_ago), params, result in zip(due, messages, results):
+        if result['id']:
+            replies.record_sent(params['headers']['Message-ID'], email, 'followup')
+            print(f"✓ Follow-up gesendet an {email} (Tag {days_ago}) - ID: {result['id']}")
+            continue
+        print(f"✗ Fehler bei {email}: {result['error']}")
+        if result['retryable']:
+            outcome = {'status': 'deferred', 'error': result['error'], 'kind': TRANSIENT,
+                       'attempts': result['attempts'],
+                       'retry_at': time.time() + CAMPAIGN_POLICY.backoff(result['attempts'])}
+        else:
+            outcome = {'status': 'dead', 'error': result['error'], 'kind': PERMANENT, 'attempts': result['attempts']}
+        defer_follow_up(params, company, outcome)
+    print(f"   {transport.stats['requests']} Batch-Requests, {transport.stats['retried']} Wiederholungen")
+    return sum(1 for result in results if result['id'])
 
 def main():
     """Hauptfunktion für Follow-up Automation"""
@@ -113,7 +168,7 @@ def main():
         return
     
     now = datetime.now()
-    follow_ups_sent = 0
+    due = []
     
     # Prüfe jeden Kontakt
     for _, row in df.iterrows():
@@ -124,21 +179,32 @@ def main():
         
         # Follow-up Logik
         if days_ago == 3:
-            print(f"\n📧 Tag 3 Follow-up: {row['email']}")
-            if send_follow_up(row['email'], row['company'], 3):
-                follow_ups_sent += 1
+            print(f"📧 Tag 3 Follow-up: {row['email']}")
         elif days_ago == 7:
-            print(f"\n📧 Tag 7 Follow-up: {row['email']}")
-            if send_follow_up(row['email'], row['company'], 7):
-                follow_ups_sent += 1
+            print(f"📧 Tag 7 Follow-up: {row['email']}")
         elif days_ago == 14:
-            print(f"\n📧 Tag 14 Follow-up (letzte Nachricht): {row['email']}")
-            if send_follow_up(row['email'], row['company'], 14):
-                follow_ups_sent += 1
+            print(f"📧 Tag 14 Follow-up (letzte Nachricht): {row['email']}")
+        else:
+            continue
+        due.append((row['email'], row['company'], days_ago))
+    
+    # Bounces, Complaints und Abmeldungen nie nachfassen – wer geantwortet hat, auch nicht
+    allowed, suppressed = SuppressionList().filter([{'email': item[0], 'due': item} for item in due])
+    for contact in suppressed:
+        print(f"⛔ Follow-up übersprungen ({contact['suppression_reason']}): {contact['email']}")
+    replied = ReplyTracker().stopped(contact['email'] for contact in allowed)
+    for email in sorted(replied):
+        print(f"💬 Follow-up übersprungen (Antwort erhalten): {email}")
+    allowed = [contact for contact in allowed if contact['email'] not in replied]
+    follow_ups_sent = send_follow_up_wave([contact['due'] for contact in allowed])
     
     print(f"\n{'='*60}")
     print(f"✓ {follow_ups_sent} Follow-ups versendet")
     print(f"{'='*60}")
 
 if __name__ == "__main__":
-    main()
+    if "--profile" in sys.argv:
+        from src.utils.profiling import profile_run
+        profile_run("follow_up", main)
+    else:
+        main()
@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from backend.data_cache import load_csv
 
 def show():
     st.header("📊 Analytics & Reports")
@@ -34,7 +35,7 @@ def show():
         st.subheader("📧 Email-Performance")
         
         try:
-            df = pd.read_csv('campaign_results.csv')
+            df = load_csv('campaign_results.csv')
             
             # Template Performance
             template_stats = df['template'].value_counts()
@@ -2,8 +2,12 @@ import streamlit as st
 import pandas as pd
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from automated_email_sender import SBSEmailAutomation, TARGET_CONTACTS
+from backend.data_cache import load_csv
+from src.delivery.contact_stream import ContactStream
+from src.delivery.outbox import Outbox
 
 def show():
     st.header("📧 Email Automation")
@@ -53,14 +57,16 @@ def show():
         st.subheader("Kontakte verwalten")
         
         # Upload CSV
-        uploaded_file = st.file_uploader("Kontakte hochladen (CSV)", type=['csv'])
+        uploaded_file = st.file_uploader("Kontakte hochladen (CSV/XLSX)", type=['csv', 'xlsx'])
         
         if uploaded_file:
-            df = pd.read_csv(uploaded_file)
-            st.dataframe(df, width='stretch')
+            stream = ContactStream(uploaded_file)
+            st.dataframe(pd.DataFrame(stream.preview(50)), width='stretch')
             
             if st.button("Kontakte importieren"):
-                st.success(f"✓ {len(df)} Kontakte importiert")
+                added = stream.enqueue(Outbox(), campaign_name, not_before=time.time())
+                st.success(f"✓ {added} Kontakte importiert ({stream.stats['invalid']} ungültige Zeilen übersprungen) "
+                           f"– Versand übernimmt der Scheduler")
         
         st.markdown("---")
         
@@ -91,7 +97,7 @@ def show():
         st.subheader("Kampagnen-Ergebnisse")
         
         try:
-            results_df = pd.read_csv('campaign_results.csv')
+            results_df = load_csv('campaign_results.csv')
             
             col1, col2, col3 = st.columns(3)
             
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
+from backend import data_cache
 
 load_dotenv()
 
@@ -81,8 +82,8 @@ def show():
         
         with col_sys1:
             if st.button("🔄 Cache leeren"):
-                st.cache_data.clear()
-                st.success("✅ Cache geleert")
+                data_cache.clear()
+                st.success("✅ Daten-Cache geleert")
         
         with col_sys2:
             if st.button("📥 Logs exportieren"):
@@ -187,6 +187,8 @@ class LinkedInAutomationCLI:
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(content)
         
+        self.content_generator.duplicate_index.add("generated_content", filename, post['content'], kind="post")
+        
         console.print(f"\n✅ Post gespeichert: [cyan]{filepath}[/cyan]\n", style="bold green")
     
     def show_settings(self):
@@ -213,6 +215,10 @@ class LinkedInAutomationCLI:
         console.print(f"[bold cyan]📝 Post: {post.get('topic') or post.get('subtopic', 'Unbekannt')}[/bold cyan]")
         console.print("═" * 70)
         
+        if post.get('duplicate_of'):
+            dup = post['duplicate_of']
+            console.print(f"[yellow]⚠️  Near-Duplicate ({dup['similarity']:.0%}) zu {dup['source']}: {dup['key']}[/yellow]")
+        
         console.print("\n[bold]CONTENT:[/bold]")
         console.print(Panel(post['content'], border_style="blue"))
         
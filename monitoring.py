@@ -2,63 +2,92 @@
 """
 Performance Monitoring & Alert System
 Überwacht Kampagnen-Performance und sendet Alerts
+
+Status kommt aus gleitenden Fenstern (src/analytics/health.py), nicht mehr aus
+der All-Time-Erfolgsquote; Alerts sind dedupliziert und haben einen Cooldown.
 """
 import pandas as pd
 from datetime import datetime, timedelta
 import resend
 import os
+from typing import Dict, List
 from dotenv import load_dotenv
+from src.analytics.health import HealthEvaluator, SLO_CONFIG
+from src.delivery.policy import ALERT_POLICY
 
 load_dotenv()
 resend.api_key = os.getenv('RESEND_API_KEY')
 
+EVENT_LOG = 'email_events.csv'
+
+def _epoch(timestamp: pd.Timestamp) -> float:
+    """Naive Zeitstempel sind Ortszeit (datetime.now()) – pandas' .timestamp() nähme UTC an"""
+    if timestamp.tzinfo is not None:
+        return timestamp.timestamp()
+    return timestamp.to_pydatetime().timestamp()
+
+def _replay(evaluator: HealthEvaluator, since: datetime):
+    """Sends + Webhook-Events der letzten 24h in die Fenster einspielen"""
+    df = pd.read_csv('campaign_results.csv')
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    for row in df[df['timestamp'] > since].itertuples():
+        evaluator.record_send(row.status == 'sent', ts=_epoch(row.timestamp))
+    
+    if os.path.exists(EVENT_LOG):
+        events = pd.read_csv(EVENT_LOG)
+        events['timestamp'] = pd.to_datetime(events['timestamp'])
+        for row in events[events['timestamp'] > since].itertuples():
+            evaluator.record_event(row.event_type, ts=_epoch(row.timestamp))
+    return df
+
 def check_campaign_health():
-    """Prüft Kampagnen-Gesundheit"""
+    """Prüft Kampagnen-Gesundheit (Status aus 5min/1h/24h-Fenstern + SLO-Regeln)"""
+    evaluator = HealthEvaluator.from_config(SLO_CONFIG)
     try:
-        df = pd.read_csv('campaign_results.csv')
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = _replay(evaluator, datetime.now() - timedelta(hours=24))
     except FileNotFoundError:
         return None
     
     total = len(df)
     sent = len(df[df['status'] == 'sent'])
     failed = len(df[df['status'] == 'failed'])
-    success_rate = (sent/total*100) if total > 0 else 0
-    
-    # Letzte 24h
-    last_24h = df[df['timestamp'] > datetime.now() - timedelta(hours=24)]
+    windows = evaluator.snapshot()
+    violations, evaluated = evaluator.evaluate()
     
     health = {
         'total': total,
         'sent': sent,
         'failed': failed,
-        'success_rate': success_rate,
-        'last_24h': len(last_24h),
-        'status': 'healthy' if success_rate >= 95 else 'warning' if success_rate >= 80 else 'critical'
+        'success_rate': windows['24h']['success_rate'] * 100,
+        'last_24h': windows['24h']['attempts'],
+        'windows': windows,
+        'violations': violations,
+        'evaluated': sorted(evaluated),
+        'status': evaluator.status()
     }
     
     return health
 
-def send_alert(health):
-    """Sendet Alert-Email bei Problemen"""
-    if health['status'] == 'critical':
+def notify(alerts: List[Dict]):
+    """Alert-Sink: eine Email für alle fälligen SLO-Verletzungen"""
+    critical = any(a['severity'] == 'critical' for a in alerts)
+    if critical:
         subject = "🚨 CRITICAL: SBS GTM Kampagnen-Performance"
-        message = f"""
-        <h2>🚨 Kritische Kampagnen-Performance</h2>
-        <p><strong>Erfolgsrate:</strong> {health['success_rate']:.1f}%</p>
-        <p><strong>Fehlgeschlagen:</strong> {health['failed']}/{health['total']}</p>
-        <p><strong>Letzte 24h:</strong> {health['last_24h']} Emails</p>
-        <p>Bitte prüfen Sie die Kampagnen-Konfiguration.</p>
-        """
-    elif health['status'] == 'warning':
-        subject = "⚠️ WARNING: SBS GTM Performance unter 95%"
-        message = f"""
-        <h2>⚠️ Kampagnen-Performance-Warnung</h2>
-        <p><strong>Erfolgsrate:</strong> {health['success_rate']:.1f}%</p>
-        <p><strong>Gesamt versendet:</strong> {health['sent']}/{health['total']}</p>
-        """
+        headline = "🚨 Kritische Kampagnen-Performance"
     else:
-        return  # Kein Alert bei healthy
+        subject = "⚠️ WARNING: SBS GTM Kampagnen-Performance"
+        headline = "⚠️ Kampagnen-Performance-Warnung"
+    
+    rows = "".join(
+        f"<li><strong>{a['rule']}</strong> ({a['window']}): {a['metric']} = {a['value']:.3g} "
+        f"(Schwelle {a['threshold']}, {a['events']} Events)</li>"
+        for a in alerts
+    )
+    message = f"""
+    <h2>{headline}</h2>
+    <ul>{rows}</ul>
+    <p>Bitte prüfen Sie die Kampagnen-Konfiguration.</p>
+    """
     
     params = {
         "from": "SBS Monitoring <ki@sbsdeutschland.de>",
@@ -67,11 +96,20 @@ def send_alert(health):
         "html": message
     }
     
-    try:
-        resend.Emails.send(params)
-        print(f"✓ Alert gesendet: {health['status']}")
-    except Exception as e:
-        print(f"✗ Alert-Fehler: {str(e)}")
+    # Alerts kommen gerade bei Provider-Problemen → Retries inline mit Backoff
+    outcome = ALERT_POLICY.execute(resend.Emails.send, params)
+    if outcome['status'] == 'sent':
+        print(f"✓ Alert gesendet: {', '.join(a['rule'] for a in alerts)}")
+    else:
+        print(f"✗ Alert-Fehler ({outcome['kind']}, {outcome['attempts']} Versuche): {outcome['error']}")
+
+def send_alert(health):
+    """Sendet Alert-Email bei Problemen (dedupliziert: gleiche Regel erst nach Cooldown erneut)"""
+    if health['status'] == 'healthy':
+        return  # Kein Alert bei healthy
+    
+    HealthEvaluator.from_config(SLO_CONFIG, sink=notify).alerts.process(health['violations'],
+                                                                        evaluated=health.get('evaluated'))
 
 def generate_daily_report():
     """Generiert täglichen Performance-Report"""
@@ -86,10 +124,15 @@ def generate_daily_report():
     print("="*60)
     print(f"Datum: {datetime.now().strftime('%d.%m.%Y %H:%M')}")
     print(f"Status: {health['status'].upper()}")
-    print(f"Erfolgsrate: {health['success_rate']:.1f}%")
+    print(f"Erfolgsrate (24h): {health['success_rate']:.1f}%")
     print(f"Versendet: {health['sent']}/{health['total']}")
     print(f"Fehlgeschlagen: {health['failed']}")
     print(f"Letzte 24h: {health['last_24h']} Emails")
+    for name, stats in health['windows'].items():
+        print(f"  {name:>4}: {stats['attempts']} Versuche, {stats['failure_rate']:.1%} Fehler, "
+              f"{stats['bounce_rate']:.1%} Bounces")
+    for violation in health['violations']:
+        print(f"  ⚠️  {violation['rule']}: {violation['metric']} = {violation['value']:.3g} > {violation['threshold']}")
     print("="*60)
     
     # Alert senden falls nötig
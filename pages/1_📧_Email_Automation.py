@@ -202,16 +202,27 @@ with tab2:
     st.subheader("📊 Steuerberater-Kampagne")
     st.info("💡 Upload CSV mit Steuerberater-Kontakten für Massen-Versand (aus CRM Template)")
 
-    uploaded_file = st.file_uploader("CSV hochladen", type=['csv'])
+    uploaded_file = st.file_uploader("CSV/XLSX hochladen", type=['csv', 'xlsx'])
 
     if uploaded_file:
+        import time
         import pandas as pd
-        df = pd.read_csv(uploaded_file)
-        st.dataframe(df.head(10))
-        st.metric("Kontakte geladen", len(df))
+        from datetime import datetime
+        from src.delivery.contact_stream import ContactStream
+        from src.delivery.outbox import Outbox
+
+        # Chunkweise lesen – auch Exporte mit Millionen Zeilen passen in den Speicher
+        stream = ContactStream(uploaded_file)
+        st.dataframe(pd.DataFrame(stream.preview(10)))
+        stats = stream.validate(cache=st.session_state)  # Volldurchlauf nur einmal pro Upload
+        st.metric("Kontakte geladen", stats['valid'])
+        if stats['invalid']:
+            st.warning(f"⚠️ {stats['invalid']} Zeilen ohne gültige Email übersprungen")
 
         if st.button("🚀 Kampagne starten", type="primary"):
-            st.warning("⚠️ Kampagne wird vorbereitet... Bitte API Keys prüfen.")
+            campaign_id = f"campaign_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            added = stream.enqueue(Outbox(), campaign_id, not_before=time.time())  # sofort freigeben
+            st.success(f"✓ {added} Kontakte in der Outbox ({campaign_id}) – Versand übernimmt der Scheduler")
 
 with tab3:
     st.subheader("📜 Versand-Verlauf")
@@ -1,10 +1,15 @@
 import streamlit as st
 import os
+import sys
 import yaml
 from pathlib import Path
 from datetime import datetime
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.content_automation.near_duplicates import NearDuplicateIndex, REGENERATE_HINT
+from backend.data_cache import load_yaml
+
 st.set_page_config(page_title="SBS Nexus – LinkedIn Posts", page_icon="✍️")
 
 st.title("✍️ SBS Nexus LinkedIn Automation")
@@ -19,8 +24,7 @@ if not calendar_file.exists():
     st.stop()
 
 try:
-    with open(calendar_file, 'r', encoding='utf-8') as f:
-        calendar = yaml.safe_load(f)
+    calendar = load_yaml(calendar_file)
 except Exception as e:
     st.error(f"❌ Fehler beim Laden: {str(e)}")
     st.stop()
@@ -70,6 +74,18 @@ def generate_with_openai(prompt, system_prompt="Du bist LinkedIn Content-Experte
     return response.choices[0].message.content.strip()
 
 
+def generate_unique_post(prompt, system_prompt):
+    """Generiere Post – bei Near-Duplicate einmal neu, sonst markieren"""
+    index = NearDuplicateIndex()
+    for attempt in range(2):
+        post = generate_with_openai(prompt, system_prompt)
+        duplicate = index.check(post, kind="post")
+        if not duplicate:
+            break
+        prompt += REGENERATE_HINT
+    return post, duplicate
+
+
 # Main Content
 tab1, tab2, tab3, tab4 = st.tabs(["📝 Neuer Post", "📚 Post-Serie", "📅 Content-Kalender", "📊 Hashtag-Strategie"])
 
@@ -174,12 +190,13 @@ HASHTAGS bevorzugt: #SBSNexus #ERechnung #Steuerberater #DATEV #KI #Mittelstand
 
 Schreibe NUR den Post, keine Meta-Kommentare."""
 
-                    post_content = generate_with_openai(
+                    post_content, duplicate = generate_unique_post(
                         prompt,
                         "Du bist LinkedIn Content-Stratege für B2B Enterprise SaaS im deutschen Steuerberater-Markt. Du schreibst auf dem Niveau von Apple, SAP und NVIDIA Corporate Communications."
                     )
 
                     st.session_state['generated_post'] = post_content
+                    st.session_state['post_duplicate'] = duplicate
                     st.session_state['post_theme'] = theme['title']
                     st.success("✅ Post erfolgreich generiert!")
                     st.rerun()
@@ -191,6 +208,11 @@ Schreibe NUR den Post, keine Meta-Kommentare."""
         st.markdown("---")
         st.subheader("📄 Generierter Post")
 
+        duplicate = st.session_state.get('post_duplicate')
+        if duplicate:
+            st.warning(f"⚠️ Sehr ähnlich ({duplicate['similarity']:.0%}) zu bereits gespeichertem Inhalt "
+                       f"({duplicate['source']}: {duplicate['key']}) – bitte vor Veröffentlichung anpassen.")
+
         post_text = st.text_area(
             "Post-Text (editierbar)",
             value=st.session_state['generated_post'],
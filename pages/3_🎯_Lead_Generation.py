@@ -2,8 +2,23 @@ import streamlit as st
 import yaml
 from pathlib import Path
 import pandas as pd
-import requests
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from backend.data_cache import load_yaml, hunter_client, lead_service
+from src.lead_generation.hunter_client import HunterError, import_results, normalize_domain
+from src.lead_generation.signal_crawler import SignalCrawler
+
+# Checkliste ↔ vom Crawler erkannte Signale
+CHECKLIST_SIGNALS = {
+    "q1": "DATEV Mitglied",
+    "q2": "Digitale DATEV-Kanzlei Label",
+    "q3": "Website modern",
+    "q4": "DATEV Unternehmen Online aktiv",
+    "q5": "KI-Tools auf Website erwähnt",
+    "q6": "Online-Mandantenportal",
+}
 
 st.set_page_config(page_title="SBS Nexus – Lead Generation", page_icon="🎯")
 
@@ -15,8 +30,7 @@ config_path = Path("config")
 icp_file = config_path / "icp_filters.yaml"
 
 if icp_file.exists():
-    with open(icp_file, 'r', encoding='utf-8') as f:
-        icp = yaml.safe_load(f)
+    icp = load_yaml(icp_file)
 else:
     st.error("❌ config/icp_filters.yaml nicht gefunden!")
     st.stop()
@@ -103,7 +117,8 @@ with tab1:
 with tab2:
     st.subheader("🔍 Steuerberater-Suche")
 
-    search_method = st.radio("Such-Methode", ["Domain Search (Hunter.io)", "Email Finder (Name + Domain)", "Manuelle Recherche"])
+    search_method = st.radio("Such-Methode", ["Domain Search (Hunter.io)", "Bulk Domain Search (Hunter.io)",
+                                              "Email Finder (Name + Domain)", "Manuelle Recherche"])
 
     if search_method == "Domain Search (Hunter.io)":
         st.info("💡 Finde alle öffentlichen Email-Adressen einer Kanzlei-Domain")
@@ -118,33 +133,74 @@ with tab2:
             else:
                 with st.spinner(f"Suche Emails für {domain}..."):
                     try:
-                        url = "https://api.hunter.io/v2/domain-search"
-                        params = {"domain": domain, "api_key": hunter_key, "limit": 25}
-                        response = requests.get(url, params=params, timeout=15)
-                        response.raise_for_status()
-                        data = response.json()
-
-                        if 'data' in data:
-                            emails = data['data'].get('emails', [])
-                            if emails:
-                                st.success(f"✅ {len(emails)} Emails gefunden!")
-                                df_data = []
-                                for email_info in emails:
-                                    df_data.append({
-                                        'Email': email_info.get('value', 'N/A'),
-                                        'Name': f"{email_info.get('first_name', '')} {email_info.get('last_name', '')}".strip(),
-                                        'Position': email_info.get('position', 'N/A'),
-                                        'Confidence': f"{email_info.get('confidence', 0)}%"
-                                    })
-                                df = pd.DataFrame(df_data)
-                                st.dataframe(df, use_container_width=True, hide_index=True)
-                                csv = df.to_csv(index=False)
-                                st.download_button("💾 CSV Export", csv, f"leads_{domain}.csv", "text/csv", use_container_width=True)
-                            else:
-                                st.warning("⚠️ Keine Emails gefunden – nutze Impressum/Kontaktseite der Kanzlei")
-                    except Exception as e:
+                        data = hunter_client(hunter_key).domain_search(domain, limit=25)
+                        st.session_state.hunter_results = {normalize_domain(domain): data}
+                    except HunterError as e:
                         st.error(f"❌ Fehler: {str(e)}")
 
+        results = st.session_state.get('hunter_results', {})
+        data = next(iter(results.values()), None) if len(results) == 1 else None
+        if data is not None:
+            emails = data.get('emails', [])
+            if emails:
+                st.success(f"✅ {len(emails)} Emails gefunden!")
+                df_data = []
+                for email_info in emails:
+                    df_data.append({
+                        'Email': email_info.get('value', 'N/A'),
+                        'Name': f"{email_info.get('first_name') or ''} {email_info.get('last_name') or ''}".strip(),
+                        'Position': email_info.get('position', 'N/A'),
+                        'Confidence': f"{email_info.get('confidence', 0)}%"
+                    })
+                df = pd.DataFrame(df_data)
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                col1, col2 = st.columns(2)
+                with col1:
+                    csv = df.to_csv(index=False)
+                    st.download_button("💾 CSV Export", csv, f"leads_{next(iter(results))}.csv", "text/csv", use_container_width=True)
+                with col2:
+                    if st.button("➕ In Leads übernehmen", use_container_width=True):
+                        counts = import_results(results, lead_service())
+                        st.success(f"✓ {counts['added']} neu, {counts['merged']} zusammengeführt")
+            else:
+                st.warning("⚠️ Keine Emails gefunden – nutze Impressum/Kontaktseite der Kanzlei")
+
+    elif search_method == "Bulk Domain Search (Hunter.io)":
+        st.info("💡 Viele Kanzlei-Domains auf einmal – parallel, gecacht, Credits werden geschont")
+
+        domains_text = st.text_area("Domains (eine pro Zeile)", placeholder="stbstaat.de\nhrsteuer.de", height=150)
+        write_leads = st.checkbox("Ergebnisse direkt in Leads übernehmen", value=True)
+
+        if st.button("🔍 Bulk-Suche starten", type="primary", use_container_width=True):
+            domains = [d for d in domains_text.splitlines() if d.strip()]
+            if not hunter_key:
+                st.error("❌ Bitte Hunter.io API Key eingeben!")
+            elif not domains:
+                st.error("❌ Bitte mindestens eine Domain eingeben!")
+            else:
+                client = hunter_client(hunter_key)
+                progress = st.progress(0.0)
+                done = []
+
+                def on_result(domain, result):
+                    done.append(domain)
+                    progress.progress(len(done) / len(set(domains)))
+
+                with st.spinner(f"Suche Emails für {len(domains)} Domains..."):
+                    results = client.bulk_domain_search(domains, on_result=on_result)
+                progress.progress(1.0)
+
+                rows = [{'Domain': domain,
+                         'Emails': len(result.get('emails', [])),
+                         'Status': f"❌ {result['error']}" if 'error' in result else "✅"}
+                        for domain, result in results.items()]
+                st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+                st.caption(f"{client.stats['requests']} API-Requests, {client.stats['cache_hits']} Cache-Treffer"
+                           + (f", {client.credits_available} Credits übrig" if client.credits_available is not None else ""))
+                if write_leads:
+                    counts = import_results(results, lead_service())
+                    st.success(f"✓ Leads: {counts['added']} neu, {counts['merged']} zusammengeführt")
+
     elif search_method == "Email Finder (Name + Domain)":
         st.info("💡 Finde Email basierend auf Name und Kanzlei-Domain")
         col1, col2 = st.columns(2)
@@ -162,20 +218,15 @@ with tab2:
             else:
                 with st.spinner("Suche Email..."):
                     try:
-                        url = "https://api.hunter.io/v2/email-finder"
-                        params = {"domain": domain, "first_name": first_name, "last_name": last_name, "api_key": hunter_key}
-                        response = requests.get(url, params=params, timeout=15)
-                        response.raise_for_status()
-                        data = response.json()
-                        if 'data' in data:
-                            email = data['data'].get('email')
-                            score = data['data'].get('score', 0)
-                            if email:
-                                st.success(f"✅ Email gefunden: **{email}**")
-                                st.metric("Confidence", f"{score}%")
-                            else:
-                                st.warning("⚠️ Keine Email gefunden")
-                    except Exception as e:
+                        data = hunter_client(hunter_key).email_finder(domain, first_name, last_name)
+                        email = data.get('email')
+                        score = data.get('score', 0)
+                        if email:
+                            st.success(f"✅ Email gefunden: **{email}**")
+                            st.metric("Confidence", f"{score}%")
+                        else:
+                            st.warning("⚠️ Keine Email gefunden")
+                    except HunterError as e:
                         st.error(f"❌ Fehler: {str(e)}")
 
     else:
@@ -189,6 +240,21 @@ with tab2:
         5. **LinkedIn** → Steuerberater + Stadt → Profil prüfen
         """)
 
+        st.markdown("### 🌐 Website automatisch prüfen")
+        site = st.text_input("Kanzlei-Website", placeholder="stbstaat.de")
+        if st.button("🔎 Digital-Signale erkennen", use_container_width=True) and site:
+            with st.spinner(f"Prüfe Startseite + Impressum von {site}..."):
+                result = next(iter(SignalCrawler().run([site]).values()), None)
+            if result is None or result['error']:
+                st.error(f"❌ Website nicht erreichbar: {result['error'] if result else site}")
+            else:
+                for key, signal in CHECKLIST_SIGNALS.items():
+                    st.session_state[key] = signal in result['signals']
+                st.success(f"✅ {len(result['signals'])} Signale erkannt" +
+                           (f" – Impressum: {', '.join(result['emails'][:3])}" if result['emails'] else ""))
+                for signal, evidence in result['evidence'].items():
+                    st.caption(f"**{signal}:** …{evidence}…")
+
         st.markdown("### ✅ Qualifizierungs-Checkliste")
         col1, col2 = st.columns(2)
         with col1:
@@ -1,24 +1,30 @@
 import streamlit as st
 import pandas as pd
+import os
+import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from backend.data_cache import rollup, has_rollups
+
 st.set_page_config(page_title="SBS Nexus – Analytics", page_icon="📊", layout="wide")
 
 st.title("📊 SBS Nexus GTM Analytics")
 st.caption("Kampagnen-Performance für Steuerberater-Outreach & LinkedIn Content")
 
-# Versuche echte Daten zu laden
-results_file = Path("campaign_results.csv")
-has_real_data = results_file.exists()
+
+# Vorberechnete Rollups (gecacht bis sich analytics.db ändert)
+has_real_data = has_rollups()
 
 if has_real_data:
-    df = pd.read_csv(results_file)
+    totals = rollup('totals')
     
-    total_sent = len(df[df['status'] == 'sent'])
-    total_failed = len(df[df['status'] == 'failed'])
-    success_rate = (total_sent / len(df) * 100) if len(df) > 0 else 0
+    total_sent = totals.get('sent', 0)
+    total_failed = totals.get('failed', 0)
+    total = total_sent + total_failed
+    success_rate = (total_sent / total * 100) if total > 0 else 0
     
     st.success("✅ Echte Kampagnen-Daten geladen")
 else:
@@ -39,8 +45,7 @@ with col2:
 
 with col3:
     if has_real_data:
-        unique_companies = df['company'].nunique()
-        st.metric("Unternehmen erreicht", unique_companies)
+        st.metric("Unternehmen erreicht", rollup('companies_reached'))
     else:
         st.metric("LinkedIn Posts (30d)", "8", "+2")
 
@@ -56,20 +61,21 @@ with tab1:
     st.subheader("📧 Email Campaign Analytics")
     
     if has_real_data:
-        st.dataframe(df, use_container_width=True)
+        recent_df = pd.DataFrame(rollup('recent'),
+                                 columns=['email', 'company', 'campaign', 'template', 'variant', 'status', 'timestamp'])
+        st.dataframe(recent_df, use_container_width=True)
         
         # Erfolgsrate nach Template
-        if 'template' in df.columns:
-            template_stats = df.groupby('template')['status'].value_counts().unstack(fill_value=0)
-            st.markdown("### 📋 Performance nach Template")
-            st.bar_chart(template_stats)
+        template_df = pd.DataFrame(rollup('by_template'), columns=['template', 'status', 'count'])
+        template_stats = template_df.pivot_table(index='template', columns='status', values='count', fill_value=0)
+        st.markdown("### 📋 Performance nach Template")
+        st.bar_chart(template_stats)
         
         # Timeline
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            daily_stats = df.groupby(df['timestamp'].dt.date).size()
-            st.markdown("### 📅 Versand-Timeline")
-            st.line_chart(daily_stats)
+        daily_df = pd.DataFrame(rollup('daily'), columns=['day', 'status', 'count'])
+        daily_stats = daily_df.groupby('day')['count'].sum()
+        st.markdown("### 📅 Versand-Timeline")
+        st.line_chart(daily_stats)
     else:
         st.info("🔜 Keine Email-Kampagnen Daten verfügbar")
         
@@ -85,21 +91,33 @@ with tab1:
 with tab2:
     st.subheader("📋 Template-Analyse")
     
-    template_data = pd.DataFrame({
-        'Template': ['StB Digital-affin', 'StB DATEV Label', 'KMU-Entscheider'],
-        'Verwendet': [12, 8, 5],
-        'Erfolgsquote': ['92%', '88%', '80%']
-    })
+    if has_real_data:
+        variant_df = pd.DataFrame(rollup('by_variant'), columns=['Template', 'Variante', 'status', 'count'])
+        pivot = variant_df.pivot_table(index=['Template', 'Variante'], columns='status',
+                                       values='count', fill_value=0).reset_index()
+        for column in ('sent', 'failed'):
+            if column not in pivot:
+                pivot[column] = 0
+        pivot['Verwendet'] = pivot['sent'] + pivot['failed']
+        pivot['Erfolgsquote'] = (pivot['sent'] / pivot['Verwendet'].where(pivot['Verwendet'] > 0) * 100) \
+            .fillna(0).map(lambda rate: f"{rate:.0f}%")
+        template_data = pivot.drop(columns=['sent', 'failed'])
+    else:
+        template_data = pd.DataFrame({
+            'Template': ['StB Digital-affin', 'StB DATEV Label', 'KMU-Entscheider'],
+            'Verwendet': [12, 8, 5],
+            'Erfolgsquote': ['92%', '88%', '80%']
+        })
     
     st.dataframe(template_data, use_container_width=True)
-    st.bar_chart(template_data.set_index('Template')['Verwendet'])
+    st.bar_chart(template_data.groupby('Template')['Verwendet'].sum())
 
 with tab3:
     st.subheader("🎯 Kampagnen-Verlauf")
     
     if has_real_data:
-        st.success(f"✅ Letzte Kampagne: {df['timestamp'].max()}")
-        st.metric("Gesamt versendet (all time)", len(df))
+        st.success(f"✅ Letzte Kampagne: {rollup('last_send_at')}")
+        st.metric("Gesamt versendet (all time)", total_sent + total_failed)
     else:
         st.info("Noch keine Kampagnen durchgeführt")
 
@@ -5,20 +5,29 @@ Nutzt OpenAI und Anthropic für verschiedene Content-Typen
 """
 
 import os
+import time
 from dotenv import load_dotenv
 from openai import OpenAI
 from anthropic import Anthropic
-from typing import Literal
+from typing import Literal, Optional
+
+from src.ai.prompt_context import (
+    build_system_block, openai_messages, anthropic_system
+)
+from src.ai.usage_tracker import anthropic_usage, log_usage, openai_usage
+from src.content_automation.near_duplicates import NearDuplicateIndex, REGENERATE_HINT
 
 load_dotenv()
 
 class ContentGenerator:
     """Generiert LinkedIn Content mit KI"""
     
-    def __init__(self):
+    def __init__(self, campaign: Optional[str] = None):
         self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         self.anthropic_client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
         self.company_name = os.getenv('COMPANY_NAME', 'SBS Deutschland GmbH')
+        self.campaign = campaign
+        self.duplicate_index = NearDuplicateIndex()
         
     def generate_linkedin_post(
         self,
@@ -37,20 +46,30 @@ class ContentGenerator:
             max_length: Maximale Zeichenanzahl
             
         Returns:
-            dict mit 'content', 'hashtags', 'call_to_action'
+            dict mit 'content', 'hashtags', 'call_to_action', 'duplicate_of'
+            ('duplicate_of' ist None oder der ähnlichste bestehende Inhalt)
         """
         
         prompt = self._build_prompt(topic, style, max_length)
         
-        if ai_provider == "openai":
-            response = self._generate_with_openai(prompt)
-        else:
-            response = self._generate_with_claude(prompt)
+        # Max. 2 Versuche: bei Near-Duplicate einmal neu generieren, danach markieren
+        for attempt in range(2):
+            if ai_provider == "openai":
+                response = self._generate_with_openai(prompt)
+            else:
+                response = self._generate_with_claude(prompt)
             
-        return self._parse_response(response)
+            result = self._parse_response(response)
+            duplicate = self.duplicate_index.check(result["content"], kind="post")
+            if not duplicate:
+                break
+            prompt += REGENERATE_HINT
+        
+        result["duplicate_of"] = duplicate
+        return result
     
     def _build_prompt(self, topic: str, style: str, max_length: int) -> str:
-        """Erstellt den Prompt für die KI"""
+        """Erstellt den variablen Prompt-Teil (statischer Kontext liegt im System-Block)"""
         
         style_descriptions = {
             "professional": "professionell, fachlich, seriös",
@@ -61,22 +80,14 @@ class ContentGenerator:
         
         return f"""Erstelle einen LinkedIn Post für {self.company_name}.
 
-UNTERNEHMEN: SBS Deutschland GmbH & Co. KG (Weinheim, Rhein-Neckar)
-PLATTFORM: SBS Nexus – Das operative OS für den fertigenden Mittelstand
-3 MODULE:
-  1. Finance Intelligence: KI-Rechnungsverarbeitung (8 Sek, 99,2% Genauigkeit, DATEV + SAP Export)
-  2. Contract Intelligence: KI-Vertragsanalyse (Klauselerkennung, Fristenmanagement) → contract.sbsdeutschland.com
-  3. Technical Intelligence / HydraulikDoc AI: Technische Dokumenten-KI (RAG für Datenblätter & Handbücher)
-ZIELGRUPPE: 89.000 Steuerberater in DE, fertigender Mittelstand (50-5.000 MA)
-PARTNERPROGRAMM: 15-25% Revenue Share für Steuerberater → www.sbsnexus.de/partner
-WEBSITES: www.sbsnexus.de | sbsdeutschland.com/sbshomepage/ | contract.sbsdeutschland.com
-DEMO: calendly.com/ki-sbsdeutschland/sbs-nexus-30-minuten-discovery-call
-COMPLIANCE: DSGVO-konform, Server in Frankfurt, E-Rechnungspflicht 2025
-LINKEDIN: /sbs-deutschland-gmbh-co-kg/ | /hydraulikdoc-ai/
-
 Thema: {topic}
 Stil: {style_descriptions.get(style, "professionell")}
-Maximale Länge: {max_length} Zeichen
+Maximale Länge: {max_length} Zeichen"""
+
+    def _system_block(self) -> str:
+        """Statischer System-Block: SBS Kontext + Rolle + Format (cachebar)"""
+        return build_system_block("""ROLLE:
+Du bist LinkedIn Content-Stratege für SBS Deutschland GmbH – ein Enterprise SaaS-Unternehmen im Bereich KI-gestützte Dokumentenverarbeitung (SBS Nexus). Fokus: Steuerberater-Markt, DATEV-Integration, E-Rechnungspflicht.
 
 Struktur:
 1. Aufmerksamkeitsstarke erste Zeile (Hook)
@@ -94,30 +105,35 @@ Dein Post-Text hier...
 [CTA]
 Dein Call-to-Action hier...
 
-Schreibe auf Deutsch, Enterprise-Standard (Apple/SAP Niveau), authentisch und konkret!"""
+Schreibe auf Deutsch, Enterprise-Standard (Apple/SAP Niveau), authentisch und konkret!""")
 
     def _generate_with_openai(self, prompt: str) -> str:
         """Generiert Content mit OpenAI GPT-4"""
+        model = "gpt-4o-mini"
+        system_block = self._system_block()
+        started = time.perf_counter()
         response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Du bist LinkedIn Content-Stratege für SBS Deutschland GmbH – ein Enterprise SaaS-Unternehmen im Bereich KI-gestützte Dokumentenverarbeitung (SBS Nexus). Du schreibst auf dem Niveau von Apple, SAP und NVIDIA Corporate Communications. Fokus: Steuerberater-Markt, DATEV-Integration, E-Rechnungspflicht."},
-                {"role": "user", "content": prompt}
-            ],
+            model=model,
+            messages=openai_messages(system_block, prompt),
             temperature=0.7,
             max_tokens=600
         )
+        log_usage("linkedin_post", "openai", model, openai_usage(response), started, self.campaign, system_block)
         return response.choices[0].message.content
     
     def _generate_with_claude(self, prompt: str) -> str:
-        """Generiert Content mit Anthropic Claude"""
+        """Generiert Content mit Anthropic Claude (Prompt Caching)"""
+        model = "claude-3-5-sonnet-20241022"
+        system_block = self._system_block()
+        started = time.perf_counter()
         message = self.anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
+            model=model,
             max_tokens=600,
             temperature=0.7,
-            system="Du bist LinkedIn Content-Stratege für SBS Deutschland GmbH – ein Enterprise SaaS-Unternehmen im Bereich KI-gestützte Dokumentenverarbeitung (SBS Nexus). Du schreibst auf dem Niveau von Apple, SAP und NVIDIA. Fokus: Steuerberater-Markt, DATEV-Integration, E-Rechnungspflicht.",
+            system=anthropic_system(system_block),
             messages=[{"role": "user", "content": prompt}]
         )
+        log_usage("linkedin_post", "anthropic", model, anthropic_usage(message), started, self.campaign, system_block)
         return message.content[0].text
     
     def _parse_response(self, response: str) -> dict:
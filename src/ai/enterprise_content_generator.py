@@ -9,11 +9,18 @@ Optimiert für CFO/C-Level LinkedIn Posts
 """
 
 import os
+import time
 from dotenv import load_dotenv
 from openai import OpenAI
 from anthropic import Anthropic
 from typing import Literal, Optional
 
+from src.ai.prompt_context import (
+    build_system_block, openai_messages, anthropic_system
+)
+from src.ai.usage_tracker import anthropic_usage, log_usage, openai_usage
+from src.content_automation.near_duplicates import NearDuplicateIndex, REGENERATE_HINT
+
 load_dotenv()
 
 class EnterpriseContentGenerator:
@@ -22,11 +29,13 @@ class EnterpriseContentGenerator:
     Spezialisiert auf C-Level B2B Content
     """
     
-    def __init__(self):
+    def __init__(self, campaign: Optional[str] = None):
         self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         self.anthropic_client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
         self.company_name = os.getenv('COMPANY_NAME', 'SBS Deutschland GmbH')
         self.company_domain = os.getenv('COMPANY_DOMAIN', 'sbsdeutschland.com')
+        self.campaign = campaign
+        self.duplicate_index = NearDuplicateIndex()
         
     def generate_cfo_post(
         self,
@@ -48,17 +57,26 @@ class EnterpriseContentGenerator:
             ai_provider: KI-Anbieter
             
         Returns:
-            dict mit strukturiertem Content
+            dict mit strukturiertem Content (inkl. 'duplicate_of' bei Near-Duplicate)
         """
         
         prompt = self._build_enterprise_prompt(topic, target_length, include_data)
         
-        if ai_provider == "openai":
-            response = self._generate_with_openai_enterprise(prompt)
-        else:
-            response = self._generate_with_claude_enterprise(prompt)
+        # Max. 2 Versuche: bei Near-Duplicate einmal neu generieren, danach markieren
+        for attempt in range(2):
+            if ai_provider == "openai":
+                response = self._generate_with_openai_enterprise(prompt)
+            else:
+                response = self._generate_with_claude_enterprise(prompt)
             
-        return self._parse_enterprise_response(response, topic)
+            result = self._parse_enterprise_response(response, topic)
+            duplicate = self.duplicate_index.check(result["full_post"], kind="post")
+            if not duplicate:
+                break
+            prompt += REGENERATE_HINT
+        
+        result["duplicate_of"] = duplicate
+        return result
     
     def _build_enterprise_prompt(
         self, 
@@ -66,7 +84,7 @@ class EnterpriseContentGenerator:
         target_length: str,
         include_data: bool
     ) -> str:
-        """Erstellt optimierten Prompt für Enterprise Content"""
+        """Erstellt den variablen Prompt-Teil (statischer Kontext liegt im System-Block)"""
         
         length_specs = {
             "optimal": "1300-1700 Zeichen (optimal für LinkedIn Engagement)",
@@ -74,33 +92,26 @@ class EnterpriseContentGenerator:
             "long": "2000-2500 Zeichen (ausführlich, thought leadership)"
         }
         
-        return f"""Du bist Luis Orozco, Gründer & CEO von {self.company_name}, einem Enterprise-SaaS-Anbieter für KI-gestützte Dokumentenverarbeitung.
-
-**AUFGABE:** Erstelle einen LinkedIn Post für ein B2B-Publikum.
+        data_hint = "\n**DATEN:** Nutze im [CONTEXT] konkrete Zahlen/Statistiken aus dem SBS Nexus Markt" if include_data else ""
+        
+        return f"""**AUFGABE:** Erstelle einen LinkedIn Post für ein B2B-Publikum.
 
 **THEMA:** {topic}
 
-**UNTERNEHMEN – SBS Deutschland GmbH & Co. KG:**
-- Plattform: SBS Nexus – Das operative OS für den Mittelstand
-- Modul 1: Finance Intelligence (KI-Rechnungsverarbeitung, 8 Sek, 99,2%, DATEV + SAP Export)
-- Modul 2: Contract Intelligence (KI-Vertragsanalyse, Klauselerkennung, Fristenmanagement)
-- Modul 3: Technical Intelligence / HydraulikDoc AI (Technische Dokumenten-KI, RAG)
-- Partnerprogramm: 15-25% Revenue Share für Steuerberater → www.sbsnexus.de/partner
-- Websites: www.sbsnexus.de | sbsdeutschland.com/sbshomepage/ | contract.sbsdeutschland.com
-- Demo: calendly.com/ki-sbsdeutschland/sbs-nexus-30-minuten-discovery-call
-- Compliance: DSGVO-konform, Server in Frankfurt
-- LinkedIn: /sbs-deutschland-gmbh-co-kg/ | /hydraulikdoc-ai/
+**LÄNGE:** {length_specs[target_length]}{data_hint}
+
+Liefere den Post im vorgegebenen Format."""
 
-**ZIELGRUPPE:**
-- Steuerberater & Kanzleiinhaber (89.000 in Deutschland, €21,3 Mrd. Markt)
-- CFOs, CTOs, Geschäftsführer im fertigenden Mittelstand
-- 50-5.000 Mitarbeiter, DACH-Region
-- DATEV 90%+ Marktanteil, E-Rechnungspflicht seit Januar 2025
+    def _enterprise_system_block(self) -> str:
+        """Statischer System-Block: SBS Kontext + Persona + Struktur (cachebar)"""
+        return build_system_block(f"""ROLLE:
+Du bist Luis Orozco, Gründer & CEO von {self.company_name}.
+Du leitest SBS Nexus – eine KI-Plattform für Rechnungsverarbeitung, Vertragsanalyse und technische Dokumenten-KI.
+Du schreibst authentische, datengetriebene LinkedIn Posts auf Enterprise-Niveau (Apple/SAP/NVIDIA Standard).
+Dein Fokus: Steuerberater-Markt, DATEV-Integration, E-Rechnungspflicht, fertigender Mittelstand.
 
 **TON & STIL:**
-- Enterprise-Standard (Apple, SAP, NVIDIA Niveau)
 - Thought Leadership mit konkreten Zahlen
-- Lösungsorientiert, authentisch und glaubwürdig
 - Persönliche Perspektive als Gründer
 - SBS Nexus und Module aktiv nennen
 
@@ -113,7 +124,6 @@ Aufmerksamkeitsstarke erste Zeile (max 65 Zeichen)
 [CONTEXT]
 2-3 Sätze Kontext zum Thema
 → Warum ist das relevant? Welches Problem?
-{\"→ Nutze konkrete Zahlen/Statistiken aus dem SBS Nexus Markt\" if include_data else \"\"}
 
 [INSIGHT]
 Deine Perspektive als SBS Deutschland Gründer
@@ -130,46 +140,38 @@ Call-to-Action
 → Link zu sbsnexus.de, Partner-Seite oder Calendly Demo
 
 [HASHTAGS]
-3-5 Hashtags: #SBSNexus #ERechnung #Steuerberater #DATEV #KI #Mittelstand #HydraulikDoc
-
-**LÄNGE:** {length_specs[target_length]}
-
-Liefere den Post im oben genannten Format."""
+3-5 Hashtags: #SBSNexus #ERechnung #Steuerberater #DATEV #KI #Mittelstand #HydraulikDoc""")
 
     def _generate_with_openai_enterprise(self, prompt: str) -> str:
         """Generiert Content mit GPT-4 (Enterprise-optimiert)"""
+        model = "gpt-4o"  # Besseres Modell für Enterprise Content
+        system_block = self._enterprise_system_block()
+        started = time.perf_counter()
         response = self.openai_client.chat.completions.create(
-            model="gpt-4o",  # Besseres Modell für Enterprise Content
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"""Du bist Luis Orozco, Gründer & CEO von {self.company_name}. 
-                    Du leitest SBS Nexus – eine KI-Plattform für Rechnungsverarbeitung, Vertragsanalyse und technische Dokumenten-KI.
-                    Du schreibst authentische, datengetriebene LinkedIn Posts auf Enterprise-Niveau (Apple/SAP/NVIDIA Standard).
-                    Dein Fokus: Steuerberater-Markt, DATEV-Integration, E-Rechnungspflicht, fertigender Mittelstand."""
-                },
-                {"role": "user", "content": prompt}
-            ],
+            model=model,
+            messages=openai_messages(system_block, prompt),
             temperature=0.7,
             max_tokens=1500,
             top_p=0.9,
             frequency_penalty=0.3,
             presence_penalty=0.3
         )
+        log_usage("enterprise_post", "openai", model, openai_usage(response), started, self.campaign, system_block)
         return response.choices[0].message.content
     
     def _generate_with_claude_enterprise(self, prompt: str) -> str:
-        """Generiert Content mit Claude (Enterprise-optimiert)"""
+        """Generiert Content mit Claude (Enterprise-optimiert, Prompt Caching)"""
+        model = "claude-3-5-sonnet-20241022"
+        system_block = self._enterprise_system_block()
+        started = time.perf_counter()
         message = self.anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
+            model=model,
             max_tokens=1500,
             temperature=0.7,
-            system=f"""Du bist Luis Orozco, Gründer & CEO von {self.company_name}.
-            Du leitest SBS Nexus – eine KI-Plattform für Rechnungsverarbeitung, Vertragsanalyse und technische Dokumenten-KI.
-            Du schreibst authentische, datengetriebene LinkedIn Posts auf Enterprise-Niveau (Apple/SAP/NVIDIA Standard).
-            Dein Fokus: Steuerberater-Markt, DATEV-Integration, E-Rechnungspflicht, fertigender Mittelstand.""",
+            system=anthropic_system(system_block),
             messages=[{"role": "user", "content": prompt}]
         )
+        log_usage("enterprise_post", "anthropic", model, anthropic_usage(message), started, self.campaign, system_block)
         return message.content[0].text
     
     def _parse_enterprise_response(self, response: str, topic: str) -> dict:
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Statischer Prompt-Kontext für alle KI-Generatoren
+Versionierter, cachebarer System-Block (Unternehmen, Produkt, Partnerprogramm, Markt)
+
+Der Block steht bei jedem Call IMMER zuerst und ist byte-identisch:
+- Anthropic: Prompt Caching via cache_control
+- OpenAI: automatisches Prefix-Caching (identischer Anfang ab 1024 Tokens)
+Variable Teile (Thema, Empfänger, Länge) gehören ausschließlich in die User-Message.
+"""
+
+import hashlib
+from typing import Dict, List
+
+# Bei inhaltlichen Änderungen am Block hochzählen – landet im Usage-Log
+PROMPT_CONTEXT_VERSION = "sbs-nexus-context-v1"
+
+SBS_NEXUS_CONTEXT = """UNTERNEHMEN – SBS Deutschland GmbH & Co. KG (Weinheim, Rhein-Neckar):
+- Enterprise-SaaS-Anbieter für KI-gestützte Dokumentenverarbeitung
+- Plattform: SBS Nexus – Das operative OS für den fertigenden Mittelstand
+- Modul 1: Finance Intelligence – KI-gestützte Rechnungsverarbeitung
+  - 8 Sekunden Verarbeitungszeit pro Rechnung
+  - 99,2% Erkennungsgenauigkeit
+  - Automatischer DATEV-konformer Export + SAP Export
+  - Unterstützt: XRechnung, ZUGFeRD, PDF
+  - Multimodale KI (nicht regelbasierte OCR)
+- Modul 2: Contract Intelligence – KI-Vertragsanalyse (Klauselerkennung, Fristenmanagement, Risikoanalyse) → contract.sbsdeutschland.com
+- Modul 3: Technical Intelligence / HydraulikDoc AI – Technische Dokumenten-KI (RAG für Datenblätter, Handbücher, Normen)
+- Compliance: DSGVO-konform, Server in Frankfurt, E-Rechnungspflicht 2025 Compliance
+- Websites: www.sbsnexus.de | sbsdeutschland.com/sbshomepage/ | contract.sbsdeutschland.com
+- Demo: calendly.com/ki-sbsdeutschland/sbs-nexus-30-minuten-discovery-call
+- LinkedIn: /sbs-deutschland-gmbh-co-kg/ | /hydraulikdoc-ai/
+
+PARTNERPROGRAMM:
+- 15-25% Revenue Share für Steuerberater (3 Tiers)
+- Dauerhaft pro vermitteltem Mandant
+- Keine Vorabkosten
+- 14-Tage-Onboarding
+- Details: www.sbsnexus.de/partner
+
+MARKT & ZIELGRUPPE:
+- 89.000 Steuerberater in Deutschland
+- €21,3 Mrd. Marktvolumen Steuerberatung
+- DATEV 90%+ Marktanteil
+- E-Rechnungspflicht seit Januar 2025
+- Steuerberater & Kanzleiinhaber, Fokus: Digitale DATEV-Kanzleien
+- CFOs, CTOs, Geschäftsführer im fertigenden Mittelstand (50-5.000 Mitarbeiter, DACH-Region)
+
+GRUNDTON:
+- Enterprise-Standard (Apple, SAP, NVIDIA Niveau)
+- Konkrete Zahlen statt generischem Marketing
+- Authentisch, lösungsorientiert, glaubwürdig
+- Schreibe auf Deutsch"""
+
+
+def build_system_block(instructions: str) -> str:
+    """Statischer Kontext zuerst, danach generator-spezifische (ebenfalls statische) Anweisungen"""
+    return f"{SBS_NEXUS_CONTEXT}\n\n{instructions.strip()}"
+
+
+def context_fingerprint(system_block: str) -> str:
+    """Kurzer Hash eines System-Blocks – zeigt im Usage-Log, ob der Prefix stabil blieb"""
+    return hashlib.sha256(system_block.encode('utf-8')).hexdigest()[:12]
+
+
+def openai_messages(system_block: str, user_prompt: str) -> List[Dict]:
+    """Message-Reihenfolge für OpenAI Prefix-Caching: statisch → variabel"""
+    return [
+        {"role": "system", "content": system_block},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def anthropic_system(system_block: str) -> List[Dict]:
+    """System-Block mit cache_control für Anthropic Prompt Caching"""
+    return [
+        {
+            "type": "text",
+            "text": system_block,
+            "cache_control": {"type": "ephemeral"}
+        }
+    ]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Token-Accounting für KI-Generierung
+Speichert Input-, Cached- und Output-Tokens + Latenz pro Call in data/ai_usage.db
+Grundlage für Kosten- und Latenz-Auswertung pro Kampagne
+"""
+
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from src.ai.prompt_context import PROMPT_CONTEXT_VERSION, context_fingerprint
+from src.analytics.metrics import MeteredConnection, record_generation
+
+_default_tracker: Optional["TokenUsageTracker"] = None
+
+
+class TokenUsageTracker:
+    """Protokolliert Token-Verbrauch aller KI-Calls"""
+
+    def __init__(self, db_path: str = "data/ai_usage.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Usage DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS ai_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                campaign TEXT,
+                generator TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT,
+                prompt_version TEXT,
+                prompt_fingerprint TEXT,
+                input_tokens INTEGER DEFAULT 0,
+                cached_tokens INTEGER DEFAULT 0,
+                cache_write_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                latency_ms REAL DEFAULT 0,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ai_usage_campaign ON ai_usage (campaign)')
+        conn.commit()
+        conn.close()
+
+    def record(self, generator: str, provider: str, model: str, usage: Dict,
+               latency_ms: float, campaign: Optional[str] = None,
+               prompt_version: str = None, prompt_fingerprint: str = None):
+        """Speichere einen Call (+ Prometheus-Metriken)"""
+        record_generation(provider, model or "", generator, latency_ms / 1000, usage)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO ai_usage (campaign, generator, provider, model, prompt_version,
+                                  prompt_fingerprint, input_tokens, cached_tokens,
+                                  cache_write_tokens, output_tokens, latency_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (campaign, generator, provider, model, prompt_version, prompt_fingerprint,
+              usage.get('input_tokens', 0), usage.get('cached_tokens', 0),
+              usage.get('cache_write_tokens', 0), usage.get('output_tokens', 0),
+              round(latency_ms, 1)))
+        conn.commit()
+        conn.close()
+
+    def summarize(self, campaign: Optional[str] = None) -> Dict:
+        """Aggregierte Token-Zahlen (optional pro Kampagne)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        query = '''
+            SELECT COUNT(*), COALESCE(SUM(input_tokens), 0), COALESCE(SUM(cached_tokens), 0),
+                   COALESCE(SUM(output_tokens), 0), COALESCE(AVG(latency_ms), 0)
+            FROM ai_usage
+        '''
+        if campaign:
+            c.execute(query + ' WHERE campaign = ?', (campaign,))
+        else:
+            c.execute(query)
+        calls, input_tokens, cached_tokens, output_tokens, avg_latency = c.fetchone()
+        conn.close()
+
+        return {
+            "calls": calls,
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "output_tokens": output_tokens,
+            "cache_hit_rate": (cached_tokens / input_tokens * 100) if input_tokens else 0,
+            "avg_latency_ms": avg_latency
+        }
+
+
+def default_tracker() -> TokenUsageTracker:
+    """Prozessweiter Tracker – DB wird erst beim ersten protokollierten Call angelegt"""
+    global _default_tracker
+    if _default_tracker is None:
+        _default_tracker = TokenUsageTracker()
+    return _default_tracker
+
+
+def log_usage(generator: str, provider: str, model: str, usage: Dict, started: float,
+              campaign: Optional[str] = None, system_block: Optional[str] = None,
+              tracker: Optional[TokenUsageTracker] = None) -> bool:
+    """Call protokollieren (started = perf_counter vor dem Call); Fehler kosten kein bereits bezahltes Ergebnis"""
+    try:
+        (tracker or default_tracker()).record(
+            generator, provider, model, usage, (time.perf_counter() - started) * 1000, campaign=campaign,
+            prompt_version=PROMPT_CONTEXT_VERSION,
+            prompt_fingerprint=context_fingerprint(system_block) if system_block else None
+        )
+        return True
+    except Exception as e:
+        print(f"⚠️  Usage-Log Fehler: {str(e)}")
+        return False
+
+
+def openai_usage(response) -> Dict:
+    """Extrahiere Token-Zahlen aus einer OpenAI Chat-Completion"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {}
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'input_tokens': usage.prompt_tokens or 0,
+        'cached_tokens': (getattr(details, 'cached_tokens', 0) or 0) if details else 0,
+        'output_tokens': usage.completion_tokens or 0
+    }
+
+
+def anthropic_usage(message) -> Dict:
+    """Extrahiere Token-Zahlen aus einer Anthropic Message (inkl. Cache-Reads/-Writes)"""
+    usage = getattr(message, 'usage', None)
+    if usage is None:
+        return {}
+    cached = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    return {
+        # input_tokens zählt bei Anthropic nur den ungecachten Rest
+        'input_tokens': (usage.input_tokens or 0) + cached + cache_write,
+        'cached_tokens': cached,
+        'cache_write_tokens': cache_write,
+        'output_tokens': usage.output_tokens or 0
+    }
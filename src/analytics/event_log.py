@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Webhook-Event-Log (email_events.csv): Schreiben und inkrementelles Lesen
+
+- Der Webhook-Handler hängt pro Event eine Zeile an (EVENT_FIELDS); ältere Logs behalten
+  ihre Kopfzeile, neue Spalten fehlen dort (z.B. bounce_type → Bounce gilt als hart)
+- Rollups, Send-Time und Suppression lesen dieselbe Datei, jeder mit eigener Watermark
+  (Byte-Offset in der jeweiligen SQLite-DB)
+- Nur vollständige Zeilen: eine gerade geschriebene Zeile kommt beim nächsten Aufruf
+- Offset hinter dem Dateiende → Log wurde rotiert/neu angelegt → von vorn
+"""
+
+import csv
+import os
+from typing import Dict, List, Optional, Tuple
+
+EVENT_FIELDS = ['timestamp', 'event_type', 'email_id', 'to', 'subject', 'status', 'bounce_type']
+
+
+def append_event(path: str, record: Dict):
+    """Eine Event-Zeile anhängen – Kopfzeile neuer Dateien aus EVENT_FIELDS, sonst die vorhandene"""
+    header = EVENT_FIELDS
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            header = next(csv.reader([f.readline()]), None) or EVENT_FIELDS
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f, lineterminator='\n').writerow(header)
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        csv.DictWriter(f, header, extrasaction='ignore', lineterminator='\n').writerow(record)
+
+
+def read_new_events(path: str, offset: int = 0) -> Tuple[List[Dict], int]:
+    """Events ab Byte-Offset → (Events als Dicts, neuer Offset)"""
+    if not os.path.exists(path):
+        return [], 0
+    if offset > os.path.getsize(path):
+        offset = 0
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader([f.readline()]), None)
+        if not header:
+            return [], 0
+        if offset:
+            f.seek(offset)
+        lines = []
+        while True:
+            line = f.readline()
+            if not line.endswith('\n'):
+                break
+            lines.append(line)
+        offset = f.tell() - len(line.encode('utf-8'))
+    return [dict(zip(header, values)) for values in csv.reader(lines)], offset
+
+
+def first_recipient(to) -> Optional[str]:
+    """Webhook 'to' kann Liste, Listen-String oder einzelne Adresse sein"""
+    if isinstance(to, list):
+        to = to[0] if to else None
+    if not to:
+        return None
+    return str(to).strip("[]'\" ").split("'")[0].lower() or None
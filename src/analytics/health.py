@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Echtzeit-Health der Kampagnen über gleitende Zeitfenster
+
+- Ringpuffer-Fenster (5 min, 1 h, 24 h) über Versand-Ergebnisse, Bounces/Complaints und Latenz
+- O(1) pro Event: nur der aktuelle Bucket wird geändert, Summen laufen mit,
+  abgelaufene Buckets werden beim Weiterrücken abgezogen
+- SLO-Regeln aus config/health_slo.yaml (Default-Regeln unten)
+- Alert-Deduplizierung + Cooldown (Zustand in data/health_alerts.json, überlebt Neustarts;
+  Laden → Auswerten → Speichern unter Dateisperre, Schreiben atomar per os.replace)
+
+Ersetzt die All-Time-Erfolgsquote aus monitoring.check_campaign_health: ein
+Resend-Ausfall heute wird nicht mehr von Monaten Historie verdünnt.
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+try:
+    import fcntl
+except ImportError:  # Windows: nur prozessinterne Sperre
+    fcntl = None
+
+SLO_CONFIG = "config/health_slo.yaml"
+ALERT_STATE = "data/health_alerts.json"
+
+# Fenster: Spanne und Bucket-Breite (Sekunden)
+WINDOWS = {
+    "5m": (5 * 60, 5),
+    "1h": (60 * 60, 60),
+    "24h": (24 * 60 * 60, 15 * 60),
+}
+
+# Latenz-Buckets (Sekunden) für p95-Schätzung
+LATENCY_EDGES = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+COUNTERS = ("sent", "failed", "delivered", "bounced", "complained")
+
+DEFAULT_RULES = [
+    {"name": "send_failure_burst", "window": "5m", "metric": "failure_rate", "op": ">", "threshold": 0.2,
+     "min_events": 5, "severity": "critical"},
+    {"name": "send_failure_rate", "window": "1h", "metric": "failure_rate", "op": ">", "threshold": 0.05,
+     "min_events": 20, "severity": "warning"},
+    {"name": "bounce_rate", "window": "24h", "metric": "bounce_rate", "op": ">", "threshold": 0.03,
+     "min_events": 30, "severity": "warning"},
+    {"name": "complaint_rate", "window": "24h", "metric": "complaint_rate", "op": ">", "threshold": 0.003,
+     "min_events": 100, "severity": "critical"},
+    {"name": "send_latency_p95", "window": "5m", "metric": "latency_p95", "op": ">", "threshold": 10,
+     "min_events": 5, "severity": "warning"},
+]
+
+SEVERITY_ORDER = {"healthy": 0, "warning": 1, "critical": 2}
+
+
+class RingWindow:
+    """Gleitendes Fenster aus festen Buckets mit laufenden Summen"""
+
+    def __init__(self, span: int, bucket: int):
+        self.bucket = bucket
+        self.size = span // bucket
+        self.slots = [self._empty() for _ in range(self.size)]
+        self.totals = self._empty()
+        self.head: Optional[int] = None
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {**{name: 0 for name in COUNTERS}, "latency_sum": 0.0, "latency_count": 0,
+                "latency_hist": [0] * (len(LATENCY_EDGES) + 1)}
+
+    def advance(self, now: float):
+        """Abgelaufene Buckets aus den Summen nehmen (amortisiert O(1))"""
+        current = int(now // self.bucket)
+        if self.head is None:
+            self.head = current
+            return
+        if current <= self.head:
+            return
+        for index in range(max(self.head + 1, current - self.size + 1), current + 1):
+            slot = self.slots[index % self.size]
+            for name in COUNTERS:
+                self.totals[name] -= slot[name]
+            self.totals["latency_sum"] -= slot["latency_sum"]
+            self.totals["latency_count"] -= slot["latency_count"]
+            for i, count in enumerate(slot["latency_hist"]):
+                self.totals["latency_hist"][i] -= count
+            self.slots[index % self.size] = self._empty()
+        self.head = current
+
+    def add(self, now: float, counter: Optional[str] = None, latency: Optional[float] = None):
+        self.advance(now)
+        if int(now // self.bucket) < self.head - self.size + 1:
+            return  # älter als das Fenster
+        slot = self.slots[int(now // self.bucket) % self.size]
+        if counter:
+            slot[counter] += 1
+            self.totals[counter] += 1
+        if latency is not None:
+            index = bisect.bisect_left(LATENCY_EDGES, latency)
+            for target in (slot, self.totals):
+                target["latency_sum"] += latency
+                target["latency_count"] += 1
+                target["latency_hist"][index] += 1
+
+    def quantile(self, q: float) -> float:
+        """Obere Bucket-Grenze des q-Quantils der Latenz"""
+        count = self.totals["latency_count"]
+        if not count:
+            return 0.0
+        rank, seen = q * count, 0
+        for index, bucket_count in enumerate(self.totals["latency_hist"]):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_EDGES[index] if index < len(LATENCY_EDGES) else float("inf")
+        return float("inf")
+
+    def stats(self) -> Dict:
+        t = self.totals
+        attempts = t["sent"] + t["failed"]
+        outcomes = t["delivered"] + t["bounced"]
+        return {
+            "sent": t["sent"],
+            "failed": t["failed"],
+            "attempts": attempts,
+            "failure_rate": t["failed"] / attempts if attempts else 0.0,
+            "success_rate": t["sent"] / attempts if attempts else 1.0,
+            "delivered": t["delivered"],
+            "bounced": t["bounced"],
+            "complained": t["complained"],
+            "bounce_rate": t["bounced"] / outcomes if outcomes else 0.0,
+            "complaint_rate": t["complained"] / outcomes if outcomes else 0.0,
+            "latency_avg": t["latency_sum"] / t["latency_count"] if t["latency_count"] else 0.0,
+            "latency_p95": self.quantile(0.95),
+        }
+
+
+# Nenner pro Metrik → min_events bezieht sich darauf
+RULE_BASIS = {"failure_rate": "attempts", "success_rate": "attempts", "bounce_rate": "outcomes",
+              "complaint_rate": "outcomes", "latency_p95": "latency_count", "latency_avg": "latency_count"}
+
+
+class AlertManager:
+    """Dedupliziert Alerts pro Regel; erneute Meldung erst nach Cooldown oder bei Eskalation"""
+
+    def __init__(self, sink: Optional[Callable[[List[Dict]], None]] = None, cooldown: float = 3600,
+                 state_path: Optional[str] = ALERT_STATE):
+        self.sink = sink
+        self.cooldown = cooldown
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.state: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def process(self, violations: List[Dict], now: Optional[float] = None,
+                evaluated: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Neue/eskalierte/fällige Alerts zurückgeben (und an den Sink melden); behobene Regeln zurücksetzen
+
+        Sender, Webhook und Monitoring teilen sich die Zustandsdatei, sehen aber jeweils nur einen
+        Teil der Events: zurückgesetzt werden nur Regeln aus `evaluated` (genug Events in diesem
+        Prozess), und Laden → Auswerten → Speichern läuft unter einer Dateisperre.
+        """
+        now = now or time.time()
+        with self._locked():
+            if self.state_path:
+                self.state = self._load()  # Änderungen anderer Prozesse nicht überschreiben
+            firing = {v["rule"]: v for v in violations}
+            due = []
+            for rule, violation in firing.items():
+                previous = self.state.get(rule)
+                escalated = previous and SEVERITY_ORDER[violation["severity"]] > SEVERITY_ORDER[previous["severity"]]
+                if not previous or escalated or now - previous["notified_at"] >= self.cooldown:
+                    due.append(violation)
+                    self.state[rule] = {"severity": violation["severity"], "notified_at": now,
+                                        "since": previous["since"] if previous else now}
+            resolved = [rule for rule in self.state if rule not in firing
+                        and (evaluated is None or rule in evaluated)]
+            for rule in resolved:
+                del self.state[rule]
+            if due or resolved:
+                self._save()
+        if due and self.sink:
+            self.sink(due)
+        return due
+
+    @contextmanager
+    def _locked(self):
+        """Exklusiv über Threads und Prozesse (Sperrdatei neben der Zustandsdatei)"""
+        with self._lock:
+            if not self.state_path or fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            with open(self.state_path + ".lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self):
+        """Temp-Datei schreiben und ersetzen – Leser sehen nie eine halbe Datei"""
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".health_alerts.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class HealthEvaluator:
+    """Streaming-Health: Events rein, SLO-Verletzungen raus"""
+
+    def __init__(self, rules: Optional[List[Dict]] = None, alerts: Optional[AlertManager] = None,
+                 clock: Callable[[], float] = time.time):
+        self.rules = rules or DEFAULT_RULES
+        self.windows = {name: RingWindow(span, bucket) for name, (span, bucket) in WINDOWS.items()}
+        self.alerts = alerts
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path: str = SLO_CONFIG, sink: Optional[Callable[[List[Dict]], None]] = None,
+                    **kwargs) -> "HealthEvaluator":
+        config = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        alerts = AlertManager(sink, cooldown=config.get("cooldown_minutes", 60) * 60, **kwargs)
+        return cls(config.get("rules") or DEFAULT_RULES, alerts)
+
+    # ---------- Events ----------
+
+    def record_send(self, success: bool, latency: Optional[float] = None, ts: Optional[float] = None):
+        self._record("sent" if success else "failed", latency, ts)
+
+    def record_event(self, event_type: str, ts: Optional[float] = None):
+        """Resend-Webhook-Event ('email.delivered', 'email.bounced', 'email.complained' …)"""
+        counter = {"delivered": "delivered", "bounced": "bounced",
+                   "complained": "complained"}.get((event_type or "").rsplit(".", 1)[-1])
+        if counter:
+            self._record(counter, None, ts)
+
+    def _record(self, counter: Optional[str], latency: Optional[float], ts: Optional[float]):
+        now = ts if ts is not None else self.clock()
+        with self._lock:
+            for window in self.windows.values():
+                window.add(now, counter, latency)
+
+    # ---------- Auswertung ----------
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        now = now if now is not None else self.clock()
+        with self._lock:
+            for window in self.windows.values():
+                window.advance(now)
+            return {name: window.stats() for name, window in self.windows.items()}
+
+    def violations(self, now: Optional[float] = None) -> List[Dict]:
+        return self.evaluate(now)[0]
+
+    def evaluate(self, now: Optional[float] = None) -> Tuple[List[Dict], Set[str]]:
+        """(Verletzungen, Regeln mit genug Events für eine Aussage)"""
+        snapshot = self.snapshot(now)
+        found, evaluated = [], set()
+        for rule in self.rules:
+            stats = snapshot[rule["window"]]
+            basis = RULE_BASIS.get(rule["metric"], "attempts")
+            events = (stats["delivered"] + stats["bounced"] if basis == "outcomes"
+                      else self.windows[rule["window"]].totals["latency_count"] if basis == "latency_count"
+                      else stats["attempts"])
+            if events < rule.get("min_events", 1):
+                continue
+            evaluated.add(rule["name"])
+            value = stats[rule["metric"]]
+            breached = value > rule["threshold"] if rule.get("op", ">") == ">" else value < rule["threshold"]
+            if breached:
+                found.append({"rule": rule["name"], "severity": rule.get("severity", "warning"),
+                              "window": rule["window"], "metric": rule["metric"], "value": value,
+                              "threshold": rule["threshold"], "events": events})
+        return found, evaluated
+
+    def status(self, now: Optional[float] = None) -> str:
+        worst = max((SEVERITY_ORDER[v["severity"]] for v in self.violations(now)), default=0)
+        return next(name for name, order in SEVERITY_ORDER.items() if order == worst)
+
+    def check(self, now: Optional[float] = None) -> List[Dict]:
+        """Regeln auswerten und fällige Alerts auslösen (dedupliziert, mit Cooldown)"""
+        violations, evaluated = self.evaluate(now)
+        if self.alerts is None:
+            return violations
+        return self.alerts.process(violations, now, evaluated)
+
+    def start_checker(self, interval: float = 30, stop: Optional[threading.Event] = None) -> threading.Thread:
+        """check() alle interval Sekunden im Daemon-Thread – Alert-I/O bleibt aus dem Request-Pfad"""
+        stop = stop or threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    print(f"⚠️  Health-Check Fehler: {str(e)}")
+
+        thread = threading.Thread(target=run, name="health-checker", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Prometheus-Metriken (Counter + Histogramme) für Versand, KI-Generierung, Caches und SQLite
+
+- Prozessweite Registry, thread-sicher, ohne Zusatz-Abhängigkeit
+- Text-Exposition im Prometheus-Format (0.0.4) → /metrics
+  (webhook_handler: Flask-Route, automation_scheduler: eigener HTTP-Thread)
+- MeteredConnection: sqlite3-Connection-Factory, misst jede Query
+
+Beispiel:
+    SENDS.labels(provider="resend", outcome="sent").inc()
+    with SEND_LATENCY.labels(provider="smtp").time():
+        server.send_message(msg)
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines += self._render_child(key, child)
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{self._label_str(key)} {_num(child.value)}"]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Verteilung (kumulative Buckets + Summe + Anzahl)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child) -> List[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _num(bound)
+            labels = self._label_str(key, 'le="%s"' % le)
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_num(total)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Alle Metriken eines Prozesses"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrik {metric.name} bereits registriert")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = Registry()
+
+# ---------- Metriken ----------
+
+SENDS = Counter("sbs_emails_sent_total", "Versendete Emails nach Provider und Ergebnis",
+                ["provider", "outcome"])
+SEND_LATENCY = Histogram("sbs_email_send_seconds", "Dauer eines Versand-Calls (SMTP/Resend)",
+                         ["provider"], LATENCY_BUCKETS)
+GENERATIONS = Counter("sbs_ai_generations_total", "KI-Generierungen nach Provider, Modell und Ergebnis",
+                      ["provider", "model", "generator", "outcome"])
+LLM_LATENCY = Histogram("sbs_ai_generation_seconds", "Latenz eines KI-Calls", ["provider", "model"], LLM_BUCKETS)
+TOKENS = Histogram("sbs_ai_tokens", "Tokens pro KI-Call (input, cached, output)",
+                   ["provider", "model", "kind"], TOKEN_BUCKETS)
+CACHE_REQUESTS = Counter("sbs_cache_requests_total", "Cache-Zugriffe nach Cache und Ergebnis (hit/miss)",
+                         ["cache", "result"])
+DB_QUERY = Histogram("sbs_db_query_seconds", "SQLite-Ausführungszeit pro Statement",
+                     ["db", "operation"], DB_BUCKETS)
+WEBHOOK_EVENTS = Counter("sbs_webhook_events_total", "Empfangene Resend-Webhook-Events", ["event_type"])
+
+
+def record_generation(provider: str, model: str, generator: str, latency_s: float, usage: Dict):
+    """Ein erfolgreicher KI-Call (Latenz + Tokens)"""
+    GENERATIONS.labels(provider=provider, model=model, generator=generator, outcome="ok").inc()
+    LLM_LATENCY.labels(provider=provider, model=model).observe(latency_s)
+    for kind in ("input", "cached", "output"):
+        tokens = usage.get(f"{kind}_tokens", 0)
+        if tokens or kind != "cached":
+            TOKENS.labels(provider=provider, model=model, kind=kind).observe(tokens)
+
+
+def cache_result(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+# ---------- SQLite ----------
+
+class MeteredCursor(sqlite3.Cursor):
+    """Cursor, der execute/executemany misst"""
+
+    def execute(self, sql, parameters=()):
+        with _db_timer(self.connection, sql):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with _db_timer(self.connection, sql):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class MeteredConnection(sqlite3.Connection):
+    """sqlite3.connect(path, factory=MeteredConnection) → jede Query landet in sbs_db_query_seconds"""
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.metrics_db = os.path.splitext(os.path.basename(str(database)))[0] or "memory"
+
+    def cursor(self, factory=MeteredCursor):
+        return super().cursor(factory)
+
+    # Connection.execute* umgeht Cursor.execute → hier separat messen
+    def execute(self, sql, parameters=()):
+        with _db_timer(self, sql):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with _db_timer(self, sql):
+            return super().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        with _db_timer(self, "script"):
+            return super().executescript(sql_script)
+
+
+@contextmanager
+def _db_timer(conn, sql: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        operation = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else "other"
+        DB_QUERY.labels(db=getattr(conn, "metrics_db", "unknown"), operation=operation).observe(
+            time.perf_counter() - started)
+
+
+# ---------- HTTP ----------
+
+def start_metrics_server(port: int = 9108, addr: str = "127.0.0.1",
+                         registry: Optional[Registry] = None) -> ThreadingHTTPServer:
+    """/metrics in einem Daemon-Thread (für Prozesse ohne eigenen Webserver)
+
+    Standardmäßig nur auf localhost – für einen externen Prometheus addr explizit setzen (METRICS_ADDR).
+    """
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Vorberechnete Kampagnen-Rollups (SQLite, data/analytics.db)
+Tägliche/stündliche Zähler pro Kampagne, Template, Variante und Status
+
+- Inkrementell: nach jedem Versand-Batch und jedem Webhook-Flush
+- Dashboards lesen nur diese kleinen Tabellen → Renderzeit unabhängig von der Historie
+"""
+
+import csv
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.analytics.event_log import first_recipient, read_new_events
+from src.analytics.metrics import MeteredConnection
+
+# Anzahl Einzel-Sends, die für die Detailtabelle im Dashboard vorgehalten werden
+RECENT_LIMIT = 500
+
+SEND_STATUSES = ('sent', 'failed')
+
+
+class CampaignRollups:
+    """Inkrementelle Aggregat-Tabellen für Email-Kampagnen"""
+
+    def __init__(self, db_path: str = "data/analytics.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Rollup DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        for table, bucket in (('rollup_daily', 'day'), ('rollup_hourly', 'hour')):
+            c.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {bucket} TEXT NOT NULL,
+                    campaign TEXT NOT NULL,
+                    template TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY ({bucket}, campaign, template, variant, status)
+                )
+            ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_company (
+                company TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER DEFAULT 0,
+                last_at TEXT,
+                PRIMARY KEY (company, status)
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS recent_sends (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT,
+                company TEXT,
+                campaign TEXT,
+                template TEXT,
+                variant TEXT,
+                status TEXT,
+                timestamp TEXT
+            )
+        ''')
+        # Letzte Zuordnung Empfänger → Kampagne/Template/Variante (für Webhook-Events)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS recipient_index (
+                email TEXT PRIMARY KEY,
+                campaign TEXT,
+                template TEXT,
+                variant TEXT,
+                company TEXT
+            )
+        ''')
+        # Bucket des gebuchten Fehlschlags → ein späterer erfolgreicher Retry bucht exakt dort um
+        if 'failed_at' not in {row[1] for row in c.execute("PRAGMA table_info(recipient_index)")}:
+            c.execute("ALTER TABLE recipient_index ADD COLUMN failed_at TEXT")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                source TEXT PRIMARY KEY,
+                watermark INTEGER DEFAULT 0
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    # ---------- Schreiben ----------
+
+    def _bump(self, c, timestamp: str, campaign: str, template: str, variant: str,
+              status: str, company: Optional[str] = None, count: int = 1):
+        ts = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+        key = (campaign or 'unknown', template or 'unknown', variant or 'default', status)
+        for table, bucket in (('rollup_daily', ts.strftime('%Y-%m-%d')),
+                              ('rollup_hourly', ts.strftime('%Y-%m-%d %H:00'))):
+            c.execute(f'''
+                INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT DO UPDATE SET count = count + excluded.count
+            ''', (bucket, *key, count))
+        if company:
+            c.execute('''
+                INSERT INTO rollup_company VALUES (?, ?, ?, ?)
+                ON CONFLICT DO UPDATE SET count = count + excluded.count,
+                                          last_at = MAX(COALESCE(last_at, ''), excluded.last_at)
+            ''', (company, status, count, ts.isoformat()))
+
+    def apply_send_batch(self, results: Dict) -> int:
+        """Versand-Ergebnis (send_campaign) einrechnen – jeder Batch nur einmal"""
+        batch_key = f"batch:{results.get('campaign', '')}:{results.get('timestamp', '')}"
+        details = results.get('details', [])
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.execute('INSERT OR IGNORE INTO rollup_state (source, watermark) VALUES (?, ?)',
+                  (batch_key, len(details)))
+        if not c.rowcount:
+            conn.close()
+            return 0
+
+        campaign = results.get('campaign', 'unknown')
+        for detail in details:
+            template = detail.get('template', 'unknown')
+            variant = detail.get('ab_variant', 'default')
+            if detail.get('retried_from'):
+                # Erfolgreicher Retry: den ursprünglichen Fehlschlag im selben Bucket umbuchen
+                failed_at = detail['retried_from']
+                row = c.execute('SELECT template, variant, failed_at FROM recipient_index WHERE email = ?',
+                                (detail['email'].lower(),)).fetchone()
+                if row:
+                    template, variant = row[0], row[1]
+                    failed_at = row[2] or failed_at
+                self._bump(c, failed_at, campaign, template, variant,
+                           'failed', detail.get('company'), count=-1)
+                self._bump(c, failed_at, campaign, template, variant,
+                           detail['status'], detail.get('company'))
+            else:
+                self._bump(c, detail.get('timestamp'), campaign, template, variant,
+                           detail['status'], detail.get('company'))
+            c.execute('''
+                INSERT INTO recent_sends (email, company, campaign, template, variant, status, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (detail['email'], detail.get('company'), campaign, template, variant,
+                  detail['status'], detail.get('timestamp')))
+            c.execute('''
+                INSERT OR REPLACE INTO recipient_index (email, campaign, template, variant, company, failed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (detail['email'].lower(), campaign, template, variant, detail.get('company'),
+                  detail.get('timestamp') if detail['status'] == 'failed' else None))
+
+        c.execute('DELETE FROM recent_sends WHERE id <= (SELECT MAX(id) FROM recent_sends) - ?',
+                  (RECENT_LIMIT,))
+        conn.commit()
+        conn.close()
+        return len(details)
+
+    def apply_events(self, events: List[Dict]) -> int:
+        """Webhook-Events (delivered, opened, clicked, bounced …) einrechnen"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        applied = self._apply_events(c, events)
+        conn.commit()
+        conn.close()
+        return applied
+
+    def _apply_events(self, c, events: List[Dict]) -> int:
+        applied = 0
+        for event in events:
+            event_type = (event.get('event_type') or '').replace('email.', '')
+            recipient = first_recipient(event.get('to'))
+            if not event_type or event_type == 'sent' or not recipient:
+                continue
+            row = c.execute('SELECT campaign, template, variant, company FROM recipient_index WHERE email = ?',
+                            (recipient,)).fetchone() or ('unknown', 'unknown', 'default', None)
+            self._bump(c, event.get('timestamp'), row[0], row[1], row[2], event_type, row[3])
+            applied += 1
+        return applied
+
+    def sync_event_log(self, path: str = 'email_events.csv') -> int:
+        """Nur neue Zeilen des Webhook-Event-Logs einlesen (Byte-Offset als Watermark)"""
+        if not os.path.exists(path):
+            return 0
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        source = f"events:{os.path.abspath(path)}"
+        row = c.execute('SELECT watermark FROM rollup_state WHERE source = ?', (source,)).fetchone()
+        events, offset = read_new_events(path, row[0] if row else 0)
+        applied = self._apply_events(c, events)
+        c.execute('INSERT OR REPLACE INTO rollup_state (source, watermark) VALUES (?, ?)', (source, offset))
+        conn.commit()
+        conn.close()
+        return applied
+
+    def backfill_results_csv(self, path: str = 'campaign_results.csv') -> int:
+        """Einmalige Übernahme einer bestehenden campaign_results.csv"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            details = list(csv.DictReader(f))
+        return self.apply_send_batch({
+            'campaign': 'backfill',
+            'timestamp': f"{os.path.abspath(path)}@{os.path.getmtime(path)}",
+            'details': details
+        })
+
+    # ---------- Lesen (Dashboards) ----------
+
+    def _query(self, query: str, params: tuple = ()) -> List[tuple]:
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+        return rows
+
+    def is_empty(self) -> bool:
+        return not self._query('SELECT 1 FROM rollup_daily LIMIT 1')
+
+    def totals(self) -> Dict[str, int]:
+        """Gesamtzahl pro Status"""
+        return dict(self._query('SELECT status, SUM(count) FROM rollup_daily GROUP BY status'))
+
+    def by_template(self) -> List[tuple]:
+        """(template, status, count)"""
+        return self._query('''
+            SELECT template, status, SUM(count) FROM rollup_daily
+            GROUP BY template, status ORDER BY template
+        ''')
+
+    def by_variant(self) -> List[tuple]:
+        """(template, variant, status, count)"""
+        return self._query('''
+            SELECT template, variant, status, SUM(count) FROM rollup_daily
+            GROUP BY template, variant, status ORDER BY template, variant
+        ''')
+
+    def daily(self, statuses: tuple = SEND_STATUSES) -> List[tuple]:
+        """(day, status, count)"""
+        marks = ','.join('?' * len(statuses))
+        return self._query(f'''
+            SELECT day, status, SUM(count) FROM rollup_daily
+            WHERE status IN ({marks}) GROUP BY day, status ORDER BY day
+        ''', statuses)
+
+    def hourly(self, statuses: tuple = SEND_STATUSES) -> List[tuple]:
+        """(hour, status, count)"""
+        marks = ','.join('?' * len(statuses))
+        return self._query(f'''
+            SELECT hour, status, SUM(count) FROM rollup_hourly
+            WHERE status IN ({marks}) GROUP BY hour, status ORDER BY hour
+        ''', statuses)
+
+    def companies(self) -> List[tuple]:
+        """(company, status, count, last_at)"""
+        return self._query('SELECT company, status, count, last_at FROM rollup_company ORDER BY company')
+
+    def companies_reached(self) -> int:
+        return self._query("SELECT COUNT(*) FROM rollup_company WHERE status = 'sent'")[0][0]
+
+    def last_send_at(self) -> Optional[str]:
+        return self._query("SELECT MAX(last_at) FROM rollup_company WHERE status IN ('sent', 'failed')")[0][0]
+
+    def recent(self, limit: int = RECENT_LIMIT) -> List[tuple]:
+        """(email, company, campaign, template, variant, status, timestamp) – neueste zuerst"""
+        return self._query('''
+            SELECT email, company, campaign, template, variant, status, timestamp
+            FROM recent_sends ORDER BY id DESC LIMIT ?
+        ''', (limit,))
+
+
+if __name__ == "__main__":
+    rollups = CampaignRollups()
+    print(f"✓ Backfill campaign_results.csv: {rollups.backfill_results_csv()} Sends")
+    print(f"✓ Event-Log: {rollups.sync_event_log()} Events")
+    print(f"📊 Totals: {rollups.totals()}")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Send-Time-Optimierung aus historischen Öffnungen (SQLite, data/send_time.db)
+
+- Lernt Öffnungszeiten (Wochentag × Stunde, 168 Slots) aus dem Webhook-Event-Log
+  (email_events.csv, inkrementell per Byte-Offset über src/analytics/event_log)
+- Hierarchisch geglättet: Prior → global → Segment → Empfänger-Domain;
+  wenige Öffnungen einer Domain verschieben die Verteilung nur leicht
+- plan(): bester freier Slot pro Kontakt innerhalb des Horizonts, mit globalem
+  Stunden-Cap (max_per_hour) → Versand verteilt sich über den Tag; bereits gebuchte
+  Slots früherer Kampagnen (Outbox.booked_hours) zählen mit
+- Die Outbox gibt Nachrichten erst ab not_before frei (Outbox.schedule / claim)
+
+CLI:
+    python -m src.analytics.send_time sync
+    python -m src.analytics.send_time show --segment Digital-affin --domain kanzlei-mueller.de
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import yaml
+
+from src.analytics.event_log import first_recipient, read_new_events
+from src.analytics.metrics import MeteredConnection
+
+SEND_TIME_CONFIG = "config/send_time.yaml"
+SLOTS = 7 * 24
+WEEKDAYS = ("Mo", "Di", "Mi", "Do", "Fr", "Sa", "So")
+
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "days": [0, 1, 2, 3, 4],
+    "hours": [7, 18],
+    "horizon_days": 7,
+    "max_per_hour": 30,
+    "smoothing": {"global": 20, "segment": 10, "domain": 5},
+    "prior": {8: 3, 9: 3, 10: 2, 11: 2, 13: 2, 14: 2, 15: 1, 16: 1},
+}
+
+
+def slot_of(moment: datetime) -> int:
+    return moment.weekday() * 24 + moment.hour
+
+
+def _smooth(counts: Dict[int, float], parent: List[float], weight: float) -> List[float]:
+    """Counts mit weight Pseudo-Counts der Elternverteilung mischen → Wahrscheinlichkeiten"""
+    total = sum(counts.values())
+    return [(counts.get(slot, 0) + weight * parent[slot]) / (total + weight) for slot in range(SLOTS)]
+
+
+class SendTimeEngine:
+    """Öffnungszeit-Profile und Versandplan"""
+
+    def __init__(self, db_path: str = "data/send_time.db", config: Optional[Dict] = None):
+        self.db_path = db_path
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self._init_db()
+
+    @classmethod
+    def from_config(cls, path: str = SEND_TIME_CONFIG, **kwargs) -> "SendTimeEngine":
+        config = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+        return cls(config=config, **kwargs)
+
+    def _init_db(self):
+        """Erstelle Send-Time DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS open_slots (
+                scope TEXT NOT NULL,            -- global | segment | domain
+                key TEXT NOT NULL,
+                slot INTEGER NOT NULL,          -- Wochentag * 24 + Stunde
+                opens INTEGER DEFAULT 0,
+                PRIMARY KEY (scope, key, slot)
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS recipients (
+                email TEXT PRIMARY KEY,
+                segment TEXT
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                source TEXT PRIMARY KEY,
+                watermark INTEGER NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    # ---------- Lernen ----------
+
+    def remember(self, contacts: List[Dict]):
+        """Segment pro Empfänger merken → spätere Öffnungen landen auch im Segment-Profil"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        conn.executemany('INSERT OR REPLACE INTO recipients (email, segment) VALUES (?, ?)',
+                         [(contact['email'].lower(), contact.get('segment')) for contact in contacts])
+        conn.commit()
+        conn.close()
+
+    def sync_event_log(self, path: str = 'email_events.csv') -> int:
+        """Neue email.opened-Events einlesen (Byte-Offset als Watermark)"""
+        if not os.path.exists(path):
+            return 0
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        c = conn.cursor()
+        source = f"events:{os.path.abspath(path)}"
+        row = c.execute('SELECT watermark FROM sync_state WHERE source = ?', (source,)).fetchone()
+        events, offset = read_new_events(path, row[0] if row else 0)
+
+        applied = 0
+        for event in events:
+            recipient = first_recipient(event.get('to'))
+            if (event.get('event_type') or '').replace('email.', '') != 'opened' or not recipient:
+                continue
+            try:
+                slot = slot_of(datetime.fromisoformat(event['timestamp']))
+            except (KeyError, TypeError, ValueError):
+                continue
+            segment = c.execute('SELECT segment FROM recipients WHERE email = ?', (recipient,)).fetchone()
+            scopes = [('global', '*'), ('domain', recipient.rsplit('@', 1)[-1])]
+            if segment and segment[0]:
+                scopes.append(('segment', segment[0]))
+            c.executemany('''
+                INSERT INTO open_slots (scope, key, slot, opens) VALUES (?, ?, ?, 1)
+                ON CONFLICT (scope, key, slot) DO UPDATE SET opens = opens + 1
+            ''', [(scope, key, slot) for scope, key in scopes])
+            applied += 1
+        c.execute('INSERT OR REPLACE INTO sync_state (source, watermark) VALUES (?, ?)', (source, offset))
+        conn.commit()
+        conn.close()
+        return applied
+
+    def _counts(self, conn, scope: str, key: str) -> Dict[int, float]:
+        return dict(conn.execute('SELECT slot, opens FROM open_slots WHERE scope = ? AND key = ?',
+                                 (scope, key)).fetchall())
+
+    # ---------- Vorhersage ----------
+
+    def _prior(self) -> List[float]:
+        hours = {int(hour): float(weight) for hour, weight in self.config['prior'].items()}
+        weights = [hours.get(slot % 24, 0.1) * (1 if slot // 24 < 5 else 0.2) for slot in range(SLOTS)]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def distribution(self, segment: Optional[str] = None, domain: Optional[str] = None,
+                     _conn=None, _cache: Optional[Dict] = None) -> List[float]:
+        """Öffnungswahrscheinlichkeit pro Slot für Segment/Domain"""
+        conn = _conn or sqlite3.connect(self.db_path, factory=MeteredConnection)
+        cache = _cache if _cache is not None else {}
+        smoothing = self.config['smoothing']
+        try:
+            if 'global' not in cache:
+                cache['global'] = _smooth(self._counts(conn, 'global', '*'), self._prior(), smoothing['global'])
+            if ('segment', segment) not in cache:
+                cache[('segment', segment)] = cache['global'] if not segment else \
+                    _smooth(self._counts(conn, 'segment', segment), cache['global'], smoothing['segment'])
+            parent = cache[('segment', segment)]
+            if not domain:
+                return parent
+            return _smooth(self._counts(conn, 'domain', domain), parent, smoothing['domain'])
+        finally:
+            if _conn is None:
+                conn.close()
+
+    def _candidates(self, now: datetime) -> List[datetime]:
+        """Alle erlaubten Stunden-Slots im Horizont (ab der nächsten vollen Stunde)"""
+        start, end = self.config['hours']
+        first = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return [moment for moment in (first + timedelta(hours=i) for i in range(self.config['horizon_days'] * 24))
+                if moment.weekday() in self.config['days'] and start <= moment.hour < end]
+
+    def plan(self, contacts: List[Dict], now: Optional[datetime] = None,
+             booked: Optional[Dict[int, int]] = None) -> Dict[str, datetime]:
+        """Versandzeitpunkt pro Kontakt: bester Slot mit freier Kapazität, innerhalb der Stunde gleichmäßig verteilt
+
+        booked: bereits eingeplante Sends pro Stunde ({Unix-Zeit // 3600: Anzahl}, Outbox.booked_hours)
+        """
+        now = now or datetime.now()
+        self.remember(contacts)
+        candidates = self._candidates(now)
+        if not candidates:
+            return {contact['email']: now for contact in contacts}
+        capacity = self.config['max_per_hour']
+        existing = booked or {}
+        taken: Dict[datetime, int] = {}
+
+        def seed(moments: List[datetime]):
+            for moment in moments:
+                taken.setdefault(moment, existing.get(int(moment.timestamp() // 3600), 0))
+        seed(candidates)
+
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        cache: Dict = {}
+        ranked = []
+        for contact in contacts:
+            probs = self.distribution(contact.get('segment'), contact['email'].rsplit('@', 1)[-1].lower(),
+                                      _conn=conn, _cache=cache)
+            ranked.append((contact, sorted(candidates, key=lambda moment: -probs[slot_of(moment)]),
+                           max(probs[slot_of(moment)] for moment in candidates)))
+        conn.close()
+
+        # Kontakte mit ausgeprägtem Profil zuerst – sie verlieren am meisten, wenn ihr Slot voll ist
+        plan = {}
+        for contact, slots, _ in sorted(ranked, key=lambda item: -item[2]):
+            moment = next((slot for slot in slots if taken[slot] < capacity), None)
+            while moment is None:  # Horizont ausgebucht → im nächsten Horizont anstellen
+                candidates += self._candidates(candidates[-1])
+                seed(candidates)
+                moment = next((slot for slot in candidates if taken[slot] < capacity), None)
+            plan[contact['email']] = moment + timedelta(seconds=taken[moment] * 3600 // capacity)
+            taken[moment] += 1
+        return plan
+
+    def top_slots(self, segment: Optional[str] = None, domain: Optional[str] = None, n: int = 5) -> List[Dict]:
+        probs = self.distribution(segment, domain)
+        best = sorted(range(SLOTS), key=lambda slot: -probs[slot])[:n]
+        return [{'slot': f"{WEEKDAYS[slot // 24]} {slot % 24:02d}:00", 'probability': probs[slot]} for slot in best]
+
+    def stats(self) -> Dict[str, int]:
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection)
+        rows = conn.execute('SELECT scope, COUNT(DISTINCT key), SUM(opens) FROM open_slots GROUP BY scope').fetchall()
+        conn.close()
+        return {scope: {'keys': keys, 'opens': opens} for scope, keys, opens in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send-Time-Optimierung")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="Öffnungen aus dem Event-Log lernen")
+    sync.add_argument("--events", default="email_events.csv")
+    show = sub.add_parser("show", help="Beste Versand-Slots anzeigen")
+    show.add_argument("--segment", default=None)
+    show.add_argument("--domain", default=None)
+    args = parser.parse_args()
+
+    engine = SendTimeEngine.from_config()
+    if args.command == "sync":
+        print(f"✓ {engine.sync_event_log(args.events)} neue Öffnungen eingelesen")
+        print(f"📊 Profile: {engine.stats()}")
+    else:
+        label = " / ".join(filter(None, [args.segment, args.domain])) or "global"
+        print(f"⏰ Beste Slots ({label}):")
+        for entry in engine.top_slots(args.segment, args.domain):
+            print(f"   {entry['slot']}  {entry['probability'] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Leichtgewichtiges Tracing (OpenTelemetry-kompatible Spans) für den Kampagnen-Ablauf
+
+    campaign → contact → generate / render / send / db.* / sleep
+
+- Span-Felder wie OTLP (traceId, spanId, parentSpanId, startTimeUnixNano, …)
+- Kontext über contextvars → verschachtelte Spans ohne Durchreichen von Objekten
+- campaign.id / contact.email werden an Kind-Spans vererbt
+- Export ist opt-in (TRACE_EXPORTER=none|jsonl|otlp, Default none):
+  JSONL (data/traces.jsonl, rotiert ab TRACE_MAX_MB=50 nach traces.jsonl.1) oder
+  OTLP/HTTP-JSON an einen Collector (OTEL_EXPORTER_OTLP_ENDPOINT, Versand im Hintergrund-Thread)
+- Collector-Ersatz für lokale Tests: LocalCollectorStub in tests/stubs.py (CLI collector)
+
+CLI:
+    TRACE_EXPORTER=jsonl python automated_email_sender.py …
+    python -m src.analytics.tracing breakdown [--campaign ID] [--file data/traces.jsonl]
+    python -m src.analytics.tracing collector --port 4318
+"""
+
+import argparse
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE = "data/traces.jsonl"
+MAX_TRACE_BYTES = 50 * 1024 * 1024
+OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+SERVICE_NAME = "sbs-gtm-automation"
+
+# Attribute, die Kind-Spans automatisch übernehmen
+INHERITED = ("campaign.id", "contact.email", "provider")
+
+# Spans, die andere Stages enthalten (im Breakdown nicht als Stage gezählt)
+CONTAINERS = ("campaign", "contact")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """Ein abgeschlossener oder laufender Zeitabschnitt"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes",
+                 "status", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = {k: parent.attributes[k] for k in INHERITED if parent and k in parent.attributes}
+        self.attributes.update({k: v for k, v in (attributes or {}).items() if v is not None})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "OK"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.status = "ERROR"
+        self.error = message
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        record = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status},
+        }
+        if self.error:
+            record["status"]["message"] = self.error
+        return record
+
+
+# ---------- Exporter ----------
+
+class JSONLExporter:
+    """Spans gepuffert als eine JSON-Zeile pro Span anhängen; ab max_bytes nach <path>.1 rotieren"""
+
+    def __init__(self, path: str = TRACE_FILE, batch_size: int = 64, max_bytes: int = MAX_TRACE_BYTES):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span.to_dict())
+            if len(self._buffer) < self.batch_size and span.parent_id:
+                return
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: List[Dict]):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch).encode("utf-8")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._file_lock:
+            if self.max_bytes and os.path.exists(self.path) \
+                    and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")  # nur eine Generation behalten
+            with open(self.path, 'ab') as f:
+                f.write(data)
+
+
+class OTLPExporter(JSONLExporter):
+    """OTLP/HTTP (JSON-Encoding) an einen Collector
+
+    Der Versand läuft in einem Daemon-Thread: volle Batches landen in einer begrenzten Queue,
+    der Kampagnen-Thread wartet nie auf den Collector. Fehler und verworfene Batches werden geloggt.
+    """
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, batch_size: int = 64, timeout: float = 5,
+                 max_queue: int = 32):
+        super().__init__(path="", batch_size=batch_size)
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue: "queue.Queue[List[Dict]]" = queue.Queue(max_queue)
+        threading.Thread(target=self._run, daemon=True, name="otlp-export").start()
+
+    def _write(self, batch: List[Dict]):
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+            logger.warning("Trace-Export-Queue voll, %d Spans verworfen", len(batch))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Puffer einreihen und warten, bis der Hintergrund-Thread die Queue abgearbeitet hat (begrenzt)"""
+        super().flush()
+        with self._queue.all_tasks_done:
+            self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks,
+                                                self.timeout if timeout is None else timeout)
+
+    def _run(self):
+        import requests
+        session = requests.Session()
+        while True:
+            batch = self._queue.get()
+            try:
+                session.post(self.endpoint, json=otlp_payload(batch), timeout=self.timeout).raise_for_status()
+            except requests.RequestException as e:
+                logger.warning("Trace-Export fehlgeschlagen (%d Spans): %s", len(batch), e)
+            finally:
+                self._queue.task_done()
+
+
+def otlp_payload(records: List[Dict]) -> Dict:
+    """JSONL-Records → OTLP ExportTraceServiceRequest (JSON)"""
+    spans = []
+    for record in records:
+        spans.append({**record,
+                      "startTimeUnixNano": str(record["startTimeUnixNano"]),
+                      "endTimeUnixNano": str(record["endTimeUnixNano"]),
+                      "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in record["attributes"].items()],
+                      "status": {"code": 2 if record["status"]["code"] == "ERROR" else 1,
+                                 **({"message": record["status"]["message"]}
+                                    if "message" in record["status"] else {})}})
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes_from_otlp(attributes: List[Dict]) -> Dict:
+    result = {}
+    for item in attributes:
+        value = item["value"]
+        if "intValue" in value:
+            result[item["key"]] = int(value["intValue"])
+        else:
+            result[item["key"]] = next(iter(value.values()))
+    return result
+
+
+# ---------- Tracer ----------
+
+class Tracer:
+    """Erzeugt Spans und gibt abgeschlossene an den Exporter"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict] = None) -> Iterator[Span]:
+        if self.exporter is None:
+            yield _NOOP
+            return
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            self.exporter.export(span)
+
+    def traced(self, name: str, attributes: Optional[Dict] = None):
+        """Decorator-Variante von span()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, attributes):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def flush(self):
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+class _NoopSpan:
+    attributes: Dict = {}
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def current_span():
+    """Aktiver Span (No-op-Span außerhalb eines Traces oder bei TRACE_EXPORTER=none)"""
+    return _current.get() or _NOOP
+
+
+def tracer_from_env() -> Tracer:
+    exporter_name = os.getenv("TRACE_EXPORTER", "none").lower()
+    if exporter_name == "otlp":
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/")
+        return Tracer(OTLPExporter(endpoint if endpoint.endswith("/v1/traces") else endpoint + "/v1/traces"))
+    if exporter_name == "jsonl":
+        max_bytes = int(float(os.getenv("TRACE_MAX_MB", MAX_TRACE_BYTES / 1024 / 1024)) * 1024 * 1024)
+        return Tracer(JSONLExporter(os.getenv("TRACE_FILE", TRACE_FILE), max_bytes=max_bytes))
+    return Tracer(None)
+
+
+TRACER = tracer_from_env()
+span = TRACER.span
+traced = TRACER.traced
+atexit.register(TRACER.flush)
+
+
+# ---------- Auswertung ----------
+
+def load_spans(path: str = TRACE_FILE) -> Iterator[Dict]:
+    """Spans zeilenweise streamen (rotierte Datei <path>.1 zuerst)"""
+    for candidate in (path + ".1", path):
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # abgebrochene Zeile (Prozess beendet während des Schreibens)
+
+
+def load_trace(path: str = TRACE_FILE, campaign: Optional[str] = None) -> List[Dict]:
+    """Nur die Spans des Kampagnen-Traces laden (zwei Durchläufe statt der ganzen Datei im Speicher)"""
+    root = None
+    for s in load_spans(path):
+        if s["name"] == "campaign" and (campaign is None or s["attributes"].get("campaign.id") == campaign) \
+                and (root is None or s["startTimeUnixNano"] > root["startTimeUnixNano"]):
+            root = s
+    if root is None:
+        return []
+    return [s for s in load_spans(path) if s["traceId"] == root["traceId"]]
+
+
+def breakdown(spans: List[Dict], campaign: Optional[str] = None) -> Dict:
+    """Latenz pro Stage für eine Kampagne (Default: die zuletzt gestartete)"""
+    roots = [s for s in spans if s["name"] == "campaign"
+             and (campaign is None or s["attributes"].get("campaign.id") == campaign)]
+    if not roots:
+        return {}
+    root = max(roots, key=lambda s: s["startTimeUnixNano"])
+    wall_ms = (root["endTimeUnixNano"] - root["startTimeUnixNano"]) / 1e6
+    trace = [s for s in spans if s["traceId"] == root["traceId"]]
+    names = {s["spanId"]: s["name"] for s in trace}
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    attributed_ms = 0.0
+    for s in trace:
+        if s["name"] in CONTAINERS:
+            continue
+        duration = (s["endTimeUnixNano"] - s["startTimeUnixNano"]) / 1e6
+        durations.setdefault(s["name"], []).append(duration)
+        if names.get(s["parentSpanId"]) in CONTAINERS:
+            attributed_ms += duration  # nur direkte Kinder zählen, sonst doppelt
+        if s["status"]["code"] == "ERROR":
+            errors[s["name"]] = errors.get(s["name"], 0) + 1
+    stages = []
+    for name, values in durations.items():
+        values.sort()
+        total = sum(values)
+        stages.append({"stage": name, "count": len(values), "total_ms": total, "avg_ms": total / len(values),
+                       "p95_ms": values[min(len(values) - 1, int(0.95 * len(values)))],
+                       "share": total / wall_ms if wall_ms else 0.0, "errors": errors.get(name, 0)})
+    stages.sort(key=lambda stage: stage["total_ms"], reverse=True)
+    return {"campaign": root["attributes"].get("campaign.id"), "trace_id": root["traceId"],
+            "wall_ms": wall_ms, "contacts": sum(1 for s in trace if s["name"] == "contact"),
+            "unattributed_ms": max(wall_ms - attributed_ms, 0.0), "stages": stages}
+
+
+def print_breakdown(result: Dict):
+    if not result:
+        print("✗ Keine Kampagne im Trace gefunden")
+        return
+    print(f"\n🔍 Kampagne {result['campaign']} – {result['contacts']} Kontakte, "
+          f"{result['wall_ms'] / 1000:.1f}s gesamt (Trace {result['trace_id'][:8]})\n")
+    print(f"{'Stage':<24}{'Anzahl':>8}{'Gesamt':>12}{'Ø':>10}{'p95':>10}{'Anteil':>9}{'Fehler':>8}")
+    for stage in result["stages"]:
+        print(f"{stage['stage']:<24}{stage['count']:>8}{stage['total_ms'] / 1000:>11.2f}s"
+              f"{stage['avg_ms']:>8.0f}ms{stage['p95_ms']:>8.0f}ms{stage['share']:>8.1%}{stage['errors']:>8}")
+    print(f"\n   Nicht zugeordnet: {result['unattributed_ms'] / 1000:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kampagnen-Traces auswerten")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("breakdown", help="Latenz pro Stage einer Kampagne")
+    report.add_argument("--campaign", help="Kampagnen-ID (Default: letzte Kampagne)")
+    report.add_argument("--file", default=TRACE_FILE)
+    report.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    collector = sub.add_parser("collector", help="Lokalen OTLP-Collector-Ersatz starten")
+    collector.add_argument("--port", type=int, default=4318)
+    collector.add_argument("--file", default=TRACE_FILE)
+    args = parser.parse_args()
+
+    if args.command == "breakdown":
+        result = breakdown(load_trace(args.file, args.campaign), args.campaign)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_breakdown(result)
+    else:
+        from tests.stubs import LocalCollectorStub  # Stand-in liegt bei den Tests (nur im Repo-Checkout)
+        stub = LocalCollectorStub(args.file, args.port).start()
+        print(f"✓ OTLP-Collector-Ersatz auf {stub.endpoint} → {args.file}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Kampagnen-Planer: Generierungs-Strategie einmal pro Kampagne statt pro Kontakt
+
+- USE_AI_GENERATION / OPENAI_API_KEY werden einmal gelesen; die Strategie (ai | template)
+  kommt pro Segment aus config/generation.yaml
+- Templates werden pro Rolle einmal über select_template aufgelöst und vorkompiliert
+  (Abschnitte zusammengesetzt, Absender-Platzhalter bereits eingesetzt)
+- Alle Template-Kontakte werden vorab in einem Durchlauf gerendert (ein Regex-Pass pro Text)
+- Nur KI-Kontakte gehen beim Versand an generate_ai_email; deren Template-Fallback nutzt die
+  bereits geladenen Templates, statt message_templates.yaml erneut zu parsen
+- Vorab erstellte Entwürfe (Batch-Job) haben weiterhin Vorrang
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from src.analytics.tracing import span
+
+GENERATION_CONFIG = "config/generation.yaml"
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+DEFAULT_CONFIG = {
+    "default": "ai",
+    "segments": {},
+}
+
+
+def fill(text: str, values: Dict[str, str]) -> str:
+    """Bekannte {{platzhalter}} ersetzen, unbekannte stehen lassen"""
+    return PLACEHOLDER.sub(lambda match: values.get(match.group(1), match.group(0)), text)
+
+
+class CampaignPlan:
+    """Fertige Nachrichten (Entwurf/Template) und KI-Kontakte einer Kampagne"""
+
+    def __init__(self, planner: "CampaignPlanner", messages: Dict[str, Tuple[str, str, str]], modes: Dict[str, str]):
+        self.planner = planner
+        self.messages = messages    # email → (subject, body, template_id)
+        self.modes = modes          # email → draft | template | ai
+
+    def compose(self, contact: Dict) -> Tuple[str, str, str]:
+        """Betreff, Body und Template-ID – vorgerendert oder jetzt per KI"""
+        message = self.messages.get(contact['email'])
+        if message:
+            return message
+        return self.planner.generate(contact)
+
+    def describe(self) -> str:
+        counts = {mode: list(self.modes.values()).count(mode) for mode in ('template', 'ai', 'draft')}
+        return f"{counts['template']} Template, {counts['ai']} KI, {counts['draft']} Entwurf"
+
+
+class CampaignPlanner:
+    """Entscheidet Generierung pro Segment und rendert Template-Kontakte gesammelt"""
+
+    def __init__(self, automation, templates: Dict, config: Optional[Dict] = None):
+        self.automation = automation
+        self.templates = templates
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self.use_ai = os.getenv('USE_AI_GENERATION', 'True') == 'True' and bool(os.getenv('OPENAI_API_KEY'))
+        self._strategies: Dict[Optional[str], str] = {}
+        self._compiled: Dict[str, Tuple[str, str, str]] = {}
+        self._sender = {key: str(value) for key, value in automation.sender_values().items()}
+
+    @classmethod
+    def from_config(cls, automation, templates: Dict, path: str = GENERATION_CONFIG) -> "CampaignPlanner":
+        config = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+        return cls(automation, templates, config)
+
+    def strategy(self, segment: Optional[str]) -> str:
+        """ai | template für ein Segment (Präfix-Match, ohne API-Key immer template)"""
+        if segment not in self._strategies:
+            mode = self.config['default']
+            for key, value in (self.config.get('segments') or {}).items():
+                if (segment or '').startswith(key):
+                    mode = value
+                    break
+            self._strategies[segment] = mode if self.use_ai else 'template'
+        return self._strategies[segment]
+
+    def compiled(self, role: str) -> Tuple[str, str, str]:
+        """(Betreff, Body, Template-ID) einer Rolle mit eingesetzten Absender-Platzhaltern"""
+        if role not in self._compiled:
+            template = self.automation.select_template(role, self.templates)
+            self._compiled[role] = (fill(template['subject_variants'][0], self._sender),
+                                    fill(self.automation.template_body(template), self._sender),
+                                    template.get('id', 'unknown'))
+        return self._compiled[role]
+
+    def render(self, contacts: List[Dict]) -> Dict[str, Tuple[str, str, str]]:
+        """Alle Template-Kontakte in einem Durchlauf → email → (subject, body, template_id)"""
+        messages = {}
+        with span("render", {"contacts": len(contacts), "mode": "template"}):
+            for contact in contacts:
+                subject, body, template_id = self.compiled(contact.get('role', 'Steuerberater'))
+                values = {key: str(value) for key, value in self.automation.placeholder_values(contact).items()}
+                messages[contact['email']] = (fill(subject, values), fill(body, values), template_id)
+        return messages
+
+    def generate(self, contact: Dict) -> Tuple[str, str, str]:
+        subject, body = self.automation.generate_ai_email(contact, self.templates)
+        return subject, body, 'ai'
+
+    def plan(self, contacts: List[Dict], drafts: Optional[Dict[str, Tuple[str, str]]] = None) -> CampaignPlan:
+        """Strategie pro Kontakt festlegen (Entwurf > Segment-Strategie) und Templates vorab rendern"""
+        drafts = drafts or {}
+        messages, modes, pending = {}, {}, []
+        for contact in contacts:
+            email = contact['email']
+            if drafts.get(email):
+                subject, body = drafts[email]
+                messages[email], modes[email] = (subject, body, 'batch_draft'), 'draft'
+            elif self.strategy(contact.get('segment')) == 'ai':
+                modes[email] = 'ai'
+            else:
+                modes[email] = 'template'
+                pending.append(contact)
+        messages.update(self.render(pending))
+        return CampaignPlan(self, messages, modes)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Erkennung für generierte Posts & Emails
+MinHash-Signaturen + LSH-Bänder in SQLite (data/similarity.db)
+
+- Quellen: data/linkedin.db (posts), data/emails.db (emails), generated_content/*.md
+- Inkrementell: pro Quelle wird nur Neues seit dem letzten Sync signiert
+- Check: 16 indizierte Band-Lookups + Vergleich weniger Kandidaten → Millisekunden
+"""
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import time
+from array import array
+from typing import Dict, List, Optional
+
+MERSENNE_PRIME = (1 << 61) - 1
+DEFAULT_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', '0.8'))
+
+WORD_PATTERN = re.compile(r"[0-9a-zäöüß]+")
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH-Index über alle gespeicherten Inhalte"""
+
+    def __init__(self, db_path: str = "data/similarity.db", num_perm: int = 64,
+                 bands: int = 16, shingle_size: int = 5, sync_interval: int = 60):
+        if num_perm % bands:
+            raise ValueError("num_perm muss durch bands teilbar sein")
+        self.db_path = db_path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.sync_interval = sync_interval
+        self._last_sync = 0.0
+
+        # Deterministische Hash-Permutationen → Signaturen bleiben über Prozesse vergleichbar
+        rng = random.Random(20260215)
+        self._perms = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Index DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS signatures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                source_key TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                preview TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (source, source_key)
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS lsh_bands (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                signature_id INTEGER NOT NULL
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh_bands (band, bucket)')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                source TEXT PRIMARY KEY,
+                watermark INTEGER DEFAULT 0
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    # ---------- MinHash ----------
+
+    def _shingles(self, text: str) -> set:
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> List[int]:
+        """MinHash-Signatur (num_perm Werte)"""
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+                  for s in self._shingles(text)]
+        if not hashes:
+            return [MERSENNE_PRIME] * self.num_perm
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _buckets(self, sig: List[int]) -> List[str]:
+        return [hashlib.md5(array('Q', sig[b * self.rows:(b + 1) * self.rows]).tobytes()).hexdigest()[:16]
+                for b in range(self.bands)]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Geschätzte Jaccard-Ähnlichkeit zweier Signaturen"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    # ---------- Index ----------
+
+    def add(self, source: str, key: str, text: str, kind: str = "post") -> bool:
+        """Inhalt aufnehmen (idempotent pro source/key)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return self._add(conn, source, key, text, kind)
+        finally:
+            conn.commit()
+            conn.close()
+
+    def _add(self, conn, source: str, key: str, text: str, kind: str) -> bool:
+        if not text or not text.strip():
+            return False
+        sig = self.signature(text)
+        c = conn.cursor()
+        c.execute('''
+            INSERT OR IGNORE INTO signatures (kind, source, source_key, signature, preview)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (kind, source, str(key), array('Q', sig).tobytes(), text.strip()[:120]))
+        if not c.rowcount:
+            return False
+        signature_id = c.lastrowid
+        c.executemany('INSERT INTO lsh_bands (band, bucket, signature_id) VALUES (?, ?, ?)',
+                      [(band, bucket, signature_id) for band, bucket in enumerate(self._buckets(sig))])
+        return True
+
+    def check(self, text: str, kind: str = "post",
+              threshold: float = DEFAULT_THRESHOLD) -> Optional[Dict]:
+        """Ähnlichster gespeicherter Inhalt oberhalb des Schwellwerts (sonst None)"""
+        if time.monotonic() - self._last_sync > self.sync_interval:
+            self.sync()
+
+        sig = self.signature(text)
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        candidates = set()
+        for band, bucket in enumerate(self._buckets(sig)):
+            c.execute('SELECT signature_id FROM lsh_bands WHERE band = ? AND bucket = ?', (band, bucket))
+            candidates.update(row[0] for row in c.fetchall())
+
+        best = None
+        for signature_id in candidates:
+            c.execute('''
+                SELECT source, source_key, signature, preview FROM signatures
+                WHERE id = ? AND kind = ?
+            ''', (signature_id, kind))
+            row = c.fetchone()
+            if not row:
+                continue
+            score = self.similarity(sig, array('Q', row[2]).tolist())
+            if score >= threshold and (best is None or score > best['similarity']):
+                best = {"source": row[0], "key": row[1], "similarity": score, "preview": row[3]}
+        conn.close()
+        return best
+
+    # ---------- Inkrementeller Sync ----------
+
+    def sync(self, linkedin_db: str = "data/linkedin.db", emails_db: str = "data/emails.db",
+             content_dir: str = "generated_content") -> int:
+        """Nimmt nur neue Zeilen/Dateien seit dem letzten Sync auf"""
+        conn = sqlite3.connect(self.db_path)
+        added = 0
+        try:
+            added += self._sync_table(conn, "linkedin_db", linkedin_db,
+                                      "SELECT id, inhalt FROM posts WHERE id > ? ORDER BY id", "post")
+            added += self._sync_table(conn, "emails_db", emails_db,
+                                      "SELECT id, nachricht FROM emails WHERE id > ? ORDER BY id", "email")
+            added += self._sync_files(conn, content_dir)
+            conn.commit()
+        finally:
+            conn.close()
+        self._last_sync = time.monotonic()
+        return added
+
+    def _watermark(self, conn, source: str) -> int:
+        row = conn.execute('SELECT watermark FROM sync_state WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else 0
+
+    def _sync_table(self, conn, source: str, db_path: str, query: str, kind: str) -> int:
+        if not os.path.exists(db_path):
+            return 0
+        watermark = self._watermark(conn, source)
+        src = sqlite3.connect(db_path)
+        try:
+            rows = src.execute(query, (watermark,)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            src.close()
+
+        added = 0
+        for row_id, text in rows:
+            added += self._add(conn, source, str(row_id), text, kind)
+            watermark = row_id
+        conn.execute('INSERT OR REPLACE INTO sync_state (source, watermark) VALUES (?, ?)',
+                     (source, watermark))
+        return added
+
+    def _sync_files(self, conn, content_dir: str) -> int:
+        if not os.path.isdir(content_dir):
+            return 0
+        known = {row[0] for row in conn.execute(
+            "SELECT source_key FROM signatures WHERE source = 'generated_content'")}
+        added = 0
+        for name in sorted(os.listdir(content_dir)):
+            if not name.endswith('.md') or name in known:
+                continue
+            with open(os.path.join(content_dir, name), 'r', encoding='utf-8') as f:
+                added += self._add(conn, 'generated_content', name, extract_post_content(f.read()), 'post')
+        return added
+
+
+def extract_post_content(markdown: str) -> str:
+    """Nur den Post-Text aus generated_content/*.md (ohne Metadaten-Header)"""
+    if "## Content" not in markdown:
+        return markdown
+    section = markdown.split("## Content", 1)[1]
+    return section.split("\n---", 1)[0].strip()
+
+
+# Zusatz für den zweiten Versuch, wenn der erste Entwurf als Near-Duplicate erkannt wurde
+REGENERATE_HINT = (
+    "\n\nHINWEIS: Ein sehr ähnlicher Text wurde bereits veröffentlicht/versendet. "
+    "Wähle einen anderen Einstieg, andere Beispiele und eine andere Argumentationsreihenfolge."
+)
@@ -0,0 +1,8 @@
+"""
+Delivery Module
+
+Outbox, Versand-Transporte & Zustellungs-Steuerung für Email-Kampagnen.
+"""
+
+__version__ = "0.1.0"
+__author__ = "SBS Deutschland GmbH"
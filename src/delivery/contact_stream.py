@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Streaming-Import von Kontaktlisten (CSV/XLSX) in die Outbox mit konstantem Speicher
+
+- CSV über pd.read_csv(chunksize=…), XLSX über openpyxl read_only (Zeile für Zeile)
+  → nie die ganze Datei im Speicher, auch bei Millionen Zeilen
+- Trennzeichen (, ; Tab) wird aus dem Dateianfang erkannt, Spaltennamen werden auf die
+  Kontaktfelder abgebildet (E-Mail → email, Vorname → first_name, Kanzlei → company_name …)
+- Validierung/Normalisierung pro Zeile: Email getrimmt + klein, ungültige Zeilen werden
+  gezählt und (begrenzt) mit Grund gemeldet; fehlende role fällt auf job_title zurück
+- preview() liest nur so viele Zeilen wie nötig; validate() kann sein Ergebnis pro Datei
+  (Name + Größe) in einem Cache ablegen, z.B. st.session_state → kein Volldurchlauf pro Rerun
+- Chunks gehen direkt an Outbox.enqueue (ein Commit pro Chunk); Duplikate fängt
+  UNIQUE (campaign, email) ab → kein Set über alle Adressen im Speicher
+- Import mit not_before=jetzt → release_scheduled im Scheduler versendet die Kampagne
+  (--hold: nur ablegen, Freigabe später per Outbox.schedule)
+
+CLI:
+    python -m src.delivery.contact_stream check kontakte.csv
+    python -m src.delivery.contact_stream import kontakte.xlsx --campaign campaign_20261019
+    python -m src.delivery.contact_stream import kontakte.csv --campaign messe_2026 --hold
+"""
+
+import argparse
+import csv
+import os
+import re
+import time
+from typing import Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+import pandas as pd
+
+from src.delivery.outbox import Outbox
+
+CHUNK_SIZE = 10_000
+MAX_REJECTS = 20
+EMAIL_PATTERN = re.compile(r"^[^@\s,;<>]+@[^@\s,;<>]+\.[a-z0-9-]{2,}$")
+
+# Spaltenname (normalisiert: klein, ohne Leer-/Sonderzeichen) → Kontaktfeld
+COLUMN_ALIASES = {
+    "email": "email", "e-mail": "email", "mail": "email", "emailadresse": "email", "e-mail-adresse": "email",
+    "firstname": "first_name", "vorname": "first_name",
+    "lastname": "last_name", "nachname": "last_name",
+    "company": "company_name", "companyname": "company_name", "firma": "company_name",
+    "kanzlei": "company_name", "unternehmen": "company_name",
+    "jobtitle": "job_title", "position": "job_title", "titel": "job_title", "funktion": "job_title",
+    "role": "role", "rolle": "role",
+    "segment": "segment",
+    "companysize": "company_size", "mitarbeiter": "company_size", "teamsize": "company_size",
+    "datevstatus": "datev_status",
+    "personalizationhook": "personalization_hook", "hook": "personalization_hook",
+    "website": "website", "domain": "website",
+    "telefon": "phone", "phone": "phone",
+}
+
+
+def canonical_column(name: str) -> str:
+    key = re.sub(r"[\s_.]+", "", str(name).strip().lower())
+    return COLUMN_ALIASES.get(key, COLUMN_ALIASES.get(key.replace("-", ""), str(name).strip()))
+
+
+def normalize_contact(row: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """Eine Zeile → (Kontakt, None) oder (None, Ablehnungsgrund)"""
+    contact = {key: value.strip() if isinstance(value, str) else value for key, value in row.items()
+               if value is not None and value == value and value != ""}
+    email = str(contact.get("email", "")).strip().lower().strip("<>")
+    if not email:
+        return None, "Email fehlt"
+    if not EMAIL_PATTERN.match(email):
+        return None, f"ungültige Email: {email}"
+    contact["email"] = email
+    if "role" not in contact and contact.get("job_title"):
+        contact["role"] = contact["job_title"]
+    return contact, None
+
+
+class ContactStream:
+    """Liest eine Kontaktdatei chunkweise und liefert validierte Kontakte"""
+
+    def __init__(self, source, filename: Optional[str] = None, chunk_size: int = CHUNK_SIZE):
+        self.source = source                    # Pfad oder Datei-Objekt (z.B. Streamlit-Upload)
+        self.filename = filename or getattr(source, "name", None) or str(source)
+        self.chunk_size = chunk_size
+        self.stats = {"rows": 0, "valid": 0, "invalid": 0}
+        self.rejects: List[Tuple[int, str]] = []
+
+    @property
+    def is_excel(self) -> bool:
+        return self.filename.lower().endswith((".xlsx", ".xlsm"))
+
+    def _rewind(self):
+        if hasattr(self.source, "seek"):
+            self.source.seek(0)
+
+    def _delimiter(self) -> str:
+        """Trennzeichen aus den ersten 64 KB erkennen (deutsche Exporte nutzen oft ';')"""
+        self._rewind()
+        if hasattr(self.source, "read"):
+            sample = self.source.read(65536)
+            self._rewind()
+        else:
+            with open(self.source, "rb") as f:
+                sample = f.read(65536)
+        if isinstance(sample, bytes):
+            sample = sample.decode("utf-8-sig", errors="ignore")
+        try:
+            return csv.Sniffer().sniff(sample.split("\n", 1)[0], delimiters=",;\t|").delimiter
+        except csv.Error:
+            return ","
+
+    def _size(self) -> Optional[int]:
+        size = getattr(self.source, "size", None)  # Streamlit-Upload
+        if size is None and isinstance(self.source, (str, os.PathLike)):
+            size = os.path.getsize(self.source)
+        elif size is None and hasattr(self.source, "seek"):
+            size = self.source.seek(0, os.SEEK_END)
+            self._rewind()
+        return size
+
+    def _csv_rows(self, chunk_size: int) -> Iterator[List[Dict]]:
+        delimiter = self._delimiter()
+        with pd.read_csv(self.source, sep=delimiter, dtype=str, keep_default_na=False,
+                         chunksize=chunk_size, encoding="utf-8-sig", on_bad_lines="warn") as reader:
+            for frame in reader:
+                frame.columns = [canonical_column(column) for column in frame.columns]
+                yield frame.to_dict("records")
+
+    def _excel_rows(self, chunk_size: int) -> Iterator[List[Dict]]:
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("XLSX-Import benötigt openpyxl (pip install openpyxl)")
+        self._rewind()
+        workbook = load_workbook(self.source, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [canonical_column(cell) for cell in next(rows, ())]
+            chunk = []
+            for values in rows:
+                chunk.append({column: value if value is None or isinstance(value, str) else str(value)
+                              for column, value in zip(header, values)})
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+
+    def chunks(self, chunk_size: Optional[int] = None) -> Iterator[List[Dict]]:
+        """Validierte Kontakte in Chunks (Statistik und Rejects werden mitgeführt)"""
+        chunk_size = chunk_size or self.chunk_size
+        self.stats = {"rows": 0, "valid": 0, "invalid": 0}
+        self.rejects = []
+        for rows in (self._excel_rows(chunk_size) if self.is_excel else self._csv_rows(chunk_size)):
+            contacts = []
+            for row in rows:
+                self.stats["rows"] += 1
+                contact, reason = normalize_contact(row)
+                if contact:
+                    contacts.append(contact)
+                    continue
+                self.stats["invalid"] += 1
+                if len(self.rejects) < MAX_REJECTS:
+                    self.rejects.append((self.stats["rows"] + 1, reason))  # +1: Kopfzeile
+            self.stats["valid"] += len(contacts)
+            if contacts:
+                yield contacts
+
+    def __iter__(self) -> Iterator[Dict]:
+        for contacts in self.chunks():
+            yield from contacts
+
+    def preview(self, n: int = 10) -> List[Dict]:
+        """Erste n gültige Kontakte (liest in Chunks der Größe n, nicht den ganzen ersten Chunk)"""
+        preview = []
+        chunks = self.chunks(chunk_size=max(1, n))
+        try:
+            for contacts in chunks:
+                preview.extend(contacts)
+                if len(preview) >= n:
+                    break
+        finally:
+            chunks.close()
+        return preview[:n]
+
+    def validate(self, cache: Optional[MutableMapping] = None) -> Dict[str, int]:
+        """Ganze Datei durchzählen, ohne etwas zu speichern
+
+        cache: z.B. st.session_state – Ergebnis pro Datei (Name + Größe) nur einmal berechnen
+        """
+        key = f"contact_stream:{self.filename}:{self._size()}"
+        if cache is not None and key in cache:
+            stats, rejects = cache[key]
+            self.stats, self.rejects = dict(stats), list(rejects)
+            return self.stats
+        for _ in self.chunks():
+            pass
+        if cache is not None:
+            cache[key] = (dict(self.stats), list(self.rejects))
+        return self.stats
+
+    def enqueue(self, outbox: Outbox, campaign: str, not_before: Optional[float] = None,
+                render: Optional[Callable[[Dict], Tuple[str, str]]] = None) -> int:
+        """Alle gültigen Kontakte chunkweise in die Outbox → Anzahl neu angelegt (Optionen s. Outbox.enqueue)"""
+        added = 0
+        for contacts in self.chunks():
+            added += outbox.enqueue(campaign, contacts, not_before=not_before, render=render)
+        self.stats["enqueued"] = added
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontaktlisten streamend prüfen/importieren")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="Datei validieren, ohne zu importieren")
+    check.add_argument("path")
+    load = sub.add_parser("import", help="Gültige Kontakte in die Outbox übernehmen")
+    load.add_argument("path")
+    load.add_argument("--campaign", required=True)
+    load.add_argument("--hold", action="store_true", help="Nicht freigeben (kein Versand durch den Scheduler)")
+    for command in (check, load):
+        command.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"Datei nicht gefunden: {args.path}")
+    stream = ContactStream(args.path, chunk_size=args.chunk_size)
+    if args.command == "check":
+        stream.validate()
+    else:
+        outbox = Outbox()
+        stream.enqueue(outbox, args.campaign, not_before=None if args.hold else time.time())
+        print(f"✓ {stream.stats['enqueued']} Kontakte in Outbox ({args.campaign}), "
+              f"{stream.stats['valid'] - stream.stats['enqueued']} bereits vorhanden")
+    print(f"📊 {stream.stats['rows']} Zeilen: {stream.stats['valid']} gültig, {stream.stats['invalid']} ungültig")
+    for line, reason in stream.rejects:
+        print(f"   ✗ Zeile {line}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+MIME-Assembly: Nachrichten einmal als fertige Bytes rendern, danach nur noch durchreichen
+
+- Statische Teile (From/Reply-To, MIME-Header, Boundary, Part-Header) werden pro Absender
+  einmal vorberechnet und von allen Empfängern geteilt
+- Pro Empfänger werden nur To/Subject/Date/Message-ID und die codierten Bodies erzeugt
+  und per b"".join zusammengesetzt (kein email.message-Objektbaum, kein Generator)
+- Identische Bodies (nicht personalisierte Wellen) werden nur einmal codiert (LRU)
+- IDN-Domains (info@müller-stb.de) gehen als Punycode in Header und Envelope
+- Ergebnis geht unverändert an smtplib.sendmail() und wird für Retries in der Outbox gespeichert
+  → ein Retry verschickt exakt dieselbe Nachricht (gleiche Message-ID)
+
+Ausgabe entspricht MIMEMultipart('alternative') mit text/plain + text/html (utf-8, base64).
+"""
+
+import base64
+import hashlib
+import re
+import time
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+CRLF = b"\r\n"
+# '=' am Zeilenanfang kommt in base64-Zeilen nie vor → eine feste Boundary für alle Nachrichten
+BOUNDARY = b"===============sbs-alternative=="
+MESSAGE_ID = re.compile(rb"^Message-ID: (<[^>\r\n]+>)", re.MULTILINE | re.IGNORECASE)
+
+
+def new_message_id(to_email: str, domain: Optional[str] = None) -> str:
+    """Eindeutige Message-ID → Antworten lassen sich per In-Reply-To zuordnen (src/delivery/replies.py)"""
+    return make_msgid(idstring=hashlib.sha1(to_email.encode("utf-8")).hexdigest()[:12], domain=domain)
+
+
+def message_id_of(message: bytes) -> Optional[str]:
+    """Message-ID aus gerenderten Bytes (z.B. aus der Outbox)"""
+    match = MESSAGE_ID.search(message)
+    return match.group(1).decode("ascii") if match else None
+
+
+def ascii_address(email: str) -> str:
+    """Adresse 7bit-sicher: Domain per IDNA (müller-stb.de → xn--mller-stb-…), Local-Part muss ASCII sein"""
+    try:
+        email.encode("ascii")
+        return email
+    except UnicodeEncodeError:
+        local, _, domain = email.rpartition("@")
+        local.encode("ascii")  # UnicodeEncodeError → Zustell-Policy: permanent (kein SMTPUTF8)
+        return f"{local}@{domain.encode('idna').decode('ascii')}"
+
+
+def _header(value: str) -> bytes:
+    """Header-Wert ASCII-sicher (RFC 2047 nur wenn nötig, Folding mit CRLF)"""
+    try:
+        return value.encode("ascii")
+    except UnicodeEncodeError:
+        return Header(value, "utf-8").encode(linesep="\r\n").encode("ascii")
+
+
+@lru_cache(maxsize=256)
+def _encoded_parts(body: str) -> Tuple[bytes, bytes]:
+    """(text/plain, text/html) als base64-Bytes mit CRLF-Zeilen"""
+    text = base64.encodebytes(body.encode("utf-8")).replace(b"\n", CRLF)
+    html = base64.encodebytes(body.replace("\n", "<br>").encode("utf-8")).replace(b"\n", CRLF)
+    return text, html
+
+
+class MessageAssembler:
+    """Rendert Kampagnen-Emails eines Absenders zu sendmail()-fertigen Bytes"""
+
+    def __init__(self, sender_name: str, sender_email: str):
+        self.sender_email = sender_email or ""
+        address = ascii_address(self.sender_email)
+        self.domain = address.rsplit("@", 1)[-1] or None
+        sender = _header(formataddr((sender_name or "", address))) if sender_name else address.encode("ascii")
+
+        # Einmal pro Absender – von allen Nachrichten geteilt
+        self._head = (b'Content-Type: multipart/alternative; boundary="' + BOUNDARY + b'"' + CRLF +
+                      b"MIME-Version: 1.0" + CRLF +
+                      b"From: " + sender + CRLF)
+        self._reply_to = b"Reply-To: " + address.encode("ascii") + CRLF
+        part = (b'Content-Type: text/%s; charset="utf-8"' + CRLF + b"MIME-Version: 1.0" + CRLF +
+                b"Content-Transfer-Encoding: base64" + CRLF + CRLF)
+        self._text_open = CRLF + b"--" + BOUNDARY + CRLF + part % b"plain"
+        self._html_open = CRLF + b"--" + BOUNDARY + CRLF + part % b"html"
+        self._close = CRLF + b"--" + BOUNDARY + b"--" + CRLF
+
+    def message_id(self, to_email: str) -> str:
+        return new_message_id(to_email, self.domain)
+
+    def render(self, to_email: str, subject: str, body: str, message_id: Optional[str] = None,
+               headers: Optional[Dict[str, str]] = None) -> bytes:
+        """Eine Nachricht als Bytes (CRLF, 7bit-sicher); nicht kodierbare Adressen → UnicodeEncodeError
+
+        headers: zusätzliche Header pro Empfänger (z.B. List-Unsubscribe)
+        """
+        text, html = _encoded_parts(body)
+        extra = b"".join(name.encode("ascii") + b": " + _header(value) + CRLF
+                         for name, value in (headers or {}).items())
+        return b"".join((
+            self._head,
+            b"To: ", ascii_address(to_email).encode("ascii"), CRLF,
+            b"Subject: ", _header(subject), CRLF,
+            self._reply_to,
+            b"Date: ", formatdate(time.time(), localtime=True).encode("ascii"), CRLF,
+            b"Message-ID: ", (message_id or self.message_id(to_email)).encode("ascii"), CRLF,
+            extra,
+            self._text_open, text,
+            self._html_open, html,
+            self._close,
+        ))
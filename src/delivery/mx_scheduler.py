@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+MX-basiertes Versand-Scheduling (Drosselung pro Mail-Provider statt pro Empfänger-Domain)
+
+Viele Kanzleien liegen bei denselben Hostern (Strato, IONOS, DATEV, Microsoft 365 …).
+Wer hintereinander 50 Emails an dieselben MX-Hosts schickt, wird dort per 421/450 deferred.
+
+- MX-Lookup ohne Zusatz-Abhängigkeit (DNS über UDP), Cache in data/mx_cache.db (TTL aus DNS)
+- Empfänger-Domain → Provider (bekannte Hoster per Muster, sonst registrierte Domain des MX)
+- Rate-Cap pro Provider aus config/mx_limits.yaml, Versand reihum über alle Provider:
+  es wird immer der Provider bedient, der als nächstes wieder senden darf → kein Head-of-Line-Blocking
+- throttle(): nach 421/429 pausiert nur der betroffene Provider
+
+CLI:
+    python -m src.delivery.mx_scheduler kanzlei-mueller.de stb-schmidt.de
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import sqlite3
+import struct
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from src.analytics.metrics import MeteredConnection
+
+MX_LIMITS = "config/mx_limits.yaml"
+
+# MX-Host-Muster → Provider
+KNOWN_PROVIDERS = {
+    "strato": ("rzone.de", "strato.de"),
+    "ionos": ("kundenserver.de", "ionos.de", "ionos.com", "1and1."),
+    "datev": ("datevnet.de", "datev.de"),
+    "microsoft": ("outlook.com", "office365.us"),
+    "google": ("google.com", "googlemail.com"),
+    "hetzner": ("your-server.de",),
+    "all-inkl": ("kasserver.com", "all-inkl.com"),
+    "domainfactory": ("ispgateway.de",),
+    "telekom": ("t-online.de",),
+}
+
+DEFAULT_LIMITS = {"default": 30, "strato": 20, "ionos": 20, "datev": 10, "microsoft": 60, "google": 60}
+
+NEGATIVE_TTL = 3600             # kein MX / DNS-Fehler → so lange merken
+MIN_TTL, MAX_TTL = 3600, 7 * 24 * 3600
+
+
+# ---------- DNS ----------
+
+def system_nameserver() -> str:
+    """Erster Nameserver aus /etc/resolv.conf (überschreibbar per DNS_RESOLVER)"""
+    if os.getenv("DNS_RESOLVER"):
+        return os.getenv("DNS_RESOLVER")
+    try:
+        with open("/etc/resolv.conf") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    return parts[1]
+    except OSError:
+        pass
+    return "1.1.1.1"
+
+
+def query_mx(domain: str, nameserver: Optional[str] = None, timeout: float = 2.0) -> Tuple[List[Tuple[int, str]], int]:
+    """MX-Records einer Domain → ([(Präferenz, Host)], TTL); LookupError bei NXDOMAIN/keiner Antwort"""
+    query_id = random.randint(0, 0xFFFF)
+    question = b"".join(bytes([len(label)]) + label.encode("idna") for label in domain.strip(".").split(".")) + b"\0"
+    packet = struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + question + struct.pack(">HH", 15, 1)
+
+    with socket.socket(socket.AF_INET6 if ":" in (nameserver or "") else socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(packet, (nameserver or system_nameserver(), 53))
+        while True:
+            response, _ = sock.recvfrom(4096)
+            if struct.unpack(">H", response[:2])[0] == query_id:
+                break
+
+    flags, qdcount, ancount = struct.unpack(">HHH", response[2:8])
+    if flags & 0x000F == 3:
+        raise LookupError(f"NXDOMAIN: {domain}")
+    if flags & 0x000F:
+        raise LookupError(f"DNS-Fehler {flags & 0x000F}: {domain}")
+
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(response, offset)
+        offset += 4
+    records, ttl = [], MAX_TTL
+    for _ in range(ancount):
+        _, offset = _read_name(response, offset)
+        rtype, _, record_ttl, length = struct.unpack(">HHIH", response[offset:offset + 10])
+        offset += 10
+        if rtype == 15:
+            preference = struct.unpack(">H", response[offset:offset + 2])[0]
+            host, _ = _read_name(response, offset + 2)
+            records.append((preference, host.lower()))
+            ttl = min(ttl, record_ttl)
+        offset += length
+    if not records:
+        raise LookupError(f"Kein MX: {domain}")
+    return sorted(records), ttl
+
+
+def _read_name(message: bytes, offset: int) -> Tuple[str, int]:
+    """Domainnamen lesen (mit Kompressions-Pointern) → (Name, Offset nach dem Namen)"""
+    labels, end = [], None
+    while True:
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = struct.unpack(">H", message[offset:offset + 2])[0] & 0x3FFF
+        elif length == 0:
+            return ".".join(labels), end if end is not None else offset + 1
+        else:
+            labels.append(message[offset + 1:offset + 1 + length].decode("ascii", "ignore"))
+            offset += 1 + length
+
+
+class LocalResolverStub:
+    """Lokaler DNS-Ersatz für Tests: {domain: [mx_host, …]}; unbekannte Domains → LookupError"""
+
+    def __init__(self, records: Dict[str, List[str]], ttl: int = 3600):
+        self.records = records
+        self.ttl = ttl
+        self.lookups: List[str] = []
+
+    def __call__(self, domain: str) -> Tuple[List[Tuple[int, str]], int]:
+        self.lookups.append(domain)
+        if domain not in self.records:
+            raise LookupError(f"NXDOMAIN: {domain}")
+        return [(10 * (i + 1), host) for i, host in enumerate(self.records[domain])], self.ttl
+
+
+# ---------- Resolver + Cache ----------
+
+def provider_for(mx_hosts: List[str]) -> str:
+    """MX-Hosts → Provider-Name (bekannter Hoster oder registrierte Domain des primären MX)"""
+    for host in mx_hosts:
+        for provider, patterns in KNOWN_PROVIDERS.items():
+            if any(pattern in host for pattern in patterns):
+                return provider
+    return ".".join(mx_hosts[0].rstrip(".").split(".")[-2:])
+
+
+class MXResolver:
+    """Empfänger-Domain → Provider, mit SQLite-Cache (TTL aus DNS, Negativ-Cache bei Fehlern)"""
+
+    def __init__(self, lookup: Optional[Callable] = None, db_path: str = "data/mx_cache.db"):
+        self.lookup = lookup            # None → query_mx (zur Laufzeit, damit Stubs greifen)
+        self.db_path = db_path
+        self._memo: Dict[str, str] = {}
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle MX-Cache DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS mx_cache (
+                domain TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                hosts TEXT,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def provider(self, email_or_domain: str) -> str:
+        """Provider für eine Adresse oder Domain (nur bei Cache-Miss ein DNS-Lookup)"""
+        domain = email_or_domain.rsplit("@", 1)[-1].lower()
+        if domain in self._memo:
+            return self._memo[domain]
+
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        row = conn.execute("SELECT provider FROM mx_cache WHERE domain = ? AND expires_at > ?",
+                           (domain, time.time())).fetchone()
+        if row:
+            conn.close()
+            self._memo[domain] = row[0]
+            return row[0]
+
+        try:
+            records, ttl = (self.lookup or query_mx)(domain)
+            hosts = [host for _, host in records]
+            provider, ttl = provider_for(hosts), min(max(ttl, MIN_TTL), MAX_TTL)
+        except (LookupError, OSError, struct.error, IndexError):
+            hosts, provider, ttl = [], domain, NEGATIVE_TTL   # kein MX → Domain selbst (RFC 5321 A-Fallback)
+        conn.execute("INSERT OR REPLACE INTO mx_cache (domain, provider, hosts, expires_at) VALUES (?, ?, ?, ?)",
+                     (domain, provider, json.dumps(hosts), time.time() + ttl))
+        conn.commit()
+        conn.close()
+        self._memo[domain] = provider
+        return provider
+
+
+# ---------- Scheduler ----------
+
+class MXScheduler:
+    """Versandreihenfolge und Pacing über Provider-Rate-Caps (Emails pro Minute)"""
+
+    def __init__(self, resolver: Optional[MXResolver] = None, limits: Optional[Dict[str, float]] = None,
+                 share: float = 1.0, sleep: Callable[[float], None] = None):
+        self.resolver = resolver or MXResolver()
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.share = share              # Anteil am Cap (z.B. 1/Shards pro Prozess)
+        self.sleep = sleep or time.sleep
+        self.next_at: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, path: str = MX_LIMITS, **kwargs) -> "MXScheduler":
+        limits = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                limits = (yaml.safe_load(f) or {}).get("per_minute")
+        return cls(limits=limits, **kwargs)
+
+    def interval(self, provider: str) -> float:
+        """Mindestabstand zwischen zwei Emails an denselben Provider (Sekunden)"""
+        return 60.0 / (self.limits.get(provider, self.limits["default"]) * self.share)
+
+    def group(self, items: List, key: Callable = lambda item: item["email"]) -> "OrderedDict[str, List]":
+        """Empfänger nach Provider gruppieren (Reihenfolge innerhalb eines Providers bleibt)"""
+        groups: "OrderedDict[str, List]" = OrderedDict()
+        for item in items:
+            groups.setdefault(self.resolver.provider(key(item)), []).append(item)
+        return groups
+
+    def plan(self, items: List, key: Callable = lambda item: item["email"]) -> List:
+        """Reihum über alle Provider verschränken (ohne zu warten)"""
+        groups = self.group(items, key)
+        ordered = []
+        while groups:
+            for provider in list(groups):
+                ordered.append(groups[provider].pop(0))
+                if not groups[provider]:
+                    del groups[provider]
+        return ordered
+
+    def schedule(self, items: List, key: Callable = lambda item: item["email"]) -> Iterator:
+        """Items im Takt der Provider-Caps liefern: immer den Provider, der als nächstes frei ist"""
+        groups = self.group(items, key)
+        while groups:
+            now = time.monotonic()
+            provider = min(groups, key=lambda p: self.next_at.get(p, 0.0))
+            wait = self.next_at.get(provider, 0.0) - now
+            if wait > 0:
+                self.sleep(wait)
+            self._consume(provider)
+            yield groups[provider].pop(0)
+            if not groups[provider]:
+                del groups[provider]
+
+    def acquire(self, email: str) -> str:
+        """Blockierend auf den nächsten freien Slot des Providers warten (sequentieller Versand)"""
+        provider = self.resolver.provider(email)
+        wait = self.next_at.get(provider, 0.0) - time.monotonic()
+        if wait > 0:
+            self.sleep(wait)
+        self._consume(provider)
+        return provider
+
+    def throttle(self, email: str, seconds: Optional[float] = None):
+        """Provider nach Drosselung (421/429) pausieren – andere Provider laufen weiter"""
+        provider = self.resolver.provider(email)
+        pause = seconds if seconds is not None else 10 * self.interval(provider)
+        self.next_at[provider] = max(self.next_at.get(provider, 0.0), time.monotonic() + pause)
+
+    def _consume(self, provider: str):
+        self.next_at[provider] = max(self.next_at.get(provider, 0.0), time.monotonic()) + self.interval(provider)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MX-Provider für Empfänger-Domains ermitteln")
+    parser.add_argument("domains", nargs="+")
+    args = parser.parse_args()
+
+    scheduler = MXScheduler.from_config()
+    for provider, domains in scheduler.group([{"email": d} for d in args.domains]).items():
+        print(f"📬 {provider} ({scheduler.limits.get(provider, scheduler.limits['default'])}/min): "
+              f"{', '.join(d['email'] for d in domains)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Kampagnen-Outbox (SQLite)
+Eine Zeile pro Kontakt und Kampagne: pending → drafted → sent / failed
+Zustell-Policy (src/delivery/policy.py): deferred (Retry ab next_attempt_at) / dead (Dead Letter)
+Send-Time-Plan (src/analytics/send_time.py): Zeilen werden erst ab not_before geclaimt
+Gerenderte MIME-Bytes (src/delivery/mime.py) werden mitgespeichert → Retries senden ohne Neu-Rendering
+Batch-Entwürfe (batch_email_drafts.py): batch_job reserviert pending-Zeilen für genau einen Job
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.analytics.metrics import MeteredConnection
+
+
+def shard_key(email: str) -> int:
+    """Stabiler Hash der Empfänger-Domain → alle Empfänger einer Domain landen im selben Shard"""
+    return zlib.crc32(email.rsplit('@', 1)[-1].lower().encode('utf-8'))
+
+
+class Outbox:
+    """Persistente Outbox für Kampagnen-Emails"""
+
+    def __init__(self, db_path: str = "data/outbox.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Outbox DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')  # Shard-Prozesse lesen/schreiben parallel
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                campaign TEXT NOT NULL,
+                email TEXT NOT NULL,
+                contact TEXT NOT NULL,
+                subject TEXT,
+                body TEXT,
+                status TEXT DEFAULT 'pending',
+                error TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (campaign, email)
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (campaign, status)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_outbox_email ON outbox (email, status)')
+
+        # Retry-Zustand der Zustell-Policy (nachträglich ergänzt)
+        columns = {row[1] for row in c.execute("PRAGMA table_info(outbox)")}
+        for column, kind in (("attempts", "INTEGER DEFAULT 0"), ("first_attempt_at", "REAL"),
+                             ("next_attempt_at", "REAL"), ("error_kind", "TEXT"),
+                             ("shard_key", "INTEGER"), ("claimed_by", "TEXT"), ("claimed_at", "REAL"),
+                             ("mime", "BLOB"), ("not_before", "REAL"), ("batch_job", "INTEGER")):
+            if column not in columns:
+                c.execute(f"ALTER TABLE outbox ADD COLUMN {column} {kind}")
+        if "shard_key" not in columns:
+            c.executemany("UPDATE outbox SET shard_key = ? WHERE id = ?",
+                          [(shard_key(email), row_id) for row_id, email in c.execute("SELECT id, email FROM outbox")])
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS idx_outbox_claim ON outbox (campaign, shard_key)
+            WHERE status IN ('pending', 'drafted', 'sending')
+        ''')
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS idx_outbox_retry ON outbox (next_attempt_at)
+            WHERE status = 'deferred'
+        ''')
+        conn.commit()
+        conn.close()
+
+    def enqueue(self, campaign: str, contacts: Iterable[Dict], not_before: Optional[float] = None,
+                render: Optional[Callable[[Dict], Tuple[str, str]]] = None) -> int:
+        """Lege Kontakte als 'pending' an (bereits vorhandene bleiben unverändert)
+
+        not_before: Freigabezeit → release_scheduled versendet die Kampagne ab dann
+        render: contact → (subject, body) – Zeile wird direkt als 'drafted' angelegt
+        """
+        def row(contact: Dict) -> Tuple:
+            subject, body = render(contact) if render else (None, None)
+            return (campaign, contact['email'], json.dumps(contact, ensure_ascii=False), shard_key(contact['email']),
+                    subject, body, 'drafted' if render else 'pending', not_before)
+
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.executemany('''
+            INSERT OR IGNORE INTO outbox (campaign, email, contact, shard_key, subject, body, status, not_before)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (row(contact) for contact in contacts))
+        added = conn.total_changes
+        conn.commit()
+        conn.close()
+        return added
+
+    def pending(self, campaign: str, limit: Optional[int] = None) -> List[Dict]:
+        """Kontakte ohne fertigen Entwurf (und ohne laufenden Batch-Job)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        query = '''
+            SELECT contact FROM outbox WHERE campaign = ? AND status = 'pending' AND batch_job IS NULL ORDER BY id
+        '''
+        if limit:
+            c.execute(query + ' LIMIT ?', (campaign, limit))
+        else:
+            c.execute(query, (campaign,))
+        rows = c.fetchall()
+        conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def store_draft(self, campaign: str, email: str, subject: Optional[str] = None,
+                    body: Optional[str] = None):
+        """Speichere Betreff und/oder Body – sobald beides da ist: 'drafted'"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            UPDATE outbox
+            SET subject = COALESCE(?, subject),
+                body = COALESCE(?, body),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE campaign = ? AND email = ?
+        ''', (subject, body, campaign, email))
+        c.execute('''
+            UPDATE outbox SET status = 'drafted'
+            WHERE campaign = ? AND email = ? AND status = 'pending'
+              AND subject IS NOT NULL AND body IS NOT NULL
+        ''', (campaign, email))
+        conn.commit()
+        conn.close()
+
+    def drafts(self, campaign: str) -> Dict[str, Tuple[str, str]]:
+        """Fertige Entwürfe als {email: (subject, body)}"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            SELECT email, subject, body FROM outbox
+            WHERE campaign = ? AND status = 'drafted'
+        ''', (campaign,))
+        rows = c.fetchall()
+        conn.close()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def drafted_contacts(self, campaign: str) -> List[Dict]:
+        """Kontakte mit fertigem Entwurf (für send_campaign)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            SELECT contact FROM outbox
+            WHERE campaign = ? AND status = 'drafted'
+            ORDER BY id
+        ''', (campaign,))
+        rows = c.fetchall()
+        conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def mark(self, campaign: str, email: str, status: str, error: Optional[str] = None):
+        """Setze Versandstatus"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            UPDATE outbox SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE campaign = ? AND email = ?
+        ''', (status, error, campaign, email))
+        conn.commit()
+        conn.close()
+
+    def record_attempt(self, campaign: str, contact: Dict, subject: str, body: str, outcome: Dict,
+                       mime: Optional[bytes] = None):
+        """Ergebnis der Zustell-Policy festhalten: deferred → später erneut, dead → Dead Letter"""
+        status = outcome['status'] if outcome['status'] in ('deferred', 'dead') else 'sent'
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            INSERT OR IGNORE INTO outbox (campaign, email, contact, shard_key) VALUES (?, ?, ?, ?)
+        ''', (campaign, contact['email'], json.dumps(contact, ensure_ascii=False), shard_key(contact['email'])))
+        c.execute('''
+            UPDATE outbox
+            SET status = ?, subject = ?, body = ?, error = ?, error_kind = ?, attempts = ?,
+                first_attempt_at = COALESCE(first_attempt_at, ?), next_attempt_at = ?,
+                mime = COALESCE(?, mime), updated_at = CURRENT_TIMESTAMP
+            WHERE campaign = ? AND email = ?
+        ''', (status, subject, body, outcome.get('error'), outcome.get('kind'), outcome.get('attempts', 1),
+              outcome.get('first_attempt_at') or time.time(), outcome.get('retry_at'), mime, campaign,
+              contact['email']))
+        conn.commit()
+        conn.close()
+
+    def due_retries(self, limit: int = 100, now: Optional[float] = None) -> List[Dict]:
+        """Zurückgestellte Emails, deren Retry-Zeitpunkt erreicht ist (kampagnenübergreifend)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute('''
+            SELECT campaign, email, contact, subject, body, mime, attempts, first_attempt_at
+            FROM outbox
+            WHERE status = 'deferred' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        ''', (now or time.time(), limit))
+        rows = c.fetchall()
+        conn.close()
+        return [{**dict(row), 'contact': json.loads(row['contact'])} for row in rows]
+
+    def dead_letters(self, campaign: Optional[str] = None) -> List[Dict]:
+        """Endgültig fehlgeschlagene Emails mit Fehler und Fehlerklasse"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        query = "SELECT campaign, email, error, error_kind, attempts, updated_at FROM outbox WHERE status = 'dead'"
+        if campaign:
+            c.execute(query + " AND campaign = ? ORDER BY id", (campaign,))
+        else:
+            c.execute(query + " ORDER BY id")
+        rows = c.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def requeue_dead(self, campaign: str) -> int:
+        """Dead Letters erneut einplanen (z.B. nach behobenem Konfigurationsfehler)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            UPDATE outbox
+            SET status = 'deferred', attempts = 0, first_attempt_at = NULL, next_attempt_at = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE campaign = ? AND status = 'dead'
+        ''', (time.time(), campaign))
+        count = c.rowcount
+        conn.commit()
+        conn.close()
+        return count
+
+    def claim(self, campaign: str, shard: int, shards: int, worker: str, limit: int = 50,
+              lease: float = 600) -> List[Dict]:
+        """Atomar bis zu limit Zeilen eines Shards reservieren (pending/drafted oder abgelaufene Leases)"""
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('BEGIN IMMEDIATE')  # Schreibsperre → keine Doppel-Claims zwischen Prozessen
+            rows = conn.execute('''
+                SELECT id, email, contact, subject, body FROM outbox
+                WHERE campaign = ? AND shard_key % ? = ?
+                  AND (status IN ('pending', 'drafted') OR (status = 'sending' AND claimed_at < ?))
+                  AND (not_before IS NULL OR not_before <= ?)
+                ORDER BY COALESCE(not_before, 0), id
+                LIMIT ?
+            ''', (campaign, shards, shard, now - lease, now, limit)).fetchall()
+            conn.executemany('''
+                UPDATE outbox SET status = 'sending', claimed_by = ?, claimed_at = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(worker, now, row['id']) for row in rows])
+            conn.commit()
+        finally:
+            conn.close()
+        return [{'email': row['email'], 'contact': json.loads(row['contact']),
+                 'draft': (row['subject'], row['body']) if row['subject'] and row['body'] else None}
+                for row in rows]
+
+    def schedule(self, campaign: str, plan: Dict[str, float]):
+        """Send-Time-Plan übernehmen: {email: Unix-Zeit} → Zeile wird erst ab dann geclaimt"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.executemany('''
+            UPDATE outbox SET not_before = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE campaign = ? AND email = ? AND status IN ('pending', 'drafted')
+        ''', [(release_at, campaign, email) for email, release_at in plan.items()])
+        conn.commit()
+        conn.close()
+
+    def scheduled_emails(self, emails: Iterable[str]) -> Set[str]:
+        """Welche der Kandidaten sind bereits eingeplant und noch nicht versendet (kampagnenübergreifend)"""
+        return self._matching(emails, "status IN ('pending', 'drafted', 'sending') AND not_before IS NOT NULL")
+
+    def undeliverable_emails(self, emails: Iterable[str]) -> Set[str]:
+        """Welche der Kandidaten haben einen Dead Letter oder ausstehenden Retry – nicht erneut aufnehmen"""
+        return self._matching(emails, "status IN ('dead', 'deferred')")
+
+    def _matching(self, emails: Iterable[str], condition: str, chunk: int = 500) -> Set[str]:
+        """Kandidaten-Adressen, für die eine Zeile die Bedingung erfüllt (Index-Lookup statt Vollscan)"""
+        emails = list(dict.fromkeys(emails))
+        found: Set[str] = set()
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        for start in range(0, len(emails), chunk):
+            part = emails[start:start + chunk]
+            rows = conn.execute(f"SELECT DISTINCT email FROM outbox WHERE email IN ({','.join('?' * len(part))}) "
+                                f"AND {condition}", part).fetchall()
+            found.update(row[0] for row in rows)
+        conn.close()
+        return found
+
+    def booked_hours(self, since: Optional[float] = None) -> Dict[int, int]:
+        """Eingeplante, noch offene Zeilen pro Stunde ab since → {Unix-Zeit // 3600: Anzahl}"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        rows = conn.execute('''
+            SELECT CAST(not_before / 3600 AS INTEGER) AS hour, COUNT(*) FROM outbox
+            WHERE status IN ('pending', 'drafted', 'sending') AND not_before >= ?
+            GROUP BY hour
+        ''', (since if since is not None else time.time() // 3600 * 3600,)).fetchall()
+        conn.close()
+        return dict(rows)
+
+    def due_campaigns(self, now: Optional[float] = None) -> List[str]:
+        """Kampagnen mit freigegebenen, noch nicht gesendeten Zeilen"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        rows = conn.execute('''
+            SELECT DISTINCT campaign FROM outbox
+            WHERE status IN ('pending', 'drafted') AND not_before IS NOT NULL AND not_before <= ?
+            ORDER BY campaign
+        ''', (now or time.time(),)).fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def stats(self, campaign: str) -> Dict:
+        """Anzahl pro Status"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            SELECT status, COUNT(*) FROM outbox WHERE campaign = ? GROUP BY status
+        ''', (campaign,))
+        rows = c.fetchall()
+        conn.close()
+        return dict(rows)
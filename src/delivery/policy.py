@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Zustell-Policy für alle Transporte (Resend, SMTP, Alerts)
+
+Fehlerklassen:
+- transient:  Netzwerk, Timeouts, 5xx, SMTP 4xx-Deferrals → erneut versuchen
+- throttled:  429 / SMTP 421/450/451 mit Rate-Hinweis → Retry-After respektieren
+- permanent:  Validierung, harte Bounces (SMTP 5xx), ungültige Empfänger → Dead Letter
+
+Retries mit Full-Jitter-Backoff innerhalb eines Deadline-Budgets. Nur kurze Wartezeiten
+werden inline abgewartet; alles Längere kommt als 'deferred' mit retry_at zurück und wird
+über die Outbox später erneut versucht → Worker blockieren nicht während eines Provider-Hängers.
+"""
+
+import random
+import smtplib
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+TRANSIENT = "transient"
+THROTTLED = "throttled"
+PERMANENT = "permanent"
+
+# SMTP-Codes, die auf Drosselung hindeuten (RFC 5321 + Provider-Praxis)
+SMTP_THROTTLE_CODES = (421, 450, 451)
+THROTTLE_HINTS = ("rate", "too many", "throttl", "try again later", "greylist")
+
+# HTTP-Status → Fehlerklasse (Rest: 5xx transient, 4xx permanent)
+HTTP_CLASSES = {408: TRANSIENT, 409: TRANSIENT, 425: TRANSIENT, 429: THROTTLED}
+
+
+def classify(error: BaseException) -> Tuple[str, Optional[float]]:
+    """Fehler → (Fehlerklasse, Retry-After in Sekunden oder None)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        if codes and all(400 <= code < 500 for code in codes):
+            return TRANSIENT, None
+        return PERMANENT, None
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return PERMANENT, None
+    if isinstance(error, smtplib.SMTPResponseException):
+        message = error.smtp_error.decode("utf-8", "ignore") if isinstance(error.smtp_error, bytes) \
+            else str(error.smtp_error)
+        if error.smtp_code in SMTP_THROTTLE_CODES and any(h in message.lower() for h in THROTTLE_HINTS):
+            return THROTTLED, None
+        return (TRANSIENT, None) if 400 <= error.smtp_code < 500 else (PERMANENT, None)
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                          ConnectionError, socket.timeout, TimeoutError)):
+        return TRANSIENT, None
+
+    status = _http_status(error)
+    if status is not None:
+        retry_after = _retry_after(error)
+        if status in HTTP_CLASSES:
+            return HTTP_CLASSES[status], retry_after
+        return (TRANSIENT, retry_after) if status >= 500 else (PERMANENT, None)
+
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return PERMANENT, None  # Programm-/Datenfehler: Wiederholen ändert nichts
+    return TRANSIENT, None      # Unbekannt: begrenzt wiederholen, danach Dead Letter
+
+
+def _http_status(error: BaseException) -> Optional[int]:
+    """Status aus resend.exceptions.ResendError (code) oder requests.HTTPError (response)"""
+    response = getattr(error, "response", None)
+    code = getattr(response, "status_code", None) or getattr(error, "code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None) or {}
+    return parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+
+
+def parse_retry_after(value, now: Optional[float] = None) -> Optional[float]:
+    """Retry-After-Header → Sekunden (RFC 9110: Sekundenzahl oder HTTP-Datum), None wenn unlesbar"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value)).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    """Exponentielles Backoff mit Full Jitter, Versuchs- und Zeitbudget"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 15 * 60,
+                 deadline: float = 24 * 3600, inline_max_delay: float = 2.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline            # Gesamtbudget ab erstem Versuch
+        self.inline_max_delay = inline_max_delay
+        self.sleep = sleep
+
+    def backoff(self, attempt: int, kind: str = TRANSIENT, retry_after: Optional[float] = None) -> float:
+        """Wartezeit vor Versuch attempt+1 (attempt zählt ab 1)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if kind == THROTTLED:
+            # Drosselung: mindestens Retry-After, sonst nicht unter der halben Backoff-Stufe
+            delay = max(delay, retry_after or self.base_delay * 2 ** (attempt - 1))
+        return min(delay, self.max_delay)
+
+    def execute(self, func: Callable, *args, attempt: int = 0, first_attempt_at: Optional[float] = None,
+                **kwargs) -> Dict:
+        """func ausführen → {status: sent|deferred|dead, result, error, kind, attempts, retry_at, first_attempt_at}
+
+        attempt/first_attempt_at: bereits verbrauchte Versuche (bei erneutem Versuch aus der Outbox).
+        """
+        started = first_attempt_at or time.time()
+
+        def outcome(status: str, **fields) -> Dict:
+            return {"status": status, "result": None, "error": None, "kind": None, "attempts": attempt,
+                    "retry_at": None, "first_attempt_at": started, **fields}
+
+        while True:
+            attempt += 1
+            try:
+                return outcome("sent", result=func(*args, **kwargs))
+            except Exception as e:
+                kind, retry_after = classify(e)
+                error = f"{type(e).__name__}: {e}"
+                if kind == PERMANENT or attempt >= self.max_attempts:
+                    return outcome("dead", error=error, kind=kind)
+                delay = self.backoff(attempt, kind, retry_after)
+                if time.time() + delay - started > self.deadline:
+                    return outcome("dead", error=f"Deadline überschritten – {error}", kind=kind)
+                if delay > self.inline_max_delay:
+                    return outcome("deferred", error=error, kind=kind, retry_at=time.time() + delay)
+                self.sleep(delay)
+
+
+# Vorkonfigurierte Policies
+CAMPAIGN_POLICY = RetryPolicy()                                              # Outbox übernimmt lange Waits
+INTERACTIVE_POLICY = RetryPolicy(max_attempts=3, deadline=20, inline_max_delay=5)   # Dashboard: kurz warten, dann Fehler
+ALERT_POLICY = RetryPolicy(max_attempts=4, deadline=60, inline_max_delay=15)        # Alerts: lieber inline warten
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Antwort-Erkennung per IMAP → Follow-up-Sequenz stoppen (SQLite, data/replies.db)
+
+- Jede versendete Email bekommt eine eigene Message-ID (Resend-Header bzw. MIME),
+  record_sent() merkt sich Message-ID → Empfänger
+- ReplyPoller liest das Reply-To-Postfach inkrementell: UIDVALIDITY + höchste gesehene UID
+  werden persistiert, es werden nur Header neuer UIDs geholt
+  → Kosten pro Poll hängen von neuen Nachrichten ab, nicht von der Postfachgröße
+- Optional IDLE: der Server meldet neue Nachrichten sofort, Polling nur als Fallback
+- Zuordnung über In-Reply-To/References, sonst über die Absenderadresse;
+  Abwesenheitsnotizen (Auto-Submitted, typische Betreffzeilen) stoppen nichts
+- Follow-up-Status pro Empfänger: active → stopped (reply / manual)
+
+CLI:
+    python -m src.delivery.replies poll
+    python -m src.delivery.replies watch           # IDLE-Schleife
+    python -m src.delivery.replies --stub-demo
+"""
+
+import argparse
+import imaplib
+import os
+import re
+import select
+import socketserver
+import sqlite3
+import threading
+import time
+from email import message_from_bytes
+from email.utils import parseaddr
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.analytics.metrics import MeteredConnection
+
+HEADER_FIELDS = "MESSAGE-ID IN-REPLY-TO REFERENCES FROM SUBJECT AUTO-SUBMITTED X-AUTOREPLY"
+FETCH_CHUNK = 200
+IDLE_TIMEOUT = 25 * 60          # RFC 2177: IDLE spätestens nach 29 min erneuern
+AUTO_REPLY_SUBJECTS = ("automatische antwort", "abwesenheit", "out of office", "autoreply", "auto-reply",
+                       "delivery status notification", "unzustellbar", "undeliverable")
+MESSAGE_IDS = re.compile(r"<[^<>\s]+>")
+
+
+class ReplyTracker:
+    """Gesendete Message-IDs und Follow-up-Status pro Empfänger"""
+
+    def __init__(self, db_path: str = "data/replies.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Reply DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS sent_messages (
+                message_id TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                campaign TEXT,
+                sent_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_sent_messages_email ON sent_messages (email)')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS follow_up_state (
+                email TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'active',   -- active | stopped
+                reason TEXT,
+                reply_message_id TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS imap_state (
+                mailbox TEXT PRIMARY KEY,
+                uidvalidity INTEGER NOT NULL,
+                last_uid INTEGER NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def record_sent(self, message_id: Optional[str], email: str, campaign: Optional[str] = None):
+        if not message_id:
+            return
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.execute('INSERT OR IGNORE INTO sent_messages (message_id, email, campaign) VALUES (?, ?, ?)',
+                     (message_id, email.lower(), campaign))
+        conn.execute("INSERT OR IGNORE INTO follow_up_state (email, state) VALUES (?, 'active')", (email.lower(),))
+        conn.commit()
+        conn.close()
+
+    def match(self, conn, references: Iterable[str], sender: str) -> Optional[str]:
+        """Empfänger einer Antwort: erst über referenzierte Message-IDs, dann über die Absenderadresse"""
+        references = list(references)
+        if references:
+            row = conn.execute(f'''
+                SELECT email FROM sent_messages WHERE message_id IN ({','.join('?' * len(references))}) LIMIT 1
+            ''', references).fetchone()
+            if row:
+                return row[0]
+        if sender:
+            row = conn.execute('SELECT email FROM sent_messages WHERE email = ? LIMIT 1', (sender,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def stop(self, email: str, reason: str = 'manual', reply_message_id: Optional[str] = None, conn=None):
+        """Follow-up-Sequenz eines Empfängers beenden"""
+        own = conn is None
+        conn = conn or sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.execute('''
+            INSERT INTO follow_up_state (email, state, reason, reply_message_id, updated_at)
+            VALUES (?, 'stopped', ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (email) DO UPDATE SET state = 'stopped', reason = excluded.reason,
+                reply_message_id = excluded.reply_message_id, updated_at = CURRENT_TIMESTAMP
+            WHERE follow_up_state.state != 'stopped'
+        ''', (email.lower(), reason, reply_message_id))
+        if own:
+            conn.commit()
+            conn.close()
+
+    def stopped(self, emails: Optional[Iterable[str]] = None) -> Set[str]:
+        """Empfänger mit gestoppter Follow-up-Sequenz"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        rows = conn.execute("SELECT email FROM follow_up_state WHERE state = 'stopped'").fetchall()
+        conn.close()
+        stopped = {row[0] for row in rows}
+        return stopped if emails is None else {email for email in emails if email.lower() in stopped}
+
+    def mailbox_state(self, mailbox: str) -> Tuple[int, int]:
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        row = conn.execute('SELECT uidvalidity, last_uid FROM imap_state WHERE mailbox = ?', (mailbox,)).fetchone()
+        conn.close()
+        return row or (0, 0)
+
+    def save_mailbox_state(self, conn, mailbox: str, uidvalidity: int, last_uid: int):
+        conn.execute('INSERT OR REPLACE INTO imap_state (mailbox, uidvalidity, last_uid) VALUES (?, ?, ?)',
+                     (mailbox, uidvalidity, last_uid))
+
+
+def is_auto_reply(headers) -> bool:
+    if (headers.get('Auto-Submitted') or 'no').strip().lower() != 'no' or headers.get('X-Autoreply'):
+        return True
+    subject = (headers.get('Subject') or '').lower()
+    return any(hint in subject for hint in AUTO_REPLY_SUBJECTS)
+
+
+class ReplyPoller:
+    """Inkrementeller IMAP-Leser für das Reply-To-Postfach"""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, mailbox: str = 'INBOX', use_ssl: Optional[bool] = None,
+                 tracker: Optional[ReplyTracker] = None):
+        self.host = host or os.getenv('IMAP_HOST', 'imap.strato.de')
+        self.use_ssl = use_ssl if use_ssl is not None else os.getenv('IMAP_USE_SSL', 'True') == 'True'
+        self.port = port or int(os.getenv('IMAP_PORT', 993 if self.use_ssl else 143))
+        self.username = username or os.getenv('IMAP_USERNAME') or os.getenv('SMTP_USERNAME')
+        self.password = password or os.getenv('IMAP_PASSWORD') or os.getenv('SMTP_PASSWORD')
+        self.mailbox = mailbox
+        self.tracker = tracker or ReplyTracker()
+        self.imap = None
+        self.exists = 0                 # Nachrichtenzahl beim letzten Poll → Race vor IDLE erkennen
+
+    def connect(self):
+        if self.imap is None:
+            self.imap = (imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4)(self.host, self.port)
+            self.imap.login(self.username, self.password)
+        return self.imap
+
+    def close(self):
+        if self.imap is not None:
+            try:
+                self.imap.logout()
+            except (imaplib.IMAP4.error, OSError):
+                pass
+            self.imap = None
+
+    def poll(self) -> Dict[str, int]:
+        """Neue Nachrichten seit der letzten UID prüfen → {'fetched', 'replies', 'auto_replies'}"""
+        imap = self.connect()
+        self.exists = int(imap.select(self.mailbox, readonly=True)[1][0])
+        uidvalidity = int(imap.response('UIDVALIDITY')[1][0])
+        known_validity, last_uid = self.tracker.mailbox_state(self.mailbox)
+        if known_validity != uidvalidity:
+            last_uid = 0  # Postfach neu nummeriert → einmalig komplett prüfen
+
+        _, data = imap.uid('SEARCH', None, f'UID {last_uid + 1}:*')
+        # '*' liefert immer die letzte Nachricht, auch wenn sie schon bekannt ist
+        uids = [int(uid) for uid in (data[0] or b'').split() if int(uid) > last_uid]
+        stats = {'fetched': len(uids), 'replies': 0, 'auto_replies': 0}
+
+        conn = sqlite3.connect(self.tracker.db_path, factory=MeteredConnection, timeout=30)
+        try:
+            for start in range(0, len(uids), FETCH_CHUNK):
+                chunk = uids[start:start + FETCH_CHUNK]
+                _, data = imap.uid('FETCH', ','.join(map(str, chunk)), f'(UID BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])')
+                for item in data:
+                    if not isinstance(item, tuple):
+                        continue
+                    headers = message_from_bytes(item[1])
+                    if is_auto_reply(headers):
+                        stats['auto_replies'] += 1
+                        continue
+                    references = MESSAGE_IDS.findall(f"{headers.get('In-Reply-To', '')} {headers.get('References', '')}")
+                    sender = parseaddr(headers.get('From', ''))[1].lower()
+                    email = self.tracker.match(conn, references, sender)
+                    if email:
+                        self.tracker.stop(email, 'reply', headers.get('Message-ID'), conn=conn)
+                        stats['replies'] += 1
+                        print(f"💬 Antwort von {sender or email} → Follow-ups für {email} gestoppt")
+                last_uid = max(last_uid, *chunk)
+                self.tracker.save_mailbox_state(conn, self.mailbox, uidvalidity, last_uid)
+                conn.commit()
+            if not uids:
+                self.tracker.save_mailbox_state(conn, self.mailbox, uidvalidity, last_uid)
+                conn.commit()
+        finally:
+            conn.close()
+        return stats
+
+    def idle(self, timeout: float = IDLE_TIMEOUT) -> bool:
+        """IDLE (RFC 2177): blockiert bis zu neuen Nachrichten oder Timeout → True bei neuer Nachricht"""
+        imap = self.connect()
+        if 'IDLE' not in imap.capabilities:
+            time.sleep(min(timeout, 300))
+            return True
+        if int(imap.select(self.mailbox, readonly=True)[1][0]) > self.exists:
+            return True  # zwischen Poll und IDLE eingetroffen
+        tag = imap._new_tag()
+        imap.send(tag + b' IDLE\r\n')
+        if not imap.readline().startswith(b'+'):
+            raise imaplib.IMAP4.error("IDLE abgelehnt")
+        # select statt Socket-Timeout: ein Timeout würde imaplibs gepufferte Datei unbrauchbar machen
+        deadline = time.monotonic() + timeout
+        changed = False
+        try:
+            while not changed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([imap.socket()], [], [], remaining)[0]:
+                    break
+                line = imap.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Verbindung während IDLE geschlossen")
+                changed = line.rstrip().endswith(b'EXISTS')
+        finally:
+            imap.send(b'DONE\r\n')
+            while True:  # bis zur getaggten Antwort auf IDLE lesen
+                line = imap.readline()
+                if not line or line.startswith(tag):
+                    break
+        return changed
+
+    def watch(self, stop: Optional[threading.Event] = None, idle_timeout: float = IDLE_TIMEOUT):
+        """Dauerschleife: poll → IDLE → poll …; bei Verbindungsfehlern neu verbinden"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                stats = self.poll()
+                if stats['fetched']:
+                    print(f"📥 {stats['fetched']} neue Nachrichten, {stats['replies']} Antworten")
+                self.idle(idle_timeout)
+            except (imaplib.IMAP4.abort, OSError) as e:
+                print(f"⚠️  IMAP-Verbindung verloren ({e}) – neuer Versuch in 30s")
+                self.close()
+                stop.wait(30)
+
+
+class LocalIMAPStub:
+    """Minimaler IMAP4rev1-Server für Tests (LOGIN, SELECT, UID SEARCH/FETCH, IDLE)"""
+
+    def __init__(self, uidvalidity: int = 1):
+        self.uidvalidity = uidvalidity
+        self.messages: List[Tuple[int, bytes]] = []
+        self.fetched_uids: List[int] = []
+        self._next_uid = 1
+        self._changed = threading.Condition()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def deliver(self, raw: bytes) -> int:
+        with self._changed:
+            uid = self._next_uid
+            self._next_uid += 1
+            self.messages.append((uid, raw))
+            self._changed.notify_all()
+        return uid
+
+    def renumber(self):
+        """UIDVALIDITY wechseln (z.B. Postfach neu angelegt)"""
+        with self._changed:
+            self.uidvalidity += 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def out(self, line: str, payload: Optional[bytes] = None):
+                self.wfile.write(line.encode() + (b"\r\n" + payload if payload is not None else b"") + b"\r\n")
+
+            def handle(self):
+                self.out("* OK [CAPABILITY IMAP4rev1 IDLE] LocalIMAPStub bereit")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    tag, _, rest = line.decode().strip().partition(" ")
+                    command, _, args = rest.partition(" ")
+                    command = command.upper()
+                    if command == "CAPABILITY":
+                        self.out("* CAPABILITY IMAP4rev1 IDLE")
+                    elif command in ("SELECT", "EXAMINE"):
+                        self.out(f"* {len(stub.messages)} EXISTS")
+                        self.out(f"* OK [UIDVALIDITY {stub.uidvalidity}] UIDs valid")
+                        self.out(f"* OK [UIDNEXT {stub._next_uid}] Predicted next UID")
+                        self.out(f"{tag} OK [READ-ONLY] {command} completed")
+                        continue
+                    elif command == "UID":
+                        self.uid(tag, args)
+                        continue
+                    elif command == "IDLE":
+                        self.idle(tag)
+                        continue
+                    elif command == "LOGOUT":
+                        self.out("* BYE")
+                        self.out(f"{tag} OK LOGOUT completed")
+                        return
+                    self.out(f"{tag} OK {command} completed")
+
+            def uid(self, tag: str, args: str):
+                sub, _, rest = args.partition(" ")
+                if sub.upper() == "SEARCH":
+                    low = int(re.search(r"UID (\d+):\*", rest).group(1))
+                    uids = [uid for uid, _ in stub.messages if uid >= low]
+                    if not uids and stub.messages:
+                        uids = [stub.messages[-1][0]]  # wie echte Server: n:* enthält immer die letzte UID
+                    self.out("* SEARCH " + " ".join(map(str, uids)))
+                else:
+                    wanted = {int(uid) for uid in rest.split(" ", 1)[0].split(",")}
+                    fields = re.search(r"HEADER\.FIELDS \(([^)]*)\)", rest).group(1).lower().split()
+                    for seq, (uid, raw) in enumerate(stub.messages, 1):
+                        if uid not in wanted:
+                            continue
+                        stub.fetched_uids.append(uid)
+                        head = raw.split(b"\r\n\r\n", 1)[0].split(b"\r\n")
+                        selected = b"".join(line + b"\r\n" for line in head
+                                            if line.split(b":", 1)[0].decode().lower() in fields) + b"\r\n"
+                        self.out(f"* {seq} FETCH (UID {uid} BODY[HEADER.FIELDS ({HEADER_FIELDS})] "
+                                 f"{{{len(selected)}}}", selected + b")")
+                self.out(f"{tag} OK UID completed")
+
+            def idle(self, tag: str):
+                with stub._changed:
+                    seen = len(stub.messages)
+                self.out("+ idling")
+                while True:
+                    with stub._changed:
+                        stub._changed.wait(0.05)
+                        if len(stub.messages) > seen:
+                            seen = len(stub.messages)
+                            self.out(f"* {seen} EXISTS")
+                    if select.select([self.connection], [], [], 0)[0]:
+                        if self.rfile.readline().strip().upper() in (b"DONE", b""):
+                            break
+                self.out(f"{tag} OK IDLE terminated")
+
+        return Handler
+
+
+def stub_demo():
+    """Ende-zu-Ende gegen den lokalen IMAP-Stub"""
+    import tempfile
+    tracker = ReplyTracker(os.path.join(tempfile.mkdtemp(), "replies.db"))
+    for i in range(1, 4):
+        tracker.record_sent(f"<msg{i}@sbsdeutschland.de>", f"kanzlei{i}@example.de", "demo")
+    with LocalIMAPStub() as stub:
+        stub.deliver(b"From: Kanzlei 1 <kanzlei1@example.de>\r\nSubject: Re: Ihre Kanzlei\r\n"
+                     b"In-Reply-To: <msg1@sbsdeutschland.de>\r\nMessage-ID: <r1@example.de>\r\n\r\nGerne!")
+        stub.deliver(b"From: kanzlei2@example.de\r\nSubject: Automatische Antwort: Ihre Kanzlei\r\n"
+                     b"Auto-Submitted: auto-replied\r\n\r\nBin im Urlaub")
+        poller = ReplyPoller("127.0.0.1", stub.port, "demo", "demo", use_ssl=False, tracker=tracker)
+        print(f"1. Poll: {poller.poll()}")
+        print(f"2. Poll (nichts Neues): {poller.poll()}")
+        threading.Timer(0.3, stub.deliver, [b"From: Anderer Name <kanzlei3@example.de>\r\n"
+                                            b"Subject: Frage\r\n\r\nRufen Sie an"]).start()
+        print(f"IDLE meldet neue Nachricht: {poller.idle(timeout=5)}")
+        print(f"3. Poll: {poller.poll()}")
+        poller.close()
+        print(f"✓ Gestoppt: {sorted(tracker.stopped())}, Header-Fetches: {stub.fetched_uids}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Antworten im Reply-To-Postfach erkennen")
+    parser.add_argument("command", nargs="?", choices=["poll", "watch"], default="poll")
+    parser.add_argument("--mailbox", default="INBOX")
+    parser.add_argument("--stub-demo", action="store_true", help="Gegen lokalen IMAP-Stub laufen")
+    args = parser.parse_args()
+
+    if args.stub_demo:
+        stub_demo()
+        return
+    poller = ReplyPoller(mailbox=args.mailbox)
+    if args.command == "watch":
+        poller.watch()
+    else:
+        print(f"✓ {poller.poll()}")
+        poller.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Resend-Batch-Transport (POST /emails/batch, bis zu 100 Emails pro Request)
+
+- Nachrichten werden zu Batches gruppiert → 1.000 Follow-ups ≈ 10 HTTP-Requests
+- Permissive Validation: ein ungültiger Empfänger kippt nicht den ganzen Batch,
+  IDs und Fehler werden per Index auf die Kontakte zurückgemappt
+- Wiederholt werden nur die fehlgeschlagenen Einträge (429/5xx/Netzwerk → ganzer Batch,
+  sonst nur vorübergehende Einzelfehler); Validierungsfehler sind endgültig
+- Wartezeit vor dem Retry: Retry-After des 429 (Sekunden oder HTTP-Datum), sonst exponentielles Backoff
+- Idempotency-Key pro Batch-Inhalt → ein Retry nach Timeout verschickt nichts doppelt
+- Eine gepoolte requests.Session für alle Calls
+
+CLI (gegen den lokalen Stub):
+    python -m src.delivery.resend_batch --stub --count 250
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.analytics.metrics import SENDS, SEND_LATENCY
+from src.delivery.policy import parse_retry_after
+
+RESEND_API_URL = "https://api.resend.com"
+MAX_BATCH = 100                 # Resend-Limit pro Batch-Request
+
+# Einzelfehler, die ein erneuter Versuch nicht behebt
+PERMANENT_ERRORS = ("invalid", "validation", "not allowed", "not verified", "missing", "must be")
+
+
+class ResendBatchTransport:
+    """Versendet gerenderte Nachrichten in Batches und liefert ein Ergebnis pro Nachricht"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = RESEND_API_URL,
+                 batch_size: int = MAX_BATCH, max_retries: int = 3, timeout: float = 30,
+                 backoff: float = 1.0, sleep: Callable[[float], None] = time.sleep):
+        self.api_key = api_key or os.getenv('RESEND_API_KEY')
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = min(batch_size, MAX_BATCH)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.sleep = sleep
+        self.stats = {"requests": 0, "sent": 0, "failed": 0, "retried": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "x-batch-validation": "permissive",
+        })
+
+    def send(self, messages: List[Dict]) -> List[Dict]:
+        """Resend-Params (from/to/subject/html …) senden → [{email, id, error, retryable, attempts}] in Eingabereihenfolge"""
+        results = [{"email": _recipient(message), "id": None, "error": None, "retryable": False, "attempts": 0}
+                   for message in messages]
+        pending = list(range(len(messages)))
+        retry_after: Optional[float] = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self.stats["retried"] += len(pending)
+                # Retry-After des Servers ersetzt das Backoff (nicht beides nacheinander)
+                self.sleep(self.backoff * 2 ** (attempt - 1) if retry_after is None else retry_after)
+            retry, retry_after = [], None
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                for index, outcome in zip(chunk, self._send_chunk([messages[i] for i in chunk])):
+                    results[index]["attempts"] += 1
+                    results[index]["id"] = outcome.get("id")
+                    results[index]["error"] = outcome.get("error")
+                    results[index]["retryable"] = bool(outcome.get("retryable"))
+                    if outcome.get("retryable") and attempt < self.max_retries:
+                        retry.append(index)
+                        if outcome.get("retry_after") is not None:
+                            retry_after = max(retry_after or 0.0, outcome["retry_after"])
+            if not retry:
+                break
+            pending = retry
+
+        sent = sum(1 for r in results if r["id"])
+        with self._lock:
+            self.stats["sent"] += sent
+            self.stats["failed"] += len(results) - sent
+        SENDS.labels(provider="resend_batch", outcome="sent").inc(sent)
+        SENDS.labels(provider="resend_batch", outcome="failed").inc(len(results) - sent)
+        return results
+
+    def _send_chunk(self, chunk: List[Dict]) -> List[Dict]:
+        """Ein Batch-Request → ein Outcome pro Nachricht ({id} oder {error, retryable[, retry_after]})"""
+        payload = json.dumps(chunk, ensure_ascii=False, sort_keys=True)
+        headers = {"Idempotency-Key": "batch-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:48]}
+        with self._lock:
+            self.stats["requests"] += 1
+        try:
+            with SEND_LATENCY.labels(provider="resend_batch").time():
+                response = self.session.post(f"{self.base_url}/emails/batch", data=payload.encode("utf-8"),
+                                             headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return [{"error": f"Verbindungsfehler: {e}", "retryable": True}] * len(chunk)
+
+        if response.status_code == 429:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            return [{"error": "Rate Limit (429)", "retryable": True,
+                     "retry_after": parse_retry_after(response.headers.get("Retry-After"))}] * len(chunk)
+        if response.status_code >= 500:
+            return [{"error": f"HTTP {response.status_code}", "retryable": True}] * len(chunk)
+        if response.status_code >= 400:
+            # Strict Validation oder Auth-Fehler → ganzer Batch endgültig
+            return [{"error": f"HTTP {response.status_code}: {_error_message(response)}",
+                     "retryable": False}] * len(chunk)
+
+        body = response.json()
+        errors = {item["index"]: item.get("message", "Fehler") for item in body.get("errors") or []}
+        ids = iter(body.get("data") or [])
+        outcomes = []
+        for index in range(len(chunk)):
+            if index in errors:
+                message = errors[index]
+                outcomes.append({"error": message,
+                                 "retryable": not any(p in message.lower() for p in PERMANENT_ERRORS)})
+            else:
+                # data enthält nur die angenommenen Nachrichten, in Eingabereihenfolge
+                item = next(ids, None)
+                outcomes.append({"id": item["id"]} if item else {"error": "Keine ID erhalten", "retryable": True})
+        return outcomes
+
+
+def _recipient(message: Dict) -> str:
+    to = message.get("to")
+    return to[0] if isinstance(to, list) else to
+
+
+def _error_message(response) -> str:
+    try:
+        return response.json().get("message", response.text[:200])
+    except ValueError:
+        return response.text[:200]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resend-Batch-Versand testen")
+    parser.add_argument("--stub", action="store_true", help="Lokalen Resend-Ersatz statt echter API")
+    parser.add_argument("--count", type=int, default=250)
+    args = parser.parse_args()
+
+    messages = [{"from": "SBS Nexus <ki@sbsdeutschland.de>",
+                 "to": [f"{'invalid' if i % 97 == 0 else 'flaky' if i % 41 == 0 else 'kanzlei'}{i}@example.de"],
+                 "subject": "Test", "html": f"Nachricht {i}"} for i in range(1, args.count + 1)]
+    if not args.stub:
+        transport = ResendBatchTransport()
+        results = transport.send(messages)
+    else:
+        from tests.stubs import LocalResendStub  # Stand-in liegt bei den Tests (nur im Repo-Checkout)
+        with LocalResendStub(rate_limit_every=4) as stub:
+            transport = ResendBatchTransport(api_key="re_stub", base_url=stub.url, backoff=0.05)
+            results = transport.send(messages)
+    failed = [r for r in results if not r["id"]]
+    print(f"✓ {len(results) - len(failed)}/{len(results)} gesendet in {transport.stats['requests']} Requests "
+          f"({transport.stats['retried']} Wiederholungen, {transport.stats['rate_limited']}× 429)")
+    for r in failed:
+        print(f"   ✗ {r['email']}: {r['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Kampagnen-Sharding über mehrere Prozesse
+
+- Outbox wird per Hash der Empfänger-Domain partitioniert (shard_key % shards)
+  → alle Empfänger einer Domain landen im selben Prozess
+- Jeder Shard-Prozess hat eigene Provider-Sessions (Resend/SMTP) und ein Rate-Limit-Slice
+  (Gesamtrate / Shards, ebenso die MX-Caps aus config/mx_limits.yaml); max_per_hour aus
+  config/send_time.yaml deckelt die Gesamtrate wie im sequentiellen Versand
+- Prozesse werden per spawn gestartet (kein fork des Schedulers mit laufenden Threads)
+- Wirft ein Versand, wird die Zeile sofort zurückgestellt (deferred) bzw. als Dead Letter
+  markiert, statt bis zum Lease-Ablauf in 'sending' zu hängen
+- Innerhalb eines Shards taktet der MXScheduler reihum über die Mail-Provider
+- Koordination nur über die SQLite-Outbox (WAL): Zeilen werden atomar geclaimt,
+  abgestürzte Shards geben ihre Zeilen nach Ablauf des Leases frei
+- Rendering (Template/KI), MIME-Aufbau und TLS laufen parallel → Durchsatz skaliert mit Kernen
+
+CLI:
+    python -m src.delivery.sharding --campaign campaign_20250101 --shards 4
+    python -m src.delivery.sharding --demo 2000 --shards 4 --stub
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from src.analytics.rollups import CampaignRollups
+from src.content_automation.campaign_planner import CampaignPlanner
+from src.delivery.mx_scheduler import MXScheduler
+from src.delivery.outbox import Outbox
+from src.delivery.policy import CAMPAIGN_POLICY, PERMANENT, THROTTLED, classify
+from src.lead_generation.hunter_client import TokenBucket
+
+RATE_PER_SECOND = 10        # Gesamtrate über alle Shards (Resend: 10 Requests/s)
+CLAIM_SIZE = 50
+LEASE = 600                 # geclaimte Zeilen eines abgestürzten Shards werden danach neu vergeben
+
+
+def run_shard(options: Dict) -> Dict:
+    """Ein Shard-Prozess: claimen → rendern → senden → Outbox aktualisieren, bis nichts mehr offen ist"""
+    if options.get('stub'):
+        from src.utils.profiling import NetworkStubs
+        with NetworkStubs().active():
+            return _run_shard(options)
+    return _run_shard(options)
+
+
+def _run_shard(options: Dict) -> Dict:
+    # Import erst im Kindprozess → eigene Resend-/SMTP-/HTTP-Sessions pro Shard
+    from automated_email_sender import SBSEmailAutomation
+
+    outbox = Outbox(options['outbox_path'])
+    automation = SBSEmailAutomation(use_resend=options.get('use_resend', True), outbox=outbox)
+    automation.campaign_id = options['campaign']
+    planner = CampaignPlanner.from_config(automation, automation.load_templates())
+    mx = MXScheduler.from_config(share=1 / options['shards'])
+    return send_shard(options, outbox, automation, planner, mx)
+
+
+def send_shard(options: Dict, outbox: Outbox, automation, planner, mx: MXScheduler) -> Dict:
+    """Claim-Schleife eines Shards; options['budget'] begrenzt die Sends pro Lauf (None = alles Fällige)"""
+    shard, shards, campaign = options['shard'], options['shards'], options['campaign']
+    worker = f"{os.getpid()}:{shard}"
+    rate = options['rate'] / shards
+    bucket = TokenBucket(rate, capacity=max(1.0, rate))   # < 1/s (max_per_hour) braucht Platz für ein Token
+    remaining = options.get('budget')
+    results = {'campaign': campaign, 'shard': shard, 'sent': 0, 'failed': 0, 'deferred': 0, 'total': 0,
+               'suppressed': 0, 'details': []}
+
+    while remaining is None or remaining > 0:
+        limit = options['claim_size'] if remaining is None else min(options['claim_size'], remaining)
+        claimed = outbox.claim(campaign, shard, shards, worker, limit, options['lease'])
+        if not claimed:
+            break
+        if remaining is not None:
+            remaining -= len(claimed)
+        allowed, suppressed = automation.suppress([item['contact'] for item in claimed])  # → Outbox 'suppressed'
+        results['suppressed'] += len(suppressed)
+        allowed = {contact['email'] for contact in allowed}
+        claimed = [item for item in claimed if item['email'] in allowed]
+        plan = planner.plan([item['contact'] for item in claimed],
+                            {item['email']: item['draft'] for item in claimed if item['draft']})
+        for item in mx.schedule(claimed):
+            contact = item['contact']
+            subject = body = template_id = None
+            try:
+                subject, body, template_id = plan.compose(contact)
+                bucket.acquire()
+                automation.send_email(item['email'], subject, body)
+                outcome = automation.last_outcome
+            except Exception as e:
+                outcome = _failed_outcome(e, rendered=subject is not None)
+                automation.last_message = None   # keine MIME-Bytes des vorherigen Kontakts übernehmen
+            if outcome.get('kind') == THROTTLED:
+                mx.throttle(item['email'])
+            automation._record_result(results, contact, subject, body, outcome, template_id)
+            if outcome['status'] == 'sent':
+                outbox.mark(campaign, item['email'], 'sent')
+            results['total'] += 1
+    return results
+
+
+def _failed_outcome(error: Exception, rendered: bool) -> Dict:
+    """Ausnahme beim Rendern/Senden → Policy-Outcome, damit _record_result die Zeile aus 'sending' holt"""
+    kind, retry_after = classify(error)
+    message = f"{type(error).__name__}: {error}"
+    if kind == PERMANENT or not rendered:  # ohne Betreff/Text kann der Retry-Pass nichts senden
+        return {'status': 'dead', 'error': message, 'kind': kind, 'attempts': 1}
+    return {'status': 'deferred', 'error': message, 'kind': kind, 'attempts': 1,
+            'retry_at': time.time() + CAMPAIGN_POLICY.backoff(1, kind, retry_after)}
+
+
+class ShardedCampaign:
+    """Verteilt eine Outbox-Kampagne auf einen Prozess-Pool"""
+
+    def __init__(self, campaign: str, shards: Optional[int] = None, outbox: Optional[Outbox] = None,
+                 rate_per_second: float = RATE_PER_SECOND, claim_size: int = CLAIM_SIZE, lease: float = LEASE,
+                 use_resend: bool = True, stub: bool = False, max_per_hour: Optional[int] = None,
+                 budget: Optional[int] = None):
+        """max_per_hour: Stunden-Cap aus send_time.yaml (über alle Shards); budget: max. Sends in diesem Lauf"""
+        self.campaign = campaign
+        self.shards = shards or os.cpu_count() or 1
+        self.outbox = outbox or Outbox()
+        if max_per_hour:
+            rate_per_second = min(rate_per_second, max_per_hour / 3600)
+        self.options = {'campaign': campaign, 'shards': self.shards, 'outbox_path': self.outbox.db_path,
+                        'rate': rate_per_second, 'claim_size': claim_size,
+                        'budget': math.ceil(budget / self.shards) if budget else None,
+                        'lease': lease, 'use_resend': use_resend, 'stub': stub}
+
+    def run(self) -> Dict:
+        """Alle Shards parallel ausführen → zusammengeführtes Ergebnis im Format von send_campaign"""
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(run_shard, [{**self.options, 'shard': shard} for shard in range(self.shards)]))
+        results = {'campaign': self.campaign, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'sent': 0, 'failed': 0, 'deferred': 0, 'total': 0, 'suppressed': 0, 'details': [], 'shards': {}}
+        for part in parts:
+            for key in ('sent', 'failed', 'deferred', 'total', 'suppressed'):
+                results[key] += part[key]
+            results['details'] += part['details']
+            results['shards'][part['shard']] = part['total']
+        results['duration_s'] = time.perf_counter() - started
+        try:
+            CampaignRollups().apply_send_batch(results)   # einmal für alle Shards
+        except Exception as e:
+            print(f"   ⚠️  Rollup Fehler: {str(e)}")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kampagne aus der Outbox parallel versenden")
+    parser.add_argument("--campaign", default=None)
+    parser.add_argument("--shards", type=int, default=None, help="Anzahl Prozesse (Default: CPU-Kerne)")
+    parser.add_argument("--rate", type=float, default=RATE_PER_SECOND, help="Emails/s über alle Shards")
+    parser.add_argument("--smtp", action="store_true", help="SMTP statt Resend")
+    parser.add_argument("--stub", action="store_true", help="Provider stubben (kein echter Versand)")
+    parser.add_argument("--demo", type=int, default=0, help="N Demo-Kontakte in eine Test-Outbox legen")
+    args = parser.parse_args()
+
+    outbox = Outbox()
+    campaign = args.campaign
+    if args.demo:
+        outbox = Outbox("data/outbox_demo.db")
+        campaign = campaign or f"demo_{time.strftime('%Y%m%d_%H%M%S')}"
+        outbox.enqueue(campaign, [{'email': f"kontakt{i}@kanzlei{i % 300}.de", 'first_name': 'Max',
+                                   'last_name': f"Muster{i}", 'job_title': 'Steuerberater',
+                                   'role': 'Steuerberater', 'company_name': f"Kanzlei {i % 300}"}
+                                  for i in range(args.demo)])
+    if not campaign:
+        parser.error("--campaign oder --demo angeben")
+
+    sharded = ShardedCampaign(campaign, args.shards, outbox, args.rate,
+                              use_resend=not args.smtp, stub=args.stub)
+    results = sharded.run()
+    print(f"\n✓ {results['sent']}/{results['total']} gesendet, {results['deferred']} zurückgestellt "
+          f"in {results['duration_s']:.1f}s ({results['total'] / max(results['duration_s'], 1e-9):.0f}/s, "
+          f"{sharded.shards} Shards: {results['shards']})")
+    print(f"📊 Outbox {campaign}: {outbox.stats(campaign)}")
+
+
+if __name__ == "__main__":
+    main()
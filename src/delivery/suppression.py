@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Suppression-Liste für Bounces, Complaints und Abmeldungen (SQLite, data/suppression.db)
+
+- Gespeist aus Resend-Webhooks (email.bounced, email.complained, contact.updated mit
+  unsubscribed) und der /unsubscribe-Route; Backfill aus email_events.csv per CLI
+- Webhook und Backfill teilen eine Klassifikation (suppression_reason): Soft Bounces
+  (transient/soft) sperren nicht, die Zustell-Policy versucht es erneut
+- Bloom-Filter im Speicher als Fast Path: die allermeisten Adressen sind nicht gesperrt
+  und kosten keine DB-Abfrage; Treffer werden über den Primärschlüssel bestätigt
+  (keine False Positives nach außen)
+- Beim Start aus der Tabelle aufgebaut, danach inkrementell per rowid nachgeladen
+  → ein Sender-Prozess sieht Abmeldungen aus dem Webhook-Prozess beim nächsten Check
+- send_campaign filtert vor der KI-Generierung, Follow-ups und Retries vor dem Versand
+- Abmeldelinks tragen ein HMAC-Token pro Empfänger (UNSUBSCRIBE_SECRET); Kampagnen-Mails
+  bekommen List-Unsubscribe + List-Unsubscribe-Post (RFC 8058) auf UNSUBSCRIBE_URL
+
+CLI:
+    python -m src.delivery.suppression sync            # email_events.csv nachziehen
+    python -m src.delivery.suppression add max@kanzlei.de --reason unsubscribe
+    python -m src.delivery.suppression check max@kanzlei.de
+"""
+
+import argparse
+import hashlib
+import hmac
+import math
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from src.analytics.event_log import first_recipient, read_new_events
+from src.analytics.metrics import MeteredConnection
+
+# Webhook-Event → Sperrgrund
+EVENT_REASONS = {"bounced": "bounce", "complained": "complaint", "unsubscribed": "unsubscribe"}
+SOFT_BOUNCES = ("transient", "soft")
+
+
+def bounce_type(data: Dict) -> str:
+    """Bounce-Typ aus dem Webhook-Payload (bounce.type) oder der Event-Log-Zeile (bounce_type)"""
+    bounce = data.get('bounce')
+    if isinstance(bounce, dict):
+        return str(bounce.get('type') or '').lower()
+    return str(data.get('bounce_type') or '').lower()
+
+
+def suppression_reason(event_type: Optional[str], data: Dict) -> Optional[str]:
+    """Sperrgrund für ein Webhook-Event bzw. eine Event-Log-Zeile → None, wenn nicht gesperrt wird"""
+    event = (event_type or '').split('.', 1)[-1]
+    if event == 'updated' and data.get('unsubscribed'):
+        event = 'unsubscribed'
+    if event == 'bounced' and bounce_type(data) in SOFT_BOUNCES:
+        return None  # Soft Bounce: Zustell-Policy versucht es erneut
+    return EVENT_REASONS.get(event)
+
+
+def unsubscribe_token(email: str, secret: Optional[str] = None) -> Optional[str]:
+    """HMAC-SHA256 über die normalisierte Adresse → None ohne UNSUBSCRIBE_SECRET"""
+    secret = secret or os.getenv("UNSUBSCRIBE_SECRET")
+    if not secret:
+        return None
+    return hmac.new(secret.encode("utf-8"), email.strip().lower().encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_unsubscribe(email: str, token: str, secret: Optional[str] = None) -> bool:
+    expected = unsubscribe_token(email, secret)
+    return bool(expected and token) and hmac.compare_digest(expected, token)
+
+
+def unsubscribe_url(email: str, base_url: Optional[str] = None, secret: Optional[str] = None) -> Optional[str]:
+    """Signierter Abmeldelink für einen Empfänger – None, wenn UNSUBSCRIBE_URL/Secret fehlen"""
+    base_url = base_url or os.getenv("UNSUBSCRIBE_URL")
+    token = unsubscribe_token(email, secret)
+    if not base_url or not token:
+        return None
+    return f"{base_url}{'&' if '?' in base_url else '?'}{urlencode({'email': email.strip().lower(), 'token': token})}"
+
+
+def list_unsubscribe_headers(email: str, base_url: Optional[str] = None,
+                             secret: Optional[str] = None) -> Dict[str, str]:
+    """List-Unsubscribe (One-Click, RFC 8058) für einen Empfänger – leer, wenn URL/Secret fehlen"""
+    url = unsubscribe_url(email, base_url, secret)
+    if not url:
+        return {}
+    return {"List-Unsubscribe": f"<{url}>", "List-Unsubscribe-Post": "List-Unsubscribe=One-Click"}
+
+
+class BloomFilter:
+    """Bloom-Filter mit k Hashes per Double Hashing über blake2b"""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.capacity = capacity
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SuppressionList:
+    """Gesperrte Empfänger mit Bloom-Filter-Fast-Path"""
+
+    def __init__(self, db_path: str = "data/suppression.db", error_rate: float = 0.001):
+        self.db_path = db_path
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._init_db()
+        self.rebuild()
+
+    def _init_db(self):
+        """Erstelle Suppression DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS suppressions (
+                email TEXT PRIMARY KEY,
+                reason TEXT NOT NULL,           -- bounce | complaint | unsubscribe | manual
+                source TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                source TEXT PRIMARY KEY,
+                watermark INTEGER NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def rebuild(self):
+        """Bloom-Filter komplett aus der Tabelle aufbauen (Start, oder wenn er zu voll wird)"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        rows = conn.execute('SELECT rowid, email FROM suppressions').fetchall()
+        conn.close()
+        bloom = BloomFilter(max(10_000, 2 * len(rows)), self.error_rate)
+        for _, email in rows:
+            bloom.add(email)
+        with self._lock:
+            self.bloom = bloom
+            self.loaded_rowid = max((rowid for rowid, _ in rows), default=0)
+
+    def refresh(self):
+        """Neu hinzugekommene Sperren (auch aus anderen Prozessen) in den Filter übernehmen"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        rows = conn.execute('SELECT rowid, email FROM suppressions WHERE rowid > ? ORDER BY rowid',
+                            (self.loaded_rowid,)).fetchall()
+        conn.close()
+        if not rows:
+            return
+        with self._lock:
+            for rowid, email in rows:
+                self.bloom.add(email)
+                self.loaded_rowid = rowid
+            overfull = self.bloom.count > self.bloom.capacity
+        if overfull:
+            self.rebuild()
+
+    def add(self, email: str, reason: str, source: Optional[str] = None) -> bool:
+        """Empfänger sperren (erster Grund bleibt erhalten) → True wenn neu"""
+        return self.add_many([(email, reason, source)]) > 0
+
+    def add_many(self, entries: List[Tuple[str, str, Optional[str]]]) -> int:
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.executemany('INSERT OR IGNORE INTO suppressions (email, reason, source) VALUES (?, ?, ?)',
+                         [(email.strip().lower(), reason, source) for email, reason, source in entries])
+        added = conn.total_changes
+        conn.commit()
+        conn.close()
+        self.refresh()
+        return added
+
+    def remove(self, email: str) -> bool:
+        """Sperre aufheben (z.B. erneute Einwilligung); Filter wird neu aufgebaut"""
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        removed = conn.execute('DELETE FROM suppressions WHERE email = ?', (email.strip().lower(),)).rowcount
+        conn.commit()
+        conn.close()
+        if removed:
+            self.rebuild()
+        return bool(removed)
+
+    def is_suppressed(self, email: str, refresh: bool = True) -> bool:
+        if refresh:
+            self.refresh()
+        return self.reason(email) is not None
+
+    def reason(self, email: str) -> Optional[str]:
+        """Sperrgrund oder None – Bloom-Filter zuerst, DB nur bei möglichem Treffer"""
+        email = email.strip().lower()
+        if email not in self.bloom:
+            return None
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        row = conn.execute('SELECT reason FROM suppressions WHERE email = ?', (email,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def filter(self, contacts: List[Dict], key: str = 'email') -> Tuple[List[Dict], List[Dict]]:
+        """Kontakte aufteilen → (erlaubt, gesperrt mit 'suppression_reason')"""
+        self.refresh()
+        allowed, suppressed = [], []
+        for contact in contacts:
+            reason = self.reason(contact[key])
+            if reason:
+                suppressed.append({**contact, 'suppression_reason': reason})
+            else:
+                allowed.append(contact)
+        return allowed, suppressed
+
+    def record_event(self, event_type: str, data: Dict) -> Optional[str]:
+        """Resend-Webhook auswerten → gesperrte Adresse oder None"""
+        reason = suppression_reason(event_type, data)
+        recipient = first_recipient(data.get('to') or data.get('email'))
+        if not reason or not recipient:
+            return None
+        self.add(recipient, reason, event_type)
+        return recipient
+
+    def sync_event_log(self, path: str = 'email_events.csv') -> int:
+        """Bounces/Complaints aus dem Webhook-Event-Log übernehmen (Byte-Offset als Watermark)"""
+        if not os.path.exists(path):
+            return 0
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        source = f"events:{os.path.abspath(path)}"
+        row = conn.execute('SELECT watermark FROM sync_state WHERE source = ?', (source,)).fetchone()
+        conn.close()
+        events, offset = read_new_events(path, row[0] if row else 0)
+
+        entries = []
+        for event in events:
+            reason = suppression_reason(event.get('event_type'), event)
+            recipient = first_recipient(event.get('to'))
+            if reason and recipient:
+                entries.append((recipient, reason, event.get('event_type')))
+        added = self.add_many(entries) if entries else 0
+
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        conn.execute('INSERT OR REPLACE INTO sync_state (source, watermark) VALUES (?, ?)', (source, offset))
+        conn.commit()
+        conn.close()
+        return added
+
+    def stats(self) -> Dict[str, int]:
+        conn = sqlite3.connect(self.db_path, factory=MeteredConnection, timeout=30)
+        rows = conn.execute('SELECT reason, COUNT(*) FROM suppressions GROUP BY reason').fetchall()
+        conn.close()
+        return dict(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suppression-Liste verwalten")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="Bounces/Complaints aus email_events.csv übernehmen")
+    sync.add_argument("--events", default="email_events.csv")
+    add = sub.add_parser("add", help="Adresse sperren")
+    add.add_argument("email")
+    add.add_argument("--reason", default="manual")
+    remove = sub.add_parser("remove", help="Sperre aufheben")
+    remove.add_argument("email")
+    check = sub.add_parser("check", help="Sperrstatus prüfen")
+    check.add_argument("email")
+    args = parser.parse_args()
+
+    suppression = SuppressionList()
+    if args.command == "sync":
+        print(f"✓ {suppression.sync_event_log(args.events)} neue Sperren")
+    elif args.command == "add":
+        print("✓ gesperrt" if suppression.add(args.email, args.reason, "cli") else "ℹ️  bereits gesperrt")
+    elif args.command == "remove":
+        print("✓ entsperrt" if suppression.remove(args.email) else "ℹ️  nicht gesperrt")
+    else:
+        reason = suppression.reason(args.email)
+        print(f"⛔ gesperrt ({reason})" if reason else "✓ nicht gesperrt")
+    print(f"📊 {suppression.stats()}")
+
+
+if __name__ == "__main__":
+    main()
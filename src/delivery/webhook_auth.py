@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Signaturprüfung für Resend-Webhooks (Svix)
+
+- Header svix-id, svix-timestamp, svix-signature
+- HMAC-SHA256 über "{svix-id}.{svix-timestamp}.{Body}", Schlüssel = base64-dekodiertes
+  RESEND_WEBHOOK_SECRET nach dem Präfix 'whsec_'
+- svix-signature enthält leerzeichengetrennte Einträge 'v1,<base64>' (mehrere bei Secret-Rotation)
+- Zeitstempel außerhalb der Toleranz (5 min) → abgelehnt (Replay-Schutz)
+- Ohne Secret oder Header wird jede Anfrage abgelehnt
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import time
+from typing import Mapping, Optional
+
+TOLERANCE = 300
+
+
+def webhook_signature(msg_id: str, timestamp: str, body: bytes, secret: str) -> str:
+    """Erwartete Signatur (base64, ohne 'v1,')"""
+    key = base64.b64decode(secret[len("whsec_"):] if secret.startswith("whsec_") else secret)
+    signed = f"{msg_id}.{timestamp}.".encode("utf-8") + body
+    return base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode("ascii")
+
+
+def verify_webhook(headers: Mapping[str, str], body: bytes, secret: Optional[str] = None,
+                   tolerance: float = TOLERANCE, now: Optional[float] = None) -> bool:
+    """True, wenn eine der v1-Signaturen passt und der Zeitstempel frisch ist"""
+    secret = secret or os.getenv("RESEND_WEBHOOK_SECRET")
+    msg_id, timestamp, signatures = (headers.get(name) for name in ("svix-id", "svix-timestamp", "svix-signature"))
+    if not (secret and msg_id and timestamp and signatures):
+        return False
+    try:
+        if abs((now if now is not None else time.time()) - int(timestamp)) > tolerance:
+            return False
+        expected = webhook_signature(msg_id, timestamp, body, secret)
+    except (ValueError, binascii.Error):
+        return False
+    return any(version == "v1" and hmac.compare_digest(expected, signature)
+               for version, _, signature in (entry.partition(",") for entry in signatures.split()))
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Lead-Deduplizierung & Entity Resolution (data/leads.db)
+
+- Normalisierung: Email (+Tags), Domain, Firmenname (Rechtsform, Umlaute, Füllwörter)
+- Blocking: gleiche Firmen-Domain, bei Freemail/ohne Email über den Firmen-Schlüssel
+- Scoring: Trigram-Jaccard + Token-Überdeckung, Clustering per Union-Find
+  (ein Cluster enthält nie zwei Firmen-Domains – verbindende Paare gehen in die Review-Liste)
+- Automatisch zusammengeführt wird nur bei gleicher Email, gleicher Firmen-Domain oder exakt
+  gleichem Firmennamen + gleicher Person; reine Namensähnlichkeit (Freemail, ohne Email)
+  landet in der Review-Liste (lead_review) statt im Merge
+- Merge: bester Datensatz bleibt, leere Felder werden aufgefüllt; Ansprechpartner des
+  entfernten Datensatzes bleiben in lead_contacts erhalten, Snapshot in lead_merges
+
+Läuft inkrementell bei jedem add_lead und als Batch über die ganze Tabelle:
+    python -m src.lead_generation.dedupe [--dry-run]
+    python -m src.lead_generation.dedupe --review      # offene Review-Paare anzeigen
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+FREEMAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "web.de", "gmx.de", "gmx.net", "gmx.at", "gmx.ch",
+    "t-online.de", "outlook.com", "outlook.de", "hotmail.com", "hotmail.de", "live.de",
+    "yahoo.com", "yahoo.de", "icloud.com", "me.com", "aol.com", "freenet.de", "posteo.de",
+    "mailbox.org", "arcor.de", "online.de", "1und1.de", "email.de",
+}
+
+# Rechtsformen – längste zuerst, damit "gmbh & co. kg" vor "gmbh" greift
+LEGAL_FORMS = sorted([
+    "gmbh & co. kg", "gmbh & co kg", "gmbh und co. kg", "gmbh und co kg", "ug (haftungsbeschränkt)",
+    "ug haftungsbeschränkt", "partg mbb", "partgmbb", "partg", "partnerschaftsgesellschaft mbb",
+    "partnerschaftsgesellschaft", "partnerschaft mbb", "partnerschaft", "steuerberatungsgesellschaft mbh",
+    "steuerberatungsgesellschaft", "stbg mbh", "stbg", "wpg", "gmbh", "mbh", "ag", "kg", "ohg", "gbr",
+    "ug", "e.k.", "ek", "se", "co.", "co", "mbb", "&",
+], key=len, reverse=True)
+
+# Füllwörter, die Kanzleinamen nicht unterscheiden
+GENERIC_TOKENS = {
+    "kanzlei", "steuerkanzlei", "steuerberater", "steuerberaterin", "steuerberatung", "steuerbuero",
+    "stb", "partner", "und", "die", "der", "dr", "dipl", "kfm", "rechtsanwalt", "rechtsanwaelte",
+    "wirtschaftspruefer", "wirtschaftspruefung", "gesellschaft", "beratung", "treuhand",
+}
+
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+DEFAULT_THRESHOLD = 0.85
+SAME_DOMAIN_THRESHOLD = 0.6
+
+# Große Blöcke (z.B. häufige Nachnamen): nur Nachbarn im sortierten Block vergleichen
+MAX_FULL_BLOCK = 50
+NEIGHBOUR_WINDOW = 10
+
+# Felder, die beim Merge aus Duplikaten übernommen werden, wenn sie beim Survivor leer sind
+FILL_FIELDS = ("kontakt", "position", "email", "telefon", "branche")
+CONTACT_FIELDS = ("kontakt", "position", "email", "telefon")
+
+# Gründe, die ohne Review zusammengeführt werden
+AUTO_MERGE_REASONS = {"email", "domain", "company_person"}
+TITLE_TOKENS = {"dr", "prof", "dipl", "kfm", "ing", "med", "herr", "frau", "stb", "wp", "ra"}
+
+
+# ---------- Normalisierung ----------
+
+def normalize_email(email: Optional[str]) -> str:
+    """Kleinschreibung, Leerzeichen und +Tags entfernen"""
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return ""
+    local, domain = email.rsplit("@", 1)
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def email_domain(email: Optional[str]) -> str:
+    """Firmen-Domain (leer bei Freemail)"""
+    email = normalize_email(email)
+    domain = email.rsplit("@", 1)[1] if email else ""
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return "" if domain in FREEMAIL_DOMAINS else domain
+
+
+def normalize_company(name: Optional[str]) -> str:
+    """'Müller & Partner StBG mbB' → 'mueller'"""
+    text = (name or "").lower().strip()
+    for form in LEGAL_FORMS:
+        text = re.sub(rf"(^|\s){re.escape(form)}(?=\s|$|,)", " ", text)
+    text = text.translate(UMLAUTS)
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    tokens = re.findall(r"[a-z0-9]+", text)
+    meaningful = [t for t in tokens if t not in GENERIC_TOKENS and len(t) > 1]
+    return " ".join(meaningful or tokens)
+
+
+def normalize_person(name: Optional[str]) -> str:
+    """'Dr. Müller, Anna' → 'anna mueller' (Titel weg, Reihenfolge egal)"""
+    text = unicodedata.normalize("NFKD", (name or "").lower().translate(UMLAUTS))
+    tokens = re.findall(r"[a-z]+", text.encode("ascii", "ignore").decode("ascii"))
+    return " ".join(sorted(t for t in tokens if t not in TITLE_TOKENS and len(t) > 1))
+
+
+def company_block_key(company_norm: str) -> str:
+    """Blocking-Schlüssel für Leads ohne Firmen-Domain (erstes aussagekräftiges Token)"""
+    return company_norm.split(" ", 1)[0] if company_norm else ""
+
+
+# ---------- Ähnlichkeit ----------
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def company_similarity(a: str, b: str) -> float:
+    """Trigram-Jaccard bzw. Token-Überdeckung (z.B. 'mueller' ⊂ 'mueller schmidt')"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = _trigrams(a), _trigrams(b)
+    jaccard = len(ta & tb) / len(ta | tb)
+    wa, wb = set(a.split()), set(b.split())
+    containment = len(wa & wb) / min(len(wa), len(wb))
+    return max(jaccard, 0.9 * containment)
+
+
+def match_score(a: Dict, b: Dict) -> Tuple[float, str]:
+    """(Score, Grund) für zwei normalisierte Lead-Datensätze"""
+    if a["email_norm"] and a["email_norm"] == b["email_norm"]:
+        return 1.0, "email"
+    similarity = company_similarity(a["company_norm"], b["company_norm"])
+    if a["domain"] and a["domain"] == b["domain"]:
+        # Gleiche Firmen-Domain = gleiche Kanzlei, solange die Namen nicht klar widersprechen
+        if similarity >= SAME_DOMAIN_THRESHOLD or not (a["company_norm"] and b["company_norm"]):
+            return max(similarity, 0.9), "domain"
+        return similarity, "domain"
+    if a["domain"] and b["domain"]:
+        return 0.0, "domain_conflict"  # zwei verschiedene Firmen-Domains → verschiedene Kanzleien
+    # Ohne gemeinsame Domain reicht Namensähnlichkeit nicht ('Müller' vs. 'Müller & Schmidt'):
+    # automatisch nur bei exakt gleichem Firmennamen UND gleicher Person, sonst Review
+    if a["company_norm"] and a["company_norm"] == b["company_norm"] \
+            and a.get("person_norm") and a.get("person_norm") == b.get("person_norm"):
+        return 0.95, "company_person"
+    return similarity, "review"
+
+
+def _pairs(block: List[Dict]):
+    """Vergleichspaare eines Blocks (a.id < b.id); große Blöcke per Sorted Neighbourhood"""
+    if len(block) <= MAX_FULL_BLOCK:
+        for i, a in enumerate(block):
+            for b in block[i + 1:]:
+                yield a, b
+        return
+    ordered = sorted(block, key=lambda r: r["company_norm"])
+    for i, a in enumerate(ordered):
+        for b in ordered[i + 1:i + 1 + NEIGHBOUR_WINDOW]:
+            yield (a, b) if a["id"] < b["id"] else (b, a)
+
+
+# ---------- Engine ----------
+
+class LeadDeduplicator:
+    """Inkrementelle und Batch-Deduplizierung der Lead-Tabelle"""
+
+    def __init__(self, db_path: str = "data/leads.db", threshold: float = DEFAULT_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+
+    def ensure_schema(self, conn: sqlite3.Connection) -> int:
+        """Normalisierte Spalten, Blocking-Indizes und Merge-Protokoll anlegen → Anzahl nachnormalisierter Zeilen"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(leads)")}
+        for column in ("email_norm", "company_norm", "domain", "block_key"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE leads ADD COLUMN {column} TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_email_norm ON leads (email_norm)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_domain ON leads (domain)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_block_key ON leads (block_key)")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS lead_review (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lead_id INTEGER NOT NULL,
+                candidate_id INTEGER NOT NULL,
+                reason TEXT,
+                score REAL,
+                status TEXT DEFAULT 'open',     -- open | merged | distinct
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (lead_id, candidate_id)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS lead_contacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lead_id INTEGER NOT NULL,
+                kontakt TEXT,
+                position TEXT,
+                email TEXT,
+                telefon TEXT,
+                merged_id INTEGER,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lead_contacts_lead ON lead_contacts (lead_id)")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS lead_merges (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                survivor_id INTEGER NOT NULL,
+                merged_id INTEGER,
+                reason TEXT,
+                score REAL,
+                snapshot TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Altbestand ohne normalisierte Spalten (Email-Abgleich, mark_contacted)
+        return self._backfill(conn)
+
+    @staticmethod
+    def _record(row) -> Dict:
+        """(id, email_norm, company_norm, domain, kontakt) → Vergleichsdatensatz"""
+        return {"id": row[0], "email_norm": row[1] or "", "company_norm": row[2] or "", "domain": row[3] or "",
+                "person_norm": normalize_person(row[4])}
+
+    @staticmethod
+    def normalized(unternehmen: str, email: str) -> Dict:
+        company_norm = normalize_company(unternehmen)
+        return {
+            "email_norm": normalize_email(email),
+            "company_norm": company_norm,
+            "domain": email_domain(email),
+            "block_key": company_block_key(company_norm),
+        }
+
+    # ---------- Inkrementell ----------
+
+    def classify(self, conn: sqlite3.Connection, unternehmen: str, email: str = "",
+                 kontakt: str = "") -> Tuple[Optional[Tuple[int, float, str]], List[Tuple[int, float, str]]]:
+        """Neuer Datensatz → (bester automatischer Merge oder None, Kandidaten für die Review-Liste)"""
+        record = dict(self.normalized(unternehmen, email), person_norm=normalize_person(kontakt))
+        best, review = None, []
+        for candidate in self._candidates(conn, record):
+            score, reason = match_score(record, candidate)
+            if score < self.threshold:
+                continue
+            if reason not in AUTO_MERGE_REASONS:
+                review.append((candidate["id"], score, reason))
+            elif best is None or score > best[1]:
+                best = (candidate["id"], score, reason)
+        return best, ([] if best else review)
+
+    def find_duplicate(self, conn: sqlite3.Connection, unternehmen: str, email: str = "",
+                       kontakt: str = "") -> Optional[Tuple[int, float, str]]:
+        """Bestehender Lead, mit dem automatisch zusammengeführt wird → (id, score, grund) oder None"""
+        return self.classify(conn, unternehmen, email, kontakt)[0]
+
+    @staticmethod
+    def queue_review(conn: sqlite3.Connection, lead_id: int, candidates: List[Tuple[int, float, str]]):
+        """Mögliche Duplikate zur manuellen Prüfung vormerken (nichts wird zusammengeführt)"""
+        conn.executemany('''
+            INSERT OR IGNORE INTO lead_review (lead_id, candidate_id, score, reason) VALUES (?, ?, ?, ?)
+        ''', [(lead_id, candidate_id, round(score, 3), reason) for candidate_id, score, reason in candidates])
+
+    def open_reviews(self, limit: int = 100) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        self.ensure_schema(conn)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute('''
+            SELECT r.id, r.score, r.reason, a.id AS lead_id, a.unternehmen AS lead, a.email AS lead_email,
+                   b.id AS candidate_id, b.unternehmen AS candidate, b.email AS candidate_email
+            FROM lead_review r JOIN leads a ON a.id = r.lead_id JOIN leads b ON b.id = r.candidate_id
+            WHERE r.status = 'open' ORDER BY r.score DESC LIMIT ?
+        ''', (limit,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def _candidates(self, conn: sqlite3.Connection, record: Dict) -> List[Dict]:
+        clauses, params = [], []
+        for column in ("email_norm", "domain", "block_key"):
+            if record[column]:
+                clauses.append(f"{column} = ?")
+                params.append(record[column])
+        if not clauses:
+            return []
+        rows = conn.execute(f'''
+            SELECT id, email_norm, company_norm, domain, kontakt FROM leads
+            WHERE {' OR '.join(clauses)}
+            LIMIT 500
+        ''', params).fetchall()
+        return [self._record(row) for row in rows]
+
+    def merge_into(self, conn: sqlite3.Connection, survivor_id: int, incoming: Dict,
+                   score: float, reason: str):
+        """Neuen Datensatz in bestehenden Lead einarbeiten (statt zweitem Insert)"""
+        self._apply_merge(conn, survivor_id, [incoming], score, reason)
+
+    # ---------- Batch ----------
+
+    def run_batch(self, dry_run: bool = False) -> Dict:
+        """Ganze Tabelle: normalisieren, blocken, clustern, mergen (unsichere Paare → lead_review)"""
+        conn = sqlite3.connect(self.db_path)
+        normalized = self.ensure_schema(conn)
+
+        parent: Dict[int, int] = {}
+        domains: Dict[int, set] = {}   # Root → Firmen-Domains des Clusters
+        reasons: Dict[Tuple[int, int], Tuple[float, str]] = {}
+        review: Dict[Tuple[int, int], Tuple[float, str]] = {}
+
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for block in self._blocks(conn):
+            for a, b in _pairs(block):
+                score, reason = match_score(a, b)
+                if score >= self.threshold and reason not in AUTO_MERGE_REASONS:
+                    review[(a["id"], b["id"])] = (score, reason)
+                elif score >= self.threshold:
+                    ra, rb = find(a["id"]), find(b["id"])
+                    if ra != rb:
+                        merged_domains = domains.get(ra, {a["domain"]} - {""}) | domains.get(rb, {b["domain"]} - {""})
+                        if len(merged_domains) > 1:
+                            # Kette über einen Freemail-Lead würde zwei Kanzleien verschmelzen → Review
+                            review[(a["id"], b["id"])] = (score, "domain_conflict")
+                            continue
+                        root, child = min(ra, rb), max(ra, rb)
+                        parent[child] = root
+                        domains[root] = merged_domains
+                        domains.pop(child, None)
+                    reasons[(a["id"], b["id"])] = (score, reason)
+
+        clusters: Dict[int, List[int]] = {}
+        for lead_id in list(parent):
+            clusters.setdefault(find(lead_id), []).append(lead_id)
+        clusters = {root: ids for root, ids in clusters.items() if len(ids) > 1}
+
+        # Paare, die ohnehin im selben Cluster landen, brauchen keine Review
+        review = {pair: value for pair, value in review.items() if find(pair[0]) != find(pair[1])}
+
+        merged = 0
+        if not dry_run:
+            for ids in clusters.values():
+                merged += self._merge_cluster(conn, ids, reasons)
+            for (a, b), (score, reason) in review.items():
+                self.queue_review(conn, b, [(a, score, reason)])
+            conn.commit()
+        conn.close()
+        return {"normalized": normalized, "clusters": len(clusters),
+                "duplicates": sum(len(ids) - 1 for ids in clusters.values()), "merged": merged,
+                "review": len(review)}
+
+    def _backfill(self, conn: sqlite3.Connection) -> int:
+        rows = conn.execute('SELECT id, unternehmen, email FROM leads WHERE company_norm IS NULL').fetchall()
+        conn.executemany('''
+            UPDATE leads SET email_norm = :email_norm, company_norm = :company_norm,
+                             domain = :domain, block_key = :block_key
+            WHERE id = :id
+        ''', [dict(self.normalized(unternehmen, email), id=lead_id) for lead_id, unternehmen, email in rows])
+        conn.commit()
+        return len(rows)
+
+    def _blocks(self, conn: sqlite3.Connection):
+        """Kandidatengruppen: gleiche Email, gleiche Firmen-Domain, gleicher Firmen-Schlüssel"""
+        for column in ("email_norm", "domain", "block_key"):
+            keys = conn.execute(f'''
+                SELECT {column} FROM leads WHERE {column} <> ''
+                GROUP BY {column} HAVING COUNT(*) > 1
+            ''').fetchall()
+            for (key,) in keys:
+                rows = conn.execute(f'''
+                    SELECT id, email_norm, company_norm, domain, kontakt FROM leads WHERE {column} = ? ORDER BY id
+                ''', (key,)).fetchall()
+                yield [self._record(row) for row in rows]
+
+    def _merge_cluster(self, conn: sqlite3.Connection, ids: List[int],
+                       reasons: Dict[Tuple[int, int], Tuple[float, str]]) -> int:
+        conn.row_factory = sqlite3.Row
+        rows = [dict(r) for r in conn.execute(
+            f"SELECT * FROM leads WHERE id IN ({','.join('?' * len(ids))})", ids)]
+        conn.row_factory = None
+        # Survivor: höchster Score, bei Gleichstand der älteste Datensatz
+        rows.sort(key=lambda r: (-(r["score"] or 0), r["id"]))
+        survivor, duplicates = rows[0], rows[1:]
+        best = max(reasons.get((min(survivor["id"], d["id"]), max(survivor["id"], d["id"])), (self.threshold, "cluster"))
+                   for d in duplicates)
+        self._apply_merge(conn, survivor["id"], duplicates, best[0], best[1])
+        return len(duplicates)
+
+    def _apply_merge(self, conn: sqlite3.Connection, survivor_id: int, duplicates: List[Dict],
+                     score: float, reason: str):
+        conn.row_factory = sqlite3.Row
+        survivor = dict(conn.execute("SELECT * FROM leads WHERE id = ?", (survivor_id,)).fetchone())
+        conn.row_factory = None
+        if len({email_domain(r.get("email")) for r in [survivor, *duplicates]} - {""}) > 1:
+            raise ValueError(f"Merge in Lead {survivor_id} über verschiedene Firmen-Domains")
+
+        updates = {}
+        for field in FILL_FIELDS:
+            if not survivor.get(field):
+                value = next((d.get(field) for d in duplicates if d.get(field)), None)
+                if value:
+                    updates[field] = value
+        notes = [survivor.get("notizen")] + [d.get("notizen") for d in duplicates]
+        notes = list(dict.fromkeys(n for n in notes if n))
+        if len(notes) > (1 if survivor.get("notizen") else 0):
+            updates["notizen"] = "\n".join(notes)
+        top_score = max([survivor.get("score") or 0] + [d.get("score") or 0 for d in duplicates])
+        status = "heiss" if top_score >= 80 else "warm" if top_score >= 60 else "kalt"
+        if top_score != (survivor.get("score") or 0) or status != survivor.get("status"):
+            updates["score"] = top_score
+            updates["status"] = status
+        if "email" in updates or "unternehmen" in updates:
+            updates.update(self.normalized(survivor["unternehmen"], updates.get("email", survivor.get("email"))))
+
+        if updates:
+            assignments = ", ".join(f"{field} = ?" for field in updates)
+            conn.execute(f"UPDATE leads SET {assignments} WHERE id = ?", (*updates.values(), survivor_id))
+
+        # Ansprechpartner der Duplikate, die nicht im Survivor aufgegangen sind, bleiben erhalten
+        known = [(survivor.get("kontakt") or updates.get("kontakt"), survivor.get("email") or updates.get("email"))]
+        known += conn.execute("SELECT kontakt, email FROM lead_contacts WHERE lead_id = ?", (survivor_id,)).fetchall()
+        people = {normalize_person(kontakt) for kontakt, _ in known} - {""}
+        emails = {normalize_email(email) for _, email in known} - {""}
+        for duplicate in duplicates:
+            person, email = normalize_person(duplicate.get("kontakt")), normalize_email(duplicate.get("email"))
+            if (person or email) and person not in people and email not in emails:
+                conn.execute('''
+                    INSERT INTO lead_contacts (lead_id, kontakt, position, email, telefon, merged_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (survivor_id, *(duplicate.get(field) for field in CONTACT_FIELDS), duplicate.get("id")))
+                people.add(person)
+                emails.add(email)
+
+        for duplicate in duplicates:
+            conn.execute('''
+                INSERT INTO lead_merges (survivor_id, merged_id, reason, score, snapshot)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (survivor_id, duplicate.get("id"), reason, round(score, 3),
+                  json.dumps(duplicate, ensure_ascii=False, default=str)))
+            if duplicate.get("id"):
+                conn.execute("DELETE FROM leads WHERE id = ?", (duplicate["id"],))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lead-Deduplizierung (Batch)")
+    parser.add_argument("--db", default="data/leads.db")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--dry-run", action="store_true", help="Nur Cluster zählen, nichts zusammenführen")
+    parser.add_argument("--review", action="store_true", help="Offene Review-Paare anzeigen")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ {args.db} nicht gefunden")
+        return
+    deduplicator = LeadDeduplicator(args.db, args.threshold)
+    if args.review:
+        for pair in deduplicator.open_reviews():
+            print(f"❓ {pair['score']:.2f}  #{pair['lead_id']} {pair['lead']} <{pair['lead_email']}>"
+                  f"  ↔  #{pair['candidate_id']} {pair['candidate']} <{pair['candidate_email']}>")
+        return
+    result = deduplicator.run_batch(dry_run=args.dry_run)
+    print(f"✓ {result['normalized']} Leads normalisiert")
+    print(f"🔍 {result['clusters']} Cluster mit {result['duplicates']} Duplikaten")
+    print(f"❓ {result['review']} unsichere Paare {'gefunden' if args.dry_run else 'zur Review vorgemerkt'}")
+    if not args.dry_run:
+        print(f"🔗 {result['merged']} Leads zusammengeführt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Hunter.io Client mit Cache, Rate-Limit und Bulk-Suche
+
+- Eine gepoolte requests.Session für alle Calls
+- Persistenter Response-Cache mit TTL (data/hunter_cache.db) → keine doppelten Credits
+- Token-Bucket-Throttling, 429 + Retry-After werden respektiert
+- Credit-bewusst: Suche stoppt, bevor das Monatskontingent aufgebraucht ist
+- Bulk-Domain-Suche parallel, Ergebnisse direkt in die Lead-Tabelle
+
+CLI:
+    python -m src.lead_generation.hunter_client stbstaat.de hrsteuer.de --import
+    python -m src.lead_generation.hunter_client --file domains.txt --stub
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.analytics.metrics import cache_result
+from src.delivery.policy import parse_retry_after
+
+HUNTER_API_URL = "https://api.hunter.io/v2"
+
+CACHE_TTL = 30 * 24 * 3600      # Kanzlei-Teams ändern sich selten
+RATE_PER_SECOND = 10            # Hunter: max. 15 Requests/s für Domain Search
+CREDIT_RESERVE = 5              # so viele Credits bleiben immer übrig
+
+
+class HunterError(Exception):
+    """Fehler der Hunter.io API (status: HTTP-Status, None bei Verbindungsfehlern)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class HunterCreditsExhausted(HunterError):
+    """Monatliches Suchkontingent (bis auf die Reserve) aufgebraucht"""
+
+
+class TokenBucket:
+    """Thread-sicherer Token-Bucket; pause() setzt nach 429 alle Threads aus"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class HunterCache:
+    """Persistenter Response-Cache (SQLite)"""
+
+    def __init__(self, db_path: str = "data/hunter_cache.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Cache DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                params TEXT NOT NULL,
+                response TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def key(endpoint: str, params: Dict) -> str:
+        clean = {k: v for k, v in sorted(params.items()) if k != "api_key"}
+        return hashlib.sha256(f"{endpoint}?{json.dumps(clean)}".encode("utf-8")).hexdigest()
+
+    def get(self, endpoint: str, params: Dict, ttl: float) -> Optional[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT response, fetched_at FROM responses WHERE cache_key = ?',
+                           (self.key(endpoint, params),)).fetchone()
+        conn.close()
+        if row and time.time() - row[1] < ttl:
+            return json.loads(row[0])
+        return None
+
+    def put(self, endpoint: str, params: Dict, response: Dict):
+        clean = {k: v for k, v in params.items() if k != "api_key"}
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                     (self.key(endpoint, params), endpoint, json.dumps(clean),
+                      json.dumps(response), time.time()))
+        conn.commit()
+        conn.close()
+
+
+class HunterClient:
+    """Hunter.io API (Domain Search, Email Finder, Account)"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = HUNTER_API_URL,
+                 cache: Optional[HunterCache] = None, cache_ttl: float = CACHE_TTL,
+                 rate_per_second: float = RATE_PER_SECOND, max_workers: int = 4,
+                 credit_reserve: int = CREDIT_RESERVE, max_retries: int = 3, timeout: float = 15):
+        self.api_key = api_key or os.getenv('HUNTER_API_KEY', '')
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache or HunterCache()
+        self.cache_ttl = cache_ttl
+        self.bucket = TokenBucket(rate_per_second)
+        self.max_workers = max_workers
+        self.credit_reserve = credit_reserve
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.credits_available: Optional[int] = None
+        self._credit_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "rate_limited": 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ---------- HTTP ----------
+
+    def _request(self, endpoint: str, params: Dict, use_cache: bool = True,
+                 costs_credit: bool = True) -> Dict:
+        if use_cache:
+            cached = self.cache.get(endpoint, params, self.cache_ttl)
+            cache_result("hunter", cached is not None)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+        if costs_credit:
+            self._reserve_credit()
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self._count("requests")
+            try:
+                response = self.session.get(f"{self.base_url}/{endpoint}",
+                                            params={**params, "api_key": self.api_key},
+                                            timeout=self.timeout)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    self._release_credit(costs_credit)
+                    raise HunterError(f"Verbindungsfehler: {e}") from e
+                time.sleep(2 ** attempt)
+                continue
+
+            if response.status_code == 429:
+                self._count("rate_limited")
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.bucket.pause(2 ** attempt if retry_after is None else retry_after)
+                continue
+            if response.status_code >= 500 and attempt < self.max_retries:
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code >= 400:
+                self._release_credit(costs_credit)
+                raise HunterError(f"HTTP {response.status_code}: {_error_details(response)}", response.status_code)
+
+            data = response.json()
+            if use_cache:
+                self.cache.put(endpoint, params, data)
+            return data
+
+        self._release_credit(costs_credit)
+        raise HunterError("Rate Limit – maximale Anzahl Wiederholungen erreicht", 429)
+
+    def _count(self, name: str):
+        """stats-Zähler erhöhen (bulk_domain_search ruft aus mehreren Threads)"""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _reserve_credit(self):
+        with self._credit_lock:
+            if self.credits_available is None:
+                return
+            if self.credits_available <= self.credit_reserve:
+                raise HunterCreditsExhausted(
+                    f"Nur noch {self.credits_available} Hunter-Credits (Reserve: {self.credit_reserve})")
+            self.credits_available -= 1
+
+    def _release_credit(self, costs_credit: bool):
+        if costs_credit:
+            with self._credit_lock:
+                if self.credits_available is not None:
+                    self.credits_available += 1
+
+    # ---------- Endpoints ----------
+
+    def account(self) -> Dict:
+        """Kontostand (kostet keine Credits) – setzt das Credit-Budget"""
+        data = self._request("account", {}, use_cache=False, costs_credit=False).get("data", {})
+        searches = data.get("requests", {}).get("searches", {})
+        if "available" in searches:
+            with self._credit_lock:
+                self.credits_available = searches["available"] - searches.get("used", 0)
+        return data
+
+    def domain_search(self, domain: str, limit: int = 10) -> Dict:
+        """Alle öffentlichen Emails einer Domain"""
+        return self._request("domain-search", {"domain": normalize_domain(domain), "limit": limit}).get("data", {})
+
+    def email_finder(self, domain: str, first_name: str, last_name: str) -> Dict:
+        """Email einer Person (Name + Domain)"""
+        return self._request("email-finder", {"domain": normalize_domain(domain), "first_name": first_name,
+                                              "last_name": last_name}).get("data", {})
+
+    def bulk_domain_search(self, domains: Iterable[str], limit: int = 10,
+                           on_result: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+        """Viele Domains parallel; {domain: data} bzw. {domain: {"error": ...}}"""
+        unique = list(dict.fromkeys(normalize_domain(d) for d in domains if d and d.strip()))
+        if self.credits_available is None and self.api_key:
+            try:
+                self.account()
+            except HunterError:
+                pass  # ohne Kontostand weiter, 429/Fehler greifen trotzdem
+
+        results: Dict[str, Dict] = {}
+        stop = threading.Event()
+
+        def search(domain: str):
+            if stop.is_set():
+                return domain, {"error": "übersprungen (Credits)"}
+            try:
+                return domain, self.domain_search(domain, limit)
+            except HunterCreditsExhausted as e:
+                stop.set()
+                return domain, {"error": str(e)}
+            except HunterError as e:
+                return domain, {"error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for domain, result in pool.map(search, unique):
+                results[domain] = result
+                if on_result:
+                    on_result(domain, result)
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+def normalize_domain(domain: str) -> str:
+    """'https://www.StbStaat.de/impressum' → 'stbstaat.de'"""
+    domain = domain.strip().lower()
+    if "//" in domain:
+        domain = urlparse(domain).netloc
+    domain = domain.split("/", 1)[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def _error_details(response) -> str:
+    try:
+        errors = response.json().get("errors", [])
+        return "; ".join(e.get("details", "") for e in errors) or response.text[:200]
+    except ValueError:
+        return response.text[:200]
+
+
+# ---------- Leads ----------
+
+def leads_from_domain_result(domain: str, data: Dict, default_score: int = 50) -> List[Dict]:
+    """Hunter Domain-Search → add_lead-Parameter"""
+    organization = data.get("organization") or domain
+    leads = []
+    for email_info in data.get("emails", []):
+        if not email_info.get("value"):
+            continue
+        name = f"{email_info.get('first_name') or ''} {email_info.get('last_name') or ''}".strip()
+        leads.append({
+            "unternehmen": organization,
+            "kontakt": name or email_info["value"],
+            "position": email_info.get("position") or "",
+            "email": email_info["value"],
+            "branche": data.get("industry") or "Steuerberatung",
+            "score": default_score,
+        })
+    return leads
+
+
+def import_results(results: Dict[str, Dict], lead_service=None) -> Dict[str, int]:
+    """Bulk-Ergebnisse in die Lead-Tabelle schreiben (Dedupe über LeadService.add_lead)"""
+    if lead_service is None:
+        from backend.lead_service import LeadService
+        lead_service = LeadService()
+    leads = [lead for domain, data in results.items() if "error" not in data
+             for lead in leads_from_domain_result(domain, data)]
+    merged = sum(1 for result in lead_service.add_leads(leads) if result.get("duplicate_of"))
+    return {"added": len(leads) - merged, "merged": merged}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hunter.io Bulk-Domain-Suche")
+    parser.add_argument("domains", nargs="*")
+    parser.add_argument("--file", help="Datei mit einer Domain pro Zeile")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--import", dest="do_import", action="store_true", help="Ergebnisse in leads.db schreiben")
+    parser.add_argument("--stub", action="store_true", help="Lokalen Stand-in statt Hunter.io nutzen")
+    args = parser.parse_args()
+
+    domains = list(args.domains)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            domains += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not domains:
+        parser.error("Keine Domains angegeben")
+
+    def run(client: HunterClient):
+        started = time.perf_counter()
+        results = client.bulk_domain_search(
+            domains, limit=args.limit,
+            on_result=lambda d, r: print(f"{'✗' if 'error' in r else '✓'} {d}: "
+                                         f"{r.get('error') or str(len(r.get('emails', []))) + ' Emails'}"))
+        print(f"\n📊 {client.stats['requests']} API-Requests, {client.stats['cache_hits']} aus Cache, "
+              f"{client.stats['rate_limited']}× 429 in {time.perf_counter() - started:.1f}s")
+        if client.credits_available is not None:
+            print(f"💳 Verbleibende Credits: {client.credits_available}")
+        if args.do_import:
+            counts = import_results(results)
+            print(f"✓ Leads: {counts['added']} neu, {counts['merged']} zusammengeführt")
+
+    if args.stub:
+        from tests.stubs import LocalHunterStub  # Stand-in liegt bei den Tests (nur im Repo-Checkout)
+        with LocalHunterStub(rate_limit_every=7) as stub:
+            run(HunterClient(api_key="stub", base_url=stub.url, max_workers=args.workers,
+                             cache=HunterCache("data/hunter_cache_stub.db")))
+    else:
+        run(HunterClient(max_workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Lead-Pipeline: Quellen → Normalisierung → Dedupe → (Website-Signale) → ICP-Scoring → Speicherung
+
+Jede Stufe läuft in einem eigenen Thread; verbunden sind die Stufen über
+begrenzte Queues (Backpressure: eine volle Queue bremst die Stufe davor).
+Quellen sind austauschbare Adapter (CSV-Export, JSONL-Fixture, Hunter.io …)
+und laufen parallel zueinander.
+Scheitert ein Speicher-Batch, wird er Lead für Lead wiederholt; was dann noch
+scheitert, landet als JSONL im Dead Letter (erneut einlesbar per --fixture).
+
+CLI:
+    python -m src.lead_generation.pipeline --csv exports/sales_navigator.csv --dry-run
+    python -m src.lead_generation.pipeline   # Quellen aus config/lead_sources.yaml
+"""
+
+import argparse
+import csv
+import os
+import glob
+import heapq
+import itertools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import yaml
+
+from src.lead_generation.dedupe import email_domain, normalize_company, normalize_email
+from src.lead_generation.signal_crawler import SignalCrawler, normalize_site
+
+logger = logging.getLogger(__name__)
+
+ICP_CONFIG = "config/icp_filters.yaml"
+SOURCES_CONFIG = "config/lead_sources.yaml"
+QUEUE_SIZE = 200
+BATCH_SIZE = 100  # Leads pro Transaktion in der Speicher-Stufe
+CRAWL_BATCH_SIZE = 200  # Domains pro Crawl-Durchlauf in der Enrich-Stufe
+TOP_LEADS = 20  # Dry-Run: nur die besten Leads behalten, nicht den ganzen Lauf
+DEAD_LETTER_PATH = "data/lead_pipeline_dead_letters.jsonl"
+
+_DONE = object()
+
+# Spaltennamen aus Exporten → kanonische Felder
+FIELD_ALIASES = {
+    "unternehmen": ("unternehmen", "company", "company_name", "firma", "organization", "kanzlei"),
+    "kontakt": ("kontakt", "name", "full_name"),
+    "first_name": ("first_name", "vorname", "firstname"),
+    "last_name": ("last_name", "nachname", "lastname"),
+    "position": ("position", "job_title", "title", "titel"),
+    "email": ("email", "e-mail", "email_address", "value"),
+    "branche": ("branche", "industry", "company_type"),
+    "region": ("region", "ort", "city", "stadt", "location", "standort"),
+    "company_size": ("company_size", "mitarbeiter", "employees", "team_size"),
+    "website": ("website", "domain", "url"),
+    "signals": ("signals", "signale", "digital_signals"),
+    "specializations": ("specializations", "spezialisierung", "schwerpunkte"),
+}
+
+# Signal-Texte (Kleinschreibung, Teilstring) → Schlüssel in lead_scoring
+SIGNAL_RULES = {
+    "digitale_datev_kanzlei_label": ("digitale datev-kanzlei", "digitale datev kanzlei"),
+    "datev_uo_aktiv": ("unternehmen online", "datev uo"),
+    "ki_tools_erwaehnt": ("ki-tools", "ki tools", "künstliche intelligenz"),
+    "website_modern": ("website modern", "moderne website"),
+    "mehrere_standorte": ("mehrere standorte", "standorte:"),
+    "spezialisierung_ecommerce": ("e-commerce", "onlinehandel", "online-handel"),
+}
+
+
+# ---------- Quellen ----------
+
+class LeadSource(ABC):
+    """Basis für Quell-Adapter: fetch() liefert Rohdatensätze (dicts)"""
+
+    name = "source"
+
+    @abstractmethod
+    def fetch(self) -> Iterator[Dict]:
+        """Rohdatensätze der Quelle"""
+
+
+class RecordSource(LeadSource):
+    """Datensätze aus einer Liste oder einer JSONL-Datei (lokale Fixtures)"""
+
+    name = "fixture"
+
+    def __init__(self, records: Optional[Iterable[Dict]] = None, path: Optional[str] = None):
+        self.records = records
+        self.path = path
+        if path:
+            self.name = f"fixture:{Path(path).name}"
+
+    def fetch(self) -> Iterator[Dict]:
+        if self.records is not None:
+            yield from self.records
+        if self.path:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class CSVSource(LeadSource):
+    """CSV-Export (Sales Navigator, Kammer-Listen, manuelle Recherche)"""
+
+    def __init__(self, path: str, delimiter: Optional[str] = None):
+        self.path = path
+        self.delimiter = delimiter
+        self.name = f"csv:{Path(path).name}"
+
+    def fetch(self) -> Iterator[Dict]:
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+            delimiter = self.delimiter or (';' if ';' in f.readline() else ',')
+            f.seek(0)
+            yield from csv.DictReader(f, delimiter=delimiter)
+
+
+class HunterSource(LeadSource):
+    """Hunter.io Domain Search für eine Liste von Kanzlei-Domains"""
+
+    name = "hunter"
+
+    def __init__(self, domains: Iterable[str], client=None, limit: int = 10):
+        self.domains = list(domains)
+        self.limit = limit
+        if client is None:
+            from src.lead_generation.hunter_client import HunterClient
+            client = HunterClient()
+        self.client = client
+
+    def fetch(self) -> Iterator[Dict]:
+        from src.lead_generation.hunter_client import HunterError, leads_from_domain_result
+
+        def search(domain):
+            try:
+                return domain, self.client.domain_search(domain, self.limit)
+            except HunterError as e:
+                logger.warning(f"Hunter {domain}: {e}")
+                return domain, {}
+
+        with ThreadPoolExecutor(max_workers=self.client.max_workers) as pool:
+            for domain, data in pool.map(search, self.domains):
+                for lead in leads_from_domain_result(domain, data):
+                    lead["website"] = domain
+                    yield lead
+
+
+# ---------- Stufen ----------
+
+def _first(record: Dict, field: str) -> str:
+    for alias in FIELD_ALIASES[field]:
+        for key in (alias, alias.title(), alias.upper()):
+            value = record.get(key)
+            if value not in (None, ""):
+                return str(value).strip()
+    return ""
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in re.split(r"[;|]", value or "") if v.strip()]
+
+
+def _as_int(value: str) -> Optional[int]:
+    """'15', '11-50', '50+' → untere Grenze"""
+    match = re.search(r"\d+", value or "")
+    return int(match.group()) if match else None
+
+
+def normalize_record(record: Dict, source: str = "") -> Optional[Dict]:
+    """Rohdatensatz → kanonischer Lead (None, wenn Firma oder Email fehlt)"""
+    kontakt = _first(record, "kontakt") or f"{_first(record, 'first_name')} {_first(record, 'last_name')}".strip()
+    lead = {
+        "unternehmen": _first(record, "unternehmen"),
+        "kontakt": kontakt,
+        "position": _first(record, "position"),
+        "email": _first(record, "email").lower(),
+        "branche": _first(record, "branche") or "Steuerberatung",
+        "region": _first(record, "region"),
+        "company_size": _as_int(_first(record, "company_size")),
+        "website": _first(record, "website"),
+        "signals": _as_list(record.get("signals") or _first(record, "signals")),
+        "specializations": _as_list(record.get("specializations") or _first(record, "specializations")),
+        "source": source,
+    }
+    if not lead["unternehmen"] or "@" not in lead["email"]:
+        return None
+    lead["kontakt"] = lead["kontakt"] or lead["email"]
+    return lead
+
+
+class ICPScorer:
+    """Lead-Scoring nach config/icp_filters.yaml (lead_scoring + exclusion_criteria)"""
+
+    def __init__(self, icp: Dict):
+        scoring = dict(icp.get("lead_scoring", {}))
+        self.thresholds = scoring.pop("thresholds", {})
+        self.points = scoring
+        self.max_points = sum(scoring.values()) - min(scoring.get("groesse_10_plus", 0),
+                                                      scoring.get("groesse_50_plus", 0))
+        regions = icp.get("target_filters", {}).get("regions", {})
+        self.home_regions = [part.strip().lower()
+                             for entry in regions.get("tier_1", [])
+                             for part in re.split(r"[(),/]", entry) if part.strip()]
+        exclusion = icp.get("exclusion_criteria", {})
+        self.excluded_keywords = [k.lower() for k in exclusion.get("keywords", [])]
+        self.excluded_types = [t.lower() for t in exclusion.get("company_types", [])]
+
+    @classmethod
+    def from_file(cls, path: str = ICP_CONFIG) -> "ICPScorer":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(yaml.safe_load(f))
+
+    def excluded(self, lead: Dict) -> Optional[str]:
+        position = lead["position"].lower()
+        company = f"{lead['unternehmen']} {lead['branche']}".lower()
+        for keyword in self.excluded_keywords:
+            if keyword in position:
+                return keyword
+        for company_type in self.excluded_types:
+            if company_type in company:
+                return company_type
+        return None
+
+    def criteria(self, lead: Dict) -> List[str]:
+        """Erfüllte lead_scoring-Kriterien"""
+        text = " ".join(lead["signals"] + lead["specializations"] + [lead["branche"]]).lower()
+        matched = [key for key, needles in SIGNAL_RULES.items()
+                   if key in self.points and any(needle in text for needle in needles)]
+        region = lead["region"].lower()
+        if region and any(home in region for home in self.home_regions):
+            matched.append("region_heimatmarkt")
+        size = lead["company_size"] or 0
+        if size >= 50:
+            matched.append("groesse_50_plus")
+        elif size >= 10:
+            matched.append("groesse_10_plus")
+        return matched
+
+    def to_lead_score(self, points: int) -> int:
+        """ICP-Punkte auf die Lead-Skala (0–100) abbilden: hot → 80, warm → 60 (wie LeadService)"""
+        hot, warm = self.thresholds.get("hot", 60), self.thresholds.get("warm", 35)
+        if points >= hot:
+            return min(100, 80 + round(20 * (points - hot) / max(self.max_points - hot, 1)))
+        if points >= warm:
+            return 60 + round(20 * (points - warm) / max(hot - warm, 1))
+        return round(60 * points / max(warm, 1))
+
+    def score(self, lead: Dict) -> Dict:
+        matched = self.criteria(lead)
+        points = sum(self.points.get(key, 0) for key in matched)
+        return dict(lead, icp_points=points, icp_criteria=matched, score=self.to_lead_score(points))
+
+
+class LeadPipeline:
+    """Gestufte, nebenläufige Lead-Pipeline mit begrenzten Queues"""
+
+    def __init__(self, sources: List[LeadSource], scorer: Optional[ICPScorer] = None,
+                 lead_service=None, queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE,
+                 crawler=None, crawl_batch_size: int = CRAWL_BATCH_SIZE, dry_run: bool = False,
+                 dead_letter_path: str = DEAD_LETTER_PATH):
+        self.sources = sources
+        self.dead_letter_path = dead_letter_path
+        self.crawler = crawler
+        self.crawl_batch_size = crawl_batch_size
+        self.scorer = scorer or ICPScorer.from_file()
+        self.dry_run = dry_run
+        if lead_service is None and not dry_run:
+            from backend.lead_service import LeadService
+            lead_service = LeadService()
+        self.lead_service = lead_service
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.stats = {"fetched": 0, "invalid": 0, "duplicates": 0, "excluded": 0,
+                      "enriched": 0, "added": 0, "merged": 0, "errors": 0, "dead_letters": 0}
+        self._top: List = []            # Heap (score, seq, lead) der besten TOP_LEADS – konstanter Speicher
+        self._seq = itertools.count()
+        self._stats_lock = threading.Lock()
+        self._dead_letter_lock = threading.Lock()
+        self._seen = set()
+
+    def top_leads(self, n: int = TOP_LEADS) -> List[Dict]:
+        """Beste Leads des Laufs (Score absteigend)"""
+        return [lead for _, _, lead in sorted(self._top, key=lambda entry: (-entry[0], -entry[1]))[:n]]
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # Stufen: Datensatz rein → Datensatz (oder None = verwerfen) raus
+
+    def _normalize(self, item) -> Optional[Dict]:
+        source, record = item
+        lead = normalize_record(record, source)
+        if lead is None:
+            self._count("invalid")
+        return lead
+
+    def _dedupe(self, lead: Dict) -> Optional[Dict]:
+        """Duplikate innerhalb des Laufs (bestehende Leads übernimmt LeadService.add_lead)"""
+        keys = {normalize_email(lead["email"]), (normalize_company(lead["unternehmen"]), lead["kontakt"].lower())}
+        if keys & self._seen:
+            self._count("duplicates")
+            return None
+        self._seen |= keys
+        return lead
+
+    def _enrich(self, leads: List[Dict]) -> List[Dict]:
+        """Website-Signale (SignalCrawler, gespeichert oder frisch gecrawlt) an die Leads hängen"""
+        domains = {id(lead): normalize_site(lead["website"]) if lead["website"] else email_domain(lead["email"])
+                   for lead in leads}
+        try:
+            sites = self.crawler.run([d for d in domains.values() if d])
+        except Exception as e:  # Anreicherung ist optional → Leads unangereichert weitergeben
+            logger.error(f"Enrich fehlgeschlagen, {len(leads)} Leads ohne Website-Signale: {e}")
+            self._count("errors")
+            return leads
+        for lead in leads:
+            site = sites.get(domains[id(lead)])
+            if site and site["signals"]:
+                lead["signals"] = list(dict.fromkeys(lead["signals"] + site["signals"]))
+                self._count("enriched")
+        return leads
+
+    def _score(self, lead: Dict) -> Optional[Dict]:
+        reason = self.scorer.excluded(lead)
+        if reason:
+            self._count("excluded")
+            return None
+        return self.scorer.score(lead)
+
+    def _persist(self, leads: List[Dict]):
+        """Ein Batch pro Transaktion (statt Commit pro Lead)"""
+        if not self.dry_run:
+            results = self.lead_service.add_leads([{
+                "unternehmen": lead["unternehmen"], "kontakt": lead["kontakt"], "position": lead["position"],
+                "email": lead["email"], "branche": lead["branche"], "score": lead["score"],
+                "notizen": f"Quelle: {lead['source']} | ICP {lead['icp_points']} "
+                           f"({', '.join(lead['icp_criteria']) or '–'})",
+            } for lead in leads])
+            merged = sum(1 for result in results if result.get("duplicate_of"))
+            self._count("merged", merged)
+            self._count("added", len(results) - merged)
+        # Erst nach erfolgreichem Speichern → Einzel-Wiederholungen zählen nicht doppelt
+        for lead in leads:
+            entry = (lead["score"], -next(self._seq), lead)   # bei Gleichstand gewinnt der frühere
+            if len(self._top) < TOP_LEADS:
+                heapq.heappush(self._top, entry)
+            elif entry[:2] > self._top[0][:2]:
+                heapq.heapreplace(self._top, entry)
+        return None
+
+    def _dead_letter(self, stage: str, item: Dict, error: Exception):
+        """Endgültig gescheiterten Datensatz als JSONL ablegen (Format wie RecordSource)"""
+        self._count("dead_letters")
+        record = dict(item, dead_letter_stage=stage, dead_letter_error=str(error))
+        with self._dead_letter_lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    # Threads
+
+    def _run_source(self, source: LeadSource, out: queue.Queue):
+        try:
+            for record in source.fetch():
+                self._count("fetched")
+                out.put((source.name, record))
+        except Exception as e:
+            logger.error(f"Quelle {source.name} fehlgeschlagen: {e}")
+            self._count("errors")
+        finally:
+            out.put(_DONE)
+
+    def _run_stage(self, fn: Callable, inbox: queue.Queue, outbox: queue.Queue, producers: int = 1):
+        finished = 0
+        while finished < producers:
+            item = inbox.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            try:
+                result = fn(item)
+            except Exception as e:
+                logger.error(f"{fn.__name__}: {e}")
+                self._count("errors")
+                continue
+            if result is not None:
+                outbox.put(result)
+        outbox.put(_DONE)
+
+    def _run_batches(self, fn: Callable, inbox: queue.Queue, outbox: Optional[queue.Queue], batch_size: int):
+        """Stufe mit Micro-Batches: alles nehmen, was gerade in der Queue liegt (max. batch_size)"""
+        done = False
+        while not done:
+            batch = [inbox.get()]
+            while len(batch) < batch_size and batch[-1] is not _DONE:
+                try:
+                    batch.append(inbox.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _DONE:
+                batch.pop()
+                done = True
+            if not batch:
+                continue
+            try:
+                results = fn(batch)
+            except Exception as e:
+                logger.error(f"{fn.__name__}: {e} – wiederhole {len(batch)} Datensätze einzeln")
+                results = self._retry_singly(fn, batch)
+            if outbox is not None:
+                for result in results:
+                    outbox.put(result)
+        if outbox is not None:
+            outbox.put(_DONE)
+
+    def _retry_singly(self, fn: Callable, batch: List) -> List:
+        """Gescheiterten Batch Datensatz für Datensatz wiederholen; Ausfälle → Dead Letter"""
+        results = []
+        for item in batch:
+            try:
+                results += fn([item]) or []
+            except Exception as e:
+                logger.error(f"{fn.__name__}: {e} – Dead Letter {item.get('email', '')}")
+                self._count("errors")
+                self._dead_letter(fn.__name__, item, e)
+        return results
+
+    def run(self) -> Dict:
+        """Alle Quellen durch alle Stufen; liefert Zähler + Laufzeit"""
+        started = time.perf_counter()
+        raw, normalized, unique, enriched, scored = (queue.Queue(maxsize=self.queue_size) for _ in range(5))
+        if self.crawler is None:
+            enriched = unique
+        threads = [threading.Thread(target=self._run_source, args=(source, raw), name=f"source-{source.name}")
+                   for source in self.sources]
+        threads += [
+            threading.Thread(target=self._run_stage, args=(self._normalize, raw, normalized, len(self.sources)),
+                             name="normalize"),
+            threading.Thread(target=self._run_stage, args=(self._dedupe, normalized, unique), name="dedupe"),
+            threading.Thread(target=self._run_stage, args=(self._score, enriched, scored), name="score"),
+            threading.Thread(target=self._run_batches, args=(self._persist, scored, None, self.batch_size),
+                             name="persist"),
+        ]
+        if self.crawler is not None:
+            threads.append(threading.Thread(target=self._run_batches, name="enrich",
+                                            args=(self._enrich, unique, enriched, self.crawl_batch_size)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return dict(self.stats, seconds=round(time.perf_counter() - started, 2))
+
+
+# ---------- Konfiguration ----------
+
+def crawler_from_config(path: str = SOURCES_CONFIG) -> Optional[SignalCrawler]:
+    """SignalCrawler, wenn in config/lead_sources.yaml aktiviert (crawler.enabled)"""
+    if not Path(path).exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        crawler = (yaml.safe_load(f) or {}).get("crawler") or {}
+    if not crawler.get("enabled"):
+        return None
+    return SignalCrawler(concurrency=crawler.get("concurrency", 50), per_host=crawler.get("per_host", 2),
+                         host_delay=crawler.get("host_delay", 1.0))
+
+
+def sources_from_config(path: str = SOURCES_CONFIG) -> List[LeadSource]:
+    """Quellen aus config/lead_sources.yaml (csv/fixtures per Glob, Hunter-Domainliste)"""
+    if not Path(path).exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    sources: List[LeadSource] = []
+    for pattern in config.get("csv", []):
+        sources += [CSVSource(p) for p in sorted(glob.glob(pattern))]
+    for pattern in config.get("fixtures", []):
+        sources += [RecordSource(path=p) for p in sorted(glob.glob(pattern))]
+    hunter = config.get("hunter") or {}
+    domains = list(hunter.get("domains", []))
+    if hunter.get("domains_file") and Path(hunter["domains_file"]).exists():
+        with open(hunter["domains_file"], 'r', encoding='utf-8') as f:
+            domains += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if domains:
+        sources.append(HunterSource(domains, limit=hunter.get("limit", 10)))
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lead-Pipeline (Quellen → Normalisierung → Dedupe → ICP → DB)")
+    parser.add_argument("--csv", nargs="*", default=[], help="CSV-Exporte")
+    parser.add_argument("--fixture", nargs="*", default=[], help="JSONL-Dateien")
+    parser.add_argument("--crawl", action="store_true", help="Website-Signale crawlen (sonst laut Config)")
+    parser.add_argument("--dry-run", action="store_true", help="Nichts speichern, nur Scoring anzeigen")
+    args = parser.parse_args()
+
+    sources = [CSVSource(p) for p in args.csv] + [RecordSource(path=p) for p in args.fixture]
+    sources = sources or sources_from_config()
+    if not sources:
+        parser.error(f"Keine Quellen (--csv/--fixture oder {SOURCES_CONFIG})")
+
+    crawler = SignalCrawler() if args.crawl else crawler_from_config()
+    pipeline = LeadPipeline(sources, crawler=crawler, dry_run=args.dry_run)
+    stats = pipeline.run()
+    print(f"✓ {stats['fetched']} Datensätze aus {len(sources)} Quellen in {stats['seconds']}s")
+    print(f"   Ungültig: {stats['invalid']} | Duplikate: {stats['duplicates']} | Ausgeschlossen: {stats['excluded']} "
+          f"| Mit Website-Signalen: {stats['enriched']}")
+    print(f"   Neu: {stats['added']} | Zusammengeführt: {stats['merged']} | Fehler: {stats['errors']}")
+    if stats['dead_letters']:
+        print(f"⚠️  {stats['dead_letters']} Leads im Dead Letter: {pipeline.dead_letter_path} "
+              f"(erneut per --fixture {pipeline.dead_letter_path})")
+    if args.dry_run:
+        for lead in pipeline.top_leads():
+            print(f"   {lead['score']:3d}  {lead['unternehmen']} – {lead['email']} ({', '.join(lead['icp_criteria'])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Website-Crawler für Digital-Signale von Kanzleien (asyncio + aiohttp)
+
+- Lädt Startseite + Impressum jeder Domain
+- Höflich: max. Verbindungen pro Host + Mindestabstand zwischen Requests
+- Conditional GET (ETag / Last-Modified) und Seiten-Cache auf Platte (data/page_cache)
+- Signale aus config/icp_filters.yaml per vorkompiliertem Matcher (ein Durchlauf pro Seite)
+- Ergebnisse in data/signals.db → fließen über die Lead-Pipeline ins ICP-Scoring
+
+CLI:
+    python -m src.lead_generation.signal_crawler stbstaat.de hrsteuer.de
+    python -m src.lead_generation.signal_crawler --file domains.txt --concurrency 100
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from src.analytics.metrics import CACHE_REQUESTS, cache_result
+
+USER_AGENT = "SBS-Nexus-SignalCrawler/1.0 (+https://sbsdeutschland.com)"
+MAX_PAGE_BYTES = 1_500_000
+CACHE_MAX_AGE = 7 * 24 * 3600     # so lange ohne Request aus dem Cache
+SIGNAL_MAX_AGE = 30 * 24 * 3600   # so lange gelten gespeicherte Signale einer Domain
+ERROR_MAX_AGE = 24 * 3600         # nicht erreichbare Domains am nächsten Tag erneut versuchen
+
+# Signal (Wortlaut wie in icp_filters.yaml) → Muster
+SIGNAL_PATTERNS = {
+    "Digitale DATEV-Kanzlei Label": r"digitale[\s_-]*datev[\s_-]*kanzlei",
+    "DATEV Unternehmen Online aktiv": r"unternehmen[\s_-]*online|datev[\s_-]*duo\b|\bduo[\s_-]*portal",
+    "KI-Tools auf Website erwähnt": r"\bki\b|künstliche[rn]?\s+intelligenz|chatgpt|\bai[\s_-]*(?:gestützt|basiert)",
+    "Papierloses Büro": r"papierlos|digitale[sn]?\s+belegverarbeitung|belege\s+digital",
+    "Online-Mandantenportal": r"mandanten[\s_-]*portal|datev\s+arbeitsplatz|online[\s_-]*portal|upload[\s_-]*portal",
+    "DATEV Mitglied": r"\bdatev\b",
+    "Digitale Buchhaltung": r"digitale[n]?\s+(?:finanz)?buchhaltung|online[\s_-]*buchhaltung",
+    "E-Commerce": r"e[\s_-]*commerce|onlinehandel|online[\s_-]*händler",
+    "Mehrere Standorte": r"\bstandorte\b|\bniederlassungen\b",
+}
+
+# Ein Muster, benannte Gruppen → ein finditer-Durchlauf pro Seite
+SIGNAL_MATCHER = re.compile(
+    "|".join(f"(?P<s{i}>{pattern})" for i, pattern in enumerate(SIGNAL_PATTERNS.values())),
+    re.IGNORECASE,
+)
+SIGNAL_NAMES = {f"s{i}": name for i, name in enumerate(SIGNAL_PATTERNS)}
+
+SCRIPT_STYLE = re.compile(r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAGS = re.compile(r"<[^>]+>")
+ATTRS = re.compile(r"\b(?:alt|title|src)\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+LINKS = re.compile(r"<a\b[^>]*href\s*=\s*[\"']([^\"'#]+)[\"'][^>]*>(.*?)</a>", re.IGNORECASE | re.DOTALL)
+VIEWPORT = re.compile(r"<meta[^>]+name\s*=\s*[\"']viewport[\"']", re.IGNORECASE)
+EMAILS = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+AT_OBFUSCATION = re.compile(r"\s*[\(\[\{]\s*(?:at|ät)\s*[\)\]\}]\s*", re.IGNORECASE)
+IMPRESSUM = re.compile(r"impressum|imprint", re.IGNORECASE)
+
+
+# ---------- Extraktion ----------
+
+def page_text(page: str) -> str:
+    """Sichtbarer Text + alt/title/src-Attribute (Siegel sind oft nur Bilder)"""
+    page = SCRIPT_STYLE.sub(" ", page)
+    attrs = " ".join(ATTRS.findall(page))
+    return html.unescape(TAGS.sub(" ", page)) + " " + attrs
+
+
+def extract_signals(page: str) -> Dict[str, str]:
+    """{signal: Fundstelle} für eine HTML-Seite"""
+    text = page_text(page)
+    found = {}
+    for match in SIGNAL_MATCHER.finditer(text):
+        name = SIGNAL_NAMES[match.lastgroup]
+        if name not in found:
+            start = max(match.start() - 40, 0)
+            found[name] = " ".join(text[start:match.end() + 40].split())
+    if VIEWPORT.search(page):
+        found["Website modern"] = "meta viewport (responsive)"
+    return found
+
+
+def extract_emails(page: str) -> List[str]:
+    text = AT_OBFUSCATION.sub("@", page_text(page))
+    emails = (email.lower().rstrip(".") for email in EMAILS.findall(text))
+    return list(dict.fromkeys(e for e in emails if not e.endswith((".png", ".jpg", ".svg", ".gif", ".webp"))))
+
+
+def impressum_url(page: str, base_url: str) -> str:
+    for href, label in LINKS.findall(page):
+        if IMPRESSUM.search(href) or IMPRESSUM.search(label):
+            return urljoin(base_url, href.strip())
+    return urljoin(base_url, "/impressum")
+
+
+def decode_body(raw: bytes, charset: Optional[str]) -> str:
+    """Body dekodieren; unbekannter Charset (z.B. 'charset=none') → utf-8"""
+    try:
+        return raw.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return raw.decode("utf-8", errors="replace")
+
+
+def normalize_site(domain: str) -> str:
+    """'https://www.kanzlei.de/x' → 'kanzlei.de' (Port bleibt erhalten)"""
+    domain = domain.strip().lower()
+    if "//" in domain:
+        domain = urlparse(domain).netloc
+    domain = domain.split("/", 1)[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+# ---------- Cache ----------
+
+class PageCache:
+    """Seiten-Cache auf Platte: Body (gzip) + Validatoren (ETag, Last-Modified)"""
+
+    def __init__(self, cache_dir: str = "data/page_cache", max_age: float = CACHE_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, url: str) -> Optional[Dict]:
+        path = self._path(url)
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with gzip.open(path + ".html.gz", "rt", encoding="utf-8") as f:
+                meta["body"] = f.read()
+        except (OSError, ValueError):
+            return None
+        meta["fresh"] = time.time() - meta["fetched_at"] < self.max_age
+        return meta
+
+    def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str], final_url: str):
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path + ".html.gz", "wt", encoding="utf-8") as f:
+            f.write(body)
+        self.touch(url, etag, last_modified, final_url)
+
+    def touch(self, url: str, etag: Optional[str], last_modified: Optional[str], final_url: str):
+        with open(self._path(url) + ".json", "w", encoding="utf-8") as f:
+            json.dump({"url": url, "final_url": final_url, "etag": etag,
+                       "last_modified": last_modified, "fetched_at": time.time()}, f)
+
+
+class SignalStore:
+    """Signale pro Domain (data/signals.db)"""
+
+    def __init__(self, db_path: str = "data/signals.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Erstelle Signal DB"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS site_signals (
+                domain TEXT PRIMARY KEY,
+                signals TEXT NOT NULL,
+                evidence TEXT,
+                emails TEXT,
+                pages INTEGER,
+                error TEXT,
+                crawled_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def save(self, results: Iterable[Dict]):
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('INSERT OR REPLACE INTO site_signals VALUES (?, ?, ?, ?, ?, ?, ?)', [
+            (r["domain"], json.dumps(r["signals"], ensure_ascii=False),
+             json.dumps(r["evidence"], ensure_ascii=False), json.dumps(r["emails"]),
+             r["pages"], r.get("error"), r["crawled_at"])
+            for r in results
+        ])
+        conn.commit()
+        conn.close()
+
+    def get_many(self, domains: Iterable[str], max_age: float = SIGNAL_MAX_AGE) -> Dict[str, Dict]:
+        domains = list(domains)
+        found = {}
+        conn = sqlite3.connect(self.db_path)
+        for i in range(0, len(domains), 500):
+            chunk = domains[i:i + 500]
+            rows = conn.execute(f'''
+                SELECT domain, signals, evidence, emails, pages, error, crawled_at FROM site_signals
+                WHERE domain IN ({','.join('?' * len(chunk))}) AND crawled_at >= ?
+                  AND (error IS NULL OR crawled_at >= ?)
+            ''', (*chunk, time.time() - max_age, time.time() - min(max_age, ERROR_MAX_AGE))).fetchall()
+            for row in rows:
+                found[row[0]] = {"domain": row[0], "signals": json.loads(row[1]), "evidence": json.loads(row[2] or "{}"),
+                                 "emails": json.loads(row[3] or "[]"), "pages": row[4], "error": row[5],
+                                 "crawled_at": row[6]}
+        conn.close()
+        return found
+
+
+# ---------- Crawler ----------
+
+class SignalCrawler:
+    """Asynchroner Crawler: viele Domains parallel, pro Host höflich"""
+
+    def __init__(self, cache: Optional[PageCache] = None, store: Optional[SignalStore] = None,
+                 concurrency: int = 50, per_host: int = 2, host_delay: float = 1.0, timeout: float = 15,
+                 schemes: Tuple[str, ...] = ("https", "http"), resolver: Optional[AbstractResolver] = None):
+        self.cache = cache or PageCache()
+        self.store = store or SignalStore()
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self.timeout = timeout
+        self.schemes = schemes
+        self.resolver = resolver
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0, "errors": 0}
+        self._hosts: Dict[str, Tuple[asyncio.Lock, List[float]]] = {}
+
+    async def _polite(self, host: str):
+        """Mindestabstand host_delay zwischen zwei Requests an denselben Host"""
+        lock, last = self._hosts.setdefault(host, (asyncio.Lock(), [0.0]))
+        async with lock:
+            wait = last[0] + self.host_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last[0] = time.monotonic()
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, str]:
+        """(final_url, html) – aus Cache, per 304 bestätigt oder neu geladen"""
+        cached = self.cache.get(url)
+        cache_result("page_cache", bool(cached and cached["fresh"]))
+        if cached and cached["fresh"]:
+            self.stats["cache_hits"] += 1
+            return cached["final_url"], cached["body"]
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        await self._polite(urlparse(url).netloc)
+        self.stats["requests"] += 1
+        async with session.get(url, headers=headers, allow_redirects=True) as response:
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            if response.status == 304 and cached:
+                self.stats["not_modified"] += 1
+                CACHE_REQUESTS.labels(cache="page_cache", result="revalidated").inc()
+                self.cache.touch(url, etag or cached.get("etag"), last_modified or cached.get("last_modified"),
+                                 cached["final_url"])
+                return cached["final_url"], cached["body"]
+            response.raise_for_status()
+            raw = await read_body(response.content, MAX_PAGE_BYTES)
+            body = decode_body(raw, response.charset)
+            final_url = str(response.url)
+            self.cache.put(url, body, etag, last_modified, final_url)
+            return final_url, body
+
+    async def crawl_domain(self, session: aiohttp.ClientSession, domain: str) -> Dict:
+        """Startseite + Impressum einer Domain → Signale, Fundstellen, Emails"""
+        result = {"domain": domain, "signals": [], "evidence": {}, "emails": [], "pages": 0,
+                  "error": None, "crawled_at": time.time()}
+        home = None
+        for scheme in self.schemes:
+            try:
+                home = await self.fetch(session, f"{scheme}://{domain}/")
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError) as e:
+                result["error"] = f"{type(e).__name__}: {e}"[:200]
+        if home is None:
+            self.stats["errors"] += 1
+            return result
+
+        pages = [home[1]]
+        try:
+            pages.append((await self.fetch(session, impressum_url(home[1], home[0])))[1])
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError):
+            pass  # ohne Impressum weiter – Startseite reicht für die meisten Signale
+
+        evidence = {}
+        for page in pages:
+            for name, snippet in extract_signals(page).items():
+                evidence.setdefault(name, snippet)
+        result.update(signals=list(evidence), evidence=evidence, emails=extract_emails(pages[-1]),
+                      pages=len(pages), error=None)
+        return result
+
+    async def crawl(self, domains: Iterable[str],
+                    on_result: Optional[Callable[[Dict], None]] = None) -> Dict[str, Dict]:
+        """Alle Domains crawlen (ohne Store-Lookup)"""
+        domains = list(dict.fromkeys(normalize_site(d) for d in domains if d and d.strip()))
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300, resolver=self.resolver)
+        timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=min(self.timeout, 5))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self._hosts = {}  # Locks gehören zur jeweiligen Event-Loop
+        results = {}
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": USER_AGENT}) as session:
+            async def worker(domain):
+                async with semaphore:
+                    try:
+                        result = await self.crawl_domain(session, domain)
+                    except Exception as e:  # eine kaputte Domain darf den Lauf nicht abbrechen
+                        self.stats["errors"] += 1
+                        result = {"domain": domain, "signals": [], "evidence": {}, "emails": [], "pages": 0,
+                                  "error": f"{type(e).__name__}: {e}"[:200], "crawled_at": time.time()}
+                results[domain] = result
+                if on_result:
+                    on_result(result)
+
+            await asyncio.gather(*(worker(domain) for domain in domains), return_exceptions=True)
+        return results
+
+    def run(self, domains: Iterable[str], refresh: bool = False,
+            on_result: Optional[Callable[[Dict], None]] = None) -> Dict[str, Dict]:
+        """Synchron: gespeicherte Signale nutzen, nur fehlende/veraltete Domains crawlen"""
+        domains = list(dict.fromkeys(normalize_site(d) for d in domains if d and d.strip()))
+        known = {} if refresh else self.store.get_many(domains)
+        missing = [d for d in domains if d not in known]
+        if missing:
+            crawled = asyncio.run(self.crawl(missing, on_result))
+            self.store.save(crawled.values())
+            known.update(crawled)
+        return {d: known[d] for d in domains if d in known}
+
+
+async def read_body(content: aiohttp.StreamReader, limit: int, chunk_size: int = 64 * 1024) -> bytes:
+    """Body bis EOF oder limit Bytes lesen (content.read(n) liefert nur, was gerade gepuffert ist)"""
+    chunks, size = [], 0
+    async for chunk in content.iter_chunked(chunk_size):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return b"".join(chunks)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Digital-Signale von Kanzlei-Websites crawlen")
+    parser.add_argument("domains", nargs="*")
+    parser.add_argument("--file", help="Datei mit einer Domain pro Zeile")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--delay", type=float, default=1.0, help="Sekunden zwischen Requests pro Host")
+    parser.add_argument("--refresh", action="store_true", help="Gespeicherte Signale ignorieren")
+    args = parser.parse_args()
+
+    domains = list(args.domains)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            domains += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not domains:
+        parser.error("Keine Domains angegeben")
+
+    crawler = SignalCrawler(concurrency=args.concurrency, per_host=args.per_host, host_delay=args.delay)
+    started = time.perf_counter()
+    results = crawler.run(domains, refresh=args.refresh, on_result=lambda r: print(
+        f"{'✗' if r['error'] else '✓'} {r['domain']}: {r['error'] or ', '.join(r['signals']) or '–'}"))
+    elapsed = time.perf_counter() - started
+    print(f"\n📊 {len(results)} Domains in {elapsed:.1f}s ({len(results) / max(elapsed, 0.001) * 3600:.0f}/h) – "
+          f"{crawler.stats['requests']} Requests, {crawler.stats['not_modified']}× 304, "
+          f"{crawler.stats['cache_hits']} Cache-Treffer, {crawler.stats['errors']} Fehler")
+
+
+if __name__ == "__main__":
+    main()
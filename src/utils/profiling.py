@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Profiling-Modus für die Kampagnen-Einstiegspunkte (--profile)
+
+- SamplingProfiler: Stack-Samples des laufenden Threads (pyinstrument-Stil, ~1 ms),
+  daraus Collapsed-Stacks für Flamegraphs (flamegraph.pl / speedscope / inferno)
+  und Top-N-Funktionen nach Self- und Gesamtzeit
+- tracemalloc: Top-N Allokationsstellen
+- NetworkStubs: Resend, OpenAI, SMTP und requests werden ersetzt, time.sleep ist ein No-op
+  → gemessen wird nur unser eigener Code (Personalisierung, Parsing, pandas, SQLite)
+- Sandbox: Lauf in einer temporären Kopie von config/ + data/ → keine Fake-Versände in den echten DBs
+- Verlauf in logs/profiles/history.jsonl → Regressionen gegenüber dem letzten Lauf
+
+    python automated_email_sender.py --profile
+    python automation_scheduler.py --profile
+    python follow_up_automation.py --profile
+"""
+
+import json
+import os
+import shutil
+import smtplib
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+PROFILE_DIR = "logs/profiles"
+HISTORY_FILE = "history.jsonl"
+
+# Wird in die Sandbox kopiert (relativ zum Projekt-Root)
+SANDBOX_PATHS = ("config", "data", "campaign_results.csv", "email_events.csv")
+
+STUB_EMAIL_BODY = """Sehr geehrte Damen und Herren,
+
+als digitale Kanzlei kennen Sie den Aufwand der Belegverarbeitung. SBS Nexus liest Rechnungen
+in 8 Sekunden aus und übergibt sie direkt an DATEV.
+
+Hätten Sie nächste Woche 15 Minuten für eine kurze Demo?
+
+Beste Grüße"""
+
+
+class SamplingProfiler:
+    """Sampelt den Stack eines Threads in festen Intervallen"""
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sampling-profiler")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        # Event.wait statt time.sleep → unabhängig vom gestubbten sleep
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            key = ";".join(reversed(names))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Brendan-Gregg-Format: 'root;child;leaf <count>' pro Zeile"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def top(self, n: int = 25) -> List[Dict]:
+        """Funktionen nach Self-Samples (Blatt) und Gesamt-Samples (irgendwo im Stack)"""
+        own: Dict[str, int] = {}
+        total: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] = own.get(frames[-1], 0) + count
+            for name in set(frames):
+                total[name] = total.get(name, 0) + count
+        ranked = sorted(total, key=lambda name: (own.get(name, 0), total[name]), reverse=True)[:n]
+        samples = self.samples or 1
+        return [{"function": name, "self": own.get(name, 0), "total": total[name],
+                 "self_pct": own.get(name, 0) / samples, "total_pct": total[name] / samples}
+                for name in ranked]
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# ---------- Netzwerk-Stubs ----------
+
+class _StubSMTP:
+    """smtplib.SMTP/SMTP_SSL-Ersatz: akzeptiert alles, versendet nichts"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self, *args, **kwargs):
+        pass
+
+    def login(self, *args, **kwargs):
+        pass
+
+    def send_message(self, msg, *args, **kwargs):
+        msg.as_bytes()  # MIME-Serialisierung gehört zum gemessenen Pfad
+        return {}
+
+    def sendmail(self, from_addr, to_addrs, msg, *args, **kwargs):
+        return {}
+
+    def quit(self):
+        pass
+
+
+class NetworkStubs:
+    """Ersetzt Netzwerk-Provider für die Dauer eines Profiling-Laufs"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._counter = 0
+
+    def _hit(self, provider: str):
+        self.calls[provider] = self.calls.get(provider, 0) + 1
+        if self.latency:
+            threading.Event().wait(self.latency)
+
+    def resend_send(self, params: Dict) -> Dict:
+        self._hit("resend")
+        self._counter += 1
+        return {"id": f"stub-{self._counter}"}
+
+    def openai_create(self, model: str = "gpt-4", messages=None, max_tokens: int = 800, **kwargs):
+        self._hit("openai")
+        prompt = sum(len(m.get("content", "")) for m in messages or []) // 4
+        text = "Ihre Kanzlei digital entlasten" if max_tokens <= 100 else STUB_EMAIL_BODY
+        usage = SimpleNamespace(prompt_tokens=prompt, completion_tokens=len(text) // 4,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+    def mx_lookup(self, domain: str, *args, **kwargs):
+        self._hit("dns")
+        return [(10, f"mx.{domain}")], 3600
+
+    def http_request(self, method, url, data=None, **kwargs):
+        self._hit("resend_batch" if url.endswith("/emails/batch") else "http")
+        import requests
+        body = {}
+        if url.endswith("/emails/batch"):
+            self._counter += 1
+            body = {"data": [{"id": f"stub-{self._counter}-{i}"} for i in range(len(json.loads(data or "[]")))]}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode("utf-8")
+        response.url = url
+        return response
+
+    @contextmanager
+    def active(self):
+        patches = [
+            mock.patch.object(smtplib, "SMTP", _StubSMTP),
+            mock.patch.object(smtplib, "SMTP_SSL", _StubSMTP),
+            mock.patch.object(time, "sleep", lambda seconds: None),
+            mock.patch.dict(os.environ, {"OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "sk-profile-stub",
+                                         "RESEND_API_KEY": os.getenv("RESEND_API_KEY") or "re_profile_stub"}),
+        ]
+        from src.delivery import mx_scheduler
+        patches.append(mock.patch.object(mx_scheduler, "query_mx", self.mx_lookup))
+        try:
+            import resend
+            patches.append(mock.patch.object(resend.Emails, "send", self.resend_send))
+        except ImportError:
+            pass
+        try:
+            from openai.resources.chat.completions import Completions
+            patches.append(mock.patch.object(Completions, "create",
+                                             lambda client, *a, **kw: self.openai_create(*a, **kw)))
+        except ImportError:
+            pass
+        try:
+            import requests
+            patches.append(mock.patch.object(requests.Session, "request",
+                                             lambda session, method, url, **kw: self.http_request(method, url, **kw)))
+        except ImportError:
+            pass
+        for patch in patches:
+            patch.start()
+        try:
+            yield self
+        finally:
+            for patch in reversed(patches):
+                patch.stop()
+
+
+# ---------- Sandbox ----------
+
+@contextmanager
+def sandbox(root: str = "."):
+    """Arbeitsverzeichnis auf eine Kopie von config/ und data/ umstellen"""
+    root = os.path.abspath(root)
+    workdir = tempfile.mkdtemp(prefix="sbs-profile-")
+    for name in SANDBOX_PATHS:
+        source = os.path.join(root, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(workdir, name))
+        elif os.path.exists(source):
+            shutil.copy2(source, workdir)
+    os.makedirs(os.path.join(workdir, "logs"), exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        yield workdir
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------- Lauf ----------
+
+def profile_run(name: str, func: Callable, *args, top: int = 25, interval: float = 0.001,
+                allocations: bool = True, stub_network: bool = True, isolate: bool = True,
+                out_dir: str = PROFILE_DIR, **kwargs) -> Dict:
+    """func unter dem Profiler ausführen; schreibt <name>_<ts>.collapsed + .txt und ergänzt den Verlauf"""
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = os.path.join(out_dir, f"{name}_{stamp}")
+
+    stubs = NetworkStubs()
+    error = None
+    with (sandbox() if isolate else _nullcontext()), (stubs.active() if stub_network else _nullcontext()):
+        if allocations:
+            tracemalloc.start(10)
+        profiler = SamplingProfiler(interval).start()
+        started = time.perf_counter()
+        try:
+            func(*args, **kwargs)
+        except Exception as e:  # Profil trotzdem schreiben
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            wall = time.perf_counter() - started
+            profiler.stop()
+            snapshot = tracemalloc.take_snapshot() if allocations else None
+            peak = tracemalloc.get_traced_memory()[1] if allocations else 0
+            if allocations:
+                tracemalloc.stop()
+
+    hot = profiler.top(top)
+    alloc = _top_allocations(snapshot, top) if snapshot else []
+    with open(base + ".collapsed", 'w', encoding='utf-8') as f:
+        f.write(profiler.collapsed())
+
+    summary = {"name": name, "timestamp": datetime.now().isoformat(), "wall_s": round(wall, 4),
+               "samples": profiler.samples, "peak_alloc_kb": round(peak / 1024, 1),
+               "network_calls": stubs.calls if stub_network else {}, "error": error,
+               "top": [{"function": h["function"], "self_pct": round(h["self_pct"], 4)} for h in hot[:10]]}
+    previous = _previous_run(out_dir, name)
+    with open(base + ".txt", 'w', encoding='utf-8') as f:
+        f.write(format_summary(summary, hot, alloc, previous))
+    with open(os.path.join(out_dir, HISTORY_FILE), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+    print(format_summary(summary, hot[:10], alloc[:5], previous))
+    print(f"🔥 Flamegraph: {base}.collapsed  (flamegraph.pl {os.path.basename(base)}.collapsed > profile.svg)")
+    print(f"📄 Report:     {base}.txt")
+    summary.update(collapsed=base + ".collapsed", report=base + ".txt")
+    return summary
+
+
+@contextmanager
+def _nullcontext():
+    yield
+
+
+def _top_allocations(snapshot, n: int) -> List[Dict]:
+    stats = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                    tracemalloc.Filter(False, __file__)]).statistics("lineno")
+    return [{"location": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             "size_kb": stat.size / 1024, "count": stat.count} for stat in stats[:n]]
+
+
+def _previous_run(out_dir: str, name: str) -> Optional[Dict]:
+    path = os.path.join(out_dir, HISTORY_FILE)
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("name") == name and not record.get("error"):
+                previous = record
+    return previous
+
+
+def format_summary(summary: Dict, hot: List[Dict], alloc: List[Dict], previous: Optional[Dict] = None) -> str:
+    lines = [f"⏱️  {summary['name']}: {summary['wall_s']:.3f}s, {summary['samples']} Samples, "
+             f"Peak {summary['peak_alloc_kb']:.0f} KB"]
+    if previous and previous.get("wall_s"):
+        delta = (summary["wall_s"] - previous["wall_s"]) / previous["wall_s"]
+        marker = "⚠️ " if delta > 0.2 else ""
+        lines.append(f"   {marker}vs. {previous['timestamp'][:16]}: {previous['wall_s']:.3f}s ({delta:+.0%})")
+    if summary.get("network_calls"):
+        lines.append("   Gestubbt: " + ", ".join(f"{k}={v}" for k, v in sorted(summary["network_calls"].items())))
+    if summary.get("error"):
+        lines.append(f"   ✗ Lauf abgebrochen: {summary['error']}")
+    lines += ["", f"{'Self':>7}{'Gesamt':>8}  Funktion"]
+    lines += [f"{h['self_pct']:>7.1%}{h['total_pct']:>8.1%}  {h['function']}" for h in hot]
+    if alloc:
+        lines += ["", f"{'KB':>9}{'Anzahl':>9}  Allokation"]
+        lines += [f"{a['size_kb']:>9.1f}{a['count']:>9}  {a['location']}" for a in alloc]
+    return "\n".join(lines) + "\n"
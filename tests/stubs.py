@@ -0,0 +1,266 @@
+"""
+Lokale HTTP-Stand-ins für Tests und die --stub-Modi der CLIs (nur im Repo-Checkout)
+
+- StubServer: ThreadingHTTPServer auf 127.0.0.1 im Daemon-Thread, Port 0 → freier Port
+- LocalHunterStub: Hunter.io (/v2/account, /v2/domain-search) mit Credits und 429
+- LocalSiteStub + LoopbackResolver: Kanzlei-Websites mit ETag/304 für den Signal-Crawler
+- LocalCollectorStub: OTLP/HTTP-Collector, schreibt empfangene Spans als JSONL
+- LocalResendStub: Resend /emails/batch mit Validierungs-, Einzel- und 429-Fehlern
+"""
+import hashlib
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from aiohttp.abc import AbstractResolver
+
+from src.analytics.tracing import TRACE_FILE, JSONLExporter, _attributes_from_otlp
+from src.delivery.resend_batch import MAX_BATCH, _recipient
+
+
+class StubServer:
+    """HTTP-Server im Hintergrund; Unterklassen beantworten Requests in handle()"""
+
+    def __init__(self, port: int = 0, addr: str = "127.0.0.1"):
+        self._server = ThreadingHTTPServer((addr, port), self._handler())
+        self.addr = addr
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name=type(self).__name__)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        self.send(request, 404, {"message": "Not found"})
+
+    @staticmethod
+    def send(request: BaseHTTPRequestHandler, status: int, body: Union[Dict, bytes, None] = None,
+             headers: Optional[Dict[str, str]] = None):
+        """Antwort schreiben – Dicts als JSON, Bytes unverändert, None ohne Body"""
+        payload = json.dumps(body).encode("utf-8") if isinstance(body, dict) else body or b""
+        request.send_response(status)
+        if isinstance(body, dict):
+            request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self, "GET")
+
+            def do_POST(self):
+                stub.handle(self, "POST")
+
+        return Handler
+
+
+# ---------- Hunter.io ----------
+
+class LocalHunterStub(StubServer):
+    """Lokaler Hunter.io-Ersatz für Entwicklung und Tests ohne Credits
+
+    Jede Domain liefert zwei Kontakte; rate_limit_every=N antwortet jedem N-ten
+    Request mit 429 + Retry-After.
+    """
+
+    def __init__(self, credits: int = 100, rate_limit_every: int = 0, retry_after: float = 0.2):
+        self.credits = credits
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.calls: List[str] = []
+        super().__init__()
+        self.url = f"http://127.0.0.1:{self.port}/v2"
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        parsed = urlparse(request.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        endpoint = parsed.path.rsplit("/", 1)[-1]
+        self.calls.append(endpoint)
+        if self.rate_limit_every and len(self.calls) % self.rate_limit_every == 0:
+            return self.send(request, 429, {"errors": [{"details": "Too many requests"}]},
+                             {"Retry-After": str(self.retry_after)})
+        if endpoint == "account":
+            return self.send(request, 200, {"data": {"requests": {"searches": {"used": 0,
+                                                                                "available": self.credits}}}})
+        if endpoint == "domain-search":
+            domain = params.get("domain", "")
+            if "." not in domain:
+                return self.send(request, 400, {"errors": [{"details": "Invalid domain"}]})
+            self.credits -= 1
+            name = domain.split(".")[0]
+            return self.send(request, 200, {"data": {
+                "domain": domain, "organization": f"Kanzlei {name.title()}",
+                "emails": [
+                    {"value": f"info@{domain}", "first_name": None, "last_name": None,
+                     "position": None, "confidence": 91},
+                    {"value": f"m.{name}@{domain}", "first_name": "Max", "last_name": name.title(),
+                     "position": "Steuerberater", "confidence": 87},
+                ]}})
+        return self.send(request, 404, {"errors": [{"details": "Unknown endpoint"}]})
+
+
+# ---------- Kanzlei-Websites ----------
+
+class LoopbackResolver(AbstractResolver):
+    """Jeder Hostname → 127.0.0.1 (für LocalSiteStub)"""
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        return [{"hostname": host, "host": "127.0.0.1", "port": port, "family": socket.AF_INET,
+                 "proto": 0, "flags": socket.AI_NUMERICHOST}]
+
+    async def close(self):
+        pass
+
+
+class LocalSiteStub(StubServer):
+    """Lokale Kanzlei-Websites (HTTP, ETag/304) für Entwicklung und Tests
+
+    Host-Header bestimmt die Kanzlei; sites = {"kanzlei-a.test": ["KI", "Mandantenportal", ...]}
+    charsets = {"kanzlei-b.test": "none"} simuliert kaputte Content-Type-Header
+    padding = {"kanzlei-c.test": 600_000} schiebt die Keywords hinter so viele Füllbytes (große Seiten)
+    Nutzung: SignalCrawler(schemes=("http",), resolver=LoopbackResolver()) + stub.domain(name)
+    """
+
+    def __init__(self, sites: Dict[str, List[str]], charsets: Optional[Dict[str, str]] = None,
+                 padding: Optional[Dict[str, int]] = None):
+        self.sites = sites
+        self.charsets = charsets or {}
+        self.padding = padding or {}
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def domain(self, name: str) -> str:
+        return f"{name}:{self.port}"
+
+    def page(self, host: str, path: str) -> Optional[str]:
+        keywords = self.sites.get(host)
+        if keywords is None:
+            return None
+        if path.rstrip("/") in ("", "/index.html"):
+            return (f"<html><head><meta name='viewport' content='width=device-width'><title>{host}</title></head>"
+                    f"<body><h1>Steuerkanzlei {host}</h1><!-- {'x' * self.padding.get(host, 0)} -->"
+                    f"<p>{'. '.join(keywords)}.</p>"
+                    f"<a href='/rechtliches/impressum.html'>Impressum</a></body></html>")
+        if path == "/rechtliches/impressum.html":
+            return f"<html><body><h1>Impressum</h1><p>E-Mail: info (at) {host}</p></body></html>"
+        return None
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        with self._lock:
+            self.requests += 1
+        host = request.headers.get("Host", "").split(":")[0]
+        body = self.page(host, request.path)
+        if body is None:
+            return self.send(request, 404)
+        etag = '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+        if request.headers.get("If-None-Match") == etag:
+            with self._lock:
+                self.not_modified += 1
+            return self.send(request, 304, headers={"ETag": etag})
+        self.send(request, 200, body.encode("utf-8"),
+                  {"Content-Type": f"text/html; charset={self.charsets.get(host, 'utf-8')}", "ETag": etag})
+
+
+# ---------- OTLP-Collector ----------
+
+class LocalCollectorStub(StubServer):
+    """Minimaler OTLP/HTTP-Collector: nimmt /v1/traces an und schreibt die Spans als JSONL"""
+
+    def __init__(self, path: str = TRACE_FILE, port: int = 4318, addr: str = "127.0.0.1"):
+        self.sink = JSONLExporter(path)
+        super().__init__(port, addr)
+        self.endpoint = f"http://{addr}:{self.port}/v1/traces"
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        if method != "POST" or request.path != "/v1/traces":
+            return self.send(request, 404)
+        payload = json.loads(request.rfile.read(int(request.headers.get("Content-Length", 0))) or b"{}")
+        records = []
+        for resource in payload.get("resourceSpans", []):
+            for scope in resource.get("scopeSpans", []):
+                for item in scope.get("spans", []):
+                    status = item.get("status", {})
+                    records.append({**item,
+                                    "startTimeUnixNano": int(item["startTimeUnixNano"]),
+                                    "endTimeUnixNano": int(item["endTimeUnixNano"]),
+                                    "attributes": _attributes_from_otlp(item.get("attributes", [])),
+                                    "status": {"code": "ERROR" if status.get("code") == 2 else "OK",
+                                               **({"message": status["message"]} if "message" in status else {})}})
+        self.sink._write(records)
+        self.send(request, 200, {})
+
+
+# ---------- Resend ----------
+
+class LocalResendStub(StubServer):
+    """Lokaler Resend-Ersatz für /emails/batch (Entwicklung und Tests ohne Versand)
+
+    Empfänger mit 'invalid' im Namen → Validierungsfehler, 'flaky' → beim ersten Mal
+    vorübergehender Fehler; rate_limit_every=N antwortet jedem N-ten Request mit 429.
+    """
+
+    def __init__(self, rate_limit_every: int = 0, retry_after: float = 0.05):
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.requests: List[int] = []
+        self.delivered: List[str] = []
+        self._seen_flaky = set()
+        self._idempotency: Dict[str, Dict] = {}
+        self._counter = 0
+        super().__init__()
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        if method != "POST" or request.path != "/emails/batch":
+            return self.send(request, 404, {"message": "Not found"})
+        batch = json.loads(request.rfile.read(int(request.headers.get("Content-Length", 0))))
+        self.requests.append(len(batch))
+        if self.rate_limit_every and len(self.requests) % self.rate_limit_every == 0:
+            return self.send(request, 429, {"message": "Too many requests"}, {"Retry-After": str(self.retry_after)})
+        if len(batch) > MAX_BATCH:
+            return self.send(request, 422, {"message": f"Maximal {MAX_BATCH} Emails pro Batch"})
+        key = request.headers.get("Idempotency-Key")
+        if key in self._idempotency:
+            return self.send(request, 200, self._idempotency[key])
+        data, errors = [], []
+        for index, message in enumerate(batch):
+            to = _recipient(message) or ""
+            if "invalid" in to:
+                errors.append({"index": index, "message": "Invalid `to` field"})
+            elif "flaky" in to and to not in self._seen_flaky:
+                self._seen_flaky.add(to)
+                errors.append({"index": index, "message": "Temporary upstream error"})
+            else:
+                self._counter += 1
+                self.delivered.append(to)
+                data.append({"id": f"stub-{self._counter}"})
+        body = {"data": data, "errors": errors}
+        if key:
+            self._idempotency[key] = body
+        self.send(request, 200, body)
@@ -0,0 +1,106 @@
+"""
+Unit Tests für src/analytics: gleitende Health-Fenster und Alert-Zustand
+"""
+import json
+import threading
+
+from src.analytics.health import AlertManager, HealthEvaluator, RingWindow
+
+
+def test_counts_within_the_window():
+    window = RingWindow(span=60, bucket=10)
+    for t in (0, 5, 15, 59):
+        window.add(t, "sent")
+    window.add(30, "failed")
+
+    stats = window.stats()
+    assert (stats["sent"], stats["failed"], stats["attempts"]) == (4, 1, 5)
+    assert stats["failure_rate"] == 0.2
+
+
+def test_expired_buckets_leave_the_totals():
+    window = RingWindow(span=60, bucket=10)
+    window.add(0, "sent")
+    window.add(5, "failed")
+    window.add(25, "sent")
+
+    window.advance(65)                     # Bucket [0, 10) fällt heraus
+    assert (window.totals["sent"], window.totals["failed"]) == (1, 0)
+    window.advance(200)                    # alles abgelaufen
+    assert window.stats()["attempts"] == 0
+
+
+def test_events_older_than_the_window_are_ignored():
+    window = RingWindow(span=60, bucket=10)
+    window.add(100, "sent")
+    window.add(30, "sent")
+    assert window.totals["sent"] == 1
+
+
+def test_latency_quantile_uses_bucket_upper_bounds():
+    window = RingWindow(span=300, bucket=60)
+    for latency in [0.05] * 90 + [4.0] * 10:
+        window.add(10, latency=latency)
+
+    assert window.quantile(0.5) == 0.1
+    assert window.quantile(0.95) == 5
+    assert window.stats()["sent"] == 0    # reine Latenz-Messung zählt keine Sends
+
+
+def violation(rule: str, severity: str = "warning") -> dict:
+    return {"rule": rule, "severity": severity}
+
+
+def test_alerts_are_deduplicated_until_cooldown_or_escalation(tmp_path):
+    path = str(tmp_path / "health_alerts.json")
+    sent = []
+    alerts = AlertManager(sent.extend, cooldown=600, state_path=path)
+
+    assert alerts.process([violation("bounce_rate")], now=1000) == [violation("bounce_rate")]
+    assert alerts.process([violation("bounce_rate")], now=1300) == []
+    assert alerts.process([violation("bounce_rate", "critical")], now=1400) == [violation("bounce_rate", "critical")]
+    assert alerts.process([violation("bounce_rate", "critical")], now=2000) == [violation("bounce_rate", "critical")]
+    assert len(sent) == 3
+
+    # Neustart: Zustand aus der Datei, "since" bleibt erhalten
+    assert AlertManager(cooldown=600, state_path=path).state["bounce_rate"]["since"] == 1000
+    assert alerts.process([], now=2100, evaluated={"bounce_rate"}) == []
+    assert json.loads(open(path, encoding="utf-8").read()) == {}
+
+
+def test_concurrent_managers_keep_each_others_alerts(tmp_path):
+    path = str(tmp_path / "health_alerts.json")
+    managers = [AlertManager(cooldown=600, state_path=path) for _ in range(8)]
+    start = threading.Barrier(len(managers))
+
+    def fire(index: int):
+        start.wait()
+        for round_ in range(20):
+            managers[index].process([violation(f"rule_{index}")], now=1000 + round_ * 600,
+                                    evaluated={f"rule_{index}"})
+
+    threads = [threading.Thread(target=fire, args=(i,)) for i in range(len(managers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    state = json.loads(open(path, encoding="utf-8").read())
+    assert sorted(state) == sorted(f"rule_{i}" for i in range(len(managers)))
+    assert not [name for name in tmp_path.iterdir() if name.suffix == ".tmp"]
+
+
+def test_checker_runs_off_the_request_path():
+    checked = threading.Event()
+    stop = threading.Event()
+
+    class Evaluator(HealthEvaluator):
+        def check(self, now=None):
+            checked.set()
+            raise RuntimeError("Sink nicht erreichbar")     # Fehler beenden den Thread nicht
+
+    thread = Evaluator().start_checker(interval=0.01, stop=stop)
+    assert checked.wait(2) and thread.daemon and thread.is_alive()
+    stop.set()
+    thread.join(2)
+    assert not thread.is_alive()
@@ -0,0 +1,78 @@
+"""
+Unit Tests für batch_email_drafts: LocalBatchBackend submit → poll → Entwürfe in der Outbox
+"""
+import pytest
+
+from batch_email_drafts import BatchDraftJobs, LocalBatchBackend
+from src.delivery.outbox import Outbox
+
+CONTACTS = [
+    {"email": "info@kanzlei-a.de", "company": "Kanzlei A"},
+    {"email": "info@kanzlei-b.de", "company": "Kanzlei B"},
+]
+
+
+class PromptBuilder:
+    """Minimaler Ersatz für SBSEmailAutomation (nur die Prompt-Builder)"""
+
+    def build_email_prompt(self, contact):
+        return f"Email an {contact['company']}"
+
+    def build_subject_prompt(self, contact):
+        return f"Betreff für {contact['company']}"
+
+
+class FailingBackend(LocalBatchBackend):
+    def status(self, batch_id):
+        return "failed"
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    box = Outbox(str(tmp_path / "outbox.db"))
+    box.enqueue("c1", CONTACTS)
+    return box
+
+
+def test_submit_poll_collects_drafts(outbox):
+    jobs = BatchDraftJobs(PromptBuilder(), outbox=outbox, backend=LocalBatchBackend())
+    assert jobs.submit("c1").startswith("local_c1_local_")
+    assert outbox.pending("c1") == []
+
+    assert jobs.poll("c1") == 4
+    assert jobs.open_jobs("c1") == []
+    drafts = outbox.drafts("c1")
+    assert set(drafts) == {"info@kanzlei-a.de", "info@kanzlei-b.de"}
+    subject, body = drafts["info@kanzlei-a.de"]
+    assert "Betreff für Kanzlei A" in subject and "Email an Kanzlei A" in body
+
+
+def test_second_submit_before_poll_does_not_duplicate(outbox):
+    jobs = BatchDraftJobs(PromptBuilder(), outbox=outbox, backend=LocalBatchBackend())
+    assert jobs.submit("c1")
+    assert jobs.submit("c1") is None
+    assert len(jobs.open_jobs("c1")) == 1
+
+    outbox.enqueue("c1", [{"email": "info@kanzlei-c.de", "company": "Kanzlei C"}])
+    assert jobs.submit("c1")
+    assert [len(set(job["manifest"].values())) for job in jobs.open_jobs("c1")] == [2, 1]
+
+
+def test_failed_job_releases_contacts(outbox):
+    jobs = BatchDraftJobs(PromptBuilder(), outbox=outbox, backend=FailingBackend())
+    assert jobs.submit("c1")
+    assert jobs.poll("c1") == 0
+    assert [c["email"] for c in outbox.pending("c1")] == ["info@kanzlei-a.de", "info@kanzlei-b.de"]
+
+
+def test_submit_error_releases_contacts(outbox):
+    class Unreachable(LocalBatchBackend):
+        def submit(self, job_file):
+            raise ConnectionError("batch api down")
+
+    jobs = BatchDraftJobs(PromptBuilder(), outbox=outbox, backend=Unreachable())
+    with pytest.raises(ConnectionError):
+        jobs.submit("c1")
+    assert len(outbox.pending("c1")) == 2
+    assert jobs.open_jobs("c1") == []
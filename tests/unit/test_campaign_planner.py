@@ -0,0 +1,89 @@
+"""
+Unit Tests für src/content_automation/campaign_planner: Strategie pro Segment, Vorab-Rendering, Entwürfe
+"""
+import os
+
+import pytest
+import yaml
+
+from automated_email_sender import SBSEmailAutomation
+from src.content_automation.campaign_planner import CampaignPlanner, fill
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG = {"default": "ai", "segments": {"Digital-affin": "ai", "Traditionell": "template"}}
+
+
+@pytest.fixture
+def templates():
+    with open(os.path.join(ROOT, "config", "message_templates.yaml"), encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+@pytest.fixture
+def automation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)                       # Tracker/Indizes legen data/ im Testverzeichnis an
+    automation = SBSEmailAutomation(use_resend=True)
+    automation.generated = []
+    automation.generate_ai_email = lambda contact, templates=None: (
+        automation.generated.append(contact['email']) or (f"KI {contact['first_name']}", "KI-Text"))
+    return automation
+
+
+def contact(email, segment, role="Steuerberater", **extra):
+    return {"email": email, "segment": segment, "role": role, "first_name": "Max", "company_name": "Kanzlei Muster",
+            **extra}
+
+
+def test_fill_keeps_unknown_placeholders():
+    assert fill("Hallo {{first_name}}, {{unbekannt}}", {"first_name": "Max"}) == "Hallo Max, {{unbekannt}}"
+
+
+def test_strategy_matches_segment_prefixes(automation, templates, monkeypatch):
+    monkeypatch.setenv("USE_AI_GENERATION", "True")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    planner = CampaignPlanner(automation, templates, CONFIG)
+    assert planner.strategy("Traditionell (kein DATEV)") == "template"
+    assert planner.strategy("Digital-affin (DATEV UO, Label)") == "ai"
+    assert planner.strategy(None) == "ai"
+
+    monkeypatch.delenv("OPENAI_API_KEY")
+    assert CampaignPlanner(automation, templates, CONFIG).strategy("Digital-affin") == "template"
+
+
+def test_prerendered_templates_match_per_contact_personalization(automation, templates, monkeypatch):
+    monkeypatch.setenv("USE_AI_GENERATION", "False")
+    planner = CampaignPlanner(automation, templates, CONFIG)
+    contacts = [contact("a@kanzlei-a.de", "Traditionell"), contact("b@firma-b.de", "KMU", role="CFO", job_title="CFO"),
+                contact("c@kanzlei-c.de", "Digital-affin", role="Digitalisierung")]
+    plan = planner.plan(contacts)
+
+    for item in contacts:
+        template = automation.select_template(item["role"], templates)
+        subject, body, template_id = plan.compose(item)
+        assert (subject, body) == automation.personalize_message(template, item)
+        assert template_id == template["id"]
+    assert "{{" not in plan.compose(contacts[0])[1]
+    assert len(planner._compiled) == 3                # jede Rolle einmal kompiliert
+    assert automation.generated == []
+
+
+def test_drafts_win_and_ai_contacts_are_generated_on_compose(automation, templates, monkeypatch):
+    monkeypatch.setenv("USE_AI_GENERATION", "True")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    planner = CampaignPlanner(automation, templates, CONFIG)
+    contacts = [contact("a@kanzlei-a.de", "Traditionell"), contact("b@kanzlei-b.de", "Digital-affin"),
+                contact("c@kanzlei-c.de", "Digital-affin")]
+    plan = planner.plan(contacts, drafts={"c@kanzlei-c.de": ("Entwurf", "Text aus dem Batch-Job")})
+
+    assert plan.modes == {"a@kanzlei-a.de": "template", "b@kanzlei-b.de": "ai", "c@kanzlei-c.de": "draft"}
+    assert plan.describe() == "1 Template, 1 KI, 1 Entwurf"
+    assert automation.generated == []                 # KI erst beim Versand
+    assert plan.compose(contacts[1]) == ("KI Max", "KI-Text", "ai")
+    assert plan.compose(contacts[2]) == ("Entwurf", "Text aus dem Batch-Job", "batch_draft")
+    assert automation.generated == ["b@kanzlei-b.de"]
+
+
+def test_from_config_reads_the_repo_config(automation, templates):
+    planner = CampaignPlanner.from_config(automation, templates, os.path.join(ROOT, "config", "generation.yaml"))
+    assert planner.config["segments"]["Traditionell"] == "template"
+    assert CampaignPlanner.from_config(automation, templates, "fehlt.yaml").config["default"] == "ai"
@@ -0,0 +1,102 @@
+"""
+Unit Tests für src/delivery/contact_stream: CSV/XLSX-Import, Validierung, Vorschau und Validierungs-Cache
+"""
+import io
+
+import pytest
+
+from src.delivery.contact_stream import ContactStream, normalize_contact
+from src.delivery.outbox import Outbox
+
+HEADER = ["E-Mail", "Vorname", "Kanzlei", "Position"]
+ROWS = [
+    [" Max@Kanzlei-Muster.DE ", "Max", "Kanzlei Muster", "Steuerberater"],
+    ["kein-at-zeichen", "Erika", "Kanzlei B", ""],
+    ["info@steuer.xn--bcher-kva", "Jan", "Kanzlei Ä", "Partner"],
+    ["", "Ohne", "Kanzlei C", ""],
+    ["eva@kanzlei-d.de", "Eva", "Kanzlei D", "CFO"],
+]
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "kontakte.csv"
+    path.write_text("\n".join(";".join(row) for row in [HEADER] + ROWS) + "\n", encoding="utf-8-sig")
+    return path
+
+
+@pytest.fixture
+def xlsx_file(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in [HEADER] + ROWS + [["zahl@kanzlei-z.de", "Zoe", "Kanzlei Z", 42]]:
+        sheet.append(row)
+    path = tmp_path / "kontakte.xlsx"
+    workbook.save(path)
+    return path
+
+
+@pytest.mark.parametrize("email, valid", [
+    ("max@kanzlei.de", True),
+    ("info@steuer.xn--bcher-kva", True),       # Punycode-TLD
+    ("info@kanzlei.co2", True),
+    ("max@kanzlei.d", False),
+    ("max@@kanzlei.de", False),
+    ("max kanzlei@x.de", False),
+])
+def test_email_pattern(email, valid):
+    assert (normalize_contact({"email": email})[0] is not None) is valid
+
+
+def test_csv_with_semicolons_and_german_headers(csv_file, tmp_path):
+    stream = ContactStream(str(csv_file), chunk_size=2)
+    contacts = list(stream)
+
+    assert [c["email"] for c in contacts] == ["max@kanzlei-muster.de", "info@steuer.xn--bcher-kva", "eva@kanzlei-d.de"]
+    assert contacts[0] == {"email": "max@kanzlei-muster.de", "first_name": "Max", "company_name": "Kanzlei Muster",
+                           "job_title": "Steuerberater", "role": "Steuerberater"}
+    assert stream.stats == {"rows": 5, "valid": 3, "invalid": 2}
+    assert stream.rejects == [(3, "ungültige Email: kein-at-zeichen"), (5, "Email fehlt")]
+
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    assert stream.enqueue(outbox, "c1") == 3 and stream.enqueue(outbox, "c1") == 0
+
+
+def test_xlsx_matches_csv(xlsx_file):
+    stream = ContactStream(str(xlsx_file), chunk_size=2)
+    contacts = list(stream)
+    assert [c["email"] for c in contacts][-1] == "zahl@kanzlei-z.de"
+    assert contacts[-1]["job_title"] == "42"
+    assert stream.stats == {"rows": 6, "valid": 4, "invalid": 2}
+    assert [c["email"] for c in ContactStream(str(xlsx_file)).preview(2)] == ["max@kanzlei-muster.de",
+                                                                              "info@steuer.xn--bcher-kva"]
+
+
+def test_preview_reads_only_what_it_needs(csv_file, monkeypatch):
+    stream = ContactStream(str(csv_file))
+    sizes = []
+    original = stream._csv_rows
+
+    def counted(chunk_size):
+        sizes.append(chunk_size)
+        yield from original(chunk_size)
+    monkeypatch.setattr(stream, "_csv_rows", counted)
+
+    assert [c["first_name"] for c in stream.preview(2)] == ["Max", "Jan"]
+    assert sizes == [2] and stream.stats["rows"] == 4             # zwei Chunks à 2 statt 10.000 Zeilen
+
+
+def test_validation_is_cached_per_upload(csv_file):
+    class Upload(io.BytesIO):
+        name = "kontakte.csv"
+
+    cache = {}
+    upload = Upload(csv_file.read_bytes())
+    assert ContactStream(upload).validate(cache)["valid"] == 3
+    (key,) = cache
+    cache[key] = ({"rows": 99, "valid": 42, "invalid": 57}, [])
+    assert ContactStream(upload).validate(cache)["valid"] == 42               # kein erneuter Durchlauf
+
+    other = Upload(csv_file.read_bytes() + b"neu@kanzlei-n.de;Neu;Kanzlei N;\n")
+    assert ContactStream(other).validate(cache)["valid"] == 4                 # andere Größe → neu gezählt
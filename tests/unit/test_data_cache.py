@@ -0,0 +1,35 @@
+"""
+Unit Tests für backend/data_cache: Store-Versionen als Cache-Key
+"""
+import sqlite3
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from backend import data_cache  # noqa: E402
+
+
+def test_file_version_changes_with_content(tmp_path):
+    path = tmp_path / "campaign_results.csv"
+    assert data_cache.file_version(str(path)) == (0, 0)
+    path.write_text("email,status\n", encoding="utf-8")
+    before = data_cache.file_version(str(path))
+    path.write_text("email,status\na@kanzlei-a.de,sent\n", encoding="utf-8")
+    assert data_cache.file_version(str(path)) != before
+
+
+def test_db_version_is_stable_until_another_connection_writes(tmp_path):
+    path = str(tmp_path / "emails.db")
+    assert data_cache.db_version(path) == (0, 0, 0)
+
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE emails (id INTEGER PRIMARY KEY, empfaenger TEXT)")
+    conn.commit()
+    version = data_cache.db_version(path)
+    assert data_cache.db_version(path) == version
+
+    conn.execute("INSERT INTO emails (empfaenger) VALUES ('a@kanzlei-a.de')")
+    conn.commit()
+    conn.close()
+    assert data_cache.db_version(path) != version
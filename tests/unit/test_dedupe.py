@@ -0,0 +1,95 @@
+"""
+Unit Tests für src/lead_generation/dedupe: Duplikat-Score und Batch-Clustering
+"""
+import sqlite3
+
+import pytest
+
+from backend.lead_service import LeadService
+from src.lead_generation.dedupe import LeadDeduplicator, match_score, normalize_company, normalize_person
+
+
+def lead(unternehmen: str, email: str = "", kontakt: str = "") -> dict:
+    return {**LeadDeduplicator.normalized(unternehmen, email), "person_norm": normalize_person(kontakt)}
+
+
+# ---------- match_score ----------
+
+def test_normalization():
+    assert normalize_company("Müller & Partner StBG mbB") == "mueller"
+    assert normalize_person("Dr. Müller, Anna") == normalize_person("Anna Müller") == "anna mueller"
+
+
+def test_same_email_is_always_a_duplicate():
+    assert match_score(lead("Kanzlei A", "max@a.de"), lead("Ganz anders", "MAX@a.de")) == (1.0, "email")
+
+
+def test_same_company_domain_merges():
+    score, reason = match_score(lead("Müller StB", "info@mueller-stb.de"),
+                                lead("Steuerkanzlei Müller", "anna@mueller-stb.de"))
+    assert reason == "domain" and score >= 0.9
+
+
+def test_different_company_domains_conflict():
+    assert match_score(lead("Müller StB", "a@mueller-stb.de"), lead("Müller StB", "b@mueller-tax.de")) == \
+        (0.0, "domain_conflict")
+
+
+def test_without_shared_domain_only_exact_company_and_person_merge():
+    score, reason = match_score(lead("Müller & Partner", "a@gmail.com", "Dr. Anna Müller"),
+                                lead("Müller Partner", "", "Anna Müller"))
+    assert (score, reason) == (0.95, "company_person")
+
+    # 'Müller' vs. 'Müller & Schmidt' ist ähnlich, aber kein automatischer Merge
+    score, reason = match_score(lead("Müller", "", "Anna Müller"), lead("Müller & Schmidt", "", "Anna Müller"))
+    assert reason == "review" and score < 1.0
+    assert match_score(lead("Müller", "", "Anna Müller"), lead("Müller", "", "Peter Müller"))[1] == "review"
+
+
+# ---------- Batch ----------
+
+@pytest.fixture
+def leads_db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return LeadService().db_path
+
+
+def insert(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO leads (unternehmen, kontakt, email, score) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def test_freemail_lead_does_not_chain_two_company_domains(leads_db):
+    insert(leads_db, [("Schmidt StB", "Anna Schmidt", "anna@schmidt-hh.de", 80),
+                      ("Schmidt StB", "Anna Schmidt", "anna.schmidt@gmail.com", 50),
+                      ("Schmidt StB", "Anna Schmidt", "a.schmidt@schmidt-muc.de", 70)])
+    result = LeadDeduplicator(leads_db).run_batch()
+    assert (result["clusters"], result["merged"], result["review"]) == (1, 1, 1)
+
+    conn = sqlite3.connect(leads_db)
+    assert [row[0] for row in conn.execute("SELECT email FROM leads ORDER BY id")] == \
+        ["anna@schmidt-hh.de", "a.schmidt@schmidt-muc.de"]
+    assert conn.execute("SELECT lead_id, candidate_id, reason FROM lead_review").fetchall() == \
+        [(3, 2, "domain_conflict")]
+    conn.close()
+
+
+def test_batch_merges_same_domain(leads_db):
+    insert(leads_db, [("Müller StB", "Anna Müller", "anna@mueller-stb.de", 60),
+                      ("Steuerkanzlei Müller", "Peter Müller", "info@mueller-stb.de", 90)])
+    assert LeadDeduplicator(leads_db).run_batch()["merged"] == 1
+
+    conn = sqlite3.connect(leads_db)
+    assert conn.execute("SELECT id, score, status FROM leads").fetchall() == [(2, 90, "heiss")]
+    assert conn.execute("SELECT kontakt, merged_id FROM lead_contacts").fetchall() == [("Anna Müller", 1)]
+    conn.close()
+
+
+def test_merge_across_company_domains_is_refused(leads_db):
+    insert(leads_db, [("Schmidt StB", "Anna Schmidt", "anna@schmidt-hh.de", 80)])
+    conn = sqlite3.connect(leads_db)
+    with pytest.raises(ValueError):
+        LeadDeduplicator(leads_db).merge_into(conn, 1, {"id": None, "email": "a@schmidt-muc.de"}, 1.0, "email")
+    conn.close()
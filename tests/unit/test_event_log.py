@@ -0,0 +1,38 @@
+"""
+Unit Tests für src/analytics/event_log: inkrementelles Lesen per Byte-Offset und Empfänger-Parsing
+"""
+from src.analytics.event_log import first_recipient, read_new_events
+
+
+def test_only_complete_lines_are_read(tmp_path):
+    log = tmp_path / "email_events.csv"
+    log.write_text("timestamp,event_type,to\n"
+                   "2026-10-19T09:05:00,email.delivered,a@kanzlei-ä.de\n"
+                   "2026-10-19T09:06:00,email.opened,a@kanz", encoding="utf-8")
+    events, offset = read_new_events(str(log))
+    assert events == [{"timestamp": "2026-10-19T09:05:00", "event_type": "email.delivered", "to": "a@kanzlei-ä.de"}]
+
+    with log.open("a", encoding="utf-8") as f:
+        f.write("lei-a.de\n")
+    events, offset = read_new_events(str(log), offset)
+    assert [e["to"] for e in events] == ["a@kanzlei-a.de"]
+    assert read_new_events(str(log), offset) == ([], offset)
+
+
+def test_rotated_missing_and_empty_logs(tmp_path):
+    log = tmp_path / "email_events.csv"
+    assert read_new_events(str(log), 500) == ([], 0)
+    log.write_text("", encoding="utf-8")
+    assert read_new_events(str(log), 0) == ([], 0)
+
+    log.write_text("timestamp,event_type,to\n2026-10-19T09:05:00,email.delivered,b@kanzlei-b.de\n", encoding="utf-8")
+    events, offset = read_new_events(str(log), 10_000)          # Offset hinter Dateiende → von vorn
+    assert [e["to"] for e in events] == ["b@kanzlei-b.de"]
+    assert offset == log.stat().st_size
+
+
+def test_first_recipient():
+    assert first_recipient(["A@Kanzlei.de", "b@kanzlei.de"]) == "a@kanzlei.de"
+    assert first_recipient("['a@kanzlei.de', 'b@kanzlei.de']") == "a@kanzlei.de"
+    assert first_recipient("a@kanzlei.de") == "a@kanzlei.de"
+    assert first_recipient([]) is None and first_recipient("") is None
@@ -0,0 +1,71 @@
+"""
+Unit Tests für src/lead_generation/hunter_client gegen den lokalen Stand-in (LocalHunterStub)
+"""
+import time
+from email.utils import formatdate
+
+import pytest
+
+from src.lead_generation.hunter_client import (HunterCache, HunterClient, HunterError, leads_from_domain_result,
+                                               normalize_domain)
+from tests.stubs import LocalHunterStub
+
+DOMAINS = [f"kanzlei{i}.de" for i in range(12)]
+
+
+def client_for(stub, tmp_path, **kwargs):
+    return HunterClient(api_key="stub", base_url=stub.url, cache=HunterCache(str(tmp_path / "hunter_cache.db")),
+                        rate_per_second=200, **kwargs)
+
+
+def test_bulk_search_survives_rate_limits_and_caches(tmp_path):
+    with LocalHunterStub(rate_limit_every=5, retry_after=0.05) as stub:
+        client = client_for(stub, tmp_path)
+        results = client.bulk_domain_search(DOMAINS + ["https://www.Kanzlei0.de/impressum"])
+        assert set(results) == set(DOMAINS)
+        assert all(len(data["emails"]) == 2 for data in results.values())
+        assert client.stats["rate_limited"] >= 2
+        assert client.stats["requests"] == len(stub.calls)
+        assert client.credits_available == 100 - len(DOMAINS)
+
+        calls = len(stub.calls)
+        again = client.bulk_domain_search(DOMAINS)
+        assert again == results
+        assert client.stats["cache_hits"] == len(DOMAINS)
+        assert len(stub.calls) == calls
+
+
+def test_retry_after_as_http_date(tmp_path):
+    with LocalHunterStub(rate_limit_every=1, retry_after=formatdate(time.time(), usegmt=True)) as stub:
+        client = client_for(stub, tmp_path, max_retries=2)
+        with pytest.raises(HunterError) as error:
+            client.domain_search("kanzlei-a.de")
+    assert error.value.status == 429
+    assert client.stats["rate_limited"] == 3
+
+
+def test_http_errors_carry_the_status(tmp_path):
+    with LocalHunterStub() as stub:
+        client = client_for(stub, tmp_path)
+        with pytest.raises(HunterError) as error:
+            client.domain_search("localhost")
+    assert error.value.status == 400
+    assert "Invalid domain" in str(error.value)
+
+
+def test_bulk_search_stops_before_the_credit_reserve(tmp_path):
+    with LocalHunterStub(credits=8) as stub:
+        results = client_for(stub, tmp_path, max_workers=1, credit_reserve=5).bulk_domain_search(DOMAINS[:6])
+    found = [domain for domain, data in results.items() if "error" not in data]
+    assert found == DOMAINS[:3]
+    assert stub.calls.count("domain-search") == 3
+
+
+def test_leads_from_domain_result():
+    data = {"organization": "Kanzlei Müller", "emails": [{"value": "m.mueller@mueller-stb.de", "first_name": "Max",
+                                                          "last_name": "Müller", "position": "Steuerberater"},
+                                                         {"value": None}]}
+    assert leads_from_domain_result("mueller-stb.de", data) == [{
+        "unternehmen": "Kanzlei Müller", "kontakt": "Max Müller", "position": "Steuerberater",
+        "email": "m.mueller@mueller-stb.de", "branche": "Steuerberatung", "score": 50}]
+    assert normalize_domain("https://www.StbStaat.de/impressum") == "stbstaat.de"
@@ -0,0 +1,75 @@
+"""
+Unit Tests für src/analytics/metrics: Registry, Prometheus-Textformat, MeteredConnection und /metrics
+"""
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.analytics.metrics import (CONTENT_TYPE, DB_QUERY, Counter, Histogram, MeteredConnection, Registry,
+                                   start_metrics_server)
+
+
+def test_registry_rejects_duplicate_names():
+    registry = Registry()
+    Counter("sbs_test_total", "Test", registry=registry)
+    with pytest.raises(ValueError):
+        Counter("sbs_test_total", "Test", registry=registry)
+
+
+def test_counter_exposition_with_escaped_labels():
+    registry = Registry()
+    counter = Counter("sbs_test_total", "Test-Zähler", ["provider", "outcome"], registry=registry)
+    counter.labels(provider="resend", outcome="sent").inc()
+    counter.labels(provider="resend", outcome="sent").inc(2)
+    counter.labels(provider='smtp "alt"', outcome="fail\n").inc(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP sbs_test_total Test-Zähler",
+        "# TYPE sbs_test_total counter",
+        'sbs_test_total{provider="resend",outcome="sent"} 3',
+        'sbs_test_total{provider="smtp \\"alt\\"",outcome="fail\\n"} 0.5',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = Histogram("sbs_test_seconds", "Test-Latenz", buckets=(1, 0.1), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+
+    assert registry.render().splitlines()[2:] == [
+        'sbs_test_seconds_bucket{le="0.1"} 2',
+        'sbs_test_seconds_bucket{le="1"} 3',
+        'sbs_test_seconds_bucket{le="+Inf"} 4',
+        "sbs_test_seconds_sum 3.65",
+        "sbs_test_seconds_count 4",
+    ]
+
+
+def test_metered_connection_observes_queries(tmp_path):
+    child = DB_QUERY.labels(db="metered", operation="select")
+    before = sum(child.counts)
+    conn = MeteredConnection(str(tmp_path / "metered.db"))
+    conn.execute("SELECT 1").fetchone()
+    conn.cursor().execute("  select 2").fetchone()
+    conn.close()
+    assert sum(child.counts) == before + 2
+
+
+def test_metrics_server_binds_localhost_and_serves_registry():
+    registry = Registry()
+    Counter("sbs_test_total", "Test", registry=registry).inc()
+    server = start_metrics_server(0, registry=registry)
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics?x=1", timeout=5) as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert "sbs_test_total 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5)
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
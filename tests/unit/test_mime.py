@@ -0,0 +1,35 @@
+"""
+Unit Tests für src/delivery/mime: CRLF-/ASCII-sichere MIME-Bytes für SMTP
+"""
+import base64
+import email
+from email import policy
+
+import pytest
+
+from src.delivery.mime import MessageAssembler, ascii_address, message_id_of
+
+def test_render_produces_crlf_ascii_bytes():
+    assembler = MessageAssembler("Jörg Müller", "info@sbs-deutschland.de")
+    subject = "Digitalisierung für Steuerberater – Fördermittel prüfen " * 3
+    message = assembler.render("info@müller-stb.de", subject, "Hallo\nWelt", "<id-1@sbs-deutschland.de>",
+                               {"List-Unsubscribe": "<https://sbs.de/u?t=1>"})
+
+    message.decode("ascii")
+    assert b"\n" not in message.replace(b"\r\n", b"")
+    parsed = email.message_from_bytes(message, policy=policy.default)
+    assert parsed["To"] == "info@xn--mller-stb-q9a.de"
+    assert parsed["Subject"] == subject
+    assert parsed["From"].addresses[0].display_name == "Jörg Müller"
+    assert parsed["List-Unsubscribe"] == "<https://sbs.de/u?t=1>"
+    assert message_id_of(message) == "<id-1@sbs-deutschland.de>"
+
+    plain, html = parsed.get_payload()
+    assert base64.b64decode(plain.get_payload()).decode("utf-8") == "Hallo\nWelt"
+    assert html.get_content() == "Hallo<br>Welt"
+
+
+def test_ascii_address_rejects_non_ascii_local_part():
+    assert ascii_address("max@kanzlei.de") == "max@kanzlei.de"
+    with pytest.raises(UnicodeEncodeError):
+        ascii_address("jörg@kanzlei.de")
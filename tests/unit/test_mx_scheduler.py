@@ -0,0 +1,57 @@
+"""
+Unit Tests für src/delivery/mx_scheduler gegen den lokalen DNS-Ersatz (LocalResolverStub)
+"""
+import time
+
+import pytest
+
+from src.delivery.mx_scheduler import LocalResolverStub, MXResolver, MXScheduler
+
+RECORDS = {
+    "kanzlei-a.de": ["smtpin.rzone.de"],
+    "kanzlei-b.de": ["smtpin.rzone.de"],
+    "stb-c.de": ["mx00.kundenserver.de", "mx01.kundenserver.de"],
+    "eigene-d.de": ["mail.eigene-d.de"],
+}
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    return MXResolver(LocalResolverStub(RECORDS), db_path=str(tmp_path / "mx_cache.db"))
+
+
+def test_resolver_maps_hosts_to_providers_and_caches(resolver, tmp_path):
+    assert resolver.provider("info@kanzlei-a.de") == "strato"
+    assert resolver.provider("stb-c.de") == "ionos"
+    assert resolver.provider("x@eigene-d.de") == "eigene-d.de"
+    assert resolver.provider("x@unbekannt.de") == "unbekannt.de"   # kein MX → Domain selbst
+
+    stub = LocalResolverStub(RECORDS)
+    cached = MXResolver(stub, db_path=str(tmp_path / "mx_cache.db"))
+    assert cached.provider("kanzlei-b.de") == "strato"
+    assert cached.provider("kanzlei-a.de") == "strato"
+    assert stub.lookups == ["kanzlei-b.de"]   # kanzlei-a.de kommt aus dem SQLite-Cache
+
+
+def test_plan_interleaves_providers(resolver):
+    scheduler = MXScheduler(resolver)
+    items = [{"email": e} for e in ("1@kanzlei-a.de", "2@kanzlei-b.de", "3@kanzlei-a.de", "4@stb-c.de")]
+    assert [item["email"] for item in scheduler.plan(items)] == \
+        ["1@kanzlei-a.de", "4@stb-c.de", "2@kanzlei-b.de", "3@kanzlei-a.de"]
+
+
+def test_schedule_waits_only_for_the_busy_provider(resolver):
+    waits = []
+    scheduler = MXScheduler(resolver, limits={"strato": 20}, sleep=waits.append)
+    items = [{"email": e} for e in ("1@kanzlei-a.de", "2@kanzlei-b.de", "3@eigene-d.de")]
+    order = [item["email"] for item in scheduler.schedule(items)]
+
+    assert order == ["1@kanzlei-a.de", "3@eigene-d.de", "2@kanzlei-b.de"]
+    assert len(waits) == 1 and 2.5 < waits[0] <= 3.0   # 20/min → 3 s Abstand bei Strato
+
+
+def test_throttle_pauses_one_provider(resolver):
+    scheduler = MXScheduler(resolver)
+    scheduler.throttle("x@kanzlei-a.de", seconds=60)
+    assert scheduler.next_at["strato"] - time.monotonic() > 55
+    assert "eigene-d.de" not in scheduler.next_at
@@ -0,0 +1,63 @@
+"""
+Unit Tests für src/content_automation/near_duplicates und den Duplicate-Check in generate_ai_email
+"""
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from automated_email_sender import SBSEmailAutomation
+from src.content_automation.near_duplicates import NearDuplicateIndex
+
+POST = ("Die E-Rechnungspflicht kommt 2025 für alle Kanzleien. Mit SBS Nexus und DATEV Unternehmen online "
+        "verarbeiten Steuerberater eingehende Rechnungen automatisch und sparen pro Mandant Stunden im Monat.")
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return NearDuplicateIndex(str(tmp_path / "similarity.db"))
+
+
+def test_near_duplicate_is_found_per_kind(index):
+    assert index.add("generated_content", "post_1.md", POST, kind="post")
+    assert not index.add("generated_content", "post_1.md", POST, kind="post")
+
+    duplicate = index.check(POST.replace("Stunden", "viele Stunden"), kind="post")
+    assert (duplicate["source"], duplicate["key"]) == ("generated_content", "post_1.md")
+    assert duplicate["similarity"] >= 0.8
+    assert index.check(POST, kind="email") is None
+    assert index.check("Einladung zum Mandantenabend am Freitag in Hamburg", kind="post") is None
+
+
+def test_sync_picks_up_generated_content_once(index, tmp_path):
+    content = tmp_path / "generated_content"
+    content.mkdir()
+    (content / "post_2.md").write_text(f"# Post\n\n{POST}\n", encoding="utf-8")
+    assert index.sync(content_dir=str(content)) == 1
+    assert index.sync(content_dir=str(content)) == 0
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+def test_index_errors_do_not_trigger_template_fallback(monkeypatch):
+    class BrokenIndex:
+        def check(self, text, kind="post"):
+            raise OSError("database is locked")
+
+        def add(self, *args, **kwargs):
+            raise OSError("database is locked")
+
+    automation = SBSEmailAutomation.__new__(SBSEmailAutomation)
+    automation.sender_name, automation.sender_title = "Luis Orozco", "Gründer & CEO"
+    automation.campaign_id = "c1"
+    automation.duplicate_index = BrokenIndex()
+    automation.duplicate_flags = {}
+    replies = iter([completion("Hallo Frau Müller, ..."), completion('"Ihre Kanzlei und die E-Rechnung"')])
+    monkeypatch.setattr(openai.chat.completions, "create", lambda **kwargs: next(replies))
+
+    subject, body = automation.generate_ai_email({"email": "info@kanzlei-a.de", "company_name": "Kanzlei A"})
+    assert (subject, body) == ("Ihre Kanzlei und die E-Rechnung", "Hallo Frau Müller, ...")
+    assert automation.duplicate_flags == {}
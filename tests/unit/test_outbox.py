@@ -0,0 +1,55 @@
+"""
+Unit Tests für src/delivery/outbox: atomare Claims pro Shard, Leases und not_before
+"""
+import time
+
+import pytest
+
+from src.delivery.outbox import Outbox, shard_key
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.enqueue("c1", [{"email": f"k{i}@kanzlei{i % 3}.de"} for i in range(9)])
+    return outbox
+
+
+def test_claim_is_exclusive(outbox):
+    first = outbox.claim("c1", 0, 1, "w1", limit=5)
+    second = outbox.claim("c1", 0, 1, "w2", limit=5)
+
+    assert len(first) == 5 and len(second) == 4
+    assert not {c["email"] for c in first} & {c["email"] for c in second}
+    assert outbox.claim("c1", 0, 1, "w3") == []
+    assert outbox.stats("c1") == {"sending": 9}
+
+
+def test_claim_respects_shards(outbox):
+    claimed = [outbox.claim("c1", shard, 2, f"w{shard}") for shard in (0, 1)]
+
+    assert sum(map(len, claimed)) == 9
+    for shard, items in enumerate(claimed):
+        assert all(shard_key(item["email"]) % 2 == shard for item in items)
+
+
+def test_claim_reclaims_expired_leases_and_waits_for_not_before(outbox):
+    outbox.enqueue("c2", [{"email": "spaeter@kanzlei.de"}], not_before=time.time() + 3600)
+    assert outbox.claim("c2", 0, 1, "w1") == []
+    assert outbox.due_campaigns() == []
+    assert outbox.due_campaigns(now=time.time() + 7200) == ["c2"]
+
+    outbox.claim("c1", 0, 1, "w1", limit=9)
+    assert outbox.claim("c1", 0, 1, "w2", lease=600) == []
+    assert len(outbox.claim("c1", 0, 1, "w2", lease=-1)) == 9   # Lease abgelaufen → neu vergeben
+
+
+def test_candidate_lookups_only_report_given_emails(outbox):
+    outbox.mark("c1", "k0@kanzlei0.de", "dead", error="550")
+    outbox.mark("c1", "k1@kanzlei1.de", "deferred")
+    outbox.schedule("c1", {"k2@kanzlei2.de": time.time() + 600, "k3@kanzlei0.de": time.time() + 600})
+    candidates = [f"k{i}@kanzlei{i % 3}.de" for i in range(3)] * 400   # mehrere IN-Chunks, doppelte Adressen
+
+    assert outbox.undeliverable_emails(candidates) == {"k0@kanzlei0.de", "k1@kanzlei1.de"}
+    assert outbox.scheduled_emails(candidates) == {"k2@kanzlei2.de"}
+    assert outbox.scheduled_emails([]) == set()
@@ -0,0 +1,69 @@
+"""
+Unit Tests für backend/pagination und die Keyset-Seiten von LeadService (inkl. NULL-Sortierwerten)
+"""
+import sqlite3
+
+import pytest
+
+from backend.lead_service import LEAD_ORDER, LeadService
+from backend.pagination import build_query, encode_cursor, keyset_condition
+
+ROWS = [
+    # (unternehmen, score, timestamp, status)
+    ("Kanzlei A", 90, "2026-10-01 10:00:00", "heiss"),
+    ("Kanzlei B", 90, None, "heiss"),
+    ("Kanzlei C", 70, "2026-10-02 10:00:00", "warm"),
+    ("Kanzlei D", None, "2026-10-03 10:00:00", "kalt"),
+    ("Kanzlei E", 70, "2026-10-02 10:00:00", "warm"),
+    ("Kanzlei F", None, None, "kalt"),
+    ("Kanzlei G", 10, "2026-09-30 10:00:00", "kalt"),
+]
+
+
+@pytest.fixture
+def leads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = LeadService()
+    conn = sqlite3.connect(service.db_path)
+    conn.executemany("INSERT INTO leads (unternehmen, kontakt, email, score, timestamp, status) "
+                     "VALUES (?, '', '', ?, ?, ?)", ROWS)
+    conn.commit()
+    conn.close()
+    return service
+
+
+def walk(service, limit, **filters):
+    names, after = [], None
+    while True:
+        result = service.get_leads_page(limit=limit, after=after, **filters)
+        names += [lead["unternehmen"] for lead in result["items"]]
+        after = result["next_cursor"]
+        if not after:
+            return names
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_pages_cover_rows_with_null_sort_keys(leads, limit):
+    assert walk(leads, limit) == ["Kanzlei A", "Kanzlei B", "Kanzlei E", "Kanzlei C",
+                                  "Kanzlei G", "Kanzlei D", "Kanzlei F"]
+
+
+def test_filtered_pages(leads):
+    assert walk(leads, 1, status_filter=["🔵 Kalt"]) == ["Kanzlei G", "Kanzlei D", "Kanzlei F"]
+    assert walk(leads, 1, date_from="2026-10-02") == ["Kanzlei E", "Kanzlei C", "Kanzlei D"]
+
+
+def test_keyset_query_seeks_in_the_index(leads):
+    sql, params = keyset_condition(LEAD_ORDER, encode_cursor([70, "2026-10-02 10:00:00", 5]))
+    conn = sqlite3.connect(leads.db_path)
+    plan = conn.execute("EXPLAIN QUERY PLAN " + build_query("SELECT id FROM leads", [sql], LEAD_ORDER),
+                        (*params, 10)).fetchall()
+    conn.close()
+    assert "SEARCH" in plan[0][3] and "idx_leads_keyset" in plan[0][3]
+
+
+def test_cursor_must_match_the_sort_order():
+    with pytest.raises(ValueError):
+        keyset_condition(LEAD_ORDER, encode_cursor([1, 2]))
+    with pytest.raises(ValueError):
+        keyset_condition(LEAD_ORDER, "kein-cursor")
@@ -0,0 +1,93 @@
+"""
+Unit Tests für src/lead_generation/pipeline mit lokalen Fixtures (RecordSource)
+"""
+import json
+
+import pytest
+
+from src.lead_generation.pipeline import ICPScorer, LeadPipeline, LeadSource, RecordSource, normalize_record
+
+ICP = {
+    "lead_scoring": {"datev_uo_aktiv": 20, "region_heimatmarkt": 15, "groesse_10_plus": 10,
+                     "groesse_50_plus": 20, "thresholds": {"hot": 40, "warm": 20}},
+    "target_filters": {"regions": {"tier_1": ["Hamburg (inkl. Umland)"]}},
+    "exclusion_criteria": {"keywords": ["praktikant"], "company_types": ["insolvenzverwaltung"]},
+}
+
+RECORDS = [
+    {"company": "Kanzlei Nord StB", "name": "Anna Nord", "email": "anna@kanzlei-nord.de", "city": "Hamburg",
+     "employees": "11-50", "signals": "DATEV Unternehmen online; Mandantenportal"},
+    {"company": "Kanzlei Süd", "first_name": "Bernd", "last_name": "Süd", "email": "B.Sued@kanzlei-sued.de"},
+    {"company": "Kanzlei Nord StB", "name": "Anna Nord", "email": "ANNA@kanzlei-nord.de"},
+    {"company": "Ohne Email"},
+    {"company": "Kanzlei West", "name": "Carl West", "title": "Praktikant", "email": "carl@kanzlei-west.de"},
+]
+
+
+class FlakyLeadService:
+    """add_leads scheitert für jeden Batch, der eine 'boom'-Adresse enthält"""
+
+    def __init__(self):
+        self.saved = []
+
+    def add_leads(self, leads):
+        if any(lead["email"].startswith("boom") for lead in leads):
+            raise RuntimeError("database is locked")
+        self.saved += [lead["email"] for lead in leads]
+        return [{"success": True} for _ in leads]
+
+
+def test_lead_source_is_abstract():
+    with pytest.raises(TypeError):
+        LeadSource()
+
+    class NoFetch(LeadSource):
+        pass
+
+    with pytest.raises(TypeError):
+        NoFetch()
+
+
+def test_record_source_reads_list_and_jsonl(tmp_path):
+    path = tmp_path / "leads.jsonl"
+    path.write_text(json.dumps(RECORDS[0]) + "\n\n" + json.dumps(RECORDS[1]) + "\n", encoding="utf-8")
+    source = RecordSource(records=RECORDS[2:3], path=str(path))
+    assert source.name == "fixture:leads.jsonl"
+    assert [r["company"] for r in source.fetch()] == ["Kanzlei Nord StB", "Kanzlei Nord StB", "Kanzlei Süd"]
+
+
+def test_normalize_record_maps_aliases():
+    lead = normalize_record(RECORDS[1], "fixture")
+    assert (lead["kontakt"], lead["email"], lead["branche"]) == \
+        ("Bernd Süd", "b.sued@kanzlei-sued.de", "Steuerberatung")
+    assert normalize_record(RECORDS[3]) is None
+
+
+def test_dry_run_scores_fixture_leads():
+    pipeline = LeadPipeline([RecordSource(RECORDS)], scorer=ICPScorer(ICP), dry_run=True, batch_size=2)
+    stats = pipeline.run()
+    assert {k: stats[k] for k in ("fetched", "invalid", "duplicates", "excluded", "errors")} == \
+        {"fetched": 5, "invalid": 1, "duplicates": 1, "excluded": 1, "errors": 0}
+
+    top = pipeline.top_leads()
+    assert [lead["email"] for lead in top] == ["anna@kanzlei-nord.de", "b.sued@kanzlei-sued.de"]
+    assert sorted(top[0]["icp_criteria"]) == ["datev_uo_aktiv", "groesse_10_plus", "region_heimatmarkt"]
+    assert (top[0]["icp_points"], top[0]["score"]) == (45, 87)   # hot ab 40 → 80 + 20 · 5/15
+
+
+def test_failed_batch_is_retried_per_lead_and_dead_lettered(tmp_path):
+    records = [{"company": f"Kanzlei {i}", "name": f"Person {i}", "email": f"{'boom' if i == 3 else 'p'}{i}@k{i}.de"}
+               for i in range(6)]
+    service = FlakyLeadService()
+    dead_letters = tmp_path / "dead.jsonl"
+    pipeline = LeadPipeline([RecordSource(records)], scorer=ICPScorer(ICP), lead_service=service,
+                            batch_size=10, dead_letter_path=str(dead_letters))
+    stats = pipeline.run()
+
+    assert sorted(service.saved) == ["p0@k0.de", "p1@k1.de", "p2@k2.de", "p4@k4.de", "p5@k5.de"]
+    assert (stats["added"], stats["errors"], stats["dead_letters"]) == (5, 1, 1)
+    assert "boom3@k3.de" not in [lead["email"] for lead in pipeline.top_leads()]
+
+    (letter,) = RecordSource(path=str(dead_letters)).fetch()
+    assert (letter["email"], letter["dead_letter_stage"]) == ("boom3@k3.de", "_persist")
+    assert normalize_record(letter)["unternehmen"] == "Kanzlei 3"
@@ -0,0 +1,115 @@
+"""
+Unit Tests für src/delivery/policy: Fehlerklassen, Retry-After, Backoff und Dead-Letter-Grenzen
+"""
+import smtplib
+import socket
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from src.delivery.policy import PERMANENT, THROTTLED, TRANSIENT, RetryPolicy, classify, parse_retry_after
+
+
+class ProviderError(Exception):
+    """Wie resend.exceptions.ResendError: Status in code, Header optional"""
+
+    def __init__(self, code, headers=None):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+        self.headers = headers or {}
+
+
+def http_error(status: int, retry_after=None) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(retry_after)
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (smtplib.SMTPRecipientsRefused({"a@kanzlei.de": (450, b"mailbox busy")}), (TRANSIENT, None)),
+    (smtplib.SMTPRecipientsRefused({"a@kanzlei.de": (550, b"no such user")}), (PERMANENT, None)),
+    (smtplib.SMTPAuthenticationError(535, b"auth failed"), (PERMANENT, None)),
+    (smtplib.SMTPResponseException(421, b"Too many connections, try again later"), (THROTTLED, None)),
+    (smtplib.SMTPResponseException(451, b"local error"), (TRANSIENT, None)),
+    (smtplib.SMTPResponseException(554, b"rejected"), (PERMANENT, None)),
+    (smtplib.SMTPServerDisconnected("weg"), (TRANSIENT, None)),
+    (socket.timeout("timeout"), (TRANSIENT, None)),
+    (http_error(429, 12), (THROTTLED, 12.0)),
+    (http_error(503), (TRANSIENT, None)),
+    (http_error(422), (PERMANENT, None)),
+    (http_error(408), (TRANSIENT, None)),
+    (ProviderError(429, {"retry-after": "3"}), (THROTTLED, 3.0)),
+    (ProviderError("500"), (TRANSIENT, None)),
+    (KeyError("email"), (PERMANENT, None)),
+    (RuntimeError("unbekannt"), (TRANSIENT, None)),
+])
+def test_classify(error, expected):
+    assert classify(error) == expected
+
+
+def test_parse_retry_after():
+    now = time.time()
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-5") == 0.0
+    assert 29 <= parse_retry_after(formatdate(now + 30, usegmt=True), now=now) <= 30
+    assert parse_retry_after(formatdate(now - 30, usegmt=True), now=now) == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("bald") is None
+
+
+def test_backoff_is_capped_and_respects_retry_after():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    assert all(0 <= policy.backoff(attempt) <= min(10, 2 ** attempt)
+               for attempt in range(1, 8) for _ in range(50))
+    assert policy.backoff(1, THROTTLED, retry_after=8) >= 8
+    assert policy.backoff(3, THROTTLED) >= 4                   # ohne Retry-After: mindestens halbe Stufe
+    assert policy.backoff(1, THROTTLED, retry_after=600) == 10
+
+
+def failing(*errors):
+    calls = []
+
+    def func():
+        calls.append(time.time())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    func.calls = calls
+    return func
+
+
+def test_execute_retries_inline_until_sent():
+    waits = []
+    policy = RetryPolicy(base_delay=0.01, sleep=waits.append)
+    result = policy.execute(failing(ConnectionError("reset"), http_error(503)))
+
+    assert (result["status"], result["result"], result["attempts"]) == ("sent", "ok", 3)
+    assert len(waits) == 2
+
+
+def test_permanent_errors_are_dead_lettered_at_once():
+    func = failing(http_error(422))
+    result = RetryPolicy(sleep=lambda s: None).execute(func)
+    assert (result["status"], result["kind"], result["attempts"]) == ("dead", PERMANENT, 1)
+    assert len(func.calls) == 1
+
+
+def test_attempt_budget_counts_earlier_attempts():
+    result = RetryPolicy(max_attempts=3, base_delay=0.01, sleep=lambda s: None).execute(
+        failing(*[ConnectionError("reset")] * 5), attempt=2)
+    assert (result["status"], result["attempts"]) == ("dead", 3)
+
+
+def test_long_waits_are_deferred_and_the_deadline_dead_letters():
+    policy = RetryPolicy(inline_max_delay=2, deadline=3600, sleep=lambda s: pytest.fail("kein Inline-Warten"))
+    deferred = policy.execute(failing(http_error(429, 60)))
+    assert deferred["status"] == "deferred" and deferred["kind"] == THROTTLED
+    assert 55 <= deferred["retry_at"] - time.time() <= 60
+
+    late = policy.execute(failing(http_error(429, 60)), attempt=1, first_attempt_at=time.time() - 3590)
+    assert late["status"] == "dead" and late["error"].startswith("Deadline überschritten")
+    assert late["first_attempt_at"] < time.time() - 3500
@@ -0,0 +1,83 @@
+"""
+Unit Tests für src/utils/profiling: Sampling-Profiler, Netzwerk-Stubs, Sandbox und Verlauf
+"""
+import json
+import os
+import smtplib
+import time
+
+import requests
+
+from src.utils.profiling import HISTORY_FILE, SamplingProfiler, format_summary, profile_run
+
+
+def busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(200))
+
+
+def test_sampling_profiler_collapses_stacks():
+    profiler = SamplingProfiler(interval=0.001).start()
+    busy(0.1)
+    profiler.stop()
+
+    assert profiler.samples > 10
+    lines = profiler.collapsed().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+    top = {entry["function"].split(" (")[0]: entry for entry in profiler.top(50)}
+    assert top["busy"]["total"] >= 0.8 * profiler.samples
+    assert all(entry["self"] <= entry["total"] for entry in top.values())
+
+
+def fake_campaign():
+    """Alles, was ein Kampagnenlauf nach außen tut – unter --profile gestubbt"""
+    time.sleep(3600)
+    with smtplib.SMTP("smtp.example.invalid", 587) as server:
+        server.login("user", "pass")
+    requests.Session().post("https://api.resend.com/emails/batch", data=json.dumps([{}, {}]))
+    os.makedirs("data", exist_ok=True)
+    with open("data/leads.csv", "a", encoding="utf-8") as f:
+        f.write("profil\n")
+    busy(0.02)
+
+
+def test_profile_run_stubs_network_and_isolates_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "leads.csv").write_text("email\n", encoding="utf-8")
+    out_dir = str(tmp_path / "profiles")
+
+    started = time.perf_counter()
+    summary = profile_run("fake", fake_campaign, out_dir=out_dir, top=5)
+
+    assert time.perf_counter() - started < 30
+    assert summary["error"] is None
+    assert summary["network_calls"] == {"resend_batch": 1}
+    assert (tmp_path / "data" / "leads.csv").read_text(encoding="utf-8") == "email\n"
+    assert os.path.exists(summary["collapsed"]) and os.path.exists(summary["report"])
+    assert "fake_campaign" in open(summary["collapsed"], encoding="utf-8").read()
+
+
+def test_profile_run_records_history_and_failures(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    out_dir = str(tmp_path / "profiles")
+
+    def broken():
+        raise RuntimeError("kaputt")
+
+    profile_run("job", lambda: busy(0.01), out_dir=out_dir, allocations=False)
+    failed = profile_run("job", broken, out_dir=out_dir, allocations=False)
+
+    assert failed["error"] == "RuntimeError: kaputt"
+    assert "✗ Lauf abgebrochen" in open(failed["report"], encoding="utf-8").read()
+    history = [json.loads(line) for line in open(os.path.join(out_dir, HISTORY_FILE), encoding="utf-8")]
+    assert [record["error"] for record in history] == [None, "RuntimeError: kaputt"]
+
+
+def test_summary_flags_wall_time_regressions():
+    summary = {"name": "job", "wall_s": 1.5, "samples": 10, "peak_alloc_kb": 1.0}
+    previous = {"timestamp": "2026-10-01T10:00:00", "wall_s": 1.0}
+    assert "⚠️ vs. 2026-10-01T10:00: 1.000s (+50%)" in format_summary(summary, [], [], previous)
+    assert "⚠️" not in format_summary({**summary, "wall_s": 1.1}, [], [], previous)
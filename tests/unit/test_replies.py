@@ -0,0 +1,74 @@
+"""
+Unit Tests für src/delivery/replies: IMAP-Poll, UID-High-Water-Mark, Auto-Replies
+"""
+import pytest
+
+from src.delivery.replies import LocalIMAPStub, ReplyPoller, ReplyTracker, is_auto_reply
+
+
+def reply(sender: str, in_reply_to: str = "", subject: str = "Re: Ihre Kanzlei") -> bytes:
+    return (f"From: {sender}\r\nSubject: {subject}\r\nIn-Reply-To: {in_reply_to}\r\n"
+            f"Message-ID: <r-{sender}>\r\n\r\nDanke").encode()
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = ReplyTracker(str(tmp_path / "replies.db"))
+    tracker.record_sent("<m1@sbs.de>", "kanzlei1@example.de", "test")
+    tracker.record_sent("<m2@sbs.de>", "kanzlei2@example.de", "test")
+    return tracker
+
+
+def test_poll_stops_follow_ups_and_skips_auto_replies(tracker):
+    with LocalIMAPStub() as stub:
+        stub.deliver(reply("kanzlei1@example.de", "<m1@sbs.de>"))
+        stub.deliver(reply("kanzlei2@example.de", subject="Automatische Antwort: Urlaub"))
+        poller = ReplyPoller("127.0.0.1", stub.port, "u", "p", use_ssl=False, tracker=tracker)
+        stats = poller.poll()
+        poller.close()
+
+    assert stats == {"fetched": 2, "replies": 1, "auto_replies": 1}
+    assert tracker.stopped() == {"kanzlei1@example.de"}
+
+
+def test_poll_fetches_only_new_uids(tracker):
+    with LocalIMAPStub() as stub:
+        stub.deliver(reply("kanzlei1@example.de", "<m1@sbs.de>"))
+        poller = ReplyPoller("127.0.0.1", stub.port, "u", "p", use_ssl=False, tracker=tracker)
+        poller.poll()
+        assert poller.poll()["fetched"] == 0      # '*' liefert die letzte UID erneut → ignoriert
+        stub.deliver(reply("kanzlei2@example.de"))  # Zuordnung über Absenderadresse
+        assert poller.poll() == {"fetched": 1, "replies": 1, "auto_replies": 0}
+        poller.close()
+
+    assert stub.fetched_uids == [1, 2]
+    assert tracker.mailbox_state("INBOX") == (1, 2)
+
+
+def test_poll_rescans_after_uidvalidity_change(tracker):
+    with LocalIMAPStub() as stub:
+        stub.deliver(reply("kanzlei1@example.de", "<m1@sbs.de>"))
+        poller = ReplyPoller("127.0.0.1", stub.port, "u", "p", use_ssl=False, tracker=tracker)
+        poller.poll()
+        stub.renumber()
+        assert poller.poll()["fetched"] == 1
+        poller.close()
+
+    assert tracker.mailbox_state("INBOX") == (2, 1)
+
+
+@pytest.mark.parametrize("headers, auto", [
+    ({"Subject": "Re: Ihre Kanzlei"}, False),
+    ({"Subject": "Abwesenheitsnotiz: bis 3.11."}, True),
+    ({"Subject": "Re: Termin", "Auto-Submitted": "auto-replied"}, True),
+    ({"Subject": "Re: Termin", "Auto-Submitted": "no"}, False),
+    ({"Subject": "Re: Termin", "X-Autoreply": "yes"}, True),
+])
+def test_is_auto_reply(headers, auto):
+    assert is_auto_reply(headers) is auto
+
+
+def test_manual_stop_is_kept(tracker):
+    tracker.stop("Kanzlei1@example.de")
+    tracker.stop("kanzlei1@example.de", "reply", "<r@x>")  # bereits gestoppt → Grund bleibt
+    assert tracker.stopped(["KANZLEI1@example.de", "kanzlei2@example.de"]) == {"KANZLEI1@example.de"}
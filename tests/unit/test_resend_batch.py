@@ -0,0 +1,60 @@
+"""
+Unit Tests für src/delivery/resend_batch gegen den lokalen Resend-Ersatz (LocalResendStub)
+"""
+import time
+from email.utils import formatdate
+
+from src.delivery.resend_batch import ResendBatchTransport
+from tests.stubs import LocalResendStub
+
+
+def messages(recipients):
+    return [{"from": "SBS <ki@sbs.de>", "to": [to], "subject": "Test", "html": "Hallo"} for to in recipients]
+
+
+def test_batch_maps_results_back_by_index():
+    recipients = ["a@example.de", "invalid@example.de", "flaky@example.de", "b@example.de"]
+    with LocalResendStub() as stub:
+        transport = ResendBatchTransport(api_key="re_test", base_url=stub.url, backoff=0.01)
+        results = transport.send(messages(recipients))
+
+    assert [r["email"] for r in results] == recipients
+    assert [bool(r["id"]) for r in results] == [True, False, True, True]
+    assert results[1]["retryable"] is False and results[1]["attempts"] == 1
+    assert results[2]["attempts"] == 2                    # nur der vorübergehende Fehler wird wiederholt
+    assert stub.requests == [4, 1]
+    assert sorted(stub.delivered) == ["a@example.de", "b@example.de", "flaky@example.de"]
+
+
+def test_batch_splits_and_retries_rate_limited_batches_without_duplicates():
+    recipients = [f"kanzlei{i}@example.de" for i in range(150)]
+    with LocalResendStub(rate_limit_every=2, retry_after=0.01) as stub:
+        transport = ResendBatchTransport(api_key="re_test", base_url=stub.url, backoff=0.01)
+        results = transport.send(messages(recipients))
+
+    assert all(r["id"] for r in results)
+    assert stub.requests[:2] == [100, 50]
+    assert transport.stats["rate_limited"] == 1
+    assert sorted(stub.delivered) == sorted(recipients)
+
+
+def test_rate_limit_waits_for_retry_after_instead_of_backoff():
+    waits = []
+    with LocalResendStub(rate_limit_every=1, retry_after=7) as stub:
+        transport = ResendBatchTransport(api_key="re_test", base_url=stub.url, backoff=30, max_retries=2,
+                                         sleep=waits.append)
+        results = transport.send(messages(["a@example.de"]))
+
+    assert waits == [7.0, 7.0]                            # kein zusätzliches Backoff von 30/60 s
+    assert results[0]["error"] == "Rate Limit (429)" and results[0]["attempts"] == 3
+
+
+def test_rate_limit_accepts_http_date_and_falls_back_to_backoff():
+    waits = []
+    with LocalResendStub(rate_limit_every=2, retry_after=formatdate(time.time() + 5, usegmt=True)) as stub:
+        transport = ResendBatchTransport(api_key="re_test", base_url=stub.url, backoff=0.5, sleep=waits.append)
+        results = transport.send(messages(["a@example.de", "flaky@example.de"]))
+
+    # 1. Request: flaky scheitert vorübergehend → Backoff; 2. Request: 429 mit Datum → ~5 s
+    assert waits[0] == 0.5 and 3 < waits[1] <= 5
+    assert all(r["id"] for r in results)
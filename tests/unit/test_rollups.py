@@ -0,0 +1,64 @@
+"""
+Unit Tests für src/analytics/rollups: Versand-Batches, Retry-Umbuchung, Event-Log
+"""
+import pytest
+
+from src.analytics.rollups import CampaignRollups
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    return CampaignRollups(str(tmp_path / "analytics.db"))
+
+
+def batch(timestamp, *details):
+    return {"campaign": "c1", "timestamp": timestamp, "details": list(details)}
+
+
+def test_send_batch_is_applied_once(rollups):
+    results = batch("2026-10-19T09:00:00",
+                    {"email": "a@kanzlei-a.de", "company": "Kanzlei A", "status": "sent",
+                     "timestamp": "2026-10-19T09:00:01", "template": "t1"},
+                    {"email": "b@kanzlei-b.de", "company": "Kanzlei B", "status": "failed",
+                     "timestamp": "2026-10-19T09:00:02", "template": "t1"})
+    assert rollups.apply_send_batch(results) == 2
+    assert rollups.apply_send_batch(results) == 0
+    assert rollups.totals() == {"sent": 1, "failed": 1}
+
+
+def test_retry_rebooks_the_failure_in_its_original_bucket(rollups):
+    rollups.apply_send_batch(batch("2026-10-19T09:59:59",
+                                   {"email": "b@kanzlei-b.de", "company": "Kanzlei B", "status": "failed",
+                                    "timestamp": "2026-10-19T09:59:59", "template": "t1"}))
+    # first_attempt_at des Versands lag vor der Stundengrenze, die Buchung danach → retried_from weicht ab
+    rollups.apply_send_batch(batch("2026-10-19T11:30:00",
+                                   {"email": "b@kanzlei-b.de", "company": "Kanzlei B", "status": "sent",
+                                    "timestamp": "2026-10-19T11:30:00", "retried_from": "2026-10-19T10:00:03"}))
+
+    assert rollups.hourly() == [("2026-10-19 09:00", "failed", 0), ("2026-10-19 09:00", "sent", 1)]
+    assert rollups.by_template() == [("t1", "failed", 0), ("t1", "sent", 1)]
+
+
+def test_retry_without_recorded_failure_uses_retried_from(rollups):
+    rollups.apply_send_batch(batch("2026-10-19T11:30:00",
+                                   {"email": "c@kanzlei-c.de", "status": "sent", "timestamp": "2026-10-19T11:30:00",
+                                    "retried_from": "2026-10-19T10:15:00"}))
+    assert ("2026-10-19 10:00", "sent", 1) in rollups.hourly()
+
+
+def test_event_log_is_read_incrementally(rollups, tmp_path):
+    rollups.apply_send_batch(batch("2026-10-19T09:00:00",
+                                   {"email": "a@kanzlei-a.de", "status": "sent",
+                                    "timestamp": "2026-10-19T09:00:01", "template": "t1"}))
+    log = tmp_path / "email_events.csv"
+    log.write_text("timestamp,event_type,to\n"
+                   "2026-10-19T09:05:00,email.delivered,['a@kanzlei-a.de']\n"
+                   "2026-10-19T09:06:00,email.opened,a@kanzlei-a.de\n"
+                   "2026-10-19T09:07:00,email.clicked,a@kanz", encoding="utf-8")
+    assert rollups.sync_event_log(str(log)) == 2
+    with log.open("a", encoding="utf-8") as f:
+        f.write("lei-a.de\n")
+    assert rollups.sync_event_log(str(log)) == 1
+    assert rollups.sync_event_log(str(log)) == 0
+    assert rollups.by_template() == [("t1", "clicked", 1), ("t1", "delivered", 1), ("t1", "opened", 1),
+                                     ("t1", "sent", 1)]
@@ -0,0 +1,30 @@
+"""
+Unit Tests für backend/search_service: Freitext → FTS5-Query
+"""
+import sqlite3
+
+import pytest
+
+from backend.search_service import to_match_query
+
+
+@pytest.mark.parametrize("text, query", [
+    ("datev", '"datev"*'),
+    ("KI Steuerberater", '"KI"* "Steuerberater"*'),
+    ('"digitale Kanzlei" münchen', '"digitale Kanzlei" "münchen"*'),
+    ("(foo OR bar)", '"foo"* "OR"* "bar"*'),
+    ("c++ ^col:x", '"c"* "col"* "x"*'),
+    ('"" *', ""),
+])
+def test_to_match_query(text, query):
+    assert to_match_query(text) == query
+
+
+@pytest.mark.parametrize("text", ["AND", "NEAR(a b)", 'kanzlei "offen', "müller-stb:*", "x -y"])
+def test_queries_never_raise_fts5_syntax_errors(text):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE VIRTUAL TABLE docs USING fts5(body)")
+    conn.execute("INSERT INTO docs VALUES ('Kanzlei Müller-StB AND near offen')")
+    query = to_match_query(text)
+    if query:
+        conn.execute("SELECT rowid FROM docs WHERE docs MATCH ?", (query,)).fetchall()
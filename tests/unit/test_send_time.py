@@ -0,0 +1,46 @@
+"""
+Unit Tests für src/analytics/send_time: Stunden-Cap im Versandplan inklusive bestehender Outbox-Buchungen
+"""
+from datetime import datetime
+
+import pytest
+
+from src.analytics.send_time import SendTimeEngine
+from src.delivery.outbox import Outbox
+
+NOW = datetime(2026, 10, 19, 7, 30)                     # Montag
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return SendTimeEngine(str(tmp_path / "send_time.db"), config={"max_per_hour": 2})
+
+
+def contacts(n, prefix="k"):
+    return [{"email": f"{prefix}{i}@kanzlei{i}.de", "segment": "steuer"} for i in range(n)]
+
+
+def test_plan_spreads_within_the_hourly_cap(engine):
+    plan = engine.plan(contacts(5), now=NOW)
+    per_hour = {}
+    for moment in plan.values():
+        per_hour[moment.replace(minute=0)] = per_hour.get(moment.replace(minute=0), 0) + 1
+    assert max(per_hour.values()) == 2
+    assert sorted(m.minute for m in plan.values() if m.hour == 9) == [0, 30]
+
+
+def test_plan_counts_bookings_of_earlier_campaigns(engine, tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    first = engine.plan(contacts(2, "alt"), now=NOW)
+    outbox.enqueue("c1", contacts(2, "alt"))
+    outbox.schedule("c1", {email: moment.timestamp() for email, moment in first.items()})
+    booked = outbox.booked_hours(since=NOW.timestamp())
+    assert sum(booked.values()) == 2
+
+    second = engine.plan(contacts(2, "neu"), now=NOW, booked=booked)
+    full_hour = next(iter(first.values())).replace(minute=0)
+    assert all(moment.replace(minute=0) != full_hour for moment in second.values())
+
+    # Eine halb gebuchte Stunde wird hinter der vorhandenen Buchung aufgefüllt
+    half = engine.plan(contacts(1, "x"), now=NOW, booked={int(full_hour.timestamp() // 3600): 1})
+    assert next(iter(half.values())) == full_hour.replace(minute=30)
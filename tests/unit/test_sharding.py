@@ -0,0 +1,112 @@
+"""
+Unit Tests für src/delivery/sharding: Claim-Schleife eines Shards, Fehlerpfade, Stunden-Cap und Prozess-Pool
+"""
+import multiprocessing
+
+import pytest
+
+from automated_email_sender import SBSEmailAutomation
+from src.delivery import sharding
+from src.delivery.mx_scheduler import LocalResolverStub, MXResolver, MXScheduler
+from src.delivery.outbox import Outbox
+from src.delivery.sharding import ShardedCampaign, send_shard
+
+
+class FakeAutomation:
+    """Versand-Ersatz: 'reset@' wirft einen Verbindungsfehler, alle anderen gehen raus"""
+
+    _record_result = SBSEmailAutomation._record_result
+
+    def __init__(self, outbox: Outbox):
+        self.outbox = outbox
+        self.campaign_id = "c1"
+        self.duplicate_flags = {}
+        self.last_outcome = None
+        self.last_message = None
+        self.sent = []
+
+    def suppress(self, contacts):
+        return contacts, []
+
+    def send_email(self, to_email, subject, body):
+        self.last_message = f"MIME {to_email}".encode()
+        if to_email.startswith("reset@"):
+            raise ConnectionError("Connection reset by peer")
+        self.sent.append(to_email)
+        self.last_outcome = {"status": "sent", "attempts": 1}
+
+
+class FakePlanner:
+    """Kontakte ohne Vorname lassen sich nicht rendern"""
+
+    def plan(self, contacts, drafts):
+        return self
+
+    def compose(self, contact):
+        return f"Hallo {contact['first_name']}", "Text", "t1"
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.enqueue("c1", [{"email": f"k{i}@kanzlei{i}.de", "first_name": "Max"} for i in range(4)]
+                   + [{"email": "reset@kanzlei-r.de", "first_name": "Max"}, {"email": "leer@kanzlei-l.de"}])
+    return outbox
+
+
+def run(outbox, tmp_path, **options):
+    mx = MXScheduler(MXResolver(LocalResolverStub({}), db_path=str(tmp_path / "mx_cache.db")))
+    automation = FakeAutomation(outbox)
+    options = {"campaign": "c1", "shard": 0, "shards": 1, "rate": 1000, "claim_size": 50, "lease": 600, **options}
+    return send_shard(options, outbox, automation, FakePlanner(), mx), automation
+
+
+def test_failing_rows_leave_sending_state(outbox, tmp_path):
+    results, automation = run(outbox, tmp_path)
+
+    assert (results["sent"], results["failed"], results["deferred"], results["total"]) == (4, 2, 1, 6)
+    assert outbox.stats("c1") == {"sent": 4, "deferred": 1, "dead": 1}
+    (dead,) = outbox.dead_letters("c1")
+    assert dead["email"] == "leer@kanzlei-l.de" and dead["error"].startswith("KeyError")
+
+    (retry,) = outbox.due_retries(now=4e9)
+    assert (retry["email"], retry["subject"]) == ("reset@kanzlei-r.de", "Hallo Max")
+    assert retry["mime"] is None                     # keine Bytes eines anderen Kontakts
+
+
+def test_budget_limits_sends_per_run(outbox, tmp_path):
+    results, automation = run(outbox, tmp_path, budget=3, claim_size=2)
+    assert results["total"] == 3
+    assert outbox.stats("c1")["pending"] == 3
+
+
+def test_max_per_hour_caps_the_total_rate(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    sharded = ShardedCampaign("c1", shards=4, outbox=outbox, max_per_hour=30, budget=7)
+    assert sharded.options["rate"] == pytest.approx(30 / 3600)
+    assert sharded.options["budget"] == 2
+    assert ShardedCampaign("c1", shards=4, outbox=outbox).options["rate"] == sharding.RATE_PER_SECOND
+
+
+def test_pool_uses_spawn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    seen = {}
+
+    class Pool:
+        def __init__(self, max_workers, mp_context=None):
+            seen["start_method"] = mp_context.get_start_method() if mp_context else multiprocessing.get_start_method()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, func, options):
+            return [{"shard": o["shard"], "sent": 1, "failed": 0, "deferred": 0, "total": 1, "suppressed": 0,
+                     "details": []} for o in options]
+
+    monkeypatch.setattr(sharding, "ProcessPoolExecutor", Pool)
+    results = ShardedCampaign("c1", shards=2, outbox=Outbox(str(tmp_path / "outbox.db"))).run()
+    assert seen["start_method"] == "spawn"
+    assert (results["sent"], results["shards"]) == (2, {0: 1, 1: 1})
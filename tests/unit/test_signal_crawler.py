@@ -0,0 +1,42 @@
+"""
+Unit Tests für src/lead_generation/signal_crawler gegen lokale Kanzlei-Websites (LocalSiteStub)
+"""
+import pytest
+
+from src.lead_generation.signal_crawler import PageCache, SignalCrawler, SignalStore, decode_body
+from tests.stubs import LocalSiteStub, LoopbackResolver
+
+KEYWORDS = ["KI-gestützte Buchhaltung", "DATEV Unternehmen online", "Mandantenportal"]
+
+
+def crawler_for(tmp_path) -> SignalCrawler:
+    return SignalCrawler(PageCache(str(tmp_path / "cache")), SignalStore(str(tmp_path / "signals.db")),
+                         host_delay=0, schemes=("http",), resolver=LoopbackResolver())
+
+
+def test_decode_body_falls_back_on_unknown_charset():
+    assert decode_body("Büro".encode("utf-8"), "none") == "Büro"
+    assert decode_body("Büro".encode("latin-1"), "iso-8859-1") == "Büro"
+
+
+@pytest.mark.parametrize("charset", [None, "utf-8", "none"])
+def test_crawler_extracts_signals_for_any_charset(tmp_path, charset):
+    sites = {"kanzlei-a.test": KEYWORDS}
+    with LocalSiteStub(sites, charsets={"kanzlei-a.test": charset} if charset else None) as stub:
+        result = crawler_for(tmp_path).run([stub.domain("kanzlei-a.test")])[stub.domain("kanzlei-a.test")]
+
+    assert result["error"] is None
+    assert result["pages"] == 2
+    assert result["signals"]
+
+
+def test_page_larger_than_one_read_buffer_is_read_completely(tmp_path):
+    with LocalSiteStub({"kanzlei-c.test": KEYWORDS}, padding={"kanzlei-c.test": 520_000}) as stub:
+        domain = stub.domain("kanzlei-c.test")
+        crawler = crawler_for(tmp_path)
+        result = crawler.run([domain])[domain]
+
+    assert result["error"] is None
+    assert result["signals"]      # Keywords stehen erst hinter den 520 KB Füllbytes
+    body = crawler.cache.get(f"http://{domain}/")["body"]
+    assert len(body) > 520_000 and body.endswith("</html>")
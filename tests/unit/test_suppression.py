@@ -0,0 +1,68 @@
+"""
+Unit Tests für src/delivery/suppression: gemeinsame Bounce-Klassifikation, Backfill und Abmeldelinks
+"""
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from follow_up_automation import render_follow_up
+from src.analytics.event_log import append_event
+from src.delivery.suppression import SuppressionList, suppression_reason, verify_unsubscribe
+
+
+@pytest.fixture
+def suppression(tmp_path):
+    return SuppressionList(str(tmp_path / "suppression.db"))
+
+
+@pytest.mark.parametrize("event_type, data, reason", [
+    ("email.bounced", {"bounce": {"type": "Permanent"}}, "bounce"),
+    ("email.bounced", {"bounce": {"type": "Transient"}}, None),
+    ("email.bounced", {"bounce_type": "soft"}, None),
+    ("email.bounced", {"bounce_type": ""}, "bounce"),               # Log ohne Typ → hart
+    ("email.complained", {}, "complaint"),
+    ("contact.updated", {"unsubscribed": True}, "unsubscribe"),
+    ("contact.updated", {}, None),
+    ("email.delivered", {}, None),
+])
+def test_suppression_reason(event_type, data, reason):
+    assert suppression_reason(event_type, data) == reason
+
+
+def test_webhook_and_backfill_agree_on_soft_bounces(suppression, tmp_path):
+    soft = {"to": ["soft@kanzlei-s.de"], "bounce": {"type": "Transient"}}
+    hard = {"to": ["hard@kanzlei-h.de"], "bounce": {"type": "Permanent"}}
+    assert suppression.record_event("email.bounced", soft) is None
+    assert suppression.record_event("email.bounced", hard) == "hard@kanzlei-h.de"
+
+    log = str(tmp_path / "email_events.csv")
+    for data in (soft, hard, {"to": ["beschwerde@kanzlei-b.de"]}):
+        append_event(log, {"event_type": "email.complained" if "bounce" not in data else "email.bounced",
+                           "to": data["to"], "bounce_type": data.get("bounce", {}).get("type", "").lower()})
+    backfill = SuppressionList(str(tmp_path / "backfill.db"))
+    assert backfill.sync_event_log(log) == 2
+    assert backfill.reason("soft@kanzlei-s.de") is None
+    assert (backfill.reason("hard@kanzlei-h.de"), backfill.reason("beschwerde@kanzlei-b.de")) == ("bounce", "complaint")
+
+
+def test_append_event_keeps_the_header_of_older_logs(tmp_path):
+    log = tmp_path / "email_events.csv"
+    log.write_text("timestamp,event_type,email_id,to,subject,status\n", encoding="utf-8")
+    append_event(str(log), {"event_type": "email.bounced", "to": ["a@kanzlei.de"], "bounce_type": "transient"})
+    assert log.read_text(encoding="utf-8").splitlines()[1] == ",email.bounced,,['a@kanzlei.de'],,"
+
+
+def test_follow_up_carries_signed_unsubscribe_link(monkeypatch):
+    monkeypatch.setenv("UNSUBSCRIBE_SECRET", "s3cret")
+    monkeypatch.setenv("UNSUBSCRIBE_URL", "https://sbsdeutschland.de/unsubscribe")
+    params = render_follow_up("Max.Muster@kanzlei.de", "Kanzlei Muster", 7)
+
+    url = params["headers"]["List-Unsubscribe"].strip("<>")
+    query = parse_qs(urlparse(url).query)
+    assert verify_unsubscribe(query["email"][0], query["token"][0])
+    assert params["headers"]["List-Unsubscribe-Post"] == "List-Unsubscribe=One-Click"
+    assert url.replace("&", "&amp;") in params["html"]
+
+    monkeypatch.delenv("UNSUBSCRIBE_SECRET")
+    params = render_follow_up("max@kanzlei.de", "Kanzlei Muster", 3)
+    assert "List-Unsubscribe" not in params["headers"] and "unsubscribe" not in params["html"]
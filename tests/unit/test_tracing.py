@@ -0,0 +1,90 @@
+"""
+Unit Tests für src/analytics/tracing: Spans, JSONL-Rotation, Streaming-Auswertung und OTLP-Export
+"""
+import time
+import types
+
+from src.analytics.tracing import (JSONLExporter, OTLPExporter, Tracer, breakdown, load_spans, load_trace,
+                                   tracer_from_env)
+from tests.stubs import LocalCollectorStub
+
+
+def run_campaign(tracer: Tracer, campaign: str, contacts: int = 2):
+    with tracer.span("campaign", {"campaign.id": campaign}):
+        for i in range(contacts):
+            with tracer.span("contact", {"contact.email": f"p{i}@kanzlei.de"}):
+                with tracer.span("generate"):
+                    pass
+                with tracer.span("send") as send:
+                    send.set_attribute("ok", i % 2 == 0)
+    tracer.flush()
+
+
+def test_tracing_is_opt_in(monkeypatch):
+    monkeypatch.delenv("TRACE_EXPORTER", raising=False)
+    assert tracer_from_env().exporter is None
+    monkeypatch.setenv("TRACE_EXPORTER", "jsonl")
+    monkeypatch.setenv("TRACE_MAX_MB", "0.5")
+    assert tracer_from_env().exporter.max_bytes == 512 * 1024
+
+
+def test_spans_inherit_context_and_break_down(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = Tracer(JSONLExporter(path))
+    run_campaign(tracer, "c1")
+    run_campaign(tracer, "c2", contacts=3)
+
+    spans = list(load_spans(path))
+    assert len(spans) == (1 + 2 * 3) + (1 + 3 * 3)   # campaign + je Kontakt contact/generate/send
+    send = next(s for s in spans if s["name"] == "send")
+    assert send["attributes"]["campaign.id"] == "c1" and send["attributes"]["contact.email"] == "p0@kanzlei.de"
+
+    trace = load_trace(path, "c1")
+    assert {s["attributes"]["campaign.id"] for s in trace} == {"c1"}
+    result = breakdown(trace, "c1")
+    assert result["contacts"] == 2
+    assert {stage["stage"]: stage["count"] for stage in result["stages"]} == {"generate": 2, "send": 2}
+    assert breakdown(load_trace(path), None)["campaign"] == "c2"   # Default: letzte Kampagne
+
+
+def test_jsonl_exporter_rotates_and_reader_covers_both_files(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(JSONLExporter(str(path), batch_size=1, max_bytes=4000))
+    for i in range(6):
+        run_campaign(tracer, f"c{i}")
+
+    assert path.stat().st_size <= 4000
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert len(load_trace(str(path), "c5")) == 7
+    path.write_text(path.read_text(encoding="utf-8") + '{"abgebrochen', encoding="utf-8")
+    assert all("traceId" in s for s in load_spans(str(path)))
+
+
+def test_load_spans_streams():
+    assert isinstance(load_spans("fehlt.jsonl"), types.GeneratorType)
+    assert list(load_spans("fehlt.jsonl")) == []
+
+
+def test_otlp_export_runs_in_the_background(tmp_path):
+    collector = LocalCollectorStub(str(tmp_path / "collected.jsonl"), port=0).start()
+    try:
+        tracer = Tracer(OTLPExporter(collector.endpoint, batch_size=4))
+        run_campaign(tracer, "otlp")
+    finally:
+        collector.stop()
+    collected = list(load_spans(str(tmp_path / "collected.jsonl")))
+    assert len(collected) == 7
+    assert {s["status"]["code"] for s in collected} == {"OK"}
+    assert next(s for s in collected if s["name"] == "campaign")["attributes"] == {"campaign.id": "otlp"}
+
+
+def test_unreachable_collector_does_not_block_the_caller(tmp_path, caplog):
+    exporter = OTLPExporter("http://127.0.0.1:9/v1/traces", batch_size=1, timeout=2)
+    tracer = Tracer(exporter)
+    started = time.perf_counter()
+    with tracer.span("campaign", {"campaign.id": "offline"}):
+        pass
+    assert time.perf_counter() - started < 0.5
+    exporter.flush()
+    assert "Trace-Export fehlgeschlagen" in caplog.text
+    assert exporter.dropped == 0
@@ -0,0 +1,67 @@
+"""
+Unit Tests für src/ai/usage_tracker und prompt_context: Token-Accounting, stabiler System-Block
+"""
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.ai import usage_tracker
+from src.ai.prompt_context import anthropic_system, build_system_block, context_fingerprint, openai_messages
+from src.ai.usage_tracker import TokenUsageTracker, anthropic_usage, log_usage, openai_usage
+
+
+def test_openai_usage_reads_cached_prompt_tokens():
+    response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1500, completion_tokens=200,
+                                                     prompt_tokens_details=SimpleNamespace(cached_tokens=1024)))
+    assert openai_usage(response) == {"input_tokens": 1500, "cached_tokens": 1024, "output_tokens": 200}
+    assert openai_usage(SimpleNamespace()) == {}
+
+
+def test_anthropic_usage_counts_cache_reads_and_writes_as_input():
+    message = SimpleNamespace(usage=SimpleNamespace(input_tokens=50, output_tokens=300,
+                                                    cache_read_input_tokens=1200, cache_creation_input_tokens=0))
+    assert anthropic_usage(message) == {"input_tokens": 1250, "cached_tokens": 1200,
+                                        "cache_write_tokens": 0, "output_tokens": 300}
+
+
+def test_record_and_summarize_per_campaign(tmp_path):
+    tracker = TokenUsageTracker(str(tmp_path / "ai_usage.db"))
+    tracker.record("email", "openai", "gpt-4", {"input_tokens": 1000, "cached_tokens": 500, "output_tokens": 100},
+                   120.0, campaign="c1")
+    tracker.record("email", "openai", "gpt-4", {"input_tokens": 1000, "output_tokens": 50}, 80.0, campaign="c2")
+
+    summary = tracker.summarize("c1")
+    assert (summary["calls"], summary["input_tokens"], summary["output_tokens"]) == (1, 1000, 100)
+    assert summary["cache_hit_rate"] == 50
+    assert tracker.summarize()["calls"] == 2
+
+
+def test_log_usage_never_raises(tmp_path):
+    class Broken(TokenUsageTracker):
+        def record(self, *args, **kwargs):
+            raise OSError("disk full")
+
+    assert log_usage("linkedin_post", "openai", "gpt-4o-mini", {}, time.perf_counter(),
+                     tracker=Broken(str(tmp_path / "ai_usage.db"))) is False
+
+
+def test_default_tracker_is_created_lazily(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(usage_tracker, "_default_tracker", None)
+    assert not os.path.exists("data/ai_usage.db")
+
+    assert log_usage("enterprise_post", "anthropic", "claude", {"input_tokens": 10}, time.perf_counter(),
+                     campaign="c1", system_block=build_system_block("Test"))
+    assert os.path.exists("data/ai_usage.db")
+    assert usage_tracker.default_tracker().summarize("c1")["input_tokens"] == 10
+
+
+@pytest.mark.parametrize("instructions", ["Kurzer Post", "Langer Post mit Details"])
+def test_system_block_is_a_stable_prefix(instructions):
+    block = build_system_block(instructions)
+    assert block == build_system_block(instructions)
+    assert context_fingerprint(block) == context_fingerprint(build_system_block(instructions))
+    assert openai_messages(block, "Thema X")[0] == {"role": "system", "content": block}
+    assert anthropic_system(block)[0]["cache_control"] == {"type": "ephemeral"}
@@ -0,0 +1,49 @@
+"""
+Unit Tests für src/delivery/webhook_auth: Svix-Signaturen der Resend-Webhooks
+"""
+import base64
+import hashlib
+import hmac
+
+import pytest
+
+from src.delivery.webhook_auth import verify_webhook
+
+SECRET = "whsec_" + base64.b64encode(b"geheimer-schluessel").decode()
+BODY = b'{"type":"email.bounced","data":{"to":["a@kanzlei.de"]}}'
+NOW = 1_760_000_000
+
+
+def sign(body=BODY, msg_id="msg_1", timestamp=NOW, key=b"geheimer-schluessel"):
+    digest = hmac.new(key, f"{msg_id}.{timestamp}.".encode() + body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def headers(signature, msg_id="msg_1", timestamp=NOW):
+    return {"svix-id": msg_id, "svix-timestamp": str(timestamp), "svix-signature": signature}
+
+
+def test_valid_signature_is_accepted():
+    assert verify_webhook(headers(f"v1,{sign()}"), BODY, SECRET, now=NOW)
+    # Secret-Rotation: mehrere Einträge, einer passt
+    assert verify_webhook(headers(f"v1,{sign(key=b'alt')} v1,{sign()}"), BODY, SECRET, now=NOW + 60)
+
+
+@pytest.mark.parametrize("request_headers, body", [
+    (headers(f"v1,{sign()}"), BODY + b" "),                          # Body verändert
+    (headers(f"v1,{sign()}", msg_id="msg_2"), BODY),                 # andere Nachricht
+    (headers(f"v2,{sign()}"), BODY),                                 # unbekannte Version
+    (headers(f"v1,{sign(timestamp=NOW - 600)}", timestamp=NOW - 600), BODY),   # Replay
+    (headers("v1,kein-base64"), BODY),
+    ({"svix-id": "msg_1", "svix-timestamp": str(NOW)}, BODY),        # unsigniert
+    (headers(f"v1,{sign()}", timestamp="gestern"), BODY),
+])
+def test_invalid_requests_are_rejected(request_headers, body):
+    assert not verify_webhook(request_headers, body, SECRET, now=NOW)
+
+
+def test_missing_secret_rejects_everything(monkeypatch):
+    monkeypatch.delenv("RESEND_WEBHOOK_SECRET", raising=False)
+    assert not verify_webhook(headers(f"v1,{sign()}"), BODY, now=NOW)
+    monkeypatch.setenv("RESEND_WEBHOOK_SECRET", SECRET)
+    assert verify_webhook(headers(f"v1,{sign()}"), BODY, now=NOW)
@@ -2,26 +2,46 @@
 """
 Resend Webhook Handler
 Empfängt Email-Events (delivered, opened, clicked, bounced)
+Nur Svix-signierte Requests (RESEND_WEBHOOK_SECRET) werden angenommen
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import pandas as pd
 from datetime import datetime
+from html import escape
 import os
+from src.analytics.event_log import append_event
+from src.analytics.rollups import CampaignRollups
+from src.analytics.metrics import CONTENT_TYPE, REGISTRY, WEBHOOK_EVENTS
+from src.analytics.health import HealthEvaluator
+from src.delivery.suppression import SuppressionList, bounce_type, verify_unsubscribe
+from src.delivery.webhook_auth import verify_webhook
+from monitoring import notify
 
 app = Flask(__name__)
 
 # Event-Log Datei
 EVENT_LOG = 'email_events.csv'
+rollups = CampaignRollups()
+health = HealthEvaluator.from_config(sink=notify)  # Bounce-/Complaint-Raten in Echtzeit
+health.start_checker()                             # Alerts im Hintergrund, nicht pro Request
+suppression = SuppressionList()                    # Bounces/Complaints/Abmeldungen nie wieder anschreiben
 
 @app.route('/webhook/resend', methods=['POST'])
 def handle_resend_webhook():
     """Empfängt Resend Webhook Events"""
     
-    data = request.json
+    if not verify_webhook(request.headers, request.get_data()):
+        print("✗ Webhook abgelehnt: Svix-Signatur fehlt oder ungültig")
+        return jsonify({'error': 'ungültige Signatur'}), 401
+    data = request.get_json(silent=True) or {}
     event_type = data.get('type')
     email_data = data.get('data', {})
     
     print(f"📨 Event empfangen: {event_type}")
+    WEBHOOK_EVENTS.labels(event_type=event_type or "unknown").inc()
+    health.record_event(event_type)
+    if suppression.record_event(event_type, email_data):
+        print(f"⛔ Gesperrt: {email_data.get('to') or email_data.get('email')} ({event_type})")
     
     # Event loggen
     event_record = {
@@ -30,21 +50,41 @@ def handle_resend_webhook():
         'email_id': email_data.get('email_id'),
         'to': email_data.get('to'),
         'subject': email_data.get('subject'),
-        'status': email_data.get('status')
+        'status': email_data.get('status'),
+        'bounce_type': bounce_type(email_data) or None
     }
     
     # In CSV speichern
-    df = pd.DataFrame([event_record])
-    
-    if os.path.exists(EVENT_LOG):
-        df.to_csv(EVENT_LOG, mode='a', header=False, index=False)
-    else:
-        df.to_csv(EVENT_LOG, index=False)
+    append_event(EVENT_LOG, event_record)
     
     print(f"✓ Event geloggt: {event_type} für {email_data.get('to')}")
     
+    # Rollups nach jedem Flush inkrementell nachziehen
+    try:
+        rollups.sync_event_log(EVENT_LOG)
+    except Exception as e:
+        print(f"⚠️  Rollup Fehler: {str(e)}")
+    
     return jsonify({'status': 'success'}), 200
 
+UNSUBSCRIBE_FORM = """<form method="post">
+<input type="hidden" name="email" value="{email}"><input type="hidden" name="token" value="{token}">
+<p>Keine weiteren Emails an {email} senden?</p><button type="submit">Abmelden</button>
+</form>"""
+
+@app.route('/unsubscribe', methods=['GET', 'POST'])
+def unsubscribe():
+    """Abmeldung: GET zeigt nur die Bestätigung (Link-Scanner), POST sperrt (auch One-Click, RFC 8058)"""
+    email = request.values.get('email', '').strip().lower()
+    token = request.values.get('token', '')
+    if '@' not in email or not verify_unsubscribe(email, token):
+        return jsonify({'error': 'ungültiger Abmeldelink'}), 403
+    if request.method == 'GET':
+        return UNSUBSCRIBE_FORM.format(email=escape(email), token=escape(token)), 200
+    suppression.add(email, 'unsubscribe', 'link')
+    print(f"⛔ Abgemeldet: {email}")
+    return "Sie wurden abgemeldet und erhalten keine weiteren Emails.", 200
+
 @app.route('/events/summary', methods=['GET'])
 def get_events_summary():
     """Zeigt Event-Zusammenfassung"""
@@ -62,7 +102,15 @@ def get_events_summary():
     
     return jsonify(summary), 200
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus-Metriken (Text-Format)"""
+    return Response(REGISTRY.render(), mimetype=CONTENT_TYPE)
+
 if __name__ == '__main__':
+    if not os.getenv('RESEND_WEBHOOK_SECRET'):
+        print("⚠️  RESEND_WEBHOOK_SECRET fehlt – alle Webhook-Events werden abgelehnt")
     print("🌐 Webhook Handler gestartet auf http://localhost:5000")
     print("📍 Webhook URL: http://localhost:5000/webhook/resend")
+    print("📈 Metriken: http://localhost:5000/metrics")
     app.run(host='0.0.0.0', port=5000, debug=True)